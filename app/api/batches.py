@@ -1,12 +1,16 @@
 """
 批次管理API
+批次的评分统计读取批次评分统计表(评分写入时增量维护),不扫描评分表
+更换分制时整批重算评分总分
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
 from app.database import get_db
-from app.models import Batch, Grade, Genre
-from app.schemas import BatchResponse, BatchListResponse
+from app.models import Batch, BatchScoreStats, Grade, Genre
+from app.schemas import BatchResponse, BatchListResponse, BatchRescaleRequest, BatchRescaleResponse
+from app.services.batch_rescale import rescale_batch
+from app.services.batch_stats import stats_summary
 from app.utils import logger
 
 router = APIRouter()
@@ -18,14 +22,20 @@ async def get_batches(
 ):
     """
     获取所有批次列表
-    返回批次信息,包含关联的年级和文体信息
+    返回批次信息,包含关联的年级和文体信息以及评分统计(平均分、标准差、分数段分布、各维度平均分)
     """
     try:
-        batches = db.query(Batch).filter_by(status=1).order_by(Batch.create_date.desc()).all()
+        batches = (
+            db.query(Batch, BatchScoreStats)
+            .outerjoin(BatchScoreStats, BatchScoreStats.batch_id == Batch.id)
+            .filter(Batch.status == 1)
+            .order_by(Batch.create_date.desc())
+            .all()
+        )
 
         # 组装响应数据
         batch_responses = []
-        for batch in batches:
+        for batch, stats in batches:
             batch_data = {
                 "id": batch.id,
                 "directory_name": batch.directory_name,
@@ -36,6 +46,7 @@ async def get_batches(
                 "essay_count": batch.essay_count,
                 "grade_name": batch.grade.grade_name if batch.grade else None,
                 "suggested_genre_name": batch.suggested_genre.genre_name if batch.suggested_genre else None,
+                "score_stats": stats_summary(stats),
                 "create_date": batch.create_date
             }
             batch_responses.append(BatchResponse(**batch_data))
@@ -77,7 +88,50 @@ async def get_batch_detail(
         "essay_count": batch.essay_count,
         "grade_name": batch.grade.grade_name if batch.grade else None,
         "suggested_genre_name": batch.suggested_genre.genre_name if batch.suggested_genre else None,
+        "score_stats": stats_summary(db.query(BatchScoreStats).filter_by(batch_id=batch_id).first()),
         "create_date": batch.create_date
     }
 
     return BatchResponse(**batch_data)
+
+
+@router.post("/{batch_id}/rescale", response_model=BatchRescaleResponse, summary="切换批次分制")
+async def rescale_batch_scores(
+    batch_id: int,
+    request: BatchRescaleRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    把批次内所有作文改为新分制,并在一个事务内按新分制重算这些作文的全部评分总分
+    - 维度分数完整的评分按维度分数之和换算,否则按原总分换算
+    - 批次评分统计同步更新
+    """
+    try:
+        batch = db.query(Batch.id).filter_by(id=batch_id, status=1).first()
+        if not batch:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="批次不存在"
+            )
+
+        result = rescale_batch(db, batch_id, request.score_system, request.rounding)
+        db.commit()
+
+        return BatchRescaleResponse(
+            success=True,
+            batch_id=batch_id,
+            score_system=request.score_system,
+            essays_updated=result["essays"],
+            scores_updated=result["scores"],
+            message=f"已切换为{request.score_system}分制: 作文 {result['essays']} 篇, 评分 {result['scores']} 条"
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.error(f"切换批次分制失败: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="切换批次分制失败"
+        )
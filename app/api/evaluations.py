@@ -3,10 +3,11 @@
 核心业务流程: 评价 → 文体判断 → 评分
 """
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 import json
 from app.database import get_db
-from app.models import Essay, Evaluation, Score, Prompt, Genre, Grade, Batch
+from app.models import Essay, Evaluation, Score, Prompt, Genre, Grade
 from app.schemas import (
     EvaluationAnalyzeRequest,
     EvaluationResponse,
@@ -19,13 +20,44 @@ from app.schemas import (
     CompleteAnalysisRequest,
     CompleteAnalysisResponse
 )
-from openai import OpenAI
 from app.services.ai_service import ai_service
-from app.utils import logger, convert_score_to_system
-from app.config import settings
+from app.services.batch_resolver import resolve_batch
+from app.services.batch_stats import track_batch_stats
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.prompt_builder import build_analyze_messages, build_score_messages, count_words
+from app.services.prompt_templates import CompiledPrompt, PromptTemplateError, compile_prompt
+from app.services.response_parser import ResponseParseError
+from app.services.single_flight import SingleFlight
+from app.utils import logger, get_score_system_from_original
+from app.utils.metrics import STAGE_ANALYZE, STAGE_SCORE, prompt_version_label
+from app.utils.score_converter import DEFAULT_RUBRIC, ROUND_FLOOR, normalize_score_system
 
 router = APIRouter()
 
+# 合并进行中的相同评价请求: (作文ID, 提示词ID, 模型)
+analyze_flight = SingleFlight("single_flight_analyze")
+
+
+def _compile_prompt(prompt: Prompt, label: str = "提示词") -> CompiledPrompt:
+    """获取编译后的提示词模板,模板格式错误时在调用模型前返回422"""
+    try:
+        return compile_prompt(prompt.prompt_content)
+    except PromptTemplateError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"{label}模板格式错误(ID={prompt.id}): {str(e)}"
+        )
+
+
+def _model_unavailable(e: CircuitOpenError) -> HTTPException:
+    """模型服务熔断中,快速返回503,由客户端按Retry-After重试"""
+    logger.warning(f"模型服务熔断中,拒绝请求: {str(e)}")
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=f"AI服务暂时不可用,请{e.retry_after}秒后重试",
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
 
 @router.post("/analyze", response_model=EvaluationResponse, summary="步骤1: 作文评价")
 async def analyze_essay(
@@ -37,7 +69,14 @@ async def analyze_essay(
     - 调用AI分析作文内容
     - 保存评价结果到数据库
     - 返回评价结果和evaluation_id
+    - 相同作文、提示词和模型的并发请求合并为一次模型调用,共享同一条评价记录
     """
+    key = (request.essay_id, request.analyze_prompt_id, ai_service.model)
+    return await analyze_flight.do(key, lambda: _analyze_essay(request, db))
+
+
+async def _analyze_essay(request: EvaluationAnalyzeRequest, db: Session) -> EvaluationResponse:
+    """作文评价(合并后实际执行的部分)"""
     try:
         # 1. 获取作文信息
         essay = db.query(Essay).filter_by(id=request.essay_id, status=1).first()
@@ -55,33 +94,46 @@ async def analyze_essay(
                 detail="提示词不存在"
             )
 
-        # 3. 调用AI评价
-        evaluation_result = ai_service.analyze_essay(
-            essay_content=essay.essay_content,
-            essay_title=essay.batch.essay_title if essay.batch else "",
-            essay_requirement=essay.batch.essay_requirement if essay.batch else "",
-            prompt=prompt.prompt_content
+        # 读取阶段结束: 取出模型调用需要的数据后归还连接,模型调用期间不占用连接池
+        essay_input = {
+            "essay_content": essay.essay_content,
+            "essay_title": essay.batch.essay_title if essay.batch else "",
+            "essay_requirement": essay.batch.essay_requirement if essay.batch else ""
+        }
+        template = _compile_prompt(prompt)
+        prompt_version = prompt_version_label(prompt.id, prompt.version_name)
+        db.close()
+
+        # 3. 调用AI评价(在线程池中执行,等待期间不阻塞事件循环,合并的请求才能进入)
+        evaluation_result, model_call = await run_in_threadpool(
+            ai_service.analyze_essay,
+            prompt=template,
+            prompt_version=prompt_version,
+            **essay_input
         )
 
-        # 4. 将之前的评价标记为非最新
-        db.query(Evaluation).filter_by(
-            essay_id=request.essay_id,
-            is_latest=1
-        ).update({"is_latest": 0})
-
-        # 5. 保存评价结果(暂不填充文体和年级信息,等待用户确认)
-        evaluation = Evaluation(
-            essay_id=request.essay_id,
-            user_phone=request.user_phone,
-            analyze_prompt_id=request.analyze_prompt_id,
-            evaluation_result=json.dumps(evaluation_result, ensure_ascii=False),
-            is_latest=1,
-            status=1,
-            # 注意: confirmed_genre_id 和 confirmed_grade_id 需要在文体判断后填充
-            confirmed_genre_id=1,  # 临时默认值,需要后续更新
-            confirmed_grade_id=1   # 临时默认值,需要后续更新
-        )
-        db.add(evaluation)
+        # 写入阶段: 重新获取连接,在一个短事务内完成
+        # 4. 将之前的评价标记为非最新(之前评价的默认评分不再计入批次统计)
+        with track_batch_stats(db, Evaluation.essay_id == request.essay_id):
+            db.query(Evaluation).filter_by(
+                essay_id=request.essay_id,
+                is_latest=1
+            ).update({"is_latest": 0})
+
+            # 5. 保存评价结果(暂不填充文体和年级信息,等待用户确认)
+            evaluation = Evaluation(
+                essay_id=request.essay_id,
+                user_phone=request.user_phone,
+                analyze_prompt_id=request.analyze_prompt_id,
+                evaluation_result=json.dumps(evaluation_result, ensure_ascii=False),
+                is_latest=1,
+                status=1,
+                # 注意: confirmed_genre_id 和 confirmed_grade_id 需要在文体判断后填充
+                confirmed_genre_id=1,  # 临时默认值,需要后续更新
+                confirmed_grade_id=1,  # 临时默认值,需要后续更新
+                **model_call.to_columns()
+            )
+            db.add(evaluation)
         db.commit()
         db.refresh(evaluation)
 
@@ -95,6 +147,9 @@ async def analyze_essay(
 
     except HTTPException:
         raise
+    except CircuitOpenError as e:
+        db.rollback()
+        raise _model_unavailable(e)
     except Exception as e:
         db.rollback()
         logger.error(f"作文评价失败: {str(e)}")
@@ -149,6 +204,8 @@ async def detect_genre(
             }
         )
 
+    except CircuitOpenError as e:
+        raise _model_unavailable(e)
     except Exception as e:
         logger.error(f"文体判断失败: {str(e)}")
         raise HTTPException(
@@ -178,11 +235,7 @@ async def score_essay(
                 detail="评价记录不存在"
             )
 
-        # 2. 更新评价记录的文体和年级(用户确认后的值)
-        evaluation.confirmed_genre_id = request.confirmed_genre_id
-        evaluation.confirmed_grade_id = request.confirmed_grade_id
-
-        # 3. 获取作文和提示词
+        # 2. 获取作文和提示词
         essay = evaluation.essay
         prompt = db.query(Prompt).filter_by(id=request.score_prompt_id, status=1).first()
         if not prompt:
@@ -191,45 +244,77 @@ async def score_essay(
                 detail="评分提示词不存在"
             )
 
-        # 4. 解析评价结果
+        # 3. 解析评价结果
         evaluation_result = json.loads(evaluation.evaluation_result)
 
-        # 5. 调用AI评分(传入作文的分制)
-        score_data = ai_service.score_essay(
-            essay_content=essay.essay_content,
-            essay_title=essay.batch.essay_title if essay.batch else "",
-            essay_requirement=essay.batch.essay_requirement if essay.batch else "",
+        # 读取阶段结束: 取出模型调用需要的数据后归还连接,模型调用期间不占用连接池
+        score_system = essay.score_system
+        essay_input = {
+            "essay_content": essay.essay_content,
+            "essay_title": essay.batch.essay_title if essay.batch else "",
+            "essay_requirement": essay.batch.essay_requirement if essay.batch else ""
+        }
+        template = _compile_prompt(prompt, "评分提示词")
+        prompt_version = prompt_version_label(prompt.id, prompt.version_name)
+        db.close()
+
+        # 4. 调用AI评分(传入作文的分制,在线程池中执行,不阻塞事件循环)
+        score_data, model_call = await run_in_threadpool(
+            ai_service.score_essay,
             evaluation_result=evaluation_result,
-            prompt=prompt.prompt_content,
-            score_system=essay.score_system
+            prompt=template,
+            score_system=score_system,
+            prompt_version=prompt_version,
+            **essay_input
         )
 
-        # 6. 保存评分结果
-        score = Score(
-            evaluation_id=request.evaluation_id,
-            user_phone=request.user_phone,
-            score_prompt_id=request.score_prompt_id,
-            score_type='ai' if request.user_phone == 'system' else 'user',
-            total_score=score_data.get('total_score', 0),
-            dimension_scores=json.dumps(score_data.get('dimensions', {}), ensure_ascii=False),
-            is_default=1,
-            status=1
-        )
-        db.add(score)
+        # 按评分量表计算总分(取整数部分),维度分数保存为 {维度: {"score", "max_score"}}
+        values = DEFAULT_RUBRIC.validate(score_data)
+        score_data = {
+            "total_score": int(DEFAULT_RUBRIC.total(values, normalize_score_system(score_system), rounding=ROUND_FLOOR)),
+            "dimensions": DEFAULT_RUBRIC.dimensions_json(values)
+        }
+
+        # 写入阶段: 更新评价记录的文体和年级(用户确认后的值)并保存评分结果,在一个短事务内完成
+        db.query(Evaluation).filter_by(id=request.evaluation_id).update({
+            "confirmed_genre_id": request.confirmed_genre_id,
+            "confirmed_grade_id": request.confirmed_grade_id
+        })
+        # 新评分作为默认评分(取消之前的默认评分),同步更新批次统计
+        with track_batch_stats(db, Score.evaluation_id == request.evaluation_id):
+            db.query(Score).filter_by(
+                evaluation_id=request.evaluation_id,
+                is_default=1
+            ).update({"is_default": 0})
+            score = Score(
+                evaluation_id=request.evaluation_id,
+                user_phone=request.user_phone,
+                score_prompt_id=request.score_prompt_id,
+                score_type='ai' if request.user_phone == 'system' else 'user',
+                total_score=score_data.get('total_score', 0),
+                dimension_scores=json.dumps(score_data.get('dimensions', {}), ensure_ascii=False),
+                is_default=1,
+                status=1,
+                **model_call.to_columns()
+            )
+            db.add(score)
         db.commit()
         db.refresh(score)
 
-        logger.info(f"作文评分完成: evaluation_id={request.evaluation_id}, score_id={score.id}, total={score.total_score}/{essay.score_system}")
+        logger.info(f"作文评分完成: evaluation_id={request.evaluation_id}, score_id={score.id}, total={score.total_score}/{score_system}")
 
         return ScoreResponse(
             success=True,
             score_id=score.id,
-            score_system=essay.score_system,
+            score_system=score_system,
             score_data=score_data
         )
 
     except HTTPException:
         raise
+    except CircuitOpenError as e:
+        db.rollback()
+        raise _model_unavailable(e)
     except Exception as e:
         db.rollback()
         logger.error(f"作文评分失败: {str(e)}")
@@ -287,89 +372,50 @@ async def ai_analyze_essay(
 ):
     """使用AI对作文进行分析(第一步)"""
     try:
-        # 统计作文字数（去除空白字符）
-        word_count = len(request.essay_content.replace(' ', '').replace('\n', '').replace('\r', '').replace('\t', ''))
-
-        # 创建OpenAI客户端
-        client = OpenAI(
-            base_url=settings.OPENAI_BASE_URL,
-            api_key=settings.OPENAI_API_KEY
-        )
-
-        # 构建完整用户提示词
-        user_prompt = request.prompt.format(
-            essay_title=request.essay_title or "无题目",
-            essay_requirement=request.essay_requirement or "无特定要求",
+        # 构建消息(系统提示词和评价提示词为固定前缀,本篇作文在后)
+        messages = build_analyze_messages(
+            prompt_content=request.prompt,
             essay_content=request.essay_content,
-            word_count=word_count
+            essay_title=request.essay_title,
+            essay_requirement=request.essay_requirement
         )
 
-        # 系统提示词
-        system_prompt = """你是一位资深的语文教师和作文分析专家，拥有20年的教学经验。
-
-你的职责：
-1. 对作文进行全面、客观、细致的分析
-2. 准确识别错别字和语病
-3. 发现作文的优点和亮点
-4. 提出具体可行的改进建议
-
-分析原则：
-- 客观公正：基于事实进行分析
-- 具体详细：标注位置，给出实例
-- 建设性：提供可操作的改进建议
-- 鼓励为主：既指出问题也肯定优点
-
-输出规范：
-- 必须输出纯JSON格式，不要有任何额外文字
-- 不要使用markdown代码块标记
-- 严格按照指定的JSON结构输出"""
-
         # 调用AI接口
-        response = client.chat.completions.create(
-            model=settings.OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
+        response, model_call = ai_service.chat_completion(
+            STAGE_ANALYZE,
+            messages=messages,
+            prompt_version=prompt_version_label(request.analyze_prompt_id),
             temperature=0.5,  # 适度随机性，保证分析的多样性
             max_tokens=4000    # 分析需要更多tokens
         )
 
         # 提取回复内容
-        ai_response = response.choices[0].message.content.strip()
-
-        # 尝试解析JSON
-        # 移除可能的markdown代码块标记
-        if ai_response.startswith("```json"):
-            ai_response = ai_response[7:]
-        if ai_response.startswith("```"):
-            ai_response = ai_response[3:]
-        if ai_response.endswith("```"):
-            ai_response = ai_response[:-3]
-        ai_response = ai_response.strip()
-
-        # 解析分析结果
-        analysis = json.loads(ai_response)
-
-                # 4. 将之前的评价标记为非最新
-        db.query(Evaluation).filter_by(
-            essay_id=request.essay_id,
-            is_latest=1
-        ).update({"is_latest": 0})
-
-        # 5. 保存评价结果(暂不填充文体和年级信息,等待用户确认)
-        evaluation = Evaluation(
-            essay_id=request.essay_id,
-            user_phone=request.user_phone,
-            analyze_prompt_id=request.analyze_prompt_id,
-            evaluation_result=json.dumps(analysis, ensure_ascii=False),
-            is_latest=1,
-            status=1,
-            # 注意: confirmed_genre_id 和 confirmed_grade_id 需要在文体判断后填充
-            confirmed_genre_id=1,  # 临时默认值,需要后续更新
-            confirmed_grade_id=1   # 临时默认值,需要后续更新
-        )
-        db.add(evaluation)
+        ai_response = response.choices[0].message.content
+
+        # 解析分析结果(容忍代码块标记和前后说明文字,失败时发起一次修复请求)
+        analysis = ai_service.parse_response(STAGE_ANALYZE, ai_response, model_call)
+
+        # 4. 将之前的评价标记为非最新(之前评价的默认评分不再计入批次统计)
+        with track_batch_stats(db, Evaluation.essay_id == request.essay_id):
+            db.query(Evaluation).filter_by(
+                essay_id=request.essay_id,
+                is_latest=1
+            ).update({"is_latest": 0})
+
+            # 5. 保存评价结果(暂不填充文体和年级信息,等待用户确认)
+            evaluation = Evaluation(
+                essay_id=request.essay_id,
+                user_phone=request.user_phone,
+                analyze_prompt_id=request.analyze_prompt_id,
+                evaluation_result=json.dumps(analysis, ensure_ascii=False),
+                is_latest=1,
+                status=1,
+                # 注意: confirmed_genre_id 和 confirmed_grade_id 需要在文体判断后填充
+                confirmed_genre_id=1,  # 临时默认值,需要后续更新
+                confirmed_grade_id=1,  # 临时默认值,需要后续更新
+                **model_call.to_columns()
+            )
+            db.add(evaluation)
         db.commit()
         db.refresh(evaluation)
 
@@ -388,11 +434,14 @@ async def ai_analyze_essay(
             "raw_response": ai_response
         }
 
-    except json.JSONDecodeError as e:
+    except CircuitOpenError as e:
+        db.rollback()
+        raise _model_unavailable(e)
+    except ResponseParseError as e:
         return {
             "success": False,
             "error": f"AI返回格式错误: {str(e)}",
-            "raw_response": ai_response if 'ai_response' in locals() else ""
+            "raw_response": e.raw_text or ""
         }
     except Exception as e:
         return {
@@ -408,168 +457,60 @@ async def ai_score_essay(
 ):
     """使用AI对作文进行评分(第二步,可选地基于分析结果)"""
     try:
-        # 统计作文字数（去除空白字符）
-        word_count = len(request.essay_content.replace(' ', '').replace('\n', '').replace('\r', '').replace('\t', ''))
-
-        # 创建OpenAI客户端
-        client = OpenAI(
-            base_url=settings.OPENAI_BASE_URL,
-            api_key=settings.OPENAI_API_KEY
-        )
-
-        # 如果有分析结果,将完整分析结果添加到提示词中
-        analysis_context = ""
-        if request.analysis:
-            # 根据新的JSON结构调整分析结果拼接
-            overall_eval = request.analysis.get("overall_evaluation", {})
-            typos = request.analysis.get("typos", [])
-            punctuation_errors = request.analysis.get("punctuation_errors", [])
-            grammar_errors = request.analysis.get("grammar_errors", [])
-            highlights = request.analysis.get("highlights", [])
-            requirement_eval = request.analysis.get("requirement_evaluation", [])
-
-            analysis_context = f"""
-
-## 作文分析结果(完整)
-
-以下是对本篇作文的详细分析结果,请在评分时充分参考:
-
-### 1. 综合评价
-**总评**: {overall_eval.get("summary", "")}
-**整体质量**: {overall_eval.get("quality_level", "")}
-**主要优点**:
-{json.dumps(overall_eval.get("main_strengths", []), ensure_ascii=False, indent=2)}
-**主要问题**:
-{json.dumps(overall_eval.get("main_issues", []), ensure_ascii=False, indent=2)}
-
-### 2. 作文要求评价(共 {len(requirement_eval)} 条)
-{json.dumps(requirement_eval, ensure_ascii=False, indent=2)}
-
-### 3. 错别字详细列表(共 {len(typos)} 个)
-{json.dumps(typos, ensure_ascii=False, indent=2)}
-
-### 4. 标点错误详细列表(共 {len(punctuation_errors)} 处)
-{json.dumps(punctuation_errors, ensure_ascii=False, indent=2)}
-
-### 5. 病句详细列表(共 {len(grammar_errors)} 处)
-{json.dumps(grammar_errors, ensure_ascii=False, indent=2)}
-
-### 6. 好词好句详细列表(共 {len(highlights)} 处)
-{json.dumps(highlights, ensure_ascii=False, indent=2)}
-
-**评分要求**:
-- 请充分参考上述分析结果进行评分
-- 特别注意错别字、标点错误和病句数量对"语言表达"维度的影响
-- 好词好句应提升相应维度的分数
-- 作文要求评价中指出的问题应在相应维度扣分
-- 综合评价中的主要问题应在对应维度扣分
-"""
-
-        # 构建完整用户提示词
-        system_prompt = request.prompt.format(
-            essay_title=request.essay_title or "无题目",
-            essay_requirement=request.essay_requirement or "无特定要求",
+        # 构建消息(评分提示词为固定前缀,作文和分析结果在后)
+        messages = build_score_messages(
+            prompt_content=request.prompt,
             essay_content=request.essay_content,
-            word_count=word_count
-        ) + analysis_context
-
-        # 优化的系统提示词
-        user_prompt = """请按照要求进行评分"""
-
+            essay_title=request.essay_title,
+            essay_requirement=request.essay_requirement,
+            analysis=request.analysis
+        )
 
         # 调用AI接口
-        response = client.chat.completions.create(
-            model=settings.OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
+        response, model_call = ai_service.chat_completion(
+            STAGE_SCORE,
+            messages=messages,
+            prompt_version=prompt_version_label(request.score_prompt_id),
             temperature=0.3,  # 降低随机性，提高一致性
         )
         # 提取回复内容
-        ai_response = response.choices[0].message.content.strip()
-
-        # 尝试解析JSON
-        # 移除可能的markdown代码块标记
-        if ai_response.startswith("```json"):
-            ai_response = ai_response[7:]
-        if ai_response.startswith("```"):
-            ai_response = ai_response[3:]
-        if ai_response.endswith("```"):
-            ai_response = ai_response[:-3]
-        ai_response = ai_response.strip()
-
-        # 解析分数
-        scores = json.loads(ai_response)
-
-        # 验证分数格式
-        required_dimensions = ["theme_and_intent", "language_expression", "structure", "content_selection", "emotion_and_content"]
-        max_scores = {
-            "theme_and_intent": 20,       # 中心立意
-            "language_expression": 25,    # 语言表达
-            "structure": 15,              # 篇章结构
-            "content_selection": 15,      # 文章选材
-            "emotion_and_content": 25     # 内容情感
-        }
+        ai_response = response.choices[0].message.content
 
-        dimensions = {}
-        dimensions_sum = 0
+        # 解析分数(按评分模式校验维度和分数范围,失败时发起一次修复请求)
+        scores = ai_service.parse_response(STAGE_SCORE, ai_response, model_call)
 
-        def get_cn_dim_name(en_dim):
-            dim_mapping = {
-                "theme_and_intent": "中心立意",
-                "language_expression": "语言表达",
-                "structure": "篇章结构",
-                "content_selection": "文章选材",
-                "emotion_and_content": "内容情感"
-            }
-            return dim_mapping.get(en_dim, en_dim)
-
-        for dim in required_dimensions:
-            if dim not in scores:
-                raise ValueError(f"缺少维度: {dim}（{get_cn_dim_name(dim)}）")  # 可选：加中文提示更友好
-            score = float(scores[dim])
-            if score < 0 or score > max_scores[dim]:
-                raise ValueError(f"维度 {dim}（{get_cn_dim_name(dim)}）分数超出范围: {score}（有效值0-{max_scores[dim]}）")
-            dimensions[dim] = {
-                "score": score,
-                "max_score": max_scores[dim]
-            }
-            dimensions_sum += score
-
-        # 根据原始评分数据判断分制,计算总分
-        use_10_point_scale = False
-        if request.original_score_data and "total_score" in request.original_score_data:
-            if request.original_score_data["total_score"] <= 10:
-                use_10_point_scale = True
-
-        if use_10_point_scale:
-            total_score = int((dimensions_sum / 100) * 10)
-        else:
-            total_score = int((dimensions_sum / 100) * 40)
+        # 验证分数格式(缺少维度或超出范围时抛出ValueError)
+        values = DEFAULT_RUBRIC.validate(scores)
+        dimensions = DEFAULT_RUBRIC.dimensions_json(values)
+
+        # 根据原始评分数据判断分制,计算总分(取整数部分)
+        score_system = get_score_system_from_original(request.original_score_data)
+        total_score = int(DEFAULT_RUBRIC.total(values, score_system, rounding=ROUND_FLOOR))
         score_data = {
             "total_score": total_score,
             "dimensions": dimensions
         }
 
-        db.query(Score).filter_by(
-            evaluation_id=request.evaluation_id,
-            is_default=1
-        ).update({"is_default": 0})
-
-
-        # 6. 保存评分结果
-        score = Score(
-            evaluation_id=request.evaluation_id,
-            user_phone=request.user_phone,
-            score_prompt_id=request.score_prompt_id,
-            score_type='ai' if request.user_phone == 'system' else 'user',
-            total_score=score_data.get('total_score', 0),
-            dimension_scores=json.dumps(score_data.get('dimensions', {}), ensure_ascii=False),
-            is_default=1,
-            status=1
-        )
-        db.add(score)
+        with track_batch_stats(db, Score.evaluation_id == request.evaluation_id):
+            db.query(Score).filter_by(
+                evaluation_id=request.evaluation_id,
+                is_default=1
+            ).update({"is_default": 0})
+
+
+            # 6. 保存评分结果
+            score = Score(
+                evaluation_id=request.evaluation_id,
+                user_phone=request.user_phone,
+                score_prompt_id=request.score_prompt_id,
+                score_type='ai' if request.user_phone == 'system' else 'user',
+                total_score=score_data.get('total_score', 0),
+                dimension_scores=json.dumps(score_data.get('dimensions', {}), ensure_ascii=False),
+                is_default=1,
+                status=1,
+                **model_call.to_columns()
+            )
+            db.add(score)
         db.commit()
         db.refresh(score)
 
@@ -581,11 +522,14 @@ async def ai_score_essay(
             "raw_response": ai_response
         }
 
-    except json.JSONDecodeError as e:
+    except CircuitOpenError as e:
+        db.rollback()
+        raise _model_unavailable(e)
+    except ResponseParseError as e:
         return {
             "success": False,
             "error": f"AI返回格式错误: {str(e)}",
-            "raw_response": ai_response
+            "raw_response": e.raw_text or ""
         }
     except Exception as e:
         print(e)
@@ -595,6 +539,53 @@ async def ai_score_essay(
         }
 
 
+def _grade_complete_analysis(
+    request: CompleteAnalysisRequest,
+    word_count: int,
+    analyze_template: CompiledPrompt,
+    analyze_version: str,
+    score_template: CompiledPrompt,
+    score_version: str
+) -> tuple:
+    """一站式批改的模型调用部分: AI分析后基于分析结果评分(在线程池中执行,不访问数据库)"""
+    # 构建分析消息(系统提示词和评价提示词为固定前缀,本篇作文在后)
+    messages = build_analyze_messages(
+        prompt_content=analyze_template,
+        essay_content=request.essay_content,
+        essay_title=request.essay_title,
+        essay_requirement=request.essay_requirement,
+        word_count=word_count
+    )
+    response, model_call = ai_service.chat_completion(
+        STAGE_ANALYZE,
+        prompt_version=analyze_version,
+        messages=messages,
+        temperature=0.5,
+        max_tokens=4000
+    )
+    analysis_result = ai_service.parse_response(STAGE_ANALYZE, response.choices[0].message.content, model_call)
+    logger.info("作文分析完成")
+
+    # 构建评分消息(评分提示词为固定前缀,作文和分析结果在后)
+    score_messages = build_score_messages(
+        prompt_content=score_template,
+        essay_content=request.essay_content,
+        essay_title=request.essay_title,
+        essay_requirement=request.essay_requirement,
+        word_count=word_count,
+        analysis=analysis_result
+    )
+    score_response, score_call = ai_service.chat_completion(
+        STAGE_SCORE,
+        prompt_version=score_version,
+        messages=score_messages,
+        temperature=0.3
+    )
+    scores = ai_service.parse_response(STAGE_SCORE, score_response.choices[0].message.content, score_call)
+
+    return analysis_result, model_call, scores, score_call
+
+
 @router.post("/complete-analysis", response_model=CompleteAnalysisResponse, summary="一站式作文批改")
 async def complete_analysis(
     request: CompleteAnalysisRequest,
@@ -609,55 +600,8 @@ async def complete_analysis(
     - 返回完整批改结果
     """
     try:
-        from datetime import datetime
-
-        # ========== 步骤1: 批次管理 ==========
-        # 查找是否存在相同批次
-        existing_batch = db.query(Batch).filter(
-            Batch.essay_title == request.essay_title,
-            Batch.essay_requirement == request.essay_requirement,
-            Batch.status == 1
-        ).first()
-
-        if existing_batch:
-            batch = existing_batch
-            logger.info(f"复用现有批次: batch_id={batch.id}")
-        else:
-            # 创建新批次
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            batch = Batch(
-                directory_name=f"batch_{timestamp}",
-                essay_title=request.essay_title or "无题目",
-                essay_requirement=request.essay_requirement or "无要求",
-                essay_count=0,
-                status=1
-            )
-            db.add(batch)
-            db.flush()
-            logger.info(f"创建新批次: batch_id={batch.id}")
-
-        # 更新批次作文数量
-        batch.essay_count += 1
-
-        # ========== 步骤2: 保存作文数据 ==========
-        # 统计字数
-        word_count = len(request.essay_content.replace(' ', '').replace('\n', '').replace('\r', '').replace('\t', ''))
-
-        essay = Essay(
-            batch_id=batch.id,
-            student_name=request.student_name,
-            essay_content=request.essay_content,
-            essay_image_path=request.essay_image,
-            word_count=word_count,
-            score_system=request.score_system,
-            status=1
-        )
-        db.add(essay)
-        db.flush()
-        logger.info(f"作文保存成功: essay_id={essay.id}, word_count={word_count}")
-
-        # ========== 步骤3: AI分析 ==========
-        # 获取默认分析提示词
+        # ========== 步骤0: 获取并编译默认提示词 ==========
+        # 在调用模型之前完成,提示词有问题时不产生任何模型调用
         analyze_prompt = db.query(Prompt).filter(
             Prompt.prompt_type == 'analyze',
             Prompt.is_default == 1,
@@ -670,80 +614,6 @@ async def complete_analysis(
                 detail="未找到默认分析提示词"
             )
 
-        # 创建OpenAI客户端
-        client = OpenAI(
-            base_url=settings.OPENAI_BASE_URL,
-            api_key=settings.OPENAI_API_KEY
-        )
-
-        # 构建分析提示词
-        user_prompt = analyze_prompt.prompt_content.format(
-            essay_title=request.essay_title or "无题目",
-            essay_requirement=request.essay_requirement or "无特定要求",
-            essay_content=request.essay_content,
-            word_count=word_count
-        )
-
-        system_prompt = """你是一位资深的语文教师和作文分析专家，拥有20年的教学经验。
-
-你的职责：
-1. 对作文进行全面、客观、细致的分析
-2. 准确识别错别字和语病
-3. 发现作文的优点和亮点
-4. 提出具体可行的改进建议
-
-分析原则：
-- 客观公正：基于事实进行分析
-- 具体详细：标注位置，给出实例
-- 建设性：提供可操作的改进建议
-- 鼓励为主：既指出问题也肯定优点
-
-输出规范：
-- 必须输出纯JSON格式，不要有任何额外文字
-- 不要使用markdown代码块标记
-- 严格按照指定的JSON结构输出"""
-
-        # 调用AI分析
-        response = client.chat.completions.create(
-            model=settings.OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.5,
-            max_tokens=4000
-        )
-
-        ai_response = response.choices[0].message.content.strip()
-
-        # 清理markdown标记
-        if ai_response.startswith("```json"):
-            ai_response = ai_response[7:]
-        if ai_response.startswith("```"):
-            ai_response = ai_response[3:]
-        if ai_response.endswith("```"):
-            ai_response = ai_response[:-3]
-        ai_response = ai_response.strip()
-
-        analysis_result = json.loads(ai_response)
-
-        # 保存评价记录
-        evaluation = Evaluation(
-            essay_id=essay.id,
-            user_phone=request.user_phone,
-            analyze_prompt_id=analyze_prompt.id,
-            evaluation_result=json.dumps(analysis_result, ensure_ascii=False),
-            is_latest=1,
-            status=1,
-            confirmed_genre_id=1,
-            confirmed_grade_id=1
-        )
-        db.add(evaluation)
-        db.flush()
-        logger.info(f"作文分析完成: evaluation_id={evaluation.id}")
-
-        # ========== 步骤4: AI评分 ==========
-        # 获取默认评分提示词
         score_prompt = db.query(Prompt).filter(
             Prompt.prompt_type == 'score',
             Prompt.is_default == 1,
@@ -756,153 +626,105 @@ async def complete_analysis(
                 detail="未找到默认评分提示词"
             )
 
-        # 构建评分上下文
-        overall_eval = analysis_result.get("overall_evaluation", {})
-        typos = analysis_result.get("typos", [])
-        punctuation_errors = analysis_result.get("punctuation_errors", [])
-        grammar_errors = analysis_result.get("grammar_errors", [])
-        highlights = analysis_result.get("highlights", [])
-        requirement_eval = analysis_result.get("requirement_evaluation", [])
-
-        analysis_context = f"""
-
-## 作文分析结果(完整)
-
-以下是对本篇作文的详细分析结果,请在评分时充分参考:
-
-### 1. 综合评价
-**总评**: {overall_eval.get("summary", "")}
-**整体质量**: {overall_eval.get("quality_level", "")}
-**主要优点**:
-{json.dumps(overall_eval.get("main_strengths", []), ensure_ascii=False, indent=2)}
-**主要问题**:
-{json.dumps(overall_eval.get("main_issues", []), ensure_ascii=False, indent=2)}
-
-### 2. 作文要求评价(共 {len(requirement_eval)} 条)
-{json.dumps(requirement_eval, ensure_ascii=False, indent=2)}
-
-### 3. 错别字详细列表(共 {len(typos)} 个)
-{json.dumps(typos, ensure_ascii=False, indent=2)}
-
-### 4. 标点错误详细列表(共 {len(punctuation_errors)} 处)
-{json.dumps(punctuation_errors, ensure_ascii=False, indent=2)}
-
-### 5. 病句详细列表(共 {len(grammar_errors)} 处)
-{json.dumps(grammar_errors, ensure_ascii=False, indent=2)}
+        analyze_template = _compile_prompt(analyze_prompt, "默认分析提示词")
+        score_template = _compile_prompt(score_prompt, "默认评分提示词")
+        analyze_prompt_id, score_prompt_id = analyze_prompt.id, score_prompt.id
+        analyze_version = prompt_version_label(analyze_prompt.id, analyze_prompt.version_name)
+        score_version = prompt_version_label(score_prompt.id, score_prompt.version_name)
+
+        # 读取阶段结束: 归还连接,模型调用期间不占用连接池
+        db.close()
+
+        # ========== 步骤1: AI分析和评分(只依赖请求内容,不访问数据库) ==========
+        word_count = count_words(request.essay_content)
+        analysis_result, model_call, scores, score_call = await run_in_threadpool(
+            _grade_complete_analysis,
+            request,
+            word_count,
+            analyze_template,
+            analyze_version,
+            score_template,
+            score_version
+        )
 
-### 6. 好词好句详细列表(共 {len(highlights)} 处)
-{json.dumps(highlights, ensure_ascii=False, indent=2)}
+        # 计算总分(按分制换算后取整数部分)
+        values = DEFAULT_RUBRIC.validate(scores)
+        dimensions = DEFAULT_RUBRIC.dimensions_json(values)
+        total_score = int(DEFAULT_RUBRIC.total(values, normalize_score_system(request.score_system), rounding=ROUND_FLOOR))
 
-**评分要求**:
-- 请充分参考上述分析结果进行评分
-- 特别注意错别字、标点错误和病句数量对"语言表达"维度的影响
-- 好词好句应提升相应维度的分数
-- 作文要求评价中指出的问题应在相应维度扣分
-- 综合评价中的主要问题应在对应维度扣分
-"""
+        # ========== 步骤2: 写入批次、作文、评价和评分(一个短事务,模型调用失败时不产生任何数据) ==========
+        # 按题目和要求的指纹复用批次(唯一索引,并发提交不会重复创建),作文数量原子累加
+        batch_id = resolve_batch(db, request.essay_title, request.essay_requirement)
 
-        score_system_prompt = score_prompt.prompt_content.format(
-            essay_title=request.essay_title or "无题目",
-            essay_requirement=request.essay_requirement or "无特定要求",
+        essay = Essay(
+            batch_id=batch_id,
+            student_name=request.student_name,
             essay_content=request.essay_content,
-            word_count=word_count
-        ) + analysis_context
-
-        score_user_prompt = """请按照要求进行评分"""
-
-        # 调用AI评分
-        score_response = client.chat.completions.create(
-            model=settings.OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": score_system_prompt},
-                {"role": "user", "content": score_user_prompt}
-            ],
-            temperature=0.3
+            essay_image_path=request.essay_image,
+            word_count=word_count,
+            score_system=request.score_system,
+            status=1
         )
+        db.add(essay)
+        db.flush()
 
-        score_ai_response = score_response.choices[0].message.content.strip()
-
-        # 清理markdown标记
-        if score_ai_response.startswith("```json"):
-            score_ai_response = score_ai_response[7:]
-        if score_ai_response.startswith("```"):
-            score_ai_response = score_ai_response[3:]
-        if score_ai_response.endswith("```"):
-            score_ai_response = score_ai_response[:-3]
-        score_ai_response = score_ai_response.strip()
-
-        scores = json.loads(score_ai_response)
-
-        # 计算总分
-        required_dimensions = ["theme_and_intent", "language_expression", "structure", "content_selection", "emotion_and_content"]
-        max_scores = {
-            "theme_and_intent": 20,
-            "language_expression": 25,
-            "structure": 15,
-            "content_selection": 15,
-            "emotion_and_content": 25
-        }
-
-        dimensions = {}
-        dimensions_sum = 0
-
-        for dim in required_dimensions:
-            if dim not in scores:
-                raise ValueError(f"缺少维度: {dim}")
-            score_value = float(scores[dim])
-            if score_value < 0 or score_value > max_scores[dim]:
-                raise ValueError(f"维度 {dim} 分数超出范围: {score_value}")
-            dimensions[dim] = {
-                "score": score_value,
-                "max_score": max_scores[dim]
-            }
-            dimensions_sum += score_value
-
-        # 根据分制计算总分
-        if request.score_system == 10:
-            total_score = int((dimensions_sum / 100) * 10)
-        else:
-            total_score = int((dimensions_sum / 100) * 40)
-
-        # 保存评分记录
-        score = Score(
-            evaluation_id=evaluation.id,
+        evaluation = Evaluation(
+            essay_id=essay.id,
             user_phone=request.user_phone,
-            score_prompt_id=score_prompt.id,
-            score_type='ai',
-            total_score=total_score,
-            dimension_scores=json.dumps(dimensions, ensure_ascii=False),
-            is_default=1,
-            status=1
+            analyze_prompt_id=analyze_prompt_id,
+            evaluation_result=json.dumps(analysis_result, ensure_ascii=False),
+            is_latest=1,
+            status=1,
+            confirmed_genre_id=1,
+            confirmed_grade_id=1,
+            **model_call.to_columns()
         )
-        db.add(score)
+        db.add(evaluation)
+        db.flush()
 
-        # 提交事务
+        # 新作文的评分计入批次统计
+        with track_batch_stats(db, Evaluation.id == evaluation.id):
+            score = Score(
+                evaluation_id=evaluation.id,
+                user_phone=request.user_phone,
+                score_prompt_id=score_prompt_id,
+                score_type='ai',
+                total_score=total_score,
+                dimension_scores=json.dumps(dimensions, ensure_ascii=False),
+                is_default=1,
+                status=1,
+                **score_call.to_columns()
+            )
+            db.add(score)
+        evaluation_id, essay_id = evaluation.id, essay.id
+
+        # 提交事务(提交后不再访问ORM对象,避免重新加载)
         db.commit()
-        db.refresh(evaluation)
-        db.refresh(score)
 
-        logger.info(f"一站式批改完成: essay_id={essay.id}, evaluation_id={evaluation.id}, total_score={total_score}")
+        logger.info(f"一站式批改完成: essay_id={essay_id}, evaluation_id={evaluation_id}, total_score={total_score}")
 
-        # ========== 步骤5: 构建返回结果 ==========
+        # ========== 步骤3: 构建返回结果 ==========
         complete_result = {
             **analysis_result,
             "total_score": total_score,
-            "evaluation_id": evaluation.id
+            "evaluation_id": evaluation_id
         }
 
         return CompleteAnalysisResponse(
             success=True,
-            evaluation_id=evaluation.id,
-            essay_id=essay.id,
-            batch_id=batch.id,
+            evaluation_id=evaluation_id,
+            essay_id=essay_id,
+            batch_id=batch_id,
             total_score=total_score,
             analysis_result=complete_result
         )
 
     except HTTPException:
         raise
-    except json.JSONDecodeError as e:
+    except CircuitOpenError as e:
+        db.rollback()
+        raise _model_unavailable(e)
+    except ResponseParseError as e:
         db.rollback()
         logger.error(f"AI返回JSON解析失败: {str(e)}")
         raise HTTPException(
@@ -1,8 +1,14 @@
 """
 用户反馈API
 支持4种反馈类型: 评分对比、自定义评分、文字点评、问题标注
+可逐条提交,也可批量提交(一次校验、一条INSERT)
+反馈分析: AI评分与教师评分的差异统计
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import insert, literal, select, union_all
 from sqlalchemy.orm import Session
 import json
 from app.database import get_db
@@ -12,13 +18,29 @@ from app.schemas import (
     FeedbackCustomScoreRequest,
     FeedbackCommentRequest,
     FeedbackIssueMarkRequest,
+    FeedbackBulkRequest,
+    FeedbackBulkResponse,
     FeedbackResponse,
     FeedbackListResponse
 )
+from app.services.score_analytics import GROUP_BY_OPTIONS, score_divergence
 from app.utils import logger
 
 router = APIRouter()
 
+# 各反馈类型保存到feedback_data的字段
+FEEDBACK_DATA_FIELDS = {
+    "comparison": ("which_accurate", "user_score", "reason"),
+    "custom_score": ("custom_scores", "total_score", "comment"),
+    "comment": ("comment", "comment_type"),
+    "issue_mark": ("issue_type", "issue_position", "issue_description", "suggested_fix")
+}
+
+
+def build_feedback_data(feedback_type: str, request) -> dict:
+    """按反馈类型从请求中取出反馈数据"""
+    return {field: getattr(request, field) for field in FEEDBACK_DATA_FIELDS[feedback_type]}
+
 
 @router.post("/comparison", response_model=FeedbackResponse, summary="提交评分对比反馈")
 async def submit_comparison_feedback(
@@ -47,11 +69,7 @@ async def submit_comparison_feedback(
             )
 
         # 构建反馈数据
-        feedback_data = {
-            "which_accurate": request.which_accurate,
-            "user_score": request.user_score,
-            "reason": request.reason
-        }
+        feedback_data = build_feedback_data("comparison", request)
 
         # 保存反馈
         feedback = Feedback(
@@ -112,11 +130,7 @@ async def submit_custom_score_feedback(
             )
 
         # 构建反馈数据
-        feedback_data = {
-            "custom_scores": request.custom_scores,
-            "total_score": request.total_score,
-            "comment": request.comment
-        }
+        feedback_data = build_feedback_data("custom_score", request)
 
         # 保存反馈
         feedback = Feedback(
@@ -177,10 +191,7 @@ async def submit_comment_feedback(
             )
 
         # 构建反馈数据
-        feedback_data = {
-            "comment": request.comment,
-            "comment_type": request.comment_type
-        }
+        feedback_data = build_feedback_data("comment", request)
 
         # 保存反馈
         feedback = Feedback(
@@ -241,12 +252,7 @@ async def submit_issue_mark_feedback(
             )
 
         # 构建反馈数据
-        feedback_data = {
-            "issue_type": request.issue_type,
-            "issue_position": request.issue_position,
-            "issue_description": request.issue_description,
-            "suggested_fix": request.suggested_fix
-        }
+        feedback_data = build_feedback_data("issue_mark", request)
 
         # 保存反馈
         feedback = Feedback(
@@ -280,6 +286,116 @@ async def submit_issue_mark_feedback(
         )
 
 
+@router.post("/bulk", response_model=FeedbackBulkResponse, summary="批量提交反馈")
+async def submit_feedbacks_bulk(
+    request: FeedbackBulkRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    批量提交反馈
+    - 每项与单条接口的请求相同,另加feedback_type区分类型(可混合提交)
+    - 所有评价和评分ID用一条查询校验,有任何一个不存在时整批不保存
+    - 所有反馈用一条INSERT语句写入
+    """
+    try:
+        items = request.feedbacks
+        evaluation_ids = {item.evaluation_id for item in items}
+        score_ids = {item.score_id for item in items}
+
+        # 一条查询校验所有引用的评价和评分
+        found = db.execute(union_all(
+            select(literal("evaluation").label("kind"), Evaluation.id)
+            .where(Evaluation.id.in_(evaluation_ids), Evaluation.status == 1),
+            select(literal("score").label("kind"), Score.id)
+            .where(Score.id.in_(score_ids), Score.status == 1)
+        )).all()
+
+        missing_evaluations = sorted(evaluation_ids - {id_ for kind, id_ in found if kind == "evaluation"})
+        if missing_evaluations:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"评价记录不存在: {missing_evaluations}"
+            )
+
+        missing_scores = sorted(score_ids - {id_ for kind, id_ in found if kind == "score"})
+        if missing_scores:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"评分记录不存在: {missing_scores}"
+            )
+
+        # 一条语句写入所有反馈
+        rows = [
+            {
+                "evaluation_id": item.evaluation_id,
+                "score_id": item.score_id,
+                "user_phone": item.user_phone,
+                "feedback_type": item.feedback_type,
+                "feedback_data": json.dumps(build_feedback_data(item.feedback_type, item), ensure_ascii=False),
+                "status": 1
+            }
+            for item in items
+        ]
+        db.execute(insert(Feedback), rows)
+        db.commit()
+
+        logger.info(f"批量反馈提交成功: {len(rows)}条")
+
+        return FeedbackBulkResponse(
+            success=True,
+            created=len(rows),
+            message=f"成功提交{len(rows)}条反馈"
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.error(f"批量提交反馈失败: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"提交反馈失败: {str(e)}"
+        )
+
+
+@router.get("/analytics", summary="AI评分与教师评分差异分析")
+async def get_feedback_analytics(
+    group_by: str = Query("prompt", description="分组方式(prompt/batch)"),
+    batch_id: Optional[int] = Query(None, description="批次筛选"),
+    prompt_id: Optional[int] = Query(None, description="评分提示词筛选"),
+    start_date: Optional[date] = Query(None, description="反馈开始日期"),
+    end_date: Optional[date] = Query(None, description="反馈结束日期"),
+    db: Session = Depends(get_db)
+):
+    """
+    按维度统计AI评分与教师评分(自定义评分和评分对比反馈)的差异
+    - overall: 各维度和总分(百分制)的平均绝对误差、偏差(AI - 教师)、分数分布和评分一致性
+    - groups: 按评分提示词或批次分组的样本数、平均绝对误差和偏差
+    """
+    if group_by not in GROUP_BY_OPTIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"group_by只能是: {', '.join(GROUP_BY_OPTIONS)}"
+        )
+
+    try:
+        return score_divergence(
+            db,
+            batch_id=batch_id,
+            prompt_id=prompt_id,
+            start_date=start_date,
+            end_date=end_date,
+            group_by=group_by
+        )
+
+    except Exception as e:
+        logger.error(f"获取反馈分析失败: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="获取反馈分析失败"
+        )
+
+
 @router.get("/evaluation/{evaluation_id}", response_model=FeedbackListResponse, summary="获取评价的所有反馈")
 async def get_evaluation_feedbacks(
     evaluation_id: int,
@@ -7,11 +7,23 @@ from typing import List, Optional
 from app.database import get_db
 from app.models import Prompt, Grade, Genre
 from app.schemas import PromptCreate, PromptUpdate, PromptResponse, PromptListResponse
+from app.services.prompt_templates import PromptTemplateError, validate_prompt_content
 from app.utils import logger
 
 router = APIRouter()
 
 
+def _validate_template(prompt_content: str) -> None:
+    """校验提示词模板的占位符,格式错误返回400"""
+    try:
+        validate_prompt_content(prompt_content)
+    except PromptTemplateError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"提示词模板格式错误: {str(e)}"
+        )
+
+
 @router.get("", response_model=PromptListResponse, summary="获取提示词列表")
 async def get_prompts(
     grade_id: Optional[int] = None,
@@ -114,9 +126,13 @@ async def create_prompt(
     """
     创建新提示词
     - 验证年级和文体是否存在
+    - 校验提示词模板的占位符
     - 如果设置为默认,取消同类型的其他默认提示词
     """
     try:
+        # 校验提示词模板
+        _validate_template(request.prompt_content)
+
         # 验证年级存在
         grade = db.query(Grade).filter_by(id=request.grade_id, status=1).first()
         if not grade:
@@ -195,6 +211,7 @@ async def update_prompt(
     """
     更新提示词
     - 可以修改版本名称、内容、是否默认
+    - 修改内容时校验提示词模板的占位符
     - 如果设置为默认,取消同类型的其他默认提示词
     """
     try:
@@ -206,6 +223,10 @@ async def update_prompt(
                 detail="提示词不存在"
             )
 
+        # 校验提示词模板
+        if request.prompt_content is not None:
+            _validate_template(request.prompt_content)
+
         # 如果设置为默认,取消同年级、同文体、同类型的其他默认提示词
         if request.is_default:
             db.query(Prompt).filter(
@@ -0,0 +1,132 @@
+"""
+模型调用统计API
+按提示词版本/批次/日期汇总评价和评分的token用量(含提示词缓存命中)、耗时和重试次数
+"""
+from datetime import date, datetime, time
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models import Batch, Essay, Evaluation, Prompt, Score
+from app.schemas import UsageStatsResponse
+from app.utils import logger
+
+router = APIRouter()
+
+GROUP_BY_OPTIONS = ("prompt_version", "batch", "day")
+STAGES = ("analyze", "score")
+
+
+def _stage_query(stage: str, group_by: str, start_date: Optional[date], end_date: Optional[date]):
+    """构建单个阶段(评价表或评分表)的分组统计查询"""
+    if stage == "analyze":
+        table = Evaluation
+        prompt_id_column = Evaluation.analyze_prompt_id
+        essay_id_column = Evaluation.essay_id
+    else:
+        table = Score
+        prompt_id_column = Score.score_prompt_id
+        essay_id_column = Evaluation.essay_id
+
+    if group_by == "prompt_version":
+        key_columns = [Prompt.id.label("group_key"), Prompt.version_name.label("group_name")]
+    elif group_by == "batch":
+        key_columns = [Batch.id.label("group_key"), Batch.essay_title.label("group_name")]
+    else:
+        day = func.date(table.create_date)
+        key_columns = [day.label("group_key"), day.label("group_name")]
+
+    query = select(
+        *key_columns,
+        func.count(table.id).label("calls"),
+        func.coalesce(func.sum(table.prompt_tokens), 0).label("prompt_tokens"),
+        func.coalesce(func.sum(table.completion_tokens), 0).label("completion_tokens"),
+        func.coalesce(func.sum(table.cached_tokens), 0).label("cached_tokens"),
+        func.avg(table.prompt_tokens).label("avg_prompt_tokens"),
+        func.avg(table.completion_tokens).label("avg_completion_tokens"),
+        func.avg(table.latency_ms).label("avg_latency_ms"),
+        func.max(table.latency_ms).label("max_latency_ms"),
+        func.coalesce(func.sum(table.retry_count), 0).label("retries"),
+        func.avg(Essay.word_count).label("avg_word_count")
+    )
+
+    if stage == "score":
+        query = query.select_from(Score).join(Evaluation, Score.evaluation_id == Evaluation.id)
+    else:
+        query = query.select_from(Evaluation)
+    query = query.join(Essay, essay_id_column == Essay.id)
+
+    if group_by == "prompt_version":
+        query = query.join(Prompt, prompt_id_column == Prompt.id)
+    elif group_by == "batch":
+        query = query.join(Batch, Essay.batch_id == Batch.id)
+
+    # 只统计有模型调用记录的数据(用户手动评分和历史数据没有)
+    query = query.where(table.status == 1, table.model_name.isnot(None))
+    if start_date:
+        query = query.where(table.create_date >= datetime.combine(start_date, time.min))
+    if end_date:
+        query = query.where(table.create_date <= datetime.combine(end_date, time.max))
+
+    return query.group_by(*key_columns).order_by(key_columns[0])
+
+
+@router.get("/stats", response_model=UsageStatsResponse, summary="模型调用统计")
+async def get_usage_stats(
+    group_by: str = Query("prompt_version", description="分组方式(prompt_version/batch/day)"),
+    stage: Optional[str] = Query(None, description="阶段筛选(analyze/score)"),
+    start_date: Optional[date] = Query(None, description="开始日期"),
+    end_date: Optional[date] = Query(None, description="结束日期"),
+    db: Session = Depends(get_db)
+):
+    """
+    按分组汇总模型调用的token用量、耗时和重试次数
+    - group_by: prompt_version按提示词版本, batch按批次, day按日期
+    - stage: analyze为评价, score为AI评分, 不传时两者都返回
+    """
+    if group_by not in GROUP_BY_OPTIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"group_by只能是: {', '.join(GROUP_BY_OPTIONS)}"
+        )
+    if stage and stage not in STAGES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"stage只能是: {', '.join(STAGES)}"
+        )
+
+    try:
+        items = []
+        for current_stage in ([stage] if stage else STAGES):
+            for row in db.execute(_stage_query(current_stage, group_by, start_date, end_date)):
+                items.append({
+                    "stage": current_stage,
+                    "group_key": str(row.group_key),
+                    "group_name": str(row.group_name) if row.group_name is not None else None,
+                    "calls": row.calls,
+                    "prompt_tokens": row.prompt_tokens,
+                    "completion_tokens": row.completion_tokens,
+                    "cached_tokens": row.cached_tokens,
+                    "cache_hit_ratio": round(row.cached_tokens / row.prompt_tokens, 4) if row.prompt_tokens else 0.0,
+                    "avg_prompt_tokens": round(float(row.avg_prompt_tokens or 0), 1),
+                    "avg_completion_tokens": round(float(row.avg_completion_tokens or 0), 1),
+                    "avg_latency_ms": round(float(row.avg_latency_ms or 0), 1),
+                    "max_latency_ms": row.max_latency_ms or 0,
+                    "retries": row.retries,
+                    "avg_word_count": round(float(row.avg_word_count or 0), 1)
+                })
+
+        return {
+            "group_by": group_by,
+            "items": items
+        }
+
+    except Exception as e:
+        logger.error(f"获取模型调用统计失败: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="获取模型调用统计失败"
+        )
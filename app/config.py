@@ -3,7 +3,7 @@
 支持从环境变量和配置文件读取配置
 """
 import os
-from typing import Optional
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 
@@ -24,6 +24,23 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str = ""
     OPENAI_MODEL: str = "gpt-4"
 
+    # 模型路由配置
+    # 备用目标(JSON列表,按顺序切换),未填写的字段使用上面的OPENAI_*配置,例如:
+    # [{"model": "gpt-4o-mini"}, {"name": "backup", "model": "gpt-4", "base_url": "https://...", "api_key": "..."}]
+    OPENAI_FALLBACK_TARGETS: List[Dict[str, str]] = []
+    MODEL_FAILURE_THRESHOLD: int = 3       # 目标连续失败该次数后暂时下线
+    MODEL_FAILURE_COOLDOWN: float = 30.0   # 下线目标的冷却时间(秒)
+    MODEL_HEDGE_ENABLED: bool = False      # 是否发送对冲请求(会增加调用量)
+    MODEL_HEDGE_QUANTILE: float = 0.95     # 首个请求超过该分位耗时仍未返回时发出对冲请求
+    MODEL_HEDGE_MIN_DELAY: float = 2.0     # 对冲等待时间下限(秒)
+
+    # 模型服务熔断配置
+    CIRCUIT_FAILURE_RATE: float = 0.5      # 窗口内失败率达到该值时熔断
+    CIRCUIT_MIN_CALLS: int = 10            # 窗口内调用数少于该值时不熔断
+    CIRCUIT_WINDOW_SECONDS: float = 60.0   # 统计失败率的时间窗口(秒)
+    CIRCUIT_OPEN_SECONDS: float = 30.0     # 熔断持续时间(秒),之后放行探测请求
+    CIRCUIT_HALF_OPEN_PROBES: int = 1      # 同时放行的探测请求数
+
     # 应用配置
     APP_HOST: str = "0.0.0.0"
     APP_PORT: int = 8000
@@ -35,6 +52,17 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = "INFO"
     LOG_FILE: str = "logs/app.log"
 
+    # 性能分析配置
+    SLOW_REQUEST_MS: int = 1000        # 超过该耗时的请求记录慢请求日志
+    SLOW_REQUEST_QUERIES: int = 50     # 超过该SQL数量的请求记录慢请求日志
+    PROFILING_ENABLED: bool = False    # 是否允许通过请求头开启性能分析(需安装pyinstrument)
+    PROFILING_HEADER: str = "X-Profile"
+
+    # 幂等请求配置
+    IDEMPOTENCY_HEADER: str = "Idempotency-Key"
+    IDEMPOTENCY_TTL_HOURS: int = 24    # 幂等键保留时间,过期后同一个键视为新请求
+    IDEMPOTENCY_LOCK_SECONDS: int = 600  # 处理中的登记超过该时间(进程退出或保存结果失败)后允许同一个键重新处理,应大于最长的请求耗时
+
     @property
     def DATABASE_URL(self) -> str:
         """构建数据库连接URL"""
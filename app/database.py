@@ -2,20 +2,54 @@
 数据库连接管理
 使用SQLAlchemy ORM
 """
+import time
 from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool
 from typing import Generator
 from app.config import settings
+from app.utils.metrics import DB_POOL_CHECKOUT_WAIT, current_request_stats
+
+
+class InstrumentedQueuePool(QueuePool):
+    """记录获取连接等待时间的连接池"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
 
 # 创建数据库引擎
 engine = create_engine(
     settings.DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
     pool_pre_ping=True,  # 连接池预检查
     pool_recycle=3600,   # 连接回收时间(秒)
     echo=settings.APP_DEBUG  # 是否打印SQL语句
 )
 
+
+def instrument_engine(target_engine) -> None:
+    """统计每个请求执行的SQL数量和耗时"""
+
+    @event.listens_for(target_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(target_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        stats = current_request_stats()
+        if stats is not None:
+            stats.record_query(statement, elapsed)
+
+
+instrument_engine(engine)
+
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
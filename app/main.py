@@ -2,13 +2,19 @@
 FastAPI主应用
 整合所有API路由
 """
-from fastapi import FastAPI
+import time
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 from pathlib import Path
-from app.api import users, batches, essays, evaluations, prompts, feedbacks
+from app.api import users, batches, essays, evaluations, prompts, feedbacks, usage
+from app.services.ai_service import ai_service
+from app.services.circuit_breaker import STATE_CLOSED
+from app.services.idempotency import IdempotencyMiddleware
 from app.utils import logger
+from app.utils.metrics import metrics_payload, observe_request, start_request_stats
+from app.utils.profiling import log_slow_request, profiler_response, server_timing_header, start_profiler
 from app.config import settings
 
 # 创建FastAPI应用实例
@@ -20,6 +26,9 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# 幂等请求中间件(在CORS内层,重放的响应同样带CORS响应头)
+app.add_middleware(IdempotencyMiddleware)
+
 # 配置CORS中间件
 app.add_middleware(
     CORSMiddleware,
@@ -27,8 +36,43 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-DB-Query-Count", "Idempotent-Replayed", "Retry-After"],
 )
 
+
+# 监控指标中间件
+@app.middleware("http")
+async def metrics_middleware(request: Request, call_next):
+    """
+    请求级监控
+    - 按路由模板记录接口耗时、SQL数量和SQL耗时
+    - 返回Server-Timing和X-DB-Query-Count响应头
+    - 记录慢请求日志,可通过请求头开启采样分析
+    """
+    stats = start_request_stats()
+    profiler = start_profiler(request)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        route = request.scope.get("route")
+        observe_request(request.method, route.path if route else "unmatched", 500, time.perf_counter() - start, stats)
+        raise
+
+    duration = time.perf_counter() - start
+    route = request.scope.get("route")
+    route_path = route.path if route else "unmatched"
+    observe_request(request.method, route_path, response.status_code, duration, stats)
+    log_slow_request(request.method, route_path, duration, stats)
+
+    if profiler is not None:
+        response = profiler_response(profiler, request)
+
+    response.headers["Server-Timing"] = server_timing_header(stats, duration)
+    response.headers["X-DB-Query-Count"] = str(stats.queries)
+    return response
+
+
 # 注册API路由
 app.include_router(users.router, prefix="/api/users", tags=["用户管理"])
 app.include_router(batches.router, prefix="/api/batches", tags=["批次管理"])
@@ -36,6 +80,7 @@ app.include_router(essays.router, prefix="/api/essays", tags=["作文管理"])
 app.include_router(evaluations.router, prefix="/api/evaluations", tags=["评价评分"])
 app.include_router(prompts.router, prefix="/api/prompts", tags=["提示词管理"])
 app.include_router(feedbacks.router, prefix="/api/feedbacks", tags=["用户反馈"])
+app.include_router(usage.router, prefix="/api/usage", tags=["调用统计"])
 
 # 挂载静态文件目录
 project_root = Path(__file__).parent.parent
@@ -109,14 +154,24 @@ async def prompts_management_page():
 # 健康检查
 @app.get("/health", summary="健康检查")
 async def health_check():
-    """API健康检查"""
+    """API健康检查(模型服务熔断时状态为degraded,其他接口仍可用)"""
+    model_provider = ai_service.status()
     return {
-        "status": "healthy",
+        "status": "healthy" if model_provider["circuit"]["state"] == STATE_CLOSED else "degraded",
         "version": "3.0.0",
-        "service": "作文评分系统"
+        "service": "作文评分系统",
+        "model_provider": model_provider
     }
 
 
+# 监控指标
+@app.get("/metrics", summary="Prometheus监控指标", include_in_schema=False)
+async def metrics():
+    """返回Prometheus格式的监控指标"""
+    content, content_type = metrics_payload()
+    return Response(content=content, media_type=content_type)
+
+
 # 应用启动事件
 @app.on_event("startup")
 async def startup_event():
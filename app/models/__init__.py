@@ -7,10 +7,13 @@ from app.models.grade import Grade
 from app.models.genre import Genre
 from app.models.prompt import Prompt
 from app.models.batch import Batch
+from app.models.batch_score_stats import BatchScoreStats
 from app.models.essay import Essay
 from app.models.evaluation import Evaluation
 from app.models.score import Score
 from app.models.feedback import Feedback
+from app.models.idempotency import IdempotencyRecord
+from app.models.grading_job import GradingJob
 
 __all__ = [
     "BaseModel",
@@ -19,8 +22,11 @@ __all__ = [
     "Genre",
     "Prompt",
     "Batch",
+    "BatchScoreStats",
     "Essay",
     "Evaluation",
     "Score",
     "Feedback",
+    "IdempotencyRecord",
+    "GradingJob",
 ]
@@ -2,7 +2,7 @@
 数据库模型基类
 包含所有表的通用字段
 """
-from sqlalchemy import Column, Integer, DateTime
+from sqlalchemy import Column, Integer, DateTime, String
 from sqlalchemy.dialects.mysql import TINYINT
 from sqlalchemy.sql import func
 from app.database import Base
@@ -27,3 +27,16 @@ class BaseModel(Base):
         onupdate=func.now(),
         comment='更新时间'
     )
+
+
+class ModelUsageMixin:
+    """
+    模型调用记录字段(评价表和评分表共用)
+    用户手动评分时为空
+    """
+    model_name = Column(String(100), comment='模型名称')
+    prompt_tokens = Column(Integer, comment='输入token数')
+    completion_tokens = Column(Integer, comment='输出token数')
+    cached_tokens = Column(Integer, comment='命中服务商提示词缓存的输入token数')
+    latency_ms = Column(Integer, comment='模型调用耗时(毫秒)')
+    retry_count = Column(Integer, default=0, comment='重试次数')
@@ -16,6 +16,7 @@ class Batch(BaseModel):
     grade_id = Column(Integer, ForeignKey('composition_grades.id'), comment='年级ID')
     suggested_genre_id = Column(Integer, ForeignKey('composition_genres.id'), comment='建议文体ID')
     essay_count = Column(Integer, default=0, comment='该批次作文数量')
+    fingerprint = Column(String(64), comment='题目和要求的SHA-256(复用批次时按此查找,已删除的批次置空)')
 
     # 关联关系
     grade = relationship("Grade", backref="batches")
@@ -25,6 +26,7 @@ class Batch(BaseModel):
     __table_args__ = (
         Index('idx_directory', 'directory_name'),
         Index('idx_grade', 'grade_id'),
+        Index('uk_fingerprint', 'fingerprint', unique=True),
         {'comment': '作文批次表'}
     )
 
@@ -0,0 +1,45 @@
+"""
+批次评分统计模型
+每个批次一行,保存计入统计的评分(最新评价的默认评分)的累加值,评分写入或默认评分变化时增量更新,
+均分、标准差由累加值计算,批次列表接口直接读取,不需要扫描评分表
+"""
+from sqlalchemy import Column, Integer, Float, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from app.models.base import BaseModel
+
+
+class BatchScoreStats(BaseModel):
+    """批次评分统计表(总分按作文分制换算为百分制)"""
+    __tablename__ = 'composition_batch_score_stats'
+
+    batch_id = Column(Integer, ForeignKey('composition_batches.id'), nullable=False, comment='批次ID')
+    score_count = Column(Integer, nullable=False, default=0, comment='计入统计的评分数')
+    total_sum = Column(Float, nullable=False, default=0, comment='总分(百分制)之和')
+    total_sq_sum = Column(Float, nullable=False, default=0, comment='总分(百分制)平方和')
+    bucket_0 = Column(Integer, nullable=False, default=0, comment='总分[0,10)的评分数')
+    bucket_1 = Column(Integer, nullable=False, default=0, comment='总分[10,20)的评分数')
+    bucket_2 = Column(Integer, nullable=False, default=0, comment='总分[20,30)的评分数')
+    bucket_3 = Column(Integer, nullable=False, default=0, comment='总分[30,40)的评分数')
+    bucket_4 = Column(Integer, nullable=False, default=0, comment='总分[40,50)的评分数')
+    bucket_5 = Column(Integer, nullable=False, default=0, comment='总分[50,60)的评分数')
+    bucket_6 = Column(Integer, nullable=False, default=0, comment='总分[60,70)的评分数')
+    bucket_7 = Column(Integer, nullable=False, default=0, comment='总分[70,80)的评分数')
+    bucket_8 = Column(Integer, nullable=False, default=0, comment='总分[80,90)的评分数')
+    bucket_9 = Column(Integer, nullable=False, default=0, comment='总分[90,100]的评分数')
+    dimension_count = Column(Integer, nullable=False, default=0, comment='有完整维度分数的评分数')
+    theme_and_intent_sum = Column(Float, nullable=False, default=0, comment='中心立意分数之和')
+    language_expression_sum = Column(Float, nullable=False, default=0, comment='语言表达分数之和')
+    structure_sum = Column(Float, nullable=False, default=0, comment='篇章结构分数之和')
+    content_selection_sum = Column(Float, nullable=False, default=0, comment='文章选材分数之和')
+    emotion_and_content_sum = Column(Float, nullable=False, default=0, comment='内容情感分数之和')
+
+    # 关联关系
+    batch = relationship("Batch")
+
+    __table_args__ = (
+        Index('uk_batch', 'batch_id', unique=True),
+        {'comment': '批次评分统计表'}
+    )
+
+    def __repr__(self):
+        return f"<BatchScoreStats(batch_id={self.batch_id}, count={self.score_count})>"
@@ -29,6 +29,9 @@ class Essay(BaseModel):
         Index('idx_batch', 'batch_id'),
         Index('idx_student', 'student_name'),
         Index('idx_score_system', 'score_system'),
+        # 作文列表: 按批次筛选(或不筛选)后按创建时间倒序分页
+        Index('idx_batch_status_created', 'batch_id', 'status', 'create_date'),
+        Index('idx_status_created', 'status', 'create_date'),
         {'comment': '作文表'}
     )
 
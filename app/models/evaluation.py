@@ -4,10 +4,10 @@
 from sqlalchemy import Column, String, Text, Integer, Float, ForeignKey, Index
 from sqlalchemy.dialects.mysql import TINYINT
 from sqlalchemy.orm import relationship
-from app.models.base import BaseModel
+from app.models.base import BaseModel, ModelUsageMixin
 
 
-class Evaluation(BaseModel):
+class Evaluation(BaseModel, ModelUsageMixin):
     """评价表"""
     __tablename__ = 'composition_evaluations'
 
@@ -36,6 +36,8 @@ class Evaluation(BaseModel):
         Index('idx_essay', 'essay_id'),
         Index('idx_user', 'user_phone'),
         Index('idx_latest', 'essay_id', 'is_latest'),
+        # 作文的评价记录按创建时间倒序,评价次数和最新评价时间只读索引
+        Index('idx_essay_status_created', 'essay_id', 'status', 'create_date'),
         {'comment': '评价表'}
     )
 
@@ -0,0 +1,38 @@
+"""
+离线批量评分任务模型
+记录提交到模型服务商Batch接口的评价/评分任务,结果导入后标记为已导入
+"""
+from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from app.models.base import BaseModel
+
+
+class GradingJob(BaseModel):
+    """离线批量评分任务表"""
+    __tablename__ = 'composition_grading_jobs'
+
+    provider = Column(String(50), nullable=False, comment='服务商(openai)')
+    provider_job_id = Column(String(100), nullable=False, comment='服务商任务ID')
+    stage = Column(String(20), nullable=False, comment='阶段(analyze/score)')
+    prompt_id = Column(Integer, ForeignKey('composition_prompts.id'), nullable=False, comment='使用的提示词ID')
+    model_name = Column(String(100), comment='模型名称')
+    user_phone = Column(String(11), ForeignKey('composition_users.phone'), nullable=False, comment='结果记录的评价人/评分人手机号')
+    request_count = Column(Integer, default=0, comment='请求数')
+    succeeded_count = Column(Integer, default=0, comment='成功导入数')
+    failed_count = Column(Integer, default=0, comment='失败数(服务商报错或结果无法解析)')
+    job_status = Column(String(20), nullable=False, default='submitted', comment='任务状态(submitted/in_progress/completed/failed/cancelled/expired/ingested)')
+    error_message = Column(Text, comment='错误信息')
+    completed_at = Column(DateTime, comment='服务商完成时间')
+    ingested_at = Column(DateTime, comment='结果导入时间')
+
+    # 关联关系
+    prompt = relationship("Prompt")
+
+    __table_args__ = (
+        Index('idx_provider_job', 'provider', 'provider_job_id'),
+        Index('idx_job_status', 'job_status'),
+        {'comment': '离线批量评分任务表'}
+    )
+
+    def __repr__(self):
+        return f"<GradingJob(id={self.id}, stage={self.stage}, status={self.job_status})>"
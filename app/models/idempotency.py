@@ -0,0 +1,29 @@
+"""
+幂等键模型
+记录带Idempotency-Key请求头的POST请求结果,重试时直接返回保存的响应
+"""
+from sqlalchemy import Column, String, Text, Integer, Index, UniqueConstraint
+from sqlalchemy.dialects.mysql import MEDIUMTEXT
+from app.models.base import BaseModel
+
+
+class IdempotencyRecord(BaseModel):
+    """幂等键表"""
+    __tablename__ = 'composition_idempotency_keys'
+
+    idempotency_key = Column(String(128), nullable=False, comment='客户端提供的幂等键')
+    method = Column(String(10), nullable=False, comment='请求方法')
+    path = Column(String(255), nullable=False, comment='请求路径')
+    request_hash = Column(String(64), nullable=False, comment='请求内容哈希(SHA-256)')
+    status_code = Column(Integer, comment='响应状态码(为空表示处理中)')
+    content_type = Column(String(100), comment='响应Content-Type')
+    response_body = Column(Text().with_variant(MEDIUMTEXT(), 'mysql'), comment='响应内容')
+
+    __table_args__ = (
+        UniqueConstraint('idempotency_key', 'method', 'path', name='uk_idempotency_key'),
+        Index('idx_create_date', 'create_date'),
+        {'comment': '幂等键表'}
+    )
+
+    def __repr__(self):
+        return f"<IdempotencyRecord(key={self.idempotency_key}, path={self.path}, status={self.status_code})>"
@@ -26,6 +26,11 @@ class Prompt(BaseModel):
     __table_args__ = (
         Index('idx_grade_genre', 'grade_id', 'genre_id', 'prompt_type'),
         Index('idx_created_by', 'created_by'),
+        # 提示词列表: 按年级/文体/类型筛选后按创建时间倒序
+        Index('idx_grade_genre_type_status', 'grade_id', 'genre_id', 'prompt_type', 'status', 'create_date'),
+        Index('idx_status_created', 'status', 'create_date'),
+        # 各类型的默认提示词(MySQL不支持部分索引,默认提示词在索引中是连续的一小段)
+        Index('idx_type_default', 'prompt_type', 'is_default', 'status'),
         {'comment': '提示词表'}
     )
 
@@ -4,10 +4,10 @@
 from sqlalchemy import Column, String, Text, Integer, Float, ForeignKey, Index
 from sqlalchemy.dialects.mysql import TINYINT
 from sqlalchemy.orm import relationship
-from app.models.base import BaseModel
+from app.models.base import BaseModel, ModelUsageMixin
 
 
-class Score(BaseModel):
+class Score(BaseModel, ModelUsageMixin):
     """评分表"""
     __tablename__ = 'composition_scores'
 
@@ -27,6 +27,8 @@ class Score(BaseModel):
     __table_args__ = (
         Index('idx_evaluation', 'evaluation_id'),
         Index('idx_user', 'user_phone'),
+        # 评价的评分记录按创建时间倒序
+        Index('idx_evaluation_status_created', 'evaluation_id', 'status', 'create_date'),
         {'comment': '评分表'}
     )
 
@@ -2,7 +2,14 @@
 Pydantic模式导出
 """
 from app.schemas.user import UserLogin, UserResponse
-from app.schemas.batch import BatchCreate, BatchResponse, BatchListResponse
+from app.schemas.batch import (
+    BatchCreate,
+    BatchResponse,
+    BatchListResponse,
+    BatchScoreStatsResponse,
+    BatchRescaleRequest,
+    BatchRescaleResponse,
+)
 from app.schemas.essay import EssayCreate, EssayListResponse, EssayListItem, EssayDetailResponse
 from app.schemas.evaluation import (
     EvaluationAnalyzeRequest,
@@ -22,9 +29,13 @@ from app.schemas.feedback import (
     FeedbackCustomScoreRequest,
     FeedbackCommentRequest,
     FeedbackIssueMarkRequest,
+    FeedbackBulkRequest,
+    FeedbackBulkResponse,
     FeedbackResponse,
     FeedbackListResponse
 )
+from app.schemas.usage import UsageStatsItem, UsageStatsResponse
+from app.schemas.model_output import AnalysisOutput, ScoreOutput, GenreOutput
 from app.schemas.common import Response, ErrorResponse
 
 __all__ = [
@@ -33,6 +44,9 @@ __all__ = [
     "BatchCreate",
     "BatchResponse",
     "BatchListResponse",
+    "BatchScoreStatsResponse",
+    "BatchRescaleRequest",
+    "BatchRescaleResponse",
     "EssayCreate",
     "EssayListResponse",
     "EssayListItem",
@@ -53,6 +67,8 @@ __all__ = [
     "FeedbackCustomScoreRequest",
     "FeedbackCommentRequest",
     "FeedbackIssueMarkRequest",
+    "FeedbackBulkRequest",
+    "FeedbackBulkResponse",
     "FeedbackResponse",
     "FeedbackListResponse",
     "Response",
@@ -60,5 +76,10 @@ __all__ = [
     "AIScoreRequest",
     "AIScoreWithAnalysisRequest",
     "CompleteAnalysisRequest",
-    "CompleteAnalysisResponse"
+    "CompleteAnalysisResponse",
+    "UsageStatsItem",
+    "UsageStatsResponse",
+    "AnalysisOutput",
+    "ScoreOutput",
+    "GenreOutput"
 ]
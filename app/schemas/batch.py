@@ -3,7 +3,7 @@
 """
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Literal, Optional
 
 
 class BatchBase(BaseModel):
@@ -20,12 +20,22 @@ class BatchCreate(BatchBase):
     pass
 
 
+class BatchScoreStatsResponse(BaseModel):
+    """批次评分统计(总分按作文分制换算为百分制)"""
+    score_count: int = Field(..., description="计入统计的评分数(最新评价的默认评分)")
+    mean: float = Field(..., description="平均分")
+    stddev: float = Field(..., description="标准差")
+    histogram: List[int] = Field(..., description="分数段人数(每段10分,最后一段包含100分)")
+    dimension_means: Dict[str, float] = Field(default_factory=dict, description="各维度平均分")
+
+
 class BatchResponse(BatchBase):
     """批次响应"""
     id: int
     essay_count: int
     grade_name: Optional[str] = None
     suggested_genre_name: Optional[str] = None
+    score_stats: Optional[BatchScoreStatsResponse] = Field(None, description="评分统计(没有评分时为空)")
     create_date: datetime
 
     class Config:
@@ -36,3 +46,21 @@ class BatchListResponse(BaseModel):
     """批次列表响应"""
     batches: list[BatchResponse]
     total: int
+
+
+class BatchRescaleRequest(BaseModel):
+    """批次分制切换请求"""
+    score_system: Literal[10, 40] = Field(..., description="新分制(10或40)")
+    rounding: Literal["tenth", "integer", "floor"] = Field(
+        "floor", description="总分取整方式(floor: 舍去小数,与新评分一致; tenth: 保留一位小数; integer: 四舍五入到整数)"
+    )
+
+
+class BatchRescaleResponse(BaseModel):
+    """批次分制切换响应"""
+    success: bool
+    batch_id: int
+    score_system: int
+    essays_updated: int = Field(..., description="修改分制的作文数")
+    scores_updated: int = Field(..., description="重算总分的评分数")
+    message: str
@@ -25,7 +25,7 @@ class EssayListItem(BaseModel):
     id: int
     batch_id: int
     batch_title: str
-    essay_image_path: str
+    essay_image_path: Optional[str]
     student_name: Optional[str]
     word_count: int
     score_system: int
@@ -3,7 +3,7 @@
 """
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Annotated, Dict, Any, List, Literal, Optional, Union
 
 
 class FeedbackComparisonRequest(BaseModel):
@@ -46,6 +46,49 @@ class FeedbackIssueMarkRequest(BaseModel):
     suggested_fix: Optional[str] = Field(None, description="建议修改")
 
 
+class FeedbackBulkComparisonItem(FeedbackComparisonRequest):
+    """批量提交: 评分对比反馈"""
+    feedback_type: Literal["comparison"]
+
+
+class FeedbackBulkCustomScoreItem(FeedbackCustomScoreRequest):
+    """批量提交: 自定义评分反馈"""
+    feedback_type: Literal["custom_score"]
+
+
+class FeedbackBulkCommentItem(FeedbackCommentRequest):
+    """批量提交: 文字点评反馈"""
+    feedback_type: Literal["comment"]
+
+
+class FeedbackBulkIssueMarkItem(FeedbackIssueMarkRequest):
+    """批量提交: 问题标注反馈"""
+    feedback_type: Literal["issue_mark"]
+
+
+FeedbackBulkItem = Annotated[
+    Union[
+        FeedbackBulkComparisonItem,
+        FeedbackBulkCustomScoreItem,
+        FeedbackBulkCommentItem,
+        FeedbackBulkIssueMarkItem
+    ],
+    Field(discriminator="feedback_type")
+]
+
+
+class FeedbackBulkRequest(BaseModel):
+    """批量提交反馈请求(每项与单条接口的请求相同,另加feedback_type)"""
+    feedbacks: List[FeedbackBulkItem] = Field(..., min_length=1, max_length=500, description="反馈列表")
+
+
+class FeedbackBulkResponse(BaseModel):
+    """批量提交反馈响应"""
+    success: bool
+    created: int
+    message: str = "反馈提交成功"
+
+
 class FeedbackResponse(BaseModel):
     """反馈响应"""
     success: bool
@@ -0,0 +1,52 @@
+"""
+模型输出的Pydantic模式
+按阶段校验模型返回的JSON,校验失败时由ai_service发起修复请求
+"""
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field, model_validator
+from typing import Any, Dict, List, Optional
+
+
+class AnalysisOutput(BaseModel):
+    """评价阶段输出(不同版本提示词的字段不同,只校验已出现字段的类型)"""
+    model_config = ConfigDict(extra="allow")
+
+    overall_evaluation: Optional[Dict[str, Any]] = None
+    requirement_evaluation: Optional[List[Any]] = None
+    typos: Optional[List[Any]] = None
+    punctuation_errors: Optional[List[Any]] = None
+    grammar_errors: Optional[List[Any]] = None
+    highlights: Optional[List[Any]] = None
+
+
+class ScoreOutput(BaseModel):
+    """评分阶段输出(五个维度分数,兼容中文键名,统一转换为英文字段)"""
+    model_config = ConfigDict(extra="allow")
+
+    theme_and_intent: float = Field(..., ge=0, le=20, validation_alias=AliasChoices("theme_and_intent", "中心立意"))
+    language_expression: float = Field(..., ge=0, le=25, validation_alias=AliasChoices("language_expression", "语言表达"))
+    structure: float = Field(..., ge=0, le=15, validation_alias=AliasChoices("structure", "篇章结构"))
+    content_selection: float = Field(..., ge=0, le=15, validation_alias=AliasChoices("content_selection", "文章选材"))
+    emotion_and_content: float = Field(..., ge=0, le=25, validation_alias=AliasChoices("emotion_and_content", "内容情感"))
+
+    @model_validator(mode="before")
+    @classmethod
+    def _lift_dimensions(cls, data: Any) -> Any:
+        """兼容 {"total_score", "dimensions": {维度: {"score", "max_score"}}} 结构,顶层的维度分数优先"""
+        if isinstance(data, dict) and isinstance(data.get("dimensions"), dict):
+            lifted = {
+                key: value.get("score") if isinstance(value, dict) else value
+                for key, value in data["dimensions"].items()
+            }
+            data = {**lifted, **data}
+        return data
+
+
+class GenreOutput(BaseModel):
+    """文体判断输出"""
+    model_config = ConfigDict(extra="allow")
+
+    genre_code: str
+    genre_name: str
+    confidence: float = Field(0.8, ge=0, le=1)
+    grade_level: int = 7
+    reasoning: Optional[str] = None
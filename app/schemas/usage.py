@@ -0,0 +1,29 @@
+"""
+模型调用统计相关的Pydantic模式
+"""
+from pydantic import BaseModel
+from typing import Optional
+
+
+class UsageStatsItem(BaseModel):
+    """单个分组的调用统计"""
+    stage: str  # analyze/score
+    group_key: str  # 提示词ID / 批次ID / 日期
+    group_name: Optional[str] = None  # 提示词版本名 / 批次题目
+    calls: int
+    prompt_tokens: int
+    completion_tokens: int
+    cached_tokens: int
+    cache_hit_ratio: float  # 输入token中命中提示词缓存的比例
+    avg_prompt_tokens: float
+    avg_completion_tokens: float
+    avg_latency_ms: float
+    max_latency_ms: int
+    retries: int
+    avg_word_count: float
+
+
+class UsageStatsResponse(BaseModel):
+    """调用统计响应"""
+    group_by: str
+    items: list[UsageStatsItem]
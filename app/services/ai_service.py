@@ -2,31 +2,174 @@
 AI服务层
 调用OpenAI API进行作文评价和评分
 """
-from typing import Dict, Any
-from openai import OpenAI
+from typing import Dict, Any, List, Tuple, Union
 from app.config import settings
 from app.utils.logger import logger
-import json
+from app.services.prompt_builder import (
+    SCORE_SYSTEM_INSTRUCTION,
+    build_analyze_messages,
+    build_genre_messages,
+    build_score_messages,
+)
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.model_router import EmptyModelResponse, ModelTarget, build_model_router, is_failover_error
+from app.services.prompt_templates import CompiledPrompt
+from app.services.response_parser import ResponseParseError, build_repair_messages, parse_model_output
+from app.utils.metrics import (
+    MODEL_OUTPUT_REPAIRS,
+    ModelCallRecord,
+    STAGE_ANALYZE,
+    STAGE_GENRE,
+    STAGE_SCORE,
+    prompt_version_label,
+    track_model_call,
+)
 
 
 class AIService:
     """AI服务类"""
 
     def __init__(self):
-        """初始化OpenAI客户端"""
-        self.client = OpenAI(
-            base_url=settings.OPENAI_BASE_URL,
-            api_key=settings.OPENAI_API_KEY
+        """初始化模型路由(主目标和备用目标各自的OpenAI客户端)和熔断器"""
+        self.router = build_model_router(settings)
+        # 所有目标都失败才计为一次失败(请求本身有问题的400/422不计)
+        self.breaker = CircuitBreaker(
+            "model_provider",
+            failure_rate=settings.CIRCUIT_FAILURE_RATE,
+            min_calls=settings.CIRCUIT_MIN_CALLS,
+            window_seconds=settings.CIRCUIT_WINDOW_SECONDS,
+            open_seconds=settings.CIRCUIT_OPEN_SECONDS,
+            half_open_probes=settings.CIRCUIT_HALF_OPEN_PROBES,
+            is_failure=is_failover_error
         )
-        self.model = settings.OPENAI_MODEL
+
+    @property
+    def client(self):
+        """主目标的客户端"""
+        return self.router.primary.client
+
+    @client.setter
+    def client(self, value) -> None:
+        self.router.primary.client = value
+
+    @property
+    def model(self) -> str:
+        """主目标的模型"""
+        return self.router.primary.model
+
+    @model.setter
+    def model(self, value: str) -> None:
+        self.router.primary.model = value
+
+    def chat_completion(
+        self,
+        stage: str,
+        messages: List[Dict[str, Any]],
+        prompt_version: str = None,
+        **kwargs
+    ) -> Tuple[Any, ModelCallRecord]:
+        """
+        调用chat completions接口并记录耗时、token数、重试次数和错误数
+        经模型路由发出,失败时切换到备用目标(开启对冲时可能同时发出两个请求)
+        熔断中直接抛出CircuitOpenError,不发出请求
+
+        Args:
+            stage: 调用阶段(analyze/genre/score)
+            messages: 消息列表
+            prompt_version: 提示词版本(用于监控指标分组)
+            **kwargs: 透传给接口的其他参数
+
+        Returns:
+            (接口响应, 调用记录)
+        """
+        version = prompt_version or prompt_version_label()
+
+        def attempt(target: ModelTarget):
+            with track_model_call(stage, version, target.model) as call:
+                raw_response = target.client.chat.completions.with_raw_response.create(
+                    model=target.model,
+                    messages=messages,
+                    **kwargs
+                )
+                call.retry_count = getattr(raw_response, "retries_taken", 0)
+                response = raw_response.parse()
+                call.model = response.model or target.model
+                call.record_usage(response.usage)
+                if not response.choices or not response.choices[0].message.content:
+                    raise EmptyModelResponse(f"模型返回空内容: {target.name}")
+            return response, call
+
+        with self.breaker.guard():
+            (response, call), route = self.router.call(stage, attempt)
+        if route.attempts > 1:
+            # 切换目标和对冲请求计为重试,耗时按整个调用计算
+            call.retry_count += route.attempts - 1
+            call.latency_ms = int(route.elapsed * 1000)
+        return response, call
+
+    def parse_response(
+        self,
+        stage: str,
+        text: str,
+        call: ModelCallRecord = None,
+        prompt_version: str = None
+    ) -> Dict[str, Any]:
+        """
+        解析模型输出的JSON并按阶段模式校验
+        失败时发起一次修复请求(只发送原始输出和错误信息),修复请求的用量合并到call
+
+        Args:
+            stage: 调用阶段(analyze/genre/score)
+            text: 模型输出原文
+            call: 原请求的调用记录
+            prompt_version: 提示词版本(用于监控指标分组)
+
+        Returns:
+            校验后的结果字典
+
+        Raises:
+            ResponseParseError: 修复后仍无法解析
+        """
+        try:
+            return parse_model_output(stage, text)
+        except ResponseParseError as e:
+            logger.warning(f"模型输出解析失败,发起修复请求: stage={stage}, 错误: {str(e)}")
+            first_error = e
+
+        response, repair_call = self.chat_completion(
+            f"{stage}_repair",
+            messages=build_repair_messages(stage, text, str(first_error)),
+            prompt_version=prompt_version or (call.prompt_version if call else None),
+            temperature=0,
+            response_format={"type": "json_object"}
+        )
+        if call is not None:
+            call.merge(repair_call)
+
+        try:
+            result = parse_model_output(stage, response.choices[0].message.content)
+        except ResponseParseError as e:
+            MODEL_OUTPUT_REPAIRS.labels(stage, "failed").inc()
+            raise ResponseParseError(f"{str(first_error)}; 修复后仍失败: {str(e)}", text) from e
+
+        MODEL_OUTPUT_REPAIRS.labels(stage, "fixed").inc()
+        return result
+
+    def status(self) -> Dict[str, Any]:
+        """模型服务状态: 熔断状态和各路由目标的健康情况"""
+        return {
+            "circuit": self.breaker.status(),
+            "targets": self.router.status()
+        }
 
     def analyze_essay(
         self,
         essay_content: str,
         essay_title: str,
         essay_requirement: str,
-        prompt: str
-    ) -> Dict[str, Any]:
+        prompt: Union[str, CompiledPrompt],
+        prompt_version: str = None
+    ) -> Tuple[Dict[str, Any], ModelCallRecord]:
         """
         作文评价
 
@@ -34,40 +177,37 @@ class AIService:
             essay_content: 作文内容
             essay_title: 作文题目
             essay_requirement: 作文要求
-            prompt: 评价提示词
+            prompt: 评价提示词(编译后的模板或原文)
+            prompt_version: 提示词版本
 
         Returns:
-            评价结果字典
+            (评价结果字典, 模型调用记录)
         """
         try:
-            # 构建完整提示词
-            full_prompt = f"""{prompt}
-
-作文题目: {essay_title}
-
-作文要求: {essay_requirement}
-
-学生作文:
-{essay_content}
-"""
+            # 构建消息(固定前缀在前,本篇作文在后)
+            messages = build_analyze_messages(
+                prompt_content=prompt,
+                essay_content=essay_content,
+                essay_title=essay_title,
+                essay_requirement=essay_requirement
+            )
 
             logger.info(f"调用AI评价作文,长度: {len(essay_content)}")
 
             # 调用OpenAI API
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "user", "content": full_prompt}
-                ],
+            response, call = self.chat_completion(
+                STAGE_ANALYZE,
+                messages=messages,
+                prompt_version=prompt_version,
                 temperature=0.7,
                 response_format={"type": "json_object"}
             )
 
             # 解析响应
-            result = json.loads(response.choices[0].message.content)
+            result = self.parse_response(STAGE_ANALYZE, response.choices[0].message.content, call)
             logger.info("AI评价完成")
 
-            return result
+            return result, call
 
         except Exception as e:
             logger.error(f"AI评价失败: {str(e)}")
@@ -89,41 +229,16 @@ class AIService:
             文体判断结果
         """
         try:
-            prompt = """请分析这篇作文的文体类型和适合的年级。
-
-请以JSON格式返回结果:
-{
-    "genre_code": "narrative或argumentative",
-    "genre_name": "记叙文或议论文",
-    "confidence": 0.0-1.0的置信度,
-    "grade_level": 7或8或9,
-    "reasoning": "判断理由"
-}
-
-作文要求:
-{requirement}
-
-作文内容:
-{content}
-"""
-
-            full_prompt = prompt.format(
-                requirement=essay_requirement,
-                content=essay_content[:1000]  # 只取前1000字分析
-            )
-
             logger.info("调用AI判断文体")
 
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "user", "content": full_prompt}
-                ],
+            response, call = self.chat_completion(
+                STAGE_GENRE,
+                messages=build_genre_messages(essay_content, essay_requirement),
                 temperature=0.3,
                 response_format={"type": "json_object"}
             )
 
-            result = json.loads(response.choices[0].message.content)
+            result = self.parse_response(STAGE_GENRE, response.choices[0].message.content, call)
             logger.info(f"文体判断完成: {result.get('genre_name')}, 置信度: {result.get('confidence')}")
 
             return result
@@ -138,9 +253,10 @@ class AIService:
         essay_title: str,
         essay_requirement: str,
         evaluation_result: Dict[str, Any],
-        prompt: str,
-        score_system: int
-    ) -> Dict[str, Any]:
+        prompt: Union[str, CompiledPrompt],
+        score_system: int,
+        prompt_version: str = None
+    ) -> Tuple[Dict[str, Any], ModelCallRecord]:
         """
         作文评分
 
@@ -149,44 +265,38 @@ class AIService:
             essay_title: 作文题目
             essay_requirement: 作文要求
             evaluation_result: 评价结果
-            prompt: 评分提示词
+            prompt: 评分提示词(编译后的模板或原文)
             score_system: 分制(10或40)
+            prompt_version: 提示词版本
 
         Returns:
-            评分结果字典(已转换为对应分制)
+            (各维度分数(已按评分模式校验,总分由调用方按评分量表换算为对应分制), 模型调用记录)
         """
         try:
-            # 构建完整提示词
-            full_prompt = f"""{prompt}
-
-作文题目: {essay_title}
-
-作文要求: {essay_requirement}
-
-评价结果:
-{json.dumps(evaluation_result, ensure_ascii=False, indent=2)}
-
-学生作文:
-{essay_content}
-
-请注意: 最终评分需要按照{score_system}分制计算总分。
-"""
+            # 构建消息(评分提示词为固定前缀,作文和评价结果在后)
+            messages = build_score_messages(
+                prompt_content=prompt,
+                essay_content=essay_content,
+                essay_title=essay_title,
+                essay_requirement=essay_requirement,
+                analysis=evaluation_result,
+                instruction=SCORE_SYSTEM_INSTRUCTION.format(score_system=score_system)
+            )
 
             logger.info(f"调用AI评分,分制: {score_system}")
 
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "user", "content": full_prompt}
-                ],
+            response, call = self.chat_completion(
+                STAGE_SCORE,
+                messages=messages,
+                prompt_version=prompt_version,
                 temperature=0.7,
                 response_format={"type": "json_object"}
             )
 
-            result = json.loads(response.choices[0].message.content)
-            logger.info(f"AI评分完成: {result.get('total_score')}/{score_system}")
+            result = self.parse_response(STAGE_SCORE, response.choices[0].message.content, call)
+            logger.info(f"AI评分完成,分制: {score_system}")
 
-            return result
+            return result, call
 
         except Exception as e:
             logger.error(f"AI评分失败: {str(e)}")
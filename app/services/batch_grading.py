@@ -0,0 +1,444 @@
+"""
+离线批量评分
+提示词调整后重新评价/评分历史作文不需要实时返回,通过服务商的Batch接口提交(价格更低,不占实时接口的限流额度):
+1. 把选中作文的评价/评分请求序列化为JSONL
+2. 通过BatchProvider提交到服务商
+3. 轮询任务状态
+4. 任务完成后批量解析结果,写入评价表/评分表
+"""
+import io
+import json
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from openai.types.chat import ChatCompletion
+from sqlalchemy.orm import Session, joinedload
+
+from app.models import Essay, Evaluation, GradingJob, Prompt, Score
+from app.services.ai_service import ai_service
+from app.services.batch_stats import track_batch_stats
+from app.services.prompt_builder import SCORE_SYSTEM_INSTRUCTION, build_analyze_messages, build_score_messages
+from app.services.prompt_templates import compile_prompt
+from app.services.response_parser import ResponseParseError, parse_model_output
+from app.utils import logger
+from app.utils.metrics import STAGE_ANALYZE, STAGE_SCORE, ModelCallRecord, prompt_version_label
+from app.utils.score_converter import DEFAULT_RUBRIC
+
+# 任务状态
+JOB_SUBMITTED = "submitted"
+JOB_IN_PROGRESS = "in_progress"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+JOB_EXPIRED = "expired"
+JOB_INGESTED = "ingested"
+
+# 服务商不再更新的状态
+FINAL_STATUSES = {JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED, JOB_EXPIRED, JOB_INGESTED}
+
+# 作文没有评价时新评价使用的(确认文体ID, 确认年级ID)
+DEFAULT_CONFIRMED = (1, 1)
+
+# 请求参数与实时接口(ai_service)一致
+STAGE_REQUEST_PARAMS = {
+    STAGE_ANALYZE: {"temperature": 0.7, "response_format": {"type": "json_object"}},
+    STAGE_SCORE: {"temperature": 0.7, "response_format": {"type": "json_object"}},
+}
+
+
+class BatchJobState:
+    """服务商任务状态"""
+
+    def __init__(self, status: str, total: int = 0, completed: int = 0, failed: int = 0, error: Optional[str] = None):
+        self.status = status
+        self.total = total
+        self.completed = completed
+        self.failed = failed
+        self.error = error
+
+
+class BatchResult:
+    """单个请求的结果"""
+
+    def __init__(self, custom_id: str, response: Optional[ChatCompletion] = None, error: Optional[str] = None):
+        self.custom_id = custom_id
+        self.response = response
+        self.error = error
+
+
+class BatchProvider(ABC):
+    """服务商Batch接口(子类实现提交、查询、下载结果)"""
+
+    name = ""
+
+    @abstractmethod
+    def submit(self, requests: List[Dict[str, Any]], metadata: Optional[Dict[str, str]] = None) -> str:
+        """提交请求,返回服务商任务ID"""
+
+    @abstractmethod
+    def poll(self, job_id: str) -> BatchJobState:
+        """查询任务状态"""
+
+    @abstractmethod
+    def fetch_results(self, job_id: str) -> Iterator[BatchResult]:
+        """读取已完成任务的全部结果(含失败的请求)"""
+
+    @abstractmethod
+    def cancel(self, job_id: str) -> None:
+        """取消任务"""
+
+
+class OpenAIBatchProvider(BatchProvider):
+    """OpenAI Batch接口(/v1/files + /v1/batches, 兼容该接口的服务商同样可用)"""
+
+    name = "openai"
+
+    # OpenAI任务状态 → 本地任务状态
+    STATUS_MAP = {
+        "validating": JOB_IN_PROGRESS,
+        "in_progress": JOB_IN_PROGRESS,
+        "finalizing": JOB_IN_PROGRESS,
+        "cancelling": JOB_IN_PROGRESS,
+        "completed": JOB_COMPLETED,
+        "failed": JOB_FAILED,
+        "cancelled": JOB_CANCELLED,
+        "expired": JOB_EXPIRED,
+    }
+
+    def __init__(self, client=None, completion_window: str = "24h"):
+        """
+        Args:
+            client: OpenAI客户端,默认使用ai_service的客户端
+            completion_window: 服务商完成任务的时间窗口
+        """
+        self._client = client
+        self.completion_window = completion_window
+
+    @property
+    def client(self):
+        return self._client or ai_service.client
+
+    def submit(self, requests: List[Dict[str, Any]], metadata: Optional[Dict[str, str]] = None) -> str:
+        jsonl = "".join(json.dumps(request, ensure_ascii=False) + "\n" for request in requests)
+        input_file = self.client.files.create(
+            file=("grading_batch.jsonl", io.BytesIO(jsonl.encode("utf-8"))),
+            purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window=self.completion_window,
+            metadata=metadata
+        )
+        return batch.id
+
+    def poll(self, job_id: str) -> BatchJobState:
+        batch = self.client.batches.retrieve(job_id)
+        counts = batch.request_counts
+        error = None
+        if batch.errors and batch.errors.data:
+            error = "; ".join(e.message or e.code or "" for e in batch.errors.data)
+        return BatchJobState(
+            status=self.STATUS_MAP.get(batch.status, JOB_IN_PROGRESS),
+            total=counts.total if counts else 0,
+            completed=counts.completed if counts else 0,
+            failed=counts.failed if counts else 0,
+            error=error
+        )
+
+    def fetch_results(self, job_id: str) -> Iterator[BatchResult]:
+        batch = self.client.batches.retrieve(job_id)
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            content = self.client.files.content(file_id).text
+            for line in content.splitlines():
+                if line.strip():
+                    yield self._parse_line(json.loads(line))
+
+    @staticmethod
+    def _parse_line(line: Dict[str, Any]) -> BatchResult:
+        custom_id = line.get("custom_id", "")
+        if line.get("error"):
+            error = line["error"]
+            return BatchResult(custom_id, error=error.get("message") if isinstance(error, dict) else str(error))
+        response = line.get("response") or {}
+        if response.get("status_code") != 200:
+            body = response.get("body") or {}
+            message = (body.get("error") or {}).get("message") if isinstance(body, dict) else None
+            return BatchResult(custom_id, error=f"HTTP {response.get('status_code')}: {message or body}")
+        return BatchResult(custom_id, response=ChatCompletion.model_validate(response["body"]))
+
+    def cancel(self, job_id: str) -> None:
+        self.client.batches.cancel(job_id)
+
+
+def _custom_id(stage: str, record_id: int) -> str:
+    return f"{stage}-{record_id}"
+
+
+def _parse_custom_id(custom_id: str) -> int:
+    return int(custom_id.rsplit("-", 1)[1])
+
+
+def build_batch_requests(
+    db: Session,
+    stage: str,
+    prompt: Prompt,
+    essay_ids: Sequence[int],
+    model: str
+) -> List[Dict[str, Any]]:
+    """
+    构建Batch请求(每行一个chat completion请求)
+    - analyze: 每篇作文一个请求, custom_id为analyze-作文ID
+    - score: 基于每篇作文的最新评价, custom_id为score-评价ID(没有评价的作文跳过)
+    """
+    compiled = compile_prompt(prompt.prompt_content)
+    essays = db.query(Essay).options(joinedload(Essay.batch)).filter(
+        Essay.id.in_(essay_ids), Essay.status == 1
+    ).all()
+
+    latest_evaluations = {}
+    if stage == STAGE_SCORE:
+        latest_evaluations = {
+            evaluation.essay_id: evaluation
+            for evaluation in db.query(Evaluation).filter(
+                Evaluation.essay_id.in_([essay.id for essay in essays]),
+                Evaluation.is_latest == 1,
+                Evaluation.status == 1
+            )
+        }
+
+    requests = []
+    for essay in essays:
+        essay_title = essay.batch.essay_title if essay.batch else ""
+        essay_requirement = essay.batch.essay_requirement if essay.batch else ""
+        if stage == STAGE_ANALYZE:
+            custom_id = _custom_id(stage, essay.id)
+            messages = build_analyze_messages(
+                prompt_content=compiled,
+                essay_content=essay.essay_content,
+                essay_title=essay_title,
+                essay_requirement=essay_requirement,
+                word_count=essay.word_count
+            )
+        else:
+            evaluation = latest_evaluations.get(essay.id)
+            if evaluation is None:
+                logger.warning(f"作文没有评价记录,跳过评分: essay_id={essay.id}")
+                continue
+            custom_id = _custom_id(stage, evaluation.id)
+            messages = build_score_messages(
+                prompt_content=compiled,
+                essay_content=essay.essay_content,
+                essay_title=essay_title,
+                essay_requirement=essay_requirement,
+                word_count=essay.word_count,
+                analysis=json.loads(evaluation.evaluation_result),
+                instruction=SCORE_SYSTEM_INSTRUCTION.format(score_system=essay.score_system)
+            )
+        requests.append({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {"model": model, "messages": messages, **STAGE_REQUEST_PARAMS[stage]}
+        })
+    return requests
+
+
+def submit_job(
+    db: Session,
+    provider: BatchProvider,
+    stage: str,
+    prompt_id: int,
+    essay_ids: Sequence[int],
+    user_phone: str = "system",
+    model: Optional[str] = None
+) -> GradingJob:
+    """
+    提交离线批量任务
+
+    Raises:
+        ValueError: 阶段、提示词不正确或没有可提交的请求
+    """
+    if stage not in STAGE_REQUEST_PARAMS:
+        raise ValueError(f"不支持的阶段: {stage}")
+    prompt = db.query(Prompt).filter_by(id=prompt_id, status=1).first()
+    if not prompt or prompt.prompt_type != stage:
+        raise ValueError(f"提示词不存在或类型不是{stage}: {prompt_id}")
+
+    model = model or ai_service.model
+    requests = build_batch_requests(db, stage, prompt, essay_ids, model)
+    if not requests:
+        raise ValueError("没有可提交的请求")
+
+    provider_job_id = provider.submit(requests, metadata={"stage": stage, "prompt_id": str(prompt_id)})
+    job = GradingJob(
+        provider=provider.name,
+        provider_job_id=provider_job_id,
+        stage=stage,
+        prompt_id=prompt_id,
+        model_name=model,
+        user_phone=user_phone,
+        request_count=len(requests),
+        job_status=JOB_SUBMITTED,
+        status=1
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    logger.info(f"离线批量任务已提交: job_id={job.id}, 服务商任务={provider_job_id}, 阶段={stage}, 请求数={len(requests)}")
+    return job
+
+
+def refresh_job(db: Session, provider: BatchProvider, job: GradingJob) -> GradingJob:
+    """查询服务商任务状态并更新本地记录"""
+    if job.job_status in FINAL_STATUSES:
+        return job
+    state = provider.poll(job.provider_job_id)
+    job.job_status = state.status
+    if state.error:
+        job.error_message = state.error
+    if state.status in FINAL_STATUSES:
+        job.completed_at = datetime.now()
+    db.commit()
+    return job
+
+
+def wait_for_job(
+    db: Session,
+    provider: BatchProvider,
+    job: GradingJob,
+    interval: float = 60,
+    timeout: Optional[float] = None
+) -> GradingJob:
+    """轮询直到任务结束(或超时)"""
+    deadline = time.monotonic() + timeout if timeout else None
+    while refresh_job(db, provider, job).job_status not in FINAL_STATUSES:
+        if deadline and time.monotonic() > deadline:
+            break
+        time.sleep(interval)
+    return job
+
+
+def _score_rows(job: GradingJob, evaluations: Dict[int, Evaluation], parsed: Dict[int, tuple]) -> List[Score]:
+    """由解析后的评分结果构建评分记录(总分按作文分制换算)"""
+    rows = []
+    for evaluation_id, (scores, call) in parsed.items():
+        evaluation = evaluations.get(evaluation_id)
+        if evaluation is None:
+            continue
+        values = DEFAULT_RUBRIC.validate(scores)
+        dimensions = DEFAULT_RUBRIC.dimensions_json(values)
+        total_score = float(DEFAULT_RUBRIC.total(values, evaluation.essay.score_system))
+        rows.append(Score(
+            evaluation_id=evaluation_id,
+            user_phone=job.user_phone,
+            score_prompt_id=job.prompt_id,
+            score_type='ai',
+            total_score=total_score,
+            dimension_scores=json.dumps(dimensions, ensure_ascii=False),
+            is_default=1,
+            status=1,
+            **call.to_columns()
+        ))
+    return rows
+
+
+def ingest_job(db: Session, provider: BatchProvider, job: GradingJob) -> Dict[str, int]:
+    """
+    导入已完成任务的结果
+    - 解析并校验每条结果(不发起修复请求,无法解析的计入失败)
+    - analyze: 批量写入评价并把同一作文之前的评价标记为非最新
+    - score: 批量写入评分并把同一评价之前的默认评分取消
+    两种情况都同步更新批次评分统计
+
+    Returns:
+        {"succeeded": 成功数, "failed": 失败数}
+
+    Raises:
+        ValueError: 任务未完成或已导入
+    """
+    if job.job_status == JOB_INGESTED:
+        raise ValueError(f"任务已导入: job_id={job.id}")
+    if job.job_status != JOB_COMPLETED:
+        raise ValueError(f"任务未完成: job_id={job.id}, 状态={job.job_status}")
+
+    prompt_version = prompt_version_label(job.prompt_id, job.prompt.version_name if job.prompt else None)
+    parsed: Dict[int, tuple] = {}
+    errors: List[str] = []
+    for result in provider.fetch_results(job.provider_job_id):
+        if result.error or result.response is None:
+            errors.append(f"{result.custom_id}: {result.error}")
+            continue
+        try:
+            data = parse_model_output(job.stage, result.response.choices[0].message.content)
+        except ResponseParseError as e:
+            errors.append(f"{result.custom_id}: {str(e)}")
+            continue
+        call = ModelCallRecord(job.stage, prompt_version, result.response.model or job.model_name)
+        call.record_usage(result.response.usage)
+        parsed[_parse_custom_id(result.custom_id)] = (data, call)
+
+    if job.stage == STAGE_ANALYZE:
+        essay_ids = [essay.id for essay in db.query(Essay.id).filter(Essay.id.in_(list(parsed)))]
+        # 沿用之前最新评价中老师确认的文体和年级,没有评价的作文使用默认值
+        confirmed = {
+            row.essay_id: (row.confirmed_genre_id, row.confirmed_grade_id)
+            for row in db.query(
+                Evaluation.essay_id, Evaluation.confirmed_genre_id, Evaluation.confirmed_grade_id
+            ).filter(
+                Evaluation.essay_id.in_(essay_ids),
+                Evaluation.is_latest == 1,
+                Evaluation.status == 1
+            )
+        }
+        with track_batch_stats(db, Evaluation.essay_id.in_(essay_ids)):
+            db.query(Evaluation).filter(
+                Evaluation.essay_id.in_(essay_ids),
+                Evaluation.is_latest == 1
+            ).update({"is_latest": 0}, synchronize_session=False)
+            db.add_all([
+                Evaluation(
+                    essay_id=essay_id,
+                    user_phone=job.user_phone,
+                    analyze_prompt_id=job.prompt_id,
+                    evaluation_result=json.dumps(parsed[essay_id][0], ensure_ascii=False),
+                    is_latest=1,
+                    status=1,
+                    confirmed_genre_id=confirmed.get(essay_id, DEFAULT_CONFIRMED)[0],
+                    confirmed_grade_id=confirmed.get(essay_id, DEFAULT_CONFIRMED)[1],
+                    **parsed[essay_id][1].to_columns()
+                )
+                for essay_id in essay_ids
+            ])
+        succeeded = len(essay_ids)
+    else:
+        evaluations = {
+            evaluation.id: evaluation
+            for evaluation in db.query(Evaluation).options(joinedload(Evaluation.essay)).filter(
+                Evaluation.id.in_(list(parsed))
+            )
+        }
+        rows = _score_rows(job, evaluations, parsed)
+        with track_batch_stats(db, Score.evaluation_id.in_(list(evaluations))):
+            db.query(Score).filter(
+                Score.evaluation_id.in_(list(evaluations)),
+                Score.is_default == 1
+            ).update({"is_default": 0}, synchronize_session=False)
+            db.add_all(rows)
+        succeeded = len(rows)
+
+    job.succeeded_count = succeeded
+    job.failed_count = job.request_count - succeeded
+    job.job_status = JOB_INGESTED
+    job.ingested_at = datetime.now()
+    if errors:
+        job.error_message = "\n".join(errors[:50])
+        logger.warning(f"离线批量任务有{len(errors)}条结果失败: job_id={job.id}, 示例: {errors[0]}")
+    db.commit()
+
+    logger.info(f"离线批量任务导入完成: job_id={job.id}, 成功={succeeded}, 失败={job.failed_count}")
+    return {"succeeded": succeeded, "failed": job.failed_count}
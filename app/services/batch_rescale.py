@@ -0,0 +1,74 @@
+"""
+批次分制切换
+学校更换分制时把整个批次的作文改为新分制,并一次性重算批次内所有评分的总分:
+- 维度分数完整的评分按维度分数之和换算(与新评分的计算方式一致,默认舍去小数)
+- 维度分数不完整的历史评分按原总分在分制之间换算
+"""
+import json
+from typing import Any, Dict, Optional
+
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.models import Essay, Evaluation, Score
+from app.services.batch_stats import track_batch_stats
+from app.utils import logger
+from app.utils.score_converter import DEFAULT_RUBRIC, ROUND_FLOOR, Rubric
+
+
+def _load_dimensions(dimension_scores: Optional[str]) -> Dict[str, Any]:
+    try:
+        dimensions = json.loads(dimension_scores or "{}")
+    except ValueError:
+        return {}
+    return dimensions if isinstance(dimensions, dict) else {}
+
+
+def rescale_batch(
+    db: Session,
+    batch_id: int,
+    score_system: int,
+    rounding: str = ROUND_FLOOR,
+    rubric: Rubric = DEFAULT_RUBRIC
+) -> Dict[str, int]:
+    """
+    把批次内分制不同的作文改为指定分制,并按新分制重算这些作文的全部评分(不提交事务)
+
+    Returns:
+        {"essays": 修改分制的作文数, "scores": 重算的评分数}
+    """
+    rows = db.execute(
+        select(Score.id, Score.total_score, Score.dimension_scores, Essay.score_system)
+        .select_from(Score)
+        .join(Evaluation, Evaluation.id == Score.evaluation_id)
+        .join(Essay, Essay.id == Evaluation.essay_id)
+        .where(
+            Essay.batch_id == batch_id,
+            Essay.status == 1,
+            Essay.score_system != score_system,
+            Score.status == 1
+        )
+    ).all()
+
+    updates = []
+    if rows:
+        score_ids, totals, dimension_scores, from_systems = zip(*rows)
+        from_dimensions = rubric.total(rubric.matrix([_load_dimensions(value) for value in dimension_scores]), score_system, rounding)
+        from_totals = rubric.rescale(np.array(totals, dtype=float), np.array(from_systems, dtype=float), score_system, rounding)
+        new_totals = np.where(np.isnan(from_dimensions), from_totals, from_dimensions)
+        updates = [{"id": score_id, "total_score": total} for score_id, total in zip(score_ids, new_totals.tolist())]
+
+    with track_batch_stats(db, Essay.batch_id == batch_id):
+        essays = db.execute(
+            update(Essay)
+            .where(Essay.batch_id == batch_id, Essay.status == 1, Essay.score_system != score_system)
+            .values(score_system=score_system)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if updates:
+            # 按主键批量更新(executemany)
+            db.execute(update(Score), updates)
+
+    logger.info(f"批次分制切换: batch_id={batch_id}, 分制={score_system}, 作文={essays}, 评分={len(updates)}")
+    return {"essays": essays, "scores": len(updates)}
@@ -0,0 +1,94 @@
+"""
+批次复用
+相同题目和要求的作文归入同一个批次: 按题目和要求的指纹(唯一索引)查找,
+不存在时插入,并发插入冲突时加锁读取已插入的批次;作文数量用原子更新累加
+"""
+import hashlib
+from datetime import datetime
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import Batch
+from app.utils import logger
+
+DEFAULT_TITLE = "无题目"
+DEFAULT_REQUIREMENT = "无要求"
+
+
+def batch_fingerprint(essay_title: str, essay_requirement: str) -> str:
+    """题目和要求的指纹(两者之间用不会出现在文本中的分隔符,避免拼接后相同)"""
+    text = f"{essay_title}\x1f{essay_requirement}"
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _create_batch(db: Session, essay_title: str, essay_requirement: str, fingerprint: str) -> int:
+    """插入批次,指纹冲突时使用已有的批次(已删除的批次释放指纹后重新插入)"""
+    for _ in range(2):
+        batch = Batch(
+            directory_name=f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{fingerprint[:8]}",
+            essay_title=essay_title,
+            essay_requirement=essay_requirement,
+            essay_count=0,
+            fingerprint=fingerprint,
+            status=1
+        )
+        try:
+            with db.begin_nested():
+                db.add(batch)
+            logger.info(f"创建新批次: batch_id={batch.id}")
+            return batch.id
+        except IntegrityError:
+            pass
+
+        # 另一个请求同时创建了相同的批次: 加锁读取最新提交的数据
+        # (普通查询在MySQL的REPEATABLE READ下沿用事务开始时的快照,看不到并发提交的批次)
+        existing = db.execute(
+            select(Batch.id, Batch.status).where(Batch.fingerprint == fingerprint).with_for_update()
+        ).first()
+        if existing is None:
+            raise RuntimeError(f"批次指纹冲突但未找到对应批次: {fingerprint}")
+        if existing.status == 1:
+            logger.info(f"复用并发创建的批次: batch_id={existing.id}")
+            return existing.id
+        # 已删除的批次仍占用指纹(直接修改数据库删除时未置空),释放后重新插入
+        db.execute(
+            update(Batch)
+            .where(Batch.id == existing.id)
+            .values(fingerprint=None)
+            .execution_options(synchronize_session=False)
+        )
+    raise RuntimeError(f"创建批次失败: {fingerprint}")
+
+
+def resolve_batch(db: Session, essay_title: str, essay_requirement: str) -> int:
+    """
+    查找或创建批次,并将作文数量加1(不提交事务,由调用方和作文一起提交)
+
+    Args:
+        db: 数据库会话
+        essay_title: 作文题目(为空时使用默认题目)
+        essay_requirement: 作文要求(为空时使用默认要求)
+
+    Returns:
+        批次ID
+    """
+    essay_title = essay_title or DEFAULT_TITLE
+    essay_requirement = essay_requirement or DEFAULT_REQUIREMENT
+    fingerprint = batch_fingerprint(essay_title, essay_requirement)
+
+    batch_id = db.query(Batch.id).filter(Batch.fingerprint == fingerprint, Batch.status == 1).scalar()
+    if batch_id is not None:
+        logger.info(f"复用现有批次: batch_id={batch_id}")
+    else:
+        batch_id = _create_batch(db, essay_title, essay_requirement, fingerprint)
+
+    # 原子累加,并发请求不会互相覆盖
+    db.execute(
+        update(Batch)
+        .where(Batch.id == batch_id)
+        .values(essay_count=Batch.essay_count + 1)
+        .execution_options(synchronize_session=False)
+    )
+    return batch_id
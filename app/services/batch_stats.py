@@ -0,0 +1,193 @@
+"""
+批次评分统计
+计入统计的评分: 最新评价(is_latest)的默认评分(is_default),作文、评价、评分均未删除
+- 增量更新: 写入评分、切换默认评分、重新评价时,用track_batch_stats包住修改,
+  修改前后各查一次受影响的评分,差值用原子UPDATE累加到统计行
+- 全量重算: recompute_batch_stats(scripts/recompute_batch_stats.py),用于初始化和修正偏差
+统计行不存在时(新批次或尚未初始化)直接按该批次的全部评分计算后插入
+"""
+import json
+import math
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import BatchScoreStats, Essay, Evaluation, Score
+from app.services.score_analytics import TOTAL_MAX
+from app.utils import logger
+from app.utils.score_converter import DEFAULT_RUBRIC
+
+HISTOGRAM_BUCKETS = 10
+BUCKET_COLUMNS = [f"bucket_{index}" for index in range(HISTOGRAM_BUCKETS)]
+DIMENSION_COLUMNS = {dim: f"{dim}_sum" for dim in DEFAULT_RUBRIC.dimensions}
+SUM_COLUMNS = [
+    "score_count", "total_sum", "total_sq_sum", *BUCKET_COLUMNS,
+    "dimension_count", *DIMENSION_COLUMNS.values()
+]
+
+
+def _dimension_values(dimension_scores: Optional[str]) -> Optional[Dict[str, float]]:
+    """解析维度分数JSON,维度不完整或无法解析时返回None"""
+    try:
+        dimensions = json.loads(dimension_scores or "{}")
+    except ValueError:
+        return None
+    if not isinstance(dimensions, dict):
+        return None
+    values = DEFAULT_RUBRIC.matrix([dimensions])[0]
+    if np.isnan(values).any():
+        return None
+    return dict(zip(DEFAULT_RUBRIC.dimensions, values.tolist()))
+
+
+def score_contribution(total_score: float, score_system: int, dimension_scores: Optional[str]) -> Dict[str, float]:
+    """单条评分对各累加列的贡献(总分换算为百分制)"""
+    percent = (total_score or 0) / (score_system or 40) * TOTAL_MAX
+    bucket = min(HISTOGRAM_BUCKETS - 1, max(0, int(percent * HISTOGRAM_BUCKETS // TOTAL_MAX)))
+    contribution = {
+        "score_count": 1,
+        "total_sum": percent,
+        "total_sq_sum": percent * percent,
+        BUCKET_COLUMNS[bucket]: 1
+    }
+    dimensions = _dimension_values(dimension_scores)
+    if dimensions is not None:
+        contribution["dimension_count"] = 1
+        for dim, value in dimensions.items():
+            contribution[DIMENSION_COLUMNS[dim]] = value
+    return contribution
+
+
+def counted_scores(db: Session, *criteria) -> List[Any]:
+    """计入统计的评分(batch_id, score_system, total_score, dimension_scores),可附加筛选条件"""
+    query = (
+        select(Essay.batch_id, Essay.score_system, Score.total_score, Score.dimension_scores)
+        .select_from(Score)
+        .join(Evaluation, Evaluation.id == Score.evaluation_id)
+        .join(Essay, Essay.id == Evaluation.essay_id)
+        .where(
+            Score.is_default == 1,
+            Score.status == 1,
+            Evaluation.is_latest == 1,
+            Evaluation.status == 1,
+            Essay.status == 1,
+            Essay.batch_id.isnot(None),
+            *criteria
+        )
+    )
+    return db.execute(query).all()
+
+
+def _accumulate(totals: Dict[int, Dict[str, float]], rows: Iterable[Any], sign: int = 1) -> None:
+    for row in rows:
+        batch_totals = totals[row.batch_id]
+        for column, value in score_contribution(row.total_score, row.score_system, row.dimension_scores).items():
+            batch_totals[column] += sign * value
+
+
+def _new_totals() -> Dict[int, Dict[str, float]]:
+    return defaultdict(lambda: dict.fromkeys(SUM_COLUMNS, 0))
+
+
+def _create_stats(db: Session, batch_id: int, delta: Dict[str, float]) -> None:
+    """统计行不存在: 按该批次当前的全部评分计算后插入,并发插入冲突时改为累加"""
+    totals = _new_totals()
+    _accumulate(totals, counted_scores(db, Essay.batch_id == batch_id))
+    try:
+        with db.begin_nested():
+            db.add(BatchScoreStats(batch_id=batch_id, status=1, **totals[batch_id]))
+    except IntegrityError:
+        # 另一个请求同时插入了统计行(不包含本事务未提交的修改)
+        _apply_delta(db, batch_id, delta)
+
+
+def _apply_delta(db: Session, batch_id: int, delta: Dict[str, float]) -> int:
+    """原子累加,返回更新的行数"""
+    values = {column: getattr(BatchScoreStats, column) + value for column, value in delta.items() if value}
+    result = db.execute(
+        update(BatchScoreStats)
+        .where(BatchScoreStats.batch_id == batch_id)
+        .values(values)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+@contextmanager
+def track_batch_stats(db: Session, *criteria) -> Iterator[None]:
+    """
+    跟踪一次评分/评价修改对批次统计的影响(不提交事务,由调用方和修改一起提交)
+
+    用法:
+        with track_batch_stats(db, Score.evaluation_id == evaluation_id):
+            ...取消之前的默认评分,写入新评分...
+
+    Args:
+        criteria: 圈定可能受影响的评分的条件,修改前后使用相同条件查询
+    """
+    before = counted_scores(db, *criteria)
+    yield
+    db.flush()
+    after = counted_scores(db, *criteria)
+
+    deltas = _new_totals()
+    _accumulate(deltas, before, -1)
+    _accumulate(deltas, after, 1)
+    for batch_id, delta in deltas.items():
+        if not any(delta.values()):
+            continue
+        if _apply_delta(db, batch_id, delta) == 0:
+            _create_stats(db, batch_id, delta)
+
+
+def recompute_batch_stats(db: Session, batch_ids: Optional[List[int]] = None) -> int:
+    """
+    按评分表全量重算批次统计(不提交事务)
+
+    Args:
+        batch_ids: 只重算这些批次,为空时重算全部
+
+    Returns:
+        写入的统计行数
+    """
+    criteria = [Essay.batch_id.in_(batch_ids)] if batch_ids else []
+    totals = _new_totals()
+    _accumulate(totals, counted_scores(db, *criteria))
+
+    clear = delete(BatchScoreStats)
+    if batch_ids:
+        clear = clear.where(BatchScoreStats.batch_id.in_(batch_ids))
+    db.execute(clear)
+    if totals:
+        db.execute(insert(BatchScoreStats), [
+            {"batch_id": batch_id, "status": 1, **values} for batch_id, values in totals.items()
+        ])
+    logger.info(f"批次评分统计重算完成: {len(totals)} 个批次")
+    return len(totals)
+
+
+def stats_summary(stats: Optional[BatchScoreStats]) -> Optional[Dict[str, Any]]:
+    """由累加值计算评分数、均分、标准差、分数段分布和各维度均分(无评分时返回None)"""
+    if stats is None or stats.score_count <= 0:
+        return None
+    count = stats.score_count
+    mean = stats.total_sum / count
+    variance = max(0.0, stats.total_sq_sum / count - mean * mean)
+    dimension_means = {}
+    if stats.dimension_count > 0:
+        dimension_means = {
+            dim: round(getattr(stats, column) / stats.dimension_count, 2)
+            for dim, column in DIMENSION_COLUMNS.items()
+        }
+    return {
+        "score_count": count,
+        "mean": round(mean, 2),
+        "stddev": round(math.sqrt(variance), 2),
+        "histogram": [getattr(stats, column) for column in BUCKET_COLUMNS],
+        "dimension_means": dimension_means
+    }
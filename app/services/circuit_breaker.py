@@ -0,0 +1,160 @@
+"""
+模型服务熔断器
+最近一段时间内的失败率超过阈值时熔断,熔断期间直接拒绝调用(接口快速返回503),
+不再让每个请求都等到超时;熔断时间结束后放行少量探测请求,成功则恢复,失败则继续熔断
+"""
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator
+
+from app.utils.logger import logger
+from app.utils.metrics import MODEL_CIRCUIT_EVENTS
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """熔断中,调用被拒绝"""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"{name}熔断中,{retry_after}秒后重试")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    按失败率熔断
+
+    用法:
+        with breaker.guard():
+            response = client.chat.completions.create(...)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        min_calls: int = 10,
+        window_seconds: float = 60.0,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 1,
+        is_failure: Callable[[Exception], bool] = lambda e: True,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.is_failure = is_failure
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """恢复到关闭状态并清空统计"""
+        with self._lock:
+            self.state = STATE_CLOSED
+            self.opened_until = 0.0
+            self._probes = 0
+            # (时间, 是否失败)
+            self._calls: deque = deque()
+
+    def _prune(self, now: float) -> None:
+        while self._calls and self._calls[0][0] < now - self.window_seconds:
+            self._calls.popleft()
+
+    def _current_failure_rate(self) -> float:
+        if not self._calls:
+            return 0.0
+        return sum(1 for _, failed in self._calls if failed) / len(self._calls)
+
+    def _open(self, now: float) -> None:
+        self.state = STATE_OPEN
+        self.opened_until = now + self.open_seconds
+        self._probes = 0
+        MODEL_CIRCUIT_EVENTS.labels(self.name, "opened").inc()
+
+    def _retry_after(self, now: float) -> int:
+        return max(1, math.ceil(self.opened_until - now))
+
+    def before_call(self) -> bool:
+        """调用前检查,熔断中抛出CircuitOpenError;返回本次调用是否为探测请求"""
+        with self._lock:
+            now = self.clock()
+            if self.state == STATE_OPEN:
+                if now < self.opened_until:
+                    MODEL_CIRCUIT_EVENTS.labels(self.name, "rejected").inc()
+                    raise CircuitOpenError(self.name, self._retry_after(now))
+                self.state = STATE_HALF_OPEN
+                logger.info(f"{self.name}熔断时间结束,放行探测请求")
+
+            if self.state == STATE_HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    MODEL_CIRCUIT_EVENTS.labels(self.name, "rejected").inc()
+                    raise CircuitOpenError(self.name, 1)
+                self._probes += 1
+                return True
+            return False
+
+    def record(self, failed: bool, probe: bool = False) -> None:
+        """记录一次调用结果"""
+        with self._lock:
+            now = self.clock()
+            if probe and self.state == STATE_HALF_OPEN:
+                self._probes -= 1
+                if failed:
+                    self._open(now)
+                    logger.warning(f"{self.name}探测请求失败,继续熔断{self.open_seconds}秒")
+                else:
+                    self.state = STATE_CLOSED
+                    self._calls.clear()
+                    MODEL_CIRCUIT_EVENTS.labels(self.name, "closed").inc()
+                    logger.info(f"{self.name}探测请求成功,恢复调用")
+                return
+
+            self._calls.append((now, failed))
+            self._prune(now)
+            if (
+                failed
+                and self.state == STATE_CLOSED
+                and len(self._calls) >= self.min_calls
+                and self._current_failure_rate() >= self.failure_rate
+            ):
+                self._open(now)
+                logger.error(
+                    f"{self.name}失败率{self._current_failure_rate():.0%}"
+                    f"(最近{len(self._calls)}次),熔断{self.open_seconds}秒"
+                )
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """包装一次调用: 熔断中直接拒绝,结束后按结果更新状态"""
+        probe = self.before_call()
+        try:
+            yield
+        except Exception as e:
+            self.record(self.is_failure(e), probe)
+            raise
+        self.record(False, probe)
+
+    def status(self) -> Dict[str, Any]:
+        """熔断状态(用于健康检查接口)"""
+        with self._lock:
+            now = self.clock()
+            self._prune(now)
+            status = {
+                "state": self.state,
+                "recent_calls": len(self._calls),
+                "failure_rate": round(self._current_failure_rate(), 3)
+            }
+            if self.state == STATE_OPEN:
+                status["retry_after"] = self._retry_after(now)
+            return status
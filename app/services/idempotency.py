@@ -0,0 +1,229 @@
+"""
+幂等请求
+POST请求带Idempotency-Key请求头时:
+- 首次请求正常处理,保存响应(5xx和409/429不保存,允许重试)
+- 相同键、相同内容的重试请求直接返回保存的响应(响应头Idempotent-Replayed: true)
+- 相同键的请求仍在处理中返回409,相同键但内容不同返回422
+- 处理中的登记超过IDEMPOTENCY_LOCK_SECONDS仍未完成(进程退出或保存结果失败)时视为失效,同一个键可以重新处理
+"""
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Callable, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import Response
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import IdempotencyRecord
+from app.utils import logger
+
+# 幂等键检查结果
+STATE_NEW = "new"
+STATE_REPLAY = "replay"
+STATE_IN_PROGRESS = "in_progress"
+STATE_MISMATCH = "mismatch"
+
+# 不保存的响应状态码(客户端应该重试)
+UNSTORED_STATUS = {409, 429}
+
+MAX_KEY_LENGTH = 128
+
+
+def request_fingerprint(method: str, path: str, query_string: bytes, body: bytes) -> str:
+    """请求内容哈希"""
+    digest = hashlib.sha256()
+    for part in (method.encode(), path.encode(), query_string, body):
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class IdempotencyStore:
+    """幂等键存储(数据库)"""
+
+    def __init__(self, session_factory: Callable = SessionLocal):
+        self.session_factory = session_factory
+
+    def begin(self, key: str, method: str, path: str, request_hash: str) -> Tuple[str, Optional[IdempotencyRecord]]:
+        """
+        登记一次请求
+
+        Returns:
+            (检查结果, 已保存的记录)
+        """
+        with self.session_factory() as db:
+            record = db.query(IdempotencyRecord).filter_by(
+                idempotency_key=key, method=method, path=path
+            ).first()
+
+            if record is not None:
+                now = datetime.now()
+                expired = record.create_date and record.create_date < now - timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS)
+                stale = record.status_code is None and record.create_date and \
+                    record.create_date < now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+                if not expired and not stale:
+                    if record.request_hash != request_hash:
+                        return STATE_MISMATCH, record
+                    if record.status_code is None:
+                        return STATE_IN_PROGRESS, record
+                    db.expunge(record)
+                    return STATE_REPLAY, record
+                if stale:
+                    logger.warning(f"幂等键登记超时未完成,重新处理: {method} {path}, key={key}")
+                db.delete(record)
+                try:
+                    db.flush()
+                except StaleDataError:
+                    # 另一个请求同时接管了相同的键
+                    db.rollback()
+                    return STATE_IN_PROGRESS, None
+
+            db.add(IdempotencyRecord(
+                idempotency_key=key,
+                method=method,
+                path=path,
+                request_hash=request_hash,
+                create_date=datetime.now(),
+                status=1
+            ))
+            try:
+                db.commit()
+            except IntegrityError:
+                # 另一个进程同时登记了相同的键
+                db.rollback()
+                return STATE_IN_PROGRESS, None
+        return STATE_NEW, None
+
+    def complete(self, key: str, method: str, path: str, status_code: int, content_type: Optional[str], body: bytes) -> None:
+        """保存响应"""
+        with self.session_factory() as db:
+            db.query(IdempotencyRecord).filter_by(
+                idempotency_key=key, method=method, path=path
+            ).update({
+                "status_code": status_code,
+                "content_type": content_type,
+                "response_body": body.decode("utf-8", errors="replace")
+            })
+            db.commit()
+
+    def release(self, key: str, method: str, path: str) -> None:
+        """删除未完成的登记(请求失败后允许用同一个键重试)"""
+        with self.session_factory() as db:
+            db.query(IdempotencyRecord).filter_by(
+                idempotency_key=key, method=method, path=path, status_code=None
+            ).delete()
+            db.commit()
+
+
+idempotency_store = IdempotencyStore()
+
+
+def _error_response(status_code: int, detail: str, headers: Optional[dict] = None) -> Response:
+    return Response(
+        content=json.dumps({"detail": detail}, ensure_ascii=False),
+        status_code=status_code,
+        media_type="application/json",
+        headers=headers
+    )
+
+
+class IdempotencyMiddleware:
+    """处理Idempotency-Key请求头的ASGI中间件(只处理POST请求)"""
+
+    def __init__(self, app, store: Optional[IdempotencyStore] = None):
+        self.app = app
+        self.store = store or idempotency_store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        key = Headers(scope=scope).get(settings.IDEMPOTENCY_HEADER)
+        if not key:
+            await self.app(scope, receive, send)
+            return
+        if len(key) > MAX_KEY_LENGTH:
+            await _error_response(400, f"{settings.IDEMPOTENCY_HEADER}长度不能超过{MAX_KEY_LENGTH}")(scope, receive, send)
+            return
+
+        # 读取完整请求体(计算哈希后再交给应用)
+        body_chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body_chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        body = b"".join(body_chunks)
+
+        method, path = scope["method"], scope["path"]
+        request_hash = request_fingerprint(method, path, scope.get("query_string", b""), body)
+        state, record = await run_in_threadpool(self.store.begin, key, method, path, request_hash)
+
+        if state == STATE_REPLAY:
+            logger.info(f"幂等请求重放: {method} {path}, key={key}")
+            response = Response(
+                content=record.response_body or "",
+                status_code=record.status_code,
+                media_type=record.content_type,
+                headers={"Idempotent-Replayed": "true"}
+            )
+            await response(scope, receive, send)
+            return
+        if state == STATE_IN_PROGRESS:
+            await _error_response(409, "相同幂等键的请求正在处理中,请稍后重试", {"Retry-After": "1"})(scope, receive, send)
+            return
+        if state == STATE_MISMATCH:
+            await _error_response(422, "幂等键已用于内容不同的请求")(scope, receive, send)
+            return
+
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        response_start = {}
+        response_chunks = []
+        finished = False
+
+        async def capture_send(message):
+            nonlocal finished
+            if message["type"] == "http.response.start":
+                response_start.update(message)
+            elif message["type"] == "http.response.body":
+                response_chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    # 先保存结果再发出最后一块,客户端收到响应后的重试一定能命中
+                    finished = True
+                    await self._finish(key, method, path, response_start, b"".join(response_chunks))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        finally:
+            if not finished:
+                await run_in_threadpool(self.store.release, key, method, path)
+
+    async def _finish(self, key: str, method: str, path: str, response_start: dict, body: bytes) -> None:
+        """按响应状态码保存结果或删除登记"""
+        status_code = response_start.get("status", 500)
+        try:
+            if status_code >= 500 or status_code in UNSTORED_STATUS:
+                await run_in_threadpool(self.store.release, key, method, path)
+                return
+            content_type = Headers(raw=response_start.get("headers", [])).get("content-type")
+            await run_in_threadpool(self.store.complete, key, method, path, status_code, content_type, body)
+        except Exception as e:
+            # 保存失败不影响本次响应,登记超过IDEMPOTENCY_LOCK_SECONDS后失效
+            logger.error(f"保存幂等请求结果失败: {method} {path}, key={key}, 错误: {str(e)}")
@@ -0,0 +1,323 @@
+"""
+模型路由
+按配置顺序维护多个模型/服务地址,记录每个目标的健康状态和耗时
+- 调用失败(连接错误、超时、限流、5xx、空响应)自动切换到下一个目标
+- 连续失败达到阈值的目标暂时下线,冷却后重新参与路由
+- 可选对冲请求: 首个请求开始执行后超过该目标的p95耗时仍未返回时,向下一个目标再发一次,取先成功的结果
+"""
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import openai
+
+from app.utils.logger import logger
+from app.utils.metrics import MODEL_ROUTE_EVENTS
+
+# 计算耗时分位数所需的最少样本数,样本不足时不发对冲请求
+HEDGE_MIN_SAMPLES = 20
+
+# AnyIO线程池(run_in_threadpool)的默认线程数,无法读取当前限制时使用
+DEFAULT_THREAD_LIMIT = 40
+
+
+class EmptyModelResponse(Exception):
+    """模型返回了空内容(按调用失败处理,切换到下一个目标)"""
+
+
+def is_failover_error(error: Exception) -> bool:
+    """
+    是否应切换到下一个目标
+    请求本身有问题(400/422)时换目标也会失败,直接抛出
+    """
+    if isinstance(error, (openai.BadRequestError, openai.UnprocessableEntityError)):
+        return False
+    return isinstance(error, (openai.APIError, EmptyModelResponse))
+
+
+class ModelTarget:
+    """路由目标: 一个模型和对应的客户端"""
+
+    def __init__(self, name: str, model: str, client: Any, latency_window: int = 200):
+        self.name = name
+        self.model = model
+        self.client = client
+        self.latency_window = latency_window
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+        self.total_calls = 0
+        self.total_failures = 0
+        # 阶段 → 最近的成功耗时(秒),不同阶段的耗时差别很大,分开统计
+        self._latencies: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+    def record_success(self, stage: str, elapsed: float) -> None:
+        with self._lock:
+            self.total_calls += 1
+            self.consecutive_failures = 0
+            self.unhealthy_until = 0.0
+            self._latencies.setdefault(stage, deque(maxlen=self.latency_window)).append(elapsed)
+
+    def record_failure(self, failure_threshold: int, cooldown: float) -> bool:
+        """记录一次失败,返回是否因此下线"""
+        with self._lock:
+            self.total_calls += 1
+            self.total_failures += 1
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= failure_threshold:
+                self.unhealthy_until = time.monotonic() + cooldown
+                return True
+            return False
+
+    def latency_quantile(self, stage: str, quantile: float) -> Optional[float]:
+        """最近成功调用耗时的分位数,样本不足时返回None"""
+        with self._lock:
+            samples = sorted(self._latencies.get(stage, ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        index = min(len(samples) - 1, max(0, math.ceil(quantile * len(samples)) - 1))
+        return samples[index]
+
+    def status(self) -> Dict[str, Any]:
+        """健康状态(用于健康检查接口)"""
+        with self._lock:
+            stages = {
+                stage: round(sum(samples) / len(samples), 3)
+                for stage, samples in self._latencies.items() if samples
+            }
+            return {
+                "name": self.name,
+                "model": self.model,
+                "healthy": time.monotonic() >= self.unhealthy_until,
+                "consecutive_failures": self.consecutive_failures,
+                "total_calls": self.total_calls,
+                "total_failures": self.total_failures,
+                "avg_latency_seconds": stages
+            }
+
+
+class RouteResult:
+    """一次路由调用的过程信息"""
+
+    def __init__(self):
+        self.attempts = 0
+        self.hedged = False
+        self.target: Optional[ModelTarget] = None
+        self.elapsed = 0.0
+
+
+class ModelRouter:
+    """按顺序在多个目标间路由模型调用"""
+
+    def __init__(
+        self,
+        targets: List[ModelTarget],
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        hedge_enabled: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_min_delay: float = 2.0,
+        max_hedge_workers: Optional[int] = None
+    ):
+        if not targets:
+            raise ValueError("至少需要一个模型目标")
+        self.targets = targets
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.hedge_enabled = hedge_enabled
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.max_hedge_workers = max_hedge_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def primary(self) -> ModelTarget:
+        return self.targets[0]
+
+    def candidates(self) -> List[ModelTarget]:
+        """本次调用的目标顺序: 健康目标按配置顺序在前,下线目标按恢复时间排在最后兜底"""
+        healthy = [target for target in self.targets if target.healthy]
+        unhealthy = sorted(
+            (target for target in self.targets if not target.healthy),
+            key=lambda target: target.unhealthy_until
+        )
+        return healthy + unhealthy
+
+    def hedge_delay(self, target: ModelTarget, stage: str) -> Optional[float]:
+        """对冲请求的等待时间(该目标该阶段的p95耗时,不低于hedge_min_delay),不对冲时返回None"""
+        if not self.hedge_enabled:
+            return None
+        quantile = target.latency_quantile(stage, self.hedge_quantile)
+        if quantile is None:
+            return None
+        return max(quantile, self.hedge_min_delay)
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [target.status() for target in self.targets]
+
+    def call(self, stage: str, attempt: Callable[[ModelTarget], Any]) -> Tuple[Any, RouteResult]:
+        """
+        路由一次调用
+
+        Args:
+            stage: 调用阶段(耗时按阶段统计)
+            attempt: 对单个目标发起调用的函数,失败时抛出异常
+
+        Returns:
+            (attempt的返回值, 路由过程信息)
+        """
+        route = RouteResult()
+        start = time.perf_counter()
+        try:
+            candidates = self.candidates()
+            if self.hedge_enabled:
+                result = self._call_hedged(stage, attempt, candidates, route)
+            else:
+                result = self._call_sequential(stage, attempt, candidates, route)
+        finally:
+            route.elapsed = time.perf_counter() - start
+        return result, route
+
+    def _attempt(self, stage: str, attempt: Callable[[ModelTarget], Any], target: ModelTarget) -> Any:
+        """对单个目标调用一次并更新其健康状态"""
+        start = time.perf_counter()
+        try:
+            result = attempt(target)
+        except Exception as e:
+            if is_failover_error(e) and target.record_failure(self.failure_threshold, self.cooldown):
+                logger.warning(f"模型目标连续失败{target.consecutive_failures}次,暂停{self.cooldown}秒: {target.name}")
+                MODEL_ROUTE_EVENTS.labels(target.name, "unhealthy").inc()
+            raise
+        target.record_success(stage, time.perf_counter() - start)
+        return result
+
+    def _failover(self, target: ModelTarget, error: Exception, remaining: int) -> None:
+        if not is_failover_error(error) or remaining == 0:
+            raise error
+        logger.warning(f"模型目标调用失败,切换到下一个目标: {target.name}, 错误: {type(error).__name__}: {str(error)}")
+        MODEL_ROUTE_EVENTS.labels(target.name, "failover").inc()
+
+    def _call_sequential(self, stage, attempt, candidates, route) -> Any:
+        for index, target in enumerate(candidates):
+            route.attempts += 1
+            try:
+                result = self._attempt(stage, attempt, target)
+            except Exception as e:
+                self._failover(target, e, len(candidates) - index - 1)
+                continue
+            route.target = target
+            return result
+
+    def _call_hedged(self, stage, attempt, candidates, route) -> Any:
+        executor = self._get_executor()
+        first, fallbacks = candidates[0], list(candidates[1:])
+        pending = {}
+        started = {}
+
+        def launch(target):
+            route.attempts += 1
+            event = threading.Event()
+
+            def run():
+                event.set()
+                return self._attempt(stage, attempt, target)
+
+            future = executor.submit(run)
+            pending[future] = target
+            started[future] = event
+            return future
+
+        first_future = launch(first)
+        delay = self.hedge_delay(first, stage)
+        hedge_at = None
+        if delay is not None:
+            # 从首个请求实际开始执行时计时,线程池排队时间不计入对冲等待
+            started[first_future].wait()
+            hedge_at = time.monotonic() + delay
+
+        while pending:
+            hedge_pending = hedge_at is not None and not route.hedged and first_future in pending
+            timeout = max(0.0, hedge_at - time.monotonic()) if hedge_pending else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # 首个请求超过p95仍未返回,发出对冲请求(只有一个目标时发往同一个目标)
+                route.hedged = True
+                MODEL_ROUTE_EVENTS.labels(first.name, "hedge").inc()
+                launch(fallbacks.pop(0) if fallbacks else first)
+                continue
+
+            for future in done:
+                target = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self._failover(target, e, len(fallbacks) + len(pending))
+                    continue
+                if route.hedged and future is not first_future:
+                    MODEL_ROUTE_EVENTS.labels(target.name, "hedge_won").inc()
+                # 未完成的请求无法中断,在后台完成后只更新健康状态
+                route.target = target
+                return result
+
+            if not pending and fallbacks:
+                launch(fallbacks.pop(0))
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """
+        对冲调用的线程池
+        每次调用同时最多两个请求(首个请求和对冲请求),默认按AnyIO线程池的两倍创建,
+        不会比调用方的并发更早成为瓶颈
+        """
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_hedge_workers or 2 * _thread_limit(),
+                    thread_name_prefix="model-hedge"
+                )
+            return self._executor
+
+
+def _thread_limit() -> int:
+    """AnyIO线程池的线程数(在run_in_threadpool的线程中读取事件循环的当前限制)"""
+    try:
+        from anyio import from_thread, to_thread
+
+        return int(from_thread.run_sync(lambda: to_thread.current_default_thread_limiter().total_tokens))
+    except Exception:
+        return DEFAULT_THREAD_LIMIT
+
+
+def build_model_router(config) -> ModelRouter:
+    """
+    按配置创建路由: OPENAI_*为主目标,OPENAI_FALLBACK_TARGETS按顺序作为备用目标
+    备用目标未填写的base_url/api_key/model使用主目标的配置
+    """
+    from openai import OpenAI
+
+    entries = [{"name": "primary"}] + [
+        {"name": f"fallback-{index}", **entry} for index, entry in enumerate(config.OPENAI_FALLBACK_TARGETS, start=1)
+    ]
+    targets = []
+    for entry in entries:
+        client = OpenAI(
+            base_url=entry.get("base_url") or config.OPENAI_BASE_URL,
+            api_key=entry.get("api_key") or config.OPENAI_API_KEY
+        )
+        targets.append(ModelTarget(entry["name"], entry.get("model") or config.OPENAI_MODEL, client))
+
+    return ModelRouter(
+        targets,
+        failure_threshold=config.MODEL_FAILURE_THRESHOLD,
+        cooldown=config.MODEL_FAILURE_COOLDOWN,
+        hedge_enabled=config.MODEL_HEDGE_ENABLED,
+        hedge_quantile=config.MODEL_HEDGE_QUANTILE,
+        hedge_min_delay=config.MODEL_HEDGE_MIN_DELAY
+    )
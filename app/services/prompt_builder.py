@@ -0,0 +1,206 @@
+"""
+提示词组装
+模型服务商按请求前缀缓存提示词,前缀完全相同的部分可以复用缓存(更便宜、首字更快)。
+因此消息按"不变的在前、每篇作文不同的在后"组装:
+1. 系统提示词(固定)
+2. 提示词模板(同一版本固定): 模板中的作文字段占位符替换为固定的引用标记,如【作文正文】
+3. 本篇作文信息、分析结果等每次不同的内容放在最后
+"""
+import json
+from typing import Any, Dict, List, Optional, Union
+
+from app.services.prompt_templates import ESSAY_FIELD_MARKERS, CompiledPrompt, compile_prompt
+
+# 评价阶段的系统提示词
+ANALYZE_SYSTEM_PROMPT = """你是一位资深的语文教师和作文分析专家，拥有20年的教学经验。
+
+你的职责：
+1. 对作文进行全面、客观、细致的分析
+2. 准确识别错别字和语病
+3. 发现作文的优点和亮点
+4. 提出具体可行的改进建议
+
+分析原则：
+- 客观公正：基于事实进行分析
+- 具体详细：标注位置，给出实例
+- 建设性：提供可操作的改进建议
+- 鼓励为主：既指出问题也肯定优点
+
+输出规范：
+- 必须输出纯JSON格式，不要有任何额外文字
+- 不要使用markdown代码块标记
+- 严格按照指定的JSON结构输出"""
+
+# 评分阶段最后一条用户消息
+SCORE_USER_PROMPT = "请按照要求进行评分"
+
+# 评分阶段的分制说明
+SCORE_SYSTEM_INSTRUCTION = "请注意: 最终评分需要按照{score_system}分制计算总分。"
+
+# 文体判断提示词(固定部分)
+GENRE_PROMPT = """请分析这篇作文的文体类型和适合的年级。
+
+请以JSON格式返回结果:
+{
+    "genre_code": "narrative或argumentative",
+    "genre_name": "记叙文或议论文",
+    "confidence": 0.0-1.0的置信度,
+    "grade_level": 7或8或9,
+    "reasoning": "判断理由"
+}"""
+
+DEFAULT_ESSAY_TITLE = "无题目"
+DEFAULT_ESSAY_REQUIREMENT = "无特定要求"
+
+
+def count_words(essay_content: str) -> int:
+    """统计作文字数(去除空白字符)"""
+    return len(essay_content.replace(' ', '').replace('\n', '').replace('\r', '').replace('\t', ''))
+
+
+def render_static_prompt(prompt: Union[str, CompiledPrompt]) -> str:
+    """
+    渲染提示词模板的固定部分
+    作文字段占位符替换为引用标记,同一版本的提示词每次渲染结果相同
+
+    Args:
+        prompt: 编译后的提示词,或提示词原文(按内容编译并缓存)
+
+    Raises:
+        PromptTemplateError: 模板格式错误
+    """
+    if isinstance(prompt, CompiledPrompt):
+        return prompt.static_text
+    return compile_prompt(prompt).static_text
+
+
+def build_essay_block(
+    essay_content: str,
+    essay_title: Optional[str] = None,
+    essay_requirement: Optional[str] = None,
+    word_count: Optional[int] = None
+) -> str:
+    """本篇作文信息(放在消息最后)"""
+    if word_count is None:
+        word_count = count_words(essay_content)
+    return f"""## 本篇作文
+
+{ESSAY_FIELD_MARKERS["essay_title"]}
+{essay_title or DEFAULT_ESSAY_TITLE}
+
+{ESSAY_FIELD_MARKERS["essay_requirement"]}
+{essay_requirement or DEFAULT_ESSAY_REQUIREMENT}
+
+{ESSAY_FIELD_MARKERS["essay_content"]}
+{essay_content}
+
+{ESSAY_FIELD_MARKERS["word_count"]}
+本篇作文共 {word_count} 字"""
+
+
+def format_analysis_context(analysis: Dict[str, Any]) -> str:
+    """把评价结果整理为评分时参考的上下文"""
+    overall_eval = analysis.get("overall_evaluation", {})
+    typos = analysis.get("typos", [])
+    punctuation_errors = analysis.get("punctuation_errors", [])
+    grammar_errors = analysis.get("grammar_errors", [])
+    highlights = analysis.get("highlights", [])
+    requirement_eval = analysis.get("requirement_evaluation", [])
+
+    return f"""## 作文分析结果(完整)
+
+以下是对本篇作文的详细分析结果,请在评分时充分参考:
+
+### 1. 综合评价
+**总评**: {overall_eval.get("summary", "")}
+**整体质量**: {overall_eval.get("quality_level", "")}
+**主要优点**:
+{json.dumps(overall_eval.get("main_strengths", []), ensure_ascii=False, indent=2)}
+**主要问题**:
+{json.dumps(overall_eval.get("main_issues", []), ensure_ascii=False, indent=2)}
+
+### 2. 作文要求评价(共 {len(requirement_eval)} 条)
+{json.dumps(requirement_eval, ensure_ascii=False, indent=2)}
+
+### 3. 错别字详细列表(共 {len(typos)} 个)
+{json.dumps(typos, ensure_ascii=False, indent=2)}
+
+### 4. 标点错误详细列表(共 {len(punctuation_errors)} 处)
+{json.dumps(punctuation_errors, ensure_ascii=False, indent=2)}
+
+### 5. 病句详细列表(共 {len(grammar_errors)} 处)
+{json.dumps(grammar_errors, ensure_ascii=False, indent=2)}
+
+### 6. 好词好句详细列表(共 {len(highlights)} 处)
+{json.dumps(highlights, ensure_ascii=False, indent=2)}
+
+**评分要求**:
+- 请充分参考上述分析结果进行评分
+- 特别注意错别字、标点错误和病句数量对"语言表达"维度的影响
+- 好词好句应提升相应维度的分数
+- 作文要求评价中指出的问题应在相应维度扣分
+- 综合评价中的主要问题应在对应维度扣分"""
+
+
+def build_analyze_messages(
+    prompt_content: Union[str, CompiledPrompt],
+    essay_content: str,
+    essay_title: Optional[str] = None,
+    essay_requirement: Optional[str] = None,
+    word_count: Optional[int] = None
+) -> List[Dict[str, str]]:
+    """
+    评价阶段消息
+    系统提示词 + 评价提示词模板为固定前缀,本篇作文在最后
+    """
+    user_prompt = "\n\n---\n\n".join([
+        render_static_prompt(prompt_content),
+        build_essay_block(essay_content, essay_title, essay_requirement, word_count)
+    ])
+    return [
+        {"role": "system", "content": ANALYZE_SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
+def build_score_messages(
+    prompt_content: Union[str, CompiledPrompt],
+    essay_content: str,
+    essay_title: Optional[str] = None,
+    essay_requirement: Optional[str] = None,
+    word_count: Optional[int] = None,
+    analysis: Optional[Dict[str, Any]] = None,
+    instruction: Optional[str] = None
+) -> List[Dict[str, str]]:
+    """
+    评分阶段消息
+    评分提示词模板作为系统消息(固定前缀),本篇作文、分析结果和附加说明在最后的用户消息中
+
+    Args:
+        analysis: 评价结果(可选,作为评分参考)
+        instruction: 附加说明(如分制要求)
+    """
+    parts = [build_essay_block(essay_content, essay_title, essay_requirement, word_count)]
+    if analysis:
+        parts.append(format_analysis_context(analysis))
+    if instruction:
+        parts.append(instruction)
+    parts.append(SCORE_USER_PROMPT)
+    return [
+        {"role": "system", "content": render_static_prompt(prompt_content)},
+        {"role": "user", "content": "\n\n---\n\n".join(parts)}
+    ]
+
+
+def build_genre_messages(essay_content: str, essay_requirement: Optional[str] = None) -> List[Dict[str, str]]:
+    """文体判断消息(只取前1000字分析)"""
+    return [
+        {"role": "user", "content": f"""{GENRE_PROMPT}
+
+作文要求:
+{essay_requirement or DEFAULT_ESSAY_REQUIREMENT}
+
+作文内容:
+{essay_content[:1000]}
+"""}
+    ]
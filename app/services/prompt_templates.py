@@ -0,0 +1,94 @@
+"""
+提示词模板编译和缓存
+- 保存提示词时校验占位符,格式错误(多余的花括号、未知占位符)直接拒绝
+- 每个提示词版本只解析一次,按提示词内容缓存编译结果,内容修改后自动失效
+- 编译结果中作文字段已替换为固定引用标记,渲染时不再解析模板
+"""
+from functools import lru_cache
+from string import Formatter
+from typing import FrozenSet, Tuple
+
+# 模板占位符 → 固定引用标记(对应prompt_builder.build_essay_block中的标题)
+ESSAY_FIELD_MARKERS = {
+    "essay_title": "【作文题目】",
+    "essay_requirement": "【作文要求】",
+    "essay_content": "【作文正文】",
+    "word_count": "【作文字数】",
+}
+
+# 模板中允许使用的占位符
+ALLOWED_FIELDS = frozenset(ESSAY_FIELD_MARKERS)
+
+# 按提示词内容缓存的最大条目数
+CACHE_SIZE = 256
+
+
+class PromptTemplateError(ValueError):
+    """提示词模板格式错误"""
+
+
+class CompiledPrompt:
+    """
+    编译后的提示词模板
+
+    Attributes:
+        static_text: 占位符替换为引用标记后的文本(同一版本固定不变)
+        fields: 模板中使用的占位符
+    """
+
+    __slots__ = ("static_text", "fields")
+
+    def __init__(self, static_text: str, fields: FrozenSet[str]):
+        self.static_text = static_text
+        self.fields = fields
+
+
+def _parse(prompt_content: str) -> Tuple[str, FrozenSet[str]]:
+    """解析模板,返回(静态文本, 使用的占位符)"""
+    parts = []
+    fields = set()
+    try:
+        for literal, field_name, format_spec, conversion in Formatter().parse(prompt_content):
+            parts.append(literal)
+            if field_name is None:
+                continue
+            if field_name == "" or field_name.isdigit():
+                raise PromptTemplateError("不支持位置占位符{}, 字面花括号请写成{{ }}")
+            if field_name not in ALLOWED_FIELDS:
+                raise PromptTemplateError(
+                    f"未知占位符{{{field_name}}}, 可用: {', '.join(sorted(ALLOWED_FIELDS))}; 字面花括号请写成{{{{ }}}}"
+                )
+            if format_spec or conversion:
+                raise PromptTemplateError(f"占位符{{{field_name}}}不支持格式说明")
+            fields.add(field_name)
+            parts.append(ESSAY_FIELD_MARKERS[field_name])
+    except ValueError as e:
+        if isinstance(e, PromptTemplateError):
+            raise
+        # str.format的语法错误,如单个"{"或"}"
+        raise PromptTemplateError(f"花括号不匹配({e}), 字面花括号请写成{{{{ }}}}") from e
+    return "".join(parts), frozenset(fields)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_prompt(prompt_content: str) -> CompiledPrompt:
+    """
+    编译提示词模板(按内容缓存)
+
+    Raises:
+        PromptTemplateError: 模板格式错误
+    """
+    if not prompt_content or not prompt_content.strip():
+        raise PromptTemplateError("提示词内容不能为空")
+    static_text, fields = _parse(prompt_content)
+    return CompiledPrompt(static_text, fields)
+
+
+def validate_prompt_content(prompt_content: str) -> None:
+    """
+    校验提示词模板(保存前调用)
+
+    Raises:
+        PromptTemplateError: 模板格式错误
+    """
+    compile_prompt(prompt_content)
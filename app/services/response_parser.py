@@ -0,0 +1,87 @@
+"""
+模型输出解析
+提取输出中的第一个JSON对象并按阶段的Pydantic模式校验,
+失败时构建只包含原始输出和错误信息的修复请求(不重复发送作文和提示词)
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+from pydantic import ValidationError
+
+from app.schemas.model_output import AnalysisOutput, GenreOutput, ScoreOutput
+from app.utils.json_extract import JSONExtractError, extract_json
+from app.utils.metrics import STAGE_ANALYZE, STAGE_GENRE, STAGE_SCORE
+
+# 各阶段输出的校验模式
+STAGE_SCHEMAS = {
+    STAGE_ANALYZE: AnalysisOutput,
+    STAGE_GENRE: GenreOutput,
+    STAGE_SCORE: ScoreOutput,
+}
+
+# 修复请求的系统提示词
+REPAIR_SYSTEM_PROMPT = """你是JSON格式修复助手。
+用户会给出一段不符合要求的模型输出和错误信息,请在不改变原有内容和数值含义的前提下修正为合法JSON。
+只输出修正后的JSON对象,不要有任何额外文字,不要使用markdown代码块标记。"""
+
+# 修复请求中原始输出的最大长度(超出部分截断)
+REPAIR_MAX_CHARS = 12000
+
+
+class ResponseParseError(ValueError):
+    """模型输出无法解析或不符合阶段模式"""
+
+    def __init__(self, message: str, raw_text: Optional[str] = None):
+        super().__init__(message)
+        self.raw_text = raw_text
+
+
+def parse_model_output(stage: str, text: Optional[str]) -> Dict[str, Any]:
+    """
+    解析并校验模型输出
+
+    Args:
+        stage: 调用阶段(analyze/genre/score),没有对应模式的阶段只做提取
+        text: 模型输出原文
+
+    Returns:
+        校验后的字典(保留模式以外的字段, 评分维度统一为英文键名)
+
+    Raises:
+        ResponseParseError: 找不到JSON或校验失败
+    """
+    try:
+        data = extract_json(text)
+    except JSONExtractError as e:
+        raise ResponseParseError(str(e), text) from e
+
+    schema = STAGE_SCHEMAS.get(stage)
+    if schema is None:
+        return data
+    try:
+        return schema.model_validate(data).model_dump(exclude_unset=True)
+    except ValidationError as e:
+        errors = "; ".join(
+            f"{'.'.join(str(loc) for loc in error['loc']) or '(根)'}: {error['msg']}"
+            for error in e.errors()
+        )
+        raise ResponseParseError(f"字段校验失败: {errors}", text) from e
+
+
+def build_repair_messages(stage: str, text: Optional[str], error: str) -> List[Dict[str, str]]:
+    """构建修复请求消息"""
+    schema = STAGE_SCHEMAS.get(stage)
+    requirement = (
+        json.dumps(schema.model_json_schema(by_alias=False), ensure_ascii=False)
+        if schema else "一个JSON对象"
+    )
+    return [
+        {"role": "system", "content": REPAIR_SYSTEM_PROMPT},
+        {"role": "user", "content": f"""错误信息: {error}
+
+JSON需要满足的结构(JSON Schema):
+{requirement}
+
+原始输出:
+{(text or "")[:REPAIR_MAX_CHARS]}"""}
+    ]
@@ -0,0 +1,243 @@
+"""
+AI评分与教师评分的差异分析
+一条查询取出反馈和对应AI评分(维度分数在SQL中从JSON取出),转换为NumPy列数组后向量化计算:
+- 平均绝对误差、偏差(AI - 教师,正数表示AI偏高)、均方根误差
+- 分数分布(直方图和分位数)
+- 评分一致性(完全一致率、相差1分以内比例、皮尔逊相关系数、二次加权Kappa)
+
+教师评分来源:
+- custom_score反馈: 各维度分数(custom_scores,英文或中文键名)和总分(total_score)
+- comparison反馈: 总分(user_score)
+总分按作文分制换算为百分制后比较
+"""
+from datetime import date, datetime, time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import JSON, func, select, type_coerce
+from sqlalchemy.orm import Session
+
+from app.models import Essay, Evaluation, Feedback, Prompt, Score
+from app.utils.score_converter import DIMENSION_MAX_SCORES, DIMENSION_NAMES
+
+# 评分维度: 英文字段 → (中文名, 满分)
+DIMENSIONS = {dim: (DIMENSION_NAMES[dim], max_score) for dim, max_score in DIMENSION_MAX_SCORES.items()}
+TOTAL = "total"
+TOTAL_MAX = 100
+FEEDBACK_TYPES = ("custom_score", "comparison")
+GROUP_BY_OPTIONS = ("prompt", "batch")
+HISTOGRAM_BINS = 10
+
+
+def _json_number(column, *path):
+    """从JSON文本列中取出数字(缺失或null时为NULL)"""
+    return type_coerce(column, JSON)[path].as_float()
+
+
+def build_query(
+    batch_id: Optional[int] = None,
+    prompt_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+):
+    """每条反馈一行: 分组字段、分制、AI和教师的各维度分数及总分"""
+    feedback_json = Feedback.feedback_data
+    columns = [
+        Essay.batch_id.label("batch_id"),
+        Score.score_prompt_id.label("prompt_id"),
+        Prompt.version_name.label("prompt_version"),
+        Essay.score_system.label("score_system"),
+        Score.total_score.label("ai_total"),
+        func.coalesce(
+            _json_number(feedback_json, "total_score"),
+            _json_number(feedback_json, "user_score")
+        ).label("teacher_total"),
+    ]
+    for dim, (cn_name, _) in DIMENSIONS.items():
+        columns.append(_json_number(Score.dimension_scores, dim, "score").label(f"ai_{dim}"))
+        columns.append(func.coalesce(
+            _json_number(feedback_json, "custom_scores", dim),
+            _json_number(feedback_json, "custom_scores", cn_name)
+        ).label(f"teacher_{dim}"))
+
+    query = (
+        select(*columns)
+        .select_from(Feedback)
+        .join(Score, Score.id == Feedback.score_id)
+        .join(Evaluation, Evaluation.id == Score.evaluation_id)
+        .join(Essay, Essay.id == Evaluation.essay_id)
+        .outerjoin(Prompt, Prompt.id == Score.score_prompt_id)
+        .where(
+            Feedback.status == 1,
+            Feedback.feedback_type.in_(FEEDBACK_TYPES),
+            Score.status == 1
+        )
+    )
+    if batch_id is not None:
+        query = query.where(Essay.batch_id == batch_id)
+    if prompt_id is not None:
+        query = query.where(Score.score_prompt_id == prompt_id)
+    if start_date:
+        query = query.where(Feedback.create_date >= datetime.combine(start_date, time.min))
+    if end_date:
+        query = query.where(Feedback.create_date <= datetime.combine(end_date, time.max))
+    return query
+
+
+def load_columns(db: Session, query) -> Dict[str, np.ndarray]:
+    """执行查询并转换为列数组(数字列为float,NULL为nan)"""
+    result = db.execute(query)
+    keys = list(result.keys())
+    rows = result.all()
+    if not rows:
+        return {key: np.empty(0) for key in keys}
+
+    columns = dict(zip(keys, zip(*rows)))
+    arrays = {}
+    for key, values in columns.items():
+        if key == "prompt_version":
+            arrays[key] = np.array(values, dtype=object)
+        else:
+            arrays[key] = np.array(values, dtype=float)
+    return arrays
+
+
+def _round(value: float, digits: int = 3) -> Optional[float]:
+    return None if value is None or np.isnan(value) else round(float(value), digits)
+
+
+def quadratic_weighted_kappa(a: np.ndarray, b: np.ndarray, max_score: int) -> Optional[float]:
+    """二次加权Kappa(分数四舍五入到整数,取值0..max_score)"""
+    if len(a) < 2:
+        return None
+    levels = max_score + 1
+    a = np.clip(np.rint(a), 0, max_score).astype(np.int64)
+    b = np.clip(np.rint(b), 0, max_score).astype(np.int64)
+
+    observed = np.bincount(a * levels + b, minlength=levels * levels).reshape(levels, levels).astype(float)
+    expected = np.outer(np.bincount(a, minlength=levels), np.bincount(b, minlength=levels)) / len(a)
+    grid = np.arange(levels)
+    weights = (grid[:, None] - grid[None, :]) ** 2 / (levels - 1) ** 2
+
+    denominator = (weights * expected).sum()
+    if denominator == 0:
+        return None
+    return 1 - (weights * observed).sum() / denominator
+
+
+def _pearson(a: np.ndarray, b: np.ndarray) -> Optional[float]:
+    if len(a) < 2 or np.std(a) == 0 or np.std(b) == 0:
+        return None
+    return float(np.corrcoef(a, b)[0, 1])
+
+
+def _distribution(values: np.ndarray, max_score: int) -> Dict[str, Any]:
+    counts, edges = np.histogram(values, bins=HISTOGRAM_BINS, range=(0, max_score))
+    p25, p50, p75 = np.percentile(values, [25, 50, 75]) if len(values) else (np.nan, np.nan, np.nan)
+    return {
+        "bin_edges": [_round(edge, 2) for edge in edges],
+        "counts": counts.tolist(),
+        "mean": _round(values.mean()) if len(values) else None,
+        "p25": _round(p25),
+        "median": _round(p50),
+        "p75": _round(p75)
+    }
+
+
+def dimension_stats(ai: np.ndarray, teacher: np.ndarray, max_score: int) -> Dict[str, Any]:
+    """单个维度的完整统计(只用AI和教师都有分数的行)"""
+    mask = ~(np.isnan(ai) | np.isnan(teacher))
+    ai, teacher = ai[mask], teacher[mask]
+    diff = ai - teacher
+    n = len(diff)
+    return {
+        "n": n,
+        "mae": _round(np.abs(diff).mean()) if n else None,
+        "bias": _round(diff.mean()) if n else None,
+        "rmse": _round(np.sqrt((diff ** 2).mean())) if n else None,
+        "exact_agreement": _round((np.rint(ai) == np.rint(teacher)).mean()) if n else None,
+        "adjacent_agreement": _round((np.abs(diff) <= 1).mean()) if n else None,
+        "pearson": _round(_pearson(ai, teacher)),
+        "qwk": _round(quadratic_weighted_kappa(ai, teacher, max_score)),
+        "ai_distribution": _distribution(ai, max_score),
+        "teacher_distribution": _distribution(teacher, max_score)
+    }
+
+
+def grouped_errors(group_index: np.ndarray, group_count: int, ai: np.ndarray, teacher: np.ndarray) -> Dict[str, np.ndarray]:
+    """按分组汇总样本数、平均绝对误差和偏差(bincount一次完成所有分组)"""
+    mask = ~(np.isnan(ai) | np.isnan(teacher))
+    diff = (ai - teacher)[mask]
+    index = group_index[mask]
+    n = np.bincount(index, minlength=group_count)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mae = np.bincount(index, weights=np.abs(diff), minlength=group_count) / n
+        bias = np.bincount(index, weights=diff, minlength=group_count) / n
+    return {"n": n, "mae": mae, "bias": bias}
+
+
+def score_pairs(arrays: Dict[str, np.ndarray]) -> Dict[str, tuple]:
+    """各维度的(AI分数, 教师分数, 满分),总分换算为百分制"""
+    pairs = {dim: (arrays[f"ai_{dim}"], arrays[f"teacher_{dim}"], max_score) for dim, (_, max_score) in DIMENSIONS.items()}
+    score_system = arrays["score_system"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pairs[TOTAL] = (
+            arrays["ai_total"] / score_system * TOTAL_MAX,
+            arrays["teacher_total"] / score_system * TOTAL_MAX,
+            TOTAL_MAX
+        )
+    return pairs
+
+
+def analyze_divergence(arrays: Dict[str, np.ndarray], group_by: str = "prompt") -> Dict[str, Any]:
+    """计算整体统计和分组统计"""
+    pairs = score_pairs(arrays)
+    overall = {dim: dimension_stats(ai, teacher, max_score) for dim, (ai, teacher, max_score) in pairs.items()}
+
+    groups: List[Dict[str, Any]] = []
+    key_column = arrays["prompt_id"] if group_by == "prompt" else arrays["batch_id"]
+    if len(key_column):
+        keys = np.nan_to_num(key_column, nan=-1).astype(np.int64)
+        group_keys, group_index = np.unique(keys, return_inverse=True)
+        group_sizes = np.bincount(group_index, minlength=len(group_keys))
+        errors = {dim: grouped_errors(group_index, len(group_keys), ai, teacher) for dim, (ai, teacher, _) in pairs.items()}
+
+        labels = {}
+        if group_by == "prompt":
+            for key, version in zip(keys, arrays["prompt_version"]):
+                labels.setdefault(int(key), version)
+
+        for i, key in enumerate(group_keys.tolist()):
+            groups.append({
+                "key": None if key == -1 else key,
+                "label": labels.get(key),
+                "feedbacks": int(group_sizes[i]),
+                "dimensions": {
+                    dim: {
+                        "n": int(stats["n"][i]),
+                        "mae": _round(stats["mae"][i]),
+                        "bias": _round(stats["bias"][i])
+                    }
+                    for dim, stats in errors.items()
+                }
+            })
+
+    return {
+        "feedbacks": int(len(key_column)),
+        "group_by": group_by,
+        "overall": overall,
+        "groups": groups
+    }
+
+
+def score_divergence(
+    db: Session,
+    batch_id: Optional[int] = None,
+    prompt_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    group_by: str = "prompt"
+) -> Dict[str, Any]:
+    """AI评分与教师评分的差异统计"""
+    arrays = load_columns(db, build_query(batch_id, prompt_id, start_date, end_date))
+    return analyze_divergence(arrays, group_by)
@@ -0,0 +1,50 @@
+"""
+相同请求合并(single-flight)
+同一个键的调用正在进行时,后到的请求等待并共享第一个请求的结果,不再重复调用模型
+只在当前进程内合并;跨进程的重试请求由Idempotency-Key处理
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from app.utils.metrics import record_cache
+
+
+class SingleFlight:
+    """进行中调用的合并器(在事件循环中使用)"""
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name: 名称(用于监控指标)
+        """
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行fn,同一个键已有调用进行中时等待其结果
+        调用失败时异常同样传给所有等待者,下一次请求重新执行
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            record_cache(self.name, True)
+            return await asyncio.shield(future)
+
+        record_cache(self.name, False)
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+        except BaseException as e:
+            future.set_exception(e)
+            # 没有等待者时避免"Future exception was never retrieved"警告
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
@@ -1,9 +1,11 @@
 """
 转换工具函数
-包含分制转换等
+包含分制转换等(批量换算和评分量表见score_converter)
 """
 from typing import Dict, Any
 
+from app.utils.score_converter import DEFAULT_RUBRIC, normalize_score_system
+
 
 def convert_score_to_system(dimensions_sum: float, score_system: int) -> float:
     """
@@ -16,10 +18,7 @@ def convert_score_to_system(dimensions_sum: float, score_system: int) -> float:
     Returns:
         转换后的总分
     """
-    if score_system == 10:
-        return round((dimensions_sum / 100) * 10, 1)
-    else:
-        return round((dimensions_sum / 100) * 40, 1)
+    return float(DEFAULT_RUBRIC.to_system(dimensions_sum, normalize_score_system(score_system)))
 
 
 def get_score_system_from_original(original_score_data: Dict[str, Any]) -> int:
@@ -0,0 +1,110 @@
+"""
+从模型输出中提取JSON
+模型经常在JSON前后附加说明文字或```json代码块标记,这里直接扫描出第一个括号配平的JSON对象:
+- 容忍前置说明、代码块标记和尾随文字
+- 支持流式输出逐块喂入,对象完整后立即返回(不必等待尾随文字)
+- 配平但无法解析的片段会跳过,继续向后查找
+"""
+import json
+from typing import Any, Optional
+
+_MISSING = object()
+
+
+class JSONExtractError(ValueError):
+    """模型输出中找不到完整的JSON对象"""
+
+
+class IncrementalJSONExtractor:
+    """
+    增量JSON提取器
+
+    用法:
+        extractor = IncrementalJSONExtractor()
+        for chunk in stream:
+            if extractor.feed(chunk):
+                break
+        result = extractor.result_or_raise()
+    """
+
+    def __init__(self, open_chars: str = "{"):
+        """
+        Args:
+            open_chars: 作为JSON起点的字符,默认只识别对象;需要数组时传"{["
+        """
+        self.open_chars = open_chars
+        self.text = ""
+        self.result: Any = _MISSING
+        self._pos = 0
+        self._reset_scan()
+
+    def _reset_scan(self) -> None:
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def done(self) -> bool:
+        return self.result is not _MISSING
+
+    def feed(self, chunk: str) -> bool:
+        """喂入一段输出,返回是否已经得到完整的JSON"""
+        if self.done:
+            return True
+        self.text += chunk
+        text = self.text
+        i = self._pos
+
+        while i < len(text):
+            char = text[i]
+            if self._start < 0:
+                if char in self.open_chars:
+                    self._start = i
+                    self._depth = 1
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        self.result = json.loads(text[self._start:i + 1])
+                        self._pos = i + 1
+                        return True
+                    except json.JSONDecodeError:
+                        # 配平但不是合法JSON(如说明文字中的花括号),从下一个字符重新查找
+                        i = self._start
+                        self._reset_scan()
+            i += 1
+
+        self._pos = i
+        return False
+
+    def result_or_raise(self) -> Any:
+        """返回提取结果,输出结束仍未得到完整JSON时抛出JSONExtractError"""
+        if self.done:
+            return self.result
+        if self._start >= 0:
+            raise JSONExtractError(f"JSON不完整(可能被截断), 已读取{len(self.text)}个字符")
+        raise JSONExtractError("输出中没有JSON对象")
+
+
+def extract_json(text: Optional[str], open_chars: str = "{") -> Any:
+    """
+    提取文本中第一个完整的JSON对象
+
+    Raises:
+        JSONExtractError: 找不到完整的JSON对象
+    """
+    extractor = IncrementalJSONExtractor(open_chars)
+    extractor.feed(text or "")
+    return extractor.result_or_raise()
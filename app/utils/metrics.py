@@ -0,0 +1,249 @@
+"""
+Prometheus监控指标
+- 接口耗时(按路由)
+- 模型调用耗时/token/错误数(按阶段和提示词版本)
+- 数据库连接池等待时间、每个请求的SQL数量和耗时
+- 缓存命中情况
+"""
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+
+# 模型调用阶段
+STAGE_ANALYZE = "analyze"
+STAGE_GENRE = "genre"
+STAGE_SCORE = "score"
+
+HTTP_REQUEST_DURATION = Histogram(
+    "essay_http_request_duration_seconds",
+    "接口请求耗时",
+    ["method", "route", "status"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
+
+MODEL_CALL_DURATION = Histogram(
+    "essay_model_call_duration_seconds",
+    "模型调用耗时",
+    ["stage", "prompt_version", "model"],
+    buckets=(0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+)
+
+MODEL_TOKENS = Counter(
+    "essay_model_tokens_total",
+    "模型调用token数(direction: in/out/cached, cached为in中命中提示词缓存的部分)",
+    ["stage", "prompt_version", "direction"]
+)
+
+MODEL_CALL_ERRORS = Counter(
+    "essay_model_call_errors_total",
+    "模型调用失败次数",
+    ["stage", "prompt_version", "error"]
+)
+
+MODEL_CALL_RETRIES = Counter(
+    "essay_model_call_retries_total",
+    "模型调用重试次数",
+    ["stage", "prompt_version"]
+)
+
+MODEL_OUTPUT_REPAIRS = Counter(
+    "essay_model_output_repairs_total",
+    "模型输出解析失败后发起的修复请求次数(result: fixed/failed)",
+    ["stage", "result"]
+)
+
+MODEL_ROUTE_EVENTS = Counter(
+    "essay_model_route_events_total",
+    "模型路由事件(event: failover/unhealthy/hedge/hedge_won)",
+    ["target", "event"]
+)
+
+MODEL_CIRCUIT_EVENTS = Counter(
+    "essay_model_circuit_events_total",
+    "模型服务熔断事件(event: opened/closed/rejected)",
+    ["circuit", "event"]
+)
+
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "essay_db_pool_checkout_wait_seconds",
+    "从连接池获取连接的等待时间",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+)
+
+DB_QUERIES_PER_REQUEST = Histogram(
+    "essay_db_queries_per_request",
+    "每个请求执行的SQL数量",
+    ["route"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+)
+
+DB_TIME_PER_REQUEST = Histogram(
+    "essay_db_time_per_request_seconds",
+    "每个请求的SQL执行总耗时",
+    ["route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+
+CACHE_REQUESTS = Counter(
+    "essay_cache_requests_total",
+    "缓存查询次数(result: hit/miss)",
+    ["cache", "result"]
+)
+
+
+class RequestStats:
+    """单个请求的数据库统计(由database.py的SQL事件累加)"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        # SQL语句(带占位符) → [执行次数, 总耗时]
+        self.statements: Dict[str, List] = {}
+
+    def record_query(self, statement: str, elapsed: float) -> None:
+        self.queries += 1
+        self.db_time += elapsed
+        entry = self.statements.setdefault(statement, [0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed
+
+    def top_statements(self, limit: int = 5) -> List[Tuple[str, int, float]]:
+        """执行次数最多的语句(N+1查询会表现为同一语句重复多次)"""
+        ranked = sorted(self.statements.items(), key=lambda item: (item[1][0], item[1][1]), reverse=True)
+        return [(statement, count, elapsed) for statement, (count, elapsed) in ranked[:limit]]
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def start_request_stats() -> RequestStats:
+    """为当前请求创建统计对象(子任务和线程池共享同一对象)"""
+    stats = RequestStats()
+    _request_stats.set(stats)
+    return stats
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    """当前请求的统计对象,不在请求中时返回None"""
+    return _request_stats.get()
+
+
+def observe_request(method: str, route: str, status_code: int, duration: float, stats: RequestStats) -> None:
+    """记录一次接口请求"""
+    HTTP_REQUEST_DURATION.labels(method, route, str(status_code)).observe(duration)
+    DB_QUERIES_PER_REQUEST.labels(route).observe(stats.queries)
+    DB_TIME_PER_REQUEST.labels(route).observe(stats.db_time)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """记录一次缓存查询"""
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+class ModelCallRecord:
+    """
+    模型调用记录
+    调用方拿到响应后通过record_usage记录token数,结束后可用to_columns()写入评价/评分表
+    """
+
+    def __init__(self, stage: str, prompt_version: str, model: str):
+        self.stage = stage
+        self.prompt_version = prompt_version
+        self.model = model
+        self.prompt_tokens = None
+        self.completion_tokens = None
+        self.cached_tokens = None
+        self.latency_ms = None
+        self.retry_count = 0
+
+    def record_usage(self, usage: Any) -> None:
+        if usage is None:
+            return
+        self.prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        self.completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        MODEL_TOKENS.labels(self.stage, self.prompt_version, "in").inc(self.prompt_tokens)
+        MODEL_TOKENS.labels(self.stage, self.prompt_version, "out").inc(self.completion_tokens)
+
+        details = getattr(usage, "prompt_tokens_details", None)
+        self.cached_tokens = (getattr(details, "cached_tokens", 0) or 0) if details is not None else 0
+        MODEL_TOKENS.labels(self.stage, self.prompt_version, "cached").inc(self.cached_tokens)
+
+    def merge(self, other: "ModelCallRecord") -> None:
+        """
+        合并同一次业务调用的追加请求(如输出修复)
+        token和耗时累加,追加请求计为一次重试
+        """
+        for field in ("prompt_tokens", "completion_tokens", "cached_tokens", "latency_ms"):
+            value = getattr(other, field)
+            if value is not None:
+                setattr(self, field, (getattr(self, field) or 0) + value)
+        self.retry_count += other.retry_count + 1
+
+    def to_columns(self) -> Dict[str, Any]:
+        """对应ModelUsageMixin的字段"""
+        return {
+            "model_name": self.model,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+            "latency_ms": self.latency_ms,
+            "retry_count": self.retry_count
+        }
+
+
+@contextmanager
+def track_model_call(stage: str, prompt_version: str, model: str) -> Iterator[ModelCallRecord]:
+    """
+    统计模型调用耗时和错误
+
+    用法:
+        with track_model_call(STAGE_ANALYZE, "v1.0", model) as call:
+            response = client.chat.completions.create(...)
+            call.record_usage(response.usage)
+    """
+    record = ModelCallRecord(stage, prompt_version, model)
+    start = time.perf_counter()
+    try:
+        yield record
+    except Exception as e:
+        MODEL_CALL_ERRORS.labels(stage, prompt_version, type(e).__name__).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        record.latency_ms = int(elapsed * 1000)
+        MODEL_CALL_DURATION.labels(stage, prompt_version, model).observe(elapsed)
+        if record.retry_count:
+            MODEL_CALL_RETRIES.labels(stage, prompt_version).inc(record.retry_count)
+
+
+def prompt_version_label(prompt_id: Optional[int] = None, version_name: Optional[str] = None) -> str:
+    """提示词版本标签: 有版本名用版本名,否则用提示词ID"""
+    if version_name:
+        return version_name
+    if prompt_id is not None:
+        return f"#{prompt_id}"
+    return "builtin"
+
+
+def metrics_payload() -> tuple:
+    """
+    生成/metrics的响应内容
+    多进程部署时设置PROMETHEUS_MULTIPROC_DIR,汇总各进程的指标
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
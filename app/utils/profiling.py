@@ -0,0 +1,64 @@
+"""
+请求级性能分析
+- Server-Timing响应头(SQL数量和耗时)
+- 慢请求日志(附带重复次数最多的SQL)
+- 通过请求头开启的采样分析(pyinstrument)
+"""
+from typing import Optional
+
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, PlainTextResponse, Response
+
+from app.config import settings
+from app.utils.logger import logger
+from app.utils.metrics import RequestStats
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # 未安装pyinstrument时不提供采样分析
+    Profiler = None
+
+
+def server_timing_header(stats: RequestStats, duration: float) -> str:
+    """构建Server-Timing响应头(单位毫秒)"""
+    return (
+        f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries", '
+        f'total;dur={duration * 1000:.1f}'
+    )
+
+
+def log_slow_request(method: str, route: str, duration: float, stats: RequestStats) -> None:
+    """耗时或SQL数量超过阈值时记录慢请求日志"""
+    if duration * 1000 < settings.SLOW_REQUEST_MS and stats.queries < settings.SLOW_REQUEST_QUERIES:
+        return
+
+    lines = [
+        f"慢请求: {method} {route} 耗时 {duration * 1000:.0f}ms, "
+        f"SQL {stats.queries} 条, SQL耗时 {stats.db_time * 1000:.0f}ms"
+    ]
+    for statement, count, elapsed in stats.top_statements():
+        sql = " ".join(statement.split())
+        lines.append(f"  x{count} {elapsed * 1000:.1f}ms  {sql[:200]}")
+    logger.warning("\n".join(lines))
+
+
+def start_profiler(request: Request) -> Optional["Profiler"]:
+    """配置允许且请求带有分析请求头时,开始采样分析"""
+    if not settings.PROFILING_ENABLED or not request.headers.get(settings.PROFILING_HEADER):
+        return None
+    if Profiler is None:
+        logger.warning("未安装pyinstrument,忽略性能分析请求")
+        return None
+
+    # 不跟踪协程上下文,直接采样事件循环线程(同步阻塞调用也能看到)
+    profiler = Profiler(async_mode="disabled")
+    profiler.start()
+    return profiler
+
+
+def profiler_response(profiler: "Profiler", request: Request) -> Response:
+    """结束采样并返回分析报告(请求头值为text时返回文本,否则返回HTML)"""
+    profiler.stop()
+    if request.headers.get(settings.PROFILING_HEADER, "").lower() == "text":
+        return PlainTextResponse(profiler.output_text(unicode=True, color=False))
+    return HTMLResponse(profiler.output_html())
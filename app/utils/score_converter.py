@@ -0,0 +1,164 @@
+"""
+分制转换
+评分量表(Rubric)定义各维度满分和取整方式,分数以NumPy数组批量换算:
+- 维度分数(单篇为一维数组,多篇为矩阵,每行一篇作文、每列一个维度) → 指定分制的总分
+- 已有总分在分制之间换算(学校更换分制时整批重算)
+"""
+from typing import Any, Dict, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+ROUND_TENTH = "tenth"      # 四舍五入到0.1分
+ROUND_INTEGER = "integer"  # 四舍五入到整数
+ROUND_FLOOR = "floor"      # 截断到整数(舍去小数部分)
+ROUNDING_MODES = (ROUND_TENTH, ROUND_INTEGER, ROUND_FLOOR)
+
+SCORE_SYSTEMS = (10, 40)
+DEFAULT_SCORE_SYSTEM = 40
+
+# 评分维度: 英文字段 → 中文名
+DIMENSION_NAMES = {
+    "theme_and_intent": "中心立意",
+    "language_expression": "语言表达",
+    "structure": "篇章结构",
+    "content_selection": "文章选材",
+    "emotion_and_content": "内容情感",
+}
+
+# 评分维度满分(合计100分)
+DIMENSION_MAX_SCORES = {
+    "theme_and_intent": 20,
+    "language_expression": 25,
+    "structure": 15,
+    "content_selection": 15,
+    "emotion_and_content": 25,
+}
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+
+# 取整前先按此精度消除浮点误差(如 73.5 / 100 * 10 = 7.3500000000000005)
+_NOISE_DECIMALS = 6
+
+
+def normalize_score_system(score_system: int) -> int:
+    """不支持的分制按默认的40分制处理"""
+    return score_system if score_system in SCORE_SYSTEMS else DEFAULT_SCORE_SYSTEM
+
+
+def round_scores(values: ArrayLike, rounding: str = ROUND_TENTH) -> np.ndarray:
+    """按取整方式处理分数(四舍五入按十进制逢五进位)"""
+    values = np.round(np.asarray(values, dtype=float), _NOISE_DECIMALS)
+    if rounding == ROUND_TENTH:
+        return np.floor(np.round(values * 10, _NOISE_DECIMALS) + 0.5) / 10
+    if rounding == ROUND_INTEGER:
+        return np.floor(values + 0.5)
+    if rounding == ROUND_FLOOR:
+        return np.trunc(values)
+    raise ValueError(f"不支持的取整方式: {rounding}(可选: {', '.join(ROUNDING_MODES)})")
+
+
+class Rubric:
+    """
+    评分量表
+
+    用法:
+        values = DEFAULT_RUBRIC.validate(scores)             # 单篇: 校验并取出维度分数
+        total = DEFAULT_RUBRIC.total(values, score_system=40)
+        totals = DEFAULT_RUBRIC.total(matrix, score_system=systems)  # 多篇: 分制可以是数组
+    """
+
+    def __init__(
+        self,
+        max_scores: Mapping[str, float],
+        rounding: str = ROUND_TENTH,
+        names: Optional[Mapping[str, str]] = None
+    ):
+        if rounding not in ROUNDING_MODES:
+            raise ValueError(f"不支持的取整方式: {rounding}(可选: {', '.join(ROUNDING_MODES)})")
+        self.dimensions = tuple(max_scores)
+        self.max_scores = np.array([max_scores[dim] for dim in self.dimensions], dtype=float)
+        self.full_score = float(self.max_scores.sum())
+        self.rounding = rounding
+        self.names = dict(names or {})
+
+    def label(self, dim: str) -> str:
+        """维度的显示名: 英文字段(中文名)"""
+        return f"{dim}（{self.names[dim]}）" if dim in self.names else dim
+
+    def _lookup(self, scores: Mapping[str, Any], dim: str) -> Any:
+        """按英文字段或中文名取维度分数,兼容{"score": 分数}结构"""
+        value = scores.get(dim)
+        if value is None and dim in self.names:
+            value = scores.get(self.names[dim])
+        if isinstance(value, Mapping):
+            value = value.get("score")
+        return value
+
+    def validate(self, scores: Mapping[str, Any]) -> np.ndarray:
+        """
+        校验单篇作文的维度分数
+
+        Returns:
+            按量表维度顺序的分数数组
+
+        Raises:
+            ValueError: 缺少维度或分数超出范围
+        """
+        values = np.empty(len(self.dimensions))
+        for index, dim in enumerate(self.dimensions):
+            value = self._lookup(scores, dim)
+            if value is None:
+                raise ValueError(f"缺少维度: {self.label(dim)}")
+            value = float(value)
+            max_score = self.max_scores[index]
+            if value < 0 or value > max_score:
+                raise ValueError(f"维度 {self.label(dim)} 分数超出范围: {value}（有效值0-{max_score:g}）")
+            values[index] = value
+        return values
+
+    def matrix(self, rows: Sequence[Mapping[str, Any]]) -> np.ndarray:
+        """多篇作文的维度分数 → 矩阵(缺少的维度或无法解析的分数为nan,不校验范围)"""
+        matrix = np.full((len(rows), len(self.dimensions)), np.nan)
+        for row_index, scores in enumerate(rows):
+            for index, dim in enumerate(self.dimensions):
+                try:
+                    matrix[row_index, index] = float(self._lookup(scores, dim))
+                except (TypeError, ValueError):
+                    continue
+        return matrix
+
+    def dimensions_json(self, values: np.ndarray, by_name: bool = False) -> Dict[str, Dict[str, float]]:
+        """单篇作文的维度分数 → 评分记录保存的结构 {维度: {"score", "max_score"}}"""
+        return {
+            (self.names.get(dim, dim) if by_name else dim): {
+                "score": float(value),
+                "max_score": int(max_score) if float(max_score).is_integer() else float(max_score)
+            }
+            for dim, value, max_score in zip(self.dimensions, values, self.max_scores)
+        }
+
+    def to_system(self, dimensions_sum: ArrayLike, score_system: ArrayLike, rounding: Optional[str] = None) -> np.ndarray:
+        """维度分数之和 → 指定分制的总分"""
+        dimensions_sum = np.asarray(dimensions_sum, dtype=float)
+        score_system = np.asarray(score_system, dtype=float)
+        return round_scores(dimensions_sum / self.full_score * score_system, rounding or self.rounding)
+
+    def total(self, values: np.ndarray, score_system: ArrayLike, rounding: Optional[str] = None) -> np.ndarray:
+        """维度分数(最后一维为维度) → 指定分制的总分,缺少维度的作文结果为nan"""
+        return self.to_system(np.asarray(values, dtype=float).sum(axis=-1), score_system, rounding)
+
+    def rescale(
+        self,
+        totals: ArrayLike,
+        from_system: ArrayLike,
+        to_system: ArrayLike,
+        rounding: Optional[str] = None
+    ) -> np.ndarray:
+        """已有总分在分制之间换算"""
+        totals = np.asarray(totals, dtype=float)
+        from_system = np.asarray(from_system, dtype=float)
+        return round_scores(totals / from_system * np.asarray(to_system, dtype=float), rounding or self.rounding)
+
+
+DEFAULT_RUBRIC = Rubric(DIMENSION_MAX_SCORES, names=DIMENSION_NAMES)
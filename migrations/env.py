@@ -0,0 +1,72 @@
+"""
+Alembic迁移环境
+目标结构取自app.models,连接地址取自应用配置(可用 -x db_url=... 覆盖)
+"""
+import os
+import sys
+from logging.config import fileConfig
+
+# 添加项目根目录到路径(可以在任意目录执行alembic -c)
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from app.config import settings
+from app.database import Base
+import app.models  # noqa: F401  注册所有模型
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def _database_url() -> str:
+    return context.get_x_argument(as_dictionary=True).get("db_url") or config.get_main_option("sqlalchemy.url") or settings.DATABASE_URL
+
+
+def run_migrations_offline() -> None:
+    """只生成SQL(alembic upgrade head --sql),不连接数据库"""
+    context.configure(
+        url=_database_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        compare_type=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """连接数据库执行迁移(测试可以通过config.attributes["connection"]传入已有连接)"""
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run(connection)
+        return
+
+    engine = create_engine(_database_url(), poolclass=pool.NullPool)
+    with engine.connect() as connection:
+        _run(connection)
+
+
+def _run(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        compare_type=True,
+        # SQLite不支持大部分ALTER TABLE,用重建表的方式执行
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
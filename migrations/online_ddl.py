@@ -0,0 +1,96 @@
+"""
+在线DDL
+MySQL(InnoDB)上以 ALGORITHM=INPLACE, LOCK=NONE 建索引、加减字段,执行期间表可以正常读写;
+MySQL无法在线执行时会直接报错,而不是退化为锁表复制
+其他数据库(开发和测试用的SQLite)使用Alembic的普通操作
+
+已存在的表、字段和索引会跳过(引入Alembic之前直接按模型建过的),只生成SQL时无法检查,全部输出
+"""
+from typing import Sequence
+
+import sqlalchemy as sa
+from alembic import context, op
+from sqlalchemy.schema import CreateColumn
+
+ONLINE_DDL = "ALGORITHM=INPLACE, LOCK=NONE"
+
+
+def _is_mysql() -> bool:
+    return op.get_context().dialect.name == "mysql"
+
+
+def _quote(name: str) -> str:
+    return op.get_context().dialect.identifier_preparer.quote(name)
+
+
+def _inspector():
+    return None if context.is_offline_mode() else sa.inspect(op.get_bind())
+
+
+def table_exists(table: str) -> bool:
+    inspector = _inspector()
+    return inspector is not None and inspector.has_table(table)
+
+
+def _column_exists(table: str, name: str) -> bool:
+    inspector = _inspector()
+    return inspector is not None and name in {column["name"] for column in inspector.get_columns(table)}
+
+
+def _index_exists(table: str, name: str) -> bool:
+    inspector = _inspector()
+    return inspector is not None and name in {index["name"] for index in inspector.get_indexes(table)}
+
+
+def create_index_online(name: str, table: str, columns: Sequence[str], unique: bool = False) -> None:
+    """在线创建索引"""
+    if _index_exists(table, name):
+        return
+    if not _is_mysql():
+        op.create_index(name, table, list(columns), unique=unique)
+        return
+    column_list = ", ".join(_quote(column) for column in columns)
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    op.execute(f"ALTER TABLE {_quote(table)} ADD {kind} {_quote(name)} ({column_list}), {ONLINE_DDL}")
+
+
+def drop_index_online(name: str, table: str) -> None:
+    """在线删除索引"""
+    if not _is_mysql():
+        op.drop_index(name, table_name=table)
+        return
+    op.execute(f"ALTER TABLE {_quote(table)} DROP INDEX {_quote(name)}, {ONLINE_DDL}")
+
+
+def add_columns_online(table: str, columns: Sequence[sa.Column]) -> None:
+    """在线添加字段(加在表的末尾),MySQL上同一张表的字段合并为一条ALTER TABLE,只重建一次表"""
+    columns = [column for column in columns if not _column_exists(table, column.name)]
+    if not columns:
+        return
+    if not _is_mysql():
+        for column in columns:
+            op.add_column(table, column)
+        return
+    dialect = op.get_context().dialect
+    clauses = ", ".join(f"ADD COLUMN {CreateColumn(column).compile(dialect=dialect)}" for column in columns)
+    op.execute(f"ALTER TABLE {_quote(table)} {clauses}, {ONLINE_DDL}")
+
+
+def add_column_online(table: str, column: sa.Column) -> None:
+    """在线添加单个字段"""
+    add_columns_online(table, [column])
+
+
+def drop_columns_online(table: str, names: Sequence[str]) -> None:
+    """在线删除字段,MySQL上同一张表的字段合并为一条ALTER TABLE"""
+    if not _is_mysql():
+        for name in names:
+            op.drop_column(table, name)
+        return
+    clauses = ", ".join(f"DROP COLUMN {_quote(name)}" for name in names)
+    op.execute(f"ALTER TABLE {_quote(table)} {clauses}, {ONLINE_DDL}")
+
+
+def drop_column_online(table: str, name: str) -> None:
+    """在线删除单个字段"""
+    drop_columns_online(table, [name])
@@ -0,0 +1,203 @@
+"""基线: 接入Alembic之前已上线的数据库结构
+
+已有数据库不要执行本迁移,先标记为基线版本再升级(之后的迁移会跳过已经存在的表、字段和索引):
+    alembic stamp 0001
+    alembic upgrade head
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 11:07:19.344037
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('composition_genres',
+    sa.Column('genre_name', sa.String(length=50), nullable=False, comment='文体名称(记叙文/议论文)'),
+    sa.Column('genre_code', sa.String(length=20), nullable=False, comment='文体编码(narrative/argumentative)'),
+    sa.Column('description', sa.String(length=200), nullable=True, comment='文体描述'),
+    sa.Column('sort_order', sa.Integer(), nullable=False, comment='排序'),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False, comment='主键ID'),
+    sa.Column('status', mysql.TINYINT(), nullable=True, comment='状态(1:正常,0:删除)'),
+    sa.Column('create_date', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True, comment='创建时间'),
+    sa.Column('update_date', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True, comment='更新时间'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('genre_code', name='uk_genre_code'),
+    comment='文体表'
+    )
+    op.create_table('composition_grades',
+    sa.Column('grade_name', sa.String(length=50), nullable=False, comment='年级名称(7年级/8年级/9年级)'),
+    sa.Column('grade_code', sa.String(length=20), nullable=False, comment='年级编码(grade_7/grade_8/grade_9)'),
+    sa.Column('grade_level', sa.String(length=20), nullable=False, comment='学段(初中)'),
+    sa.Column('sort_order', sa.Integer(), nullable=False, comment='排序'),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False, comment='主键ID'),
+    sa.Column('status', mysql.TINYINT(), nullable=True, comment='状态(1:正常,0:删除)'),
+    sa.Column('create_date', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True, comment='创建时间'),
+    sa.Column('update_date', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True, comment='更新时间'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('grade_code', name='uk_grade_code'),
+    comment='年级表'
+    )
+    op.create_table('composition_users',
+    sa.Column('phone', sa.String(length=11), nullable=False, comment='手机号'),
+    sa.Column('first_login_at', sa.DateTime(), nullable=False, comment='首次登录时间'),
+    sa.Column('last_login_at', sa.DateTime(), nullable=False, comment='最后登录时间'),
+    sa.Column('login_count', sa.Integer(), nullable=True, comment='登录次数'),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False, comment='主键ID'),
+    sa.Column('status', mysql.TINYINT(), nullable=True, comment='状态(1:正常,0:删除)'),
+    sa.Column('create_date', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True, comment='创建时间'),
+    sa.Column('update_date', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True, comment='更新时间'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('phone'),
+    comment='用户表'
+    )
+    op.create_index('idx_phone', 'composition_users', ['phone'], unique=False)
+    op.create_table('composition_batches',
+    sa.Column('directory_name', sa.String(length=100), nullable=False, comment='批次目录名(唯一标识)'),
+    sa.Column('essay_title', sa.Text(), nullable=False, comment='作文题目'),
+    sa.Column('essay_requirement', sa.Text(), nullable=True, comment='作文要求(纯文本)'),
+    sa.Column('grade_id', sa.Integer(), nullable=True, comment='年级ID'),
+    sa.Column('suggested_genre_id', sa.Integer(), nullable=True, comment='建议文体ID'),
+    sa.Column('essay_count', sa.Integer(), nullable=True, comment='该批次作文数量'),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False, comment='主键ID'),
+    sa.Column('status', mysql.TINYINT(), nullable=True, comment='状态(1:正常,0:删除)'),
+    sa.Column('create_date', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True, comment='创建时间'),
+    sa.Column('update_date', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True, comment='更新时间'),
+    sa.ForeignKeyConstraint(['grade_id'], ['composition_grades.id'], ),
+    sa.ForeignKeyConstraint(['suggested_genre_id'], ['composition_genres.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('directory_name'),
+    comment='作文批次表'
+    )
+    op.create_index('idx_directory', 'composition_batches', ['directory_name'], unique=False)
+    op.create_index('idx_grade', 'composition_batches', ['grade_id'], unique=False)
+    op.create_table('composition_prompts',
+    sa.Column('grade_id', sa.Integer(), nullable=False, comment='年级ID'),
+    sa.Column('genre_id', sa.Integer(), nullable=False, comment='文体ID'),
+    sa.Column('prompt_type', sa.String(length=20), nullable=False, comment='提示词类型(analyze/score)'),
+    sa.Column('version_name', sa.String(length=50), nullable=False, comment='版本名称'),
+    sa.Column('prompt_content', sa.Text(), nullable=False, comment='提示词内容'),
+    sa.Column('is_default', mysql.TINYINT(), nullable=True, comment='是否默认(1:是,0:否)'),
+    sa.Column('created_by', sa.String(length=11), nullable=True, comment='创建人手机号'),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False, comment='主键ID'),
+    sa.Column('status', mysql.TINYINT(), nullable=True, comment='状态(1:正常,0:删除)'),
+    sa.Column('create_date', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True, comment='创建时间'),
+    sa.Column('update_date', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True, comment='更新时间'),
+    sa.ForeignKeyConstraint(['genre_id'], ['composition_genres.id'], ),
+    sa.ForeignKeyConstraint(['grade_id'], ['composition_grades.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    comment='提示词表'
+    )
+    op.create_index('idx_created_by', 'composition_prompts', ['created_by'], unique=False)
+    op.create_index('idx_grade_genre', 'composition_prompts', ['grade_id', 'genre_id', 'prompt_type'], unique=False)
+    op.create_table('composition_essays',
+    sa.Column('batch_id', sa.Integer(), nullable=False, comment='批次ID'),
+    sa.Column('student_name', sa.String(length=100), nullable=True, comment='学生姓名'),
+    sa.Column('essay_content', sa.Text(), nullable=False, comment='作文内容'),
+    sa.Column('essay_image_path', sa.String(length=500), nullable=True, comment='作文图片路径'),
+    sa.Column('analysis_report_path', sa.String(length=500), nullable=True, comment='分析报告路径'),
+    sa.Column('word_count', sa.Integer(), nullable=False, comment='字数统计'),
+    sa.Column('score_system', mysql.TINYINT(), nullable=False, comment='分制(10:10分制, 40:40分制)'),
+    sa.Column('original_score', sa.Float(), nullable=True, comment='原始评分'),
+    sa.Column('original_score_data', sa.Text(), nullable=True, comment='原始评分详情(JSON字符串)'),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False, comment='主键ID'),
+    sa.Column('status', mysql.TINYINT(), nullable=True, comment='状态(1:正常,0:删除)'),
+    sa.Column('create_date', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True, comment='创建时间'),
+    sa.Column('update_date', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True, comment='更新时间'),
+    sa.ForeignKeyConstraint(['batch_id'], ['composition_batches.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    comment='作文表'
+    )
+    op.create_index('idx_batch', 'composition_essays', ['batch_id'], unique=False)
+    op.create_index('idx_score_system', 'composition_essays', ['score_system'], unique=False)
+    op.create_index('idx_student', 'composition_essays', ['student_name'], unique=False)
+    op.create_table('composition_evaluations',
+    sa.Column('essay_id', sa.Integer(), nullable=False, comment='作文ID'),
+    sa.Column('user_phone', sa.String(length=11), nullable=False, comment='评价人手机号'),
+    sa.Column('analyze_prompt_id', sa.Integer(), nullable=False, comment='使用的评价提示词ID'),
+    sa.Column('detected_genre_id', sa.Integer(), nullable=True, comment='AI判断的文体ID'),
+    sa.Column('detected_grade_id', sa.Integer(), nullable=True, comment='AI判断的年级ID'),
+    sa.Column('confirmed_genre_id', sa.Integer(), nullable=False, comment='用户确认的文体ID'),
+    sa.Column('confirmed_grade_id', sa.Integer(), nullable=False, comment='用户确认的年级ID'),
+    sa.Column('genre_confidence', sa.Float(), nullable=True, comment='AI判断文体的置信度(0-1)'),
+    sa.Column('evaluation_result', sa.Text(), nullable=False, comment='评价结果(JSON字符串)'),
+    sa.Column('is_latest', mysql.TINYINT(), nullable=True, comment='是否最新评价(1:是,0:否)'),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False, comment='主键ID'),
+    sa.Column('status', mysql.TINYINT(), nullable=True, comment='状态(1:正常,0:删除)'),
+    sa.Column('create_date', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True, comment='创建时间'),
+    sa.Column('update_date', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True, comment='更新时间'),
+    sa.ForeignKeyConstraint(['analyze_prompt_id'], ['composition_prompts.id'], ),
+    sa.ForeignKeyConstraint(['confirmed_genre_id'], ['composition_genres.id'], ),
+    sa.ForeignKeyConstraint(['confirmed_grade_id'], ['composition_grades.id'], ),
+    sa.ForeignKeyConstraint(['detected_genre_id'], ['composition_genres.id'], ),
+    sa.ForeignKeyConstraint(['detected_grade_id'], ['composition_grades.id'], ),
+    sa.ForeignKeyConstraint(['essay_id'], ['composition_essays.id'], ),
+    sa.ForeignKeyConstraint(['user_phone'], ['composition_users.phone'], ),
+    sa.PrimaryKeyConstraint('id'),
+    comment='评价表'
+    )
+    op.create_index('idx_essay', 'composition_evaluations', ['essay_id'], unique=False)
+    op.create_index('idx_latest', 'composition_evaluations', ['essay_id', 'is_latest'], unique=False)
+    op.create_index('idx_user', 'composition_evaluations', ['user_phone'], unique=False)
+    op.create_table('composition_scores',
+    sa.Column('evaluation_id', sa.Integer(), nullable=False, comment='评价ID'),
+    sa.Column('user_phone', sa.String(length=11), nullable=False, comment='评分人手机号(system表示AI)'),
+    sa.Column('score_prompt_id', sa.Integer(), nullable=False, comment='使用的评分提示词ID'),
+    sa.Column('score_type', sa.String(length=20), nullable=False, comment='评分类型(ai/user)'),
+    sa.Column('total_score', sa.Float(), nullable=False, comment='总分'),
+    sa.Column('dimension_scores', sa.Text(), nullable=False, comment='各维度分数(JSON字符串)'),
+    sa.Column('is_default', mysql.TINYINT(), nullable=True, comment='是否默认评分(1:是,0:否)'),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False, comment='主键ID'),
+    sa.Column('status', mysql.TINYINT(), nullable=True, comment='状态(1:正常,0:删除)'),
+    sa.Column('create_date', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True, comment='创建时间'),
+    sa.Column('update_date', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True, comment='更新时间'),
+    sa.ForeignKeyConstraint(['evaluation_id'], ['composition_evaluations.id'], ),
+    sa.ForeignKeyConstraint(['score_prompt_id'], ['composition_prompts.id'], ),
+    sa.ForeignKeyConstraint(['user_phone'], ['composition_users.phone'], ),
+    sa.PrimaryKeyConstraint('id'),
+    comment='评分表'
+    )
+    op.create_index('idx_evaluation', 'composition_scores', ['evaluation_id'], unique=False)
+    op.create_index('idx_user', 'composition_scores', ['user_phone'], unique=False)
+    op.create_table('composition_user_feedbacks',
+    sa.Column('evaluation_id', sa.Integer(), nullable=False, comment='评价ID'),
+    sa.Column('score_id', sa.Integer(), nullable=True, comment='评分ID(针对评分的反馈)'),
+    sa.Column('user_phone', sa.String(length=11), nullable=False, comment='反馈人手机号'),
+    sa.Column('feedback_type', sa.String(length=50), nullable=False, comment='反馈类型(comparison/custom_score/comment/issue_mark)'),
+    sa.Column('feedback_data', sa.Text(), nullable=False, comment='反馈数据(JSON字符串)'),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False, comment='主键ID'),
+    sa.Column('status', mysql.TINYINT(), nullable=True, comment='状态(1:正常,0:删除)'),
+    sa.Column('create_date', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True, comment='创建时间'),
+    sa.Column('update_date', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True, comment='更新时间'),
+    sa.ForeignKeyConstraint(['evaluation_id'], ['composition_evaluations.id'], ),
+    sa.ForeignKeyConstraint(['score_id'], ['composition_scores.id'], ),
+    sa.ForeignKeyConstraint(['user_phone'], ['composition_users.phone'], ),
+    sa.PrimaryKeyConstraint('id'),
+    comment='用户反馈表'
+    )
+    op.create_index('idx_evaluation', 'composition_user_feedbacks', ['evaluation_id'], unique=False)
+    op.create_index('idx_score', 'composition_user_feedbacks', ['score_id'], unique=False)
+    op.create_index('idx_user', 'composition_user_feedbacks', ['user_phone'], unique=False)
+
+
+def downgrade() -> None:
+    # 删除表时索引一起删除
+    op.drop_table('composition_user_feedbacks')
+    op.drop_table('composition_scores')
+    op.drop_table('composition_evaluations')
+    op.drop_table('composition_essays')
+    op.drop_table('composition_prompts')
+    op.drop_table('composition_batches')
+    op.drop_table('composition_users')
+    op.drop_table('composition_grades')
+    op.drop_table('composition_genres')
@@ -0,0 +1,41 @@
+"""评价表和评分表记录模型调用(模型名称、token数、耗时、重试次数)
+
+MySQL上每张表用一条ALTER TABLE在线添加字段(ALGORITHM=INPLACE, LOCK=NONE)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 11:20:00.000000
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from migrations.online_ddl import add_columns_online, drop_columns_online
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ['composition_evaluations', 'composition_scores']
+
+
+def _columns():
+    return [
+        sa.Column('model_name', sa.String(length=100), nullable=True, comment='模型名称'),
+        sa.Column('prompt_tokens', sa.Integer(), nullable=True, comment='输入token数'),
+        sa.Column('completion_tokens', sa.Integer(), nullable=True, comment='输出token数'),
+        sa.Column('latency_ms', sa.Integer(), nullable=True, comment='模型调用耗时(毫秒)'),
+        sa.Column('retry_count', sa.Integer(), nullable=True, comment='重试次数'),
+    ]
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        add_columns_online(table, _columns())
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        drop_columns_online(table, [column.name for column in reversed(_columns())])
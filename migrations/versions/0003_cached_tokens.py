@@ -0,0 +1,37 @@
+"""评价表和评分表记录命中服务商提示词缓存的输入token数
+
+MySQL上每张表用一条ALTER TABLE在线添加字段(ALGORITHM=INPLACE, LOCK=NONE)
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 11:21:00.000000
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from migrations.online_ddl import add_columns_online, drop_columns_online
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ['composition_evaluations', 'composition_scores']
+
+
+def _columns():
+    return [
+        sa.Column('cached_tokens', sa.Integer(), nullable=True, comment='命中服务商提示词缓存的输入token数'),
+    ]
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        add_columns_online(table, _columns())
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        drop_columns_online(table, [column.name for column in reversed(_columns())])
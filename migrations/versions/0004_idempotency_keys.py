@@ -0,0 +1,45 @@
+"""幂等键表(带Idempotency-Key请求头的POST请求结果)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 11:22:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+from migrations.online_ddl import table_exists
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if table_exists('composition_idempotency_keys'):
+        return
+    op.create_table('composition_idempotency_keys',
+    sa.Column('idempotency_key', sa.String(length=128), nullable=False, comment='客户端提供的幂等键'),
+    sa.Column('method', sa.String(length=10), nullable=False, comment='请求方法'),
+    sa.Column('path', sa.String(length=255), nullable=False, comment='请求路径'),
+    sa.Column('request_hash', sa.String(length=64), nullable=False, comment='请求内容哈希(SHA-256)'),
+    sa.Column('status_code', sa.Integer(), nullable=True, comment='响应状态码(为空表示处理中)'),
+    sa.Column('content_type', sa.String(length=100), nullable=True, comment='响应Content-Type'),
+    sa.Column('response_body', sa.Text().with_variant(mysql.MEDIUMTEXT(), 'mysql'), nullable=True, comment='响应内容'),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False, comment='主键ID'),
+    sa.Column('status', mysql.TINYINT(), nullable=True, comment='状态(1:正常,0:删除)'),
+    sa.Column('create_date', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True, comment='创建时间'),
+    sa.Column('update_date', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True, comment='更新时间'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('idempotency_key', 'method', 'path', name='uk_idempotency_key'),
+    comment='幂等键表'
+    )
+    op.create_index('idx_create_date', 'composition_idempotency_keys', ['create_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_table('composition_idempotency_keys')
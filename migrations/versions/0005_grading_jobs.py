@@ -0,0 +1,53 @@
+"""离线批量评分任务表
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 11:23:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+from migrations.online_ddl import table_exists
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if table_exists('composition_grading_jobs'):
+        return
+    op.create_table('composition_grading_jobs',
+    sa.Column('provider', sa.String(length=50), nullable=False, comment='服务商(openai)'),
+    sa.Column('provider_job_id', sa.String(length=100), nullable=False, comment='服务商任务ID'),
+    sa.Column('stage', sa.String(length=20), nullable=False, comment='阶段(analyze/score)'),
+    sa.Column('prompt_id', sa.Integer(), nullable=False, comment='使用的提示词ID'),
+    sa.Column('model_name', sa.String(length=100), nullable=True, comment='模型名称'),
+    sa.Column('user_phone', sa.String(length=11), nullable=False, comment='结果记录的评价人/评分人手机号'),
+    sa.Column('request_count', sa.Integer(), nullable=True, comment='请求数'),
+    sa.Column('succeeded_count', sa.Integer(), nullable=True, comment='成功导入数'),
+    sa.Column('failed_count', sa.Integer(), nullable=True, comment='失败数(服务商报错或结果无法解析)'),
+    sa.Column('job_status', sa.String(length=20), nullable=False, comment='任务状态(submitted/in_progress/completed/failed/cancelled/expired/ingested)'),
+    sa.Column('error_message', sa.Text(), nullable=True, comment='错误信息'),
+    sa.Column('completed_at', sa.DateTime(), nullable=True, comment='服务商完成时间'),
+    sa.Column('ingested_at', sa.DateTime(), nullable=True, comment='结果导入时间'),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False, comment='主键ID'),
+    sa.Column('status', mysql.TINYINT(), nullable=True, comment='状态(1:正常,0:删除)'),
+    sa.Column('create_date', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True, comment='创建时间'),
+    sa.Column('update_date', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True, comment='更新时间'),
+    sa.ForeignKeyConstraint(['prompt_id'], ['composition_prompts.id'], ),
+    sa.ForeignKeyConstraint(['user_phone'], ['composition_users.phone'], ),
+    sa.PrimaryKeyConstraint('id'),
+    comment='离线批量评分任务表'
+    )
+    op.create_index('idx_job_status', 'composition_grading_jobs', ['job_status'], unique=False)
+    op.create_index('idx_provider_job', 'composition_grading_jobs', ['provider', 'provider_job_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_table('composition_grading_jobs')
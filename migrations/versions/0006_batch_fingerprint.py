@@ -0,0 +1,34 @@
+"""批次按题目和要求的指纹复用(fingerprint列和唯一索引)
+
+MySQL上在线添加字段和索引(ALGORITHM=INPLACE, LOCK=NONE);
+已有批次的指纹需要执行 scripts/backfill_batch_fingerprints.py 回填
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 11:24:00.000000
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from migrations.online_ddl import add_column_online, create_index_online, drop_column_online, drop_index_online
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    add_column_online('composition_batches', sa.Column(
+        'fingerprint', sa.String(length=64), nullable=True,
+        comment='题目和要求的SHA-256(复用批次时按此查找,已删除的批次置空)'
+    ))
+    # 新增的列全部为空,唯一索引可以直接创建
+    create_index_online('uk_fingerprint', 'composition_batches', ['fingerprint'], unique=True)
+
+
+def downgrade() -> None:
+    drop_index_online('uk_fingerprint', 'composition_batches')
+    drop_column_online('composition_batches', 'fingerprint')
@@ -0,0 +1,60 @@
+"""批次评分统计表
+
+建表后执行 scripts/recompute_batch_stats.py 初始化统计
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 11:25:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+from migrations.online_ddl import table_exists
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if table_exists('composition_batch_score_stats'):
+        return
+    op.create_table('composition_batch_score_stats',
+    sa.Column('batch_id', sa.Integer(), nullable=False, comment='批次ID'),
+    sa.Column('score_count', sa.Integer(), nullable=False, comment='计入统计的评分数'),
+    sa.Column('total_sum', sa.Float(), nullable=False, comment='总分(百分制)之和'),
+    sa.Column('total_sq_sum', sa.Float(), nullable=False, comment='总分(百分制)平方和'),
+    sa.Column('bucket_0', sa.Integer(), nullable=False, comment='总分[0,10)的评分数'),
+    sa.Column('bucket_1', sa.Integer(), nullable=False, comment='总分[10,20)的评分数'),
+    sa.Column('bucket_2', sa.Integer(), nullable=False, comment='总分[20,30)的评分数'),
+    sa.Column('bucket_3', sa.Integer(), nullable=False, comment='总分[30,40)的评分数'),
+    sa.Column('bucket_4', sa.Integer(), nullable=False, comment='总分[40,50)的评分数'),
+    sa.Column('bucket_5', sa.Integer(), nullable=False, comment='总分[50,60)的评分数'),
+    sa.Column('bucket_6', sa.Integer(), nullable=False, comment='总分[60,70)的评分数'),
+    sa.Column('bucket_7', sa.Integer(), nullable=False, comment='总分[70,80)的评分数'),
+    sa.Column('bucket_8', sa.Integer(), nullable=False, comment='总分[80,90)的评分数'),
+    sa.Column('bucket_9', sa.Integer(), nullable=False, comment='总分[90,100]的评分数'),
+    sa.Column('dimension_count', sa.Integer(), nullable=False, comment='有完整维度分数的评分数'),
+    sa.Column('theme_and_intent_sum', sa.Float(), nullable=False, comment='中心立意分数之和'),
+    sa.Column('language_expression_sum', sa.Float(), nullable=False, comment='语言表达分数之和'),
+    sa.Column('structure_sum', sa.Float(), nullable=False, comment='篇章结构分数之和'),
+    sa.Column('content_selection_sum', sa.Float(), nullable=False, comment='文章选材分数之和'),
+    sa.Column('emotion_and_content_sum', sa.Float(), nullable=False, comment='内容情感分数之和'),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False, comment='主键ID'),
+    sa.Column('status', mysql.TINYINT(), nullable=True, comment='状态(1:正常,0:删除)'),
+    sa.Column('create_date', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True, comment='创建时间'),
+    sa.Column('update_date', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True, comment='更新时间'),
+    sa.ForeignKeyConstraint(['batch_id'], ['composition_batches.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    comment='批次评分统计表'
+    )
+    op.create_index('uk_batch', 'composition_batch_score_stats', ['batch_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_table('composition_batch_score_stats')
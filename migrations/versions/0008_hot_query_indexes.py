@@ -0,0 +1,37 @@
+"""热点查询的复合索引(列表按状态筛选、按创建时间倒序)
+
+MySQL上在线创建(ALGORITHM=INPLACE, LOCK=NONE),建索引期间不阻塞读写
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 11:26:00.000000
+"""
+from typing import Sequence, Union
+
+from migrations.online_ddl import create_index_online, drop_index_online
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('idx_batch_status_created', 'composition_essays', ['batch_id', 'status', 'create_date']),
+    ('idx_status_created', 'composition_essays', ['status', 'create_date']),
+    ('idx_essay_status_created', 'composition_evaluations', ['essay_id', 'status', 'create_date']),
+    ('idx_evaluation_status_created', 'composition_scores', ['evaluation_id', 'status', 'create_date']),
+    ('idx_grade_genre_type_status', 'composition_prompts', ['grade_id', 'genre_id', 'prompt_type', 'status', 'create_date']),
+    ('idx_status_created', 'composition_prompts', ['status', 'create_date']),
+    ('idx_type_default', 'composition_prompts', ['prompt_type', 'is_default', 'status']),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        create_index_online(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        drop_index_online(name, table)
@@ -0,0 +1,93 @@
+"""
+回填批次指纹
+为正常状态的批次计算题目和要求的指纹(一站式批改按指纹复用批次);
+题目和要求相同的多个批次只有最早的一个获得指纹,其余批次保留但不再被复用
+
+需要先执行 alembic upgrade head 添加fingerprint列和唯一索引
+
+用法:
+    python scripts/backfill_batch_fingerprints.py            # 回填指纹
+    python scripts/backfill_batch_fingerprints.py --recount  # 同时按作文表重新统计作文数量
+    python scripts/backfill_batch_fingerprints.py --dry-run  # 只打印统计
+"""
+import sys
+import argparse
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import func, select, update
+from app.database import SessionLocal
+from app.models import Batch, Essay
+from app.services.batch_resolver import DEFAULT_REQUIREMENT, DEFAULT_TITLE, batch_fingerprint
+
+
+def backfill_fingerprints(db, dry_run: bool = False) -> dict:
+    """回填缺少指纹的正常批次,返回统计"""
+    taken = {
+        fingerprint for (fingerprint,) in
+        db.query(Batch.fingerprint).filter(Batch.fingerprint.isnot(None))
+    }
+    rows = (
+        db.query(Batch.id, Batch.essay_title, Batch.essay_requirement)
+        .filter(Batch.fingerprint.is_(None), Batch.status == 1)
+        .order_by(Batch.id)
+        .all()
+    )
+
+    updates, duplicates = [], []
+    for batch_id, essay_title, essay_requirement in rows:
+        fingerprint = batch_fingerprint(essay_title or DEFAULT_TITLE, essay_requirement or DEFAULT_REQUIREMENT)
+        if fingerprint in taken:
+            duplicates.append(batch_id)
+            continue
+        taken.add(fingerprint)
+        updates.append({"id": batch_id, "fingerprint": fingerprint})
+
+    if updates and not dry_run:
+        db.execute(update(Batch), updates)
+        db.commit()
+    return {"updated": len(updates), "duplicates": duplicates}
+
+
+def recount_essays(db, dry_run: bool = False) -> int:
+    """按作文表重新统计每个批次的作文数量,返回数量不一致的批次数"""
+    counts = dict(
+        db.execute(
+            select(Essay.batch_id, func.count(Essay.id))
+            .group_by(Essay.batch_id)
+        ).all()
+    )
+    updates = [
+        {"id": batch_id, "essay_count": counts.get(batch_id, 0)}
+        for batch_id, essay_count in db.query(Batch.id, Batch.essay_count)
+        if (essay_count or 0) != counts.get(batch_id, 0)
+    ]
+    if updates and not dry_run:
+        db.execute(update(Batch), updates)
+        db.commit()
+    return len(updates)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="回填批次指纹")
+    parser.add_argument("--recount", action="store_true", help="按作文表重新统计批次作文数量")
+    parser.add_argument("--dry-run", action="store_true", help="只打印统计,不写入")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        stats = backfill_fingerprints(db, dry_run=args.dry_run)
+        print(f"{'需要' if args.dry_run else '已'}回填指纹: {stats['updated']} 个批次")
+        if stats["duplicates"]:
+            print(f"题目和要求重复的批次(不再复用): {stats['duplicates']}")
+
+        if args.recount:
+            changed = recount_essays(db, dry_run=args.dry_run)
+            print(f"{'需要' if args.dry_run else '已'}修正作文数量: {changed} 个批次")
+
+
+if __name__ == "__main__":
+    main()
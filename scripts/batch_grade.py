@@ -0,0 +1,120 @@
+"""
+离线批量评价/评分
+通过服务商Batch接口重新评价或评分历史作文(不需要实时返回,价格更低)
+
+用法:
+    # 提交: 按批次或作文ID选择作文
+    python scripts/batch_grade.py submit --stage analyze --prompt-id 3 --batch-id 12
+    python scripts/batch_grade.py submit --stage score --prompt-id 8 --essay-ids 1,2,3
+
+    # 查询状态 / 等待完成并导入结果
+    python scripts/batch_grade.py status --job-id 5
+    python scripts/batch_grade.py ingest --job-id 5 --wait
+
+    # 提交并等待完成后导入
+    python scripts/batch_grade.py run --stage analyze --prompt-id 3 --batch-id 12
+"""
+import sys
+import argparse
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.database import SessionLocal
+from app.models import Essay, GradingJob
+from app.services.batch_grading import (
+    JOB_COMPLETED,
+    JOB_INGESTED,
+    OpenAIBatchProvider,
+    ingest_job,
+    refresh_job,
+    submit_job,
+    wait_for_job,
+)
+
+
+def select_essay_ids(db, batch_id=None, essay_ids=None) -> list:
+    """按批次或作文ID列表选择作文"""
+    query = db.query(Essay.id).filter(Essay.status == 1)
+    if batch_id:
+        query = query.filter(Essay.batch_id == batch_id)
+    if essay_ids:
+        query = query.filter(Essay.id.in_(essay_ids))
+    return [row.id for row in query.order_by(Essay.id)]
+
+
+def print_job(job: GradingJob) -> None:
+    print(f"任务 {job.id}: 阶段={job.stage}, 提示词={job.prompt_id}, 服务商任务={job.provider_job_id}")
+    print(f"  状态={job.job_status}, 请求数={job.request_count}, 成功={job.succeeded_count}, 失败={job.failed_count}")
+    if job.error_message:
+        print(f"  错误: {job.error_message.splitlines()[0]}")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="离线批量评价/评分(服务商Batch接口)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for name, help_text in (("submit", "提交任务"), ("run", "提交任务并等待完成后导入")):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("--stage", choices=["analyze", "score"], required=True, help="阶段")
+        sub.add_argument("--prompt-id", type=int, required=True, help="提示词ID")
+        sub.add_argument("--batch-id", type=int, help="批次ID")
+        sub.add_argument("--essay-ids", type=lambda v: [int(x) for x in v.split(",") if x], help="作文ID,逗号分隔")
+        sub.add_argument("--user-phone", default="system", help="结果记录的评价人/评分人(默认system)")
+        sub.add_argument("--model", help="模型(默认使用配置的模型)")
+
+    status_parser = subparsers.add_parser("status", help="查询任务状态")
+    status_parser.add_argument("--job-id", type=int, required=True, help="任务ID")
+
+    ingest_parser = subparsers.add_parser("ingest", help="导入已完成任务的结果")
+    ingest_parser.add_argument("--job-id", type=int, required=True, help="任务ID")
+    ingest_parser.add_argument("--wait", action="store_true", help="等待任务完成")
+
+    for sub in (subparsers.choices["run"], ingest_parser):
+        sub.add_argument("--interval", type=float, default=60, help="轮询间隔(秒)")
+
+    args = parser.parse_args()
+    provider = OpenAIBatchProvider()
+
+    with SessionLocal() as db:
+        if args.command in ("submit", "run"):
+            if not args.batch_id and not args.essay_ids:
+                parser.error("需要指定--batch-id或--essay-ids")
+            essay_ids = select_essay_ids(db, args.batch_id, args.essay_ids)
+            print(f"选中作文 {len(essay_ids)} 篇")
+            job = submit_job(db, provider, args.stage, args.prompt_id, essay_ids, args.user_phone, args.model)
+            print_job(job)
+            if args.command == "submit":
+                return
+            wait_for_job(db, provider, job, interval=args.interval)
+        else:
+            job = db.query(GradingJob).filter_by(id=args.job_id).first()
+            if job is None:
+                print(f"任务不存在: {args.job_id}")
+                sys.exit(1)
+            if args.command == "status":
+                print_job(refresh_job(db, provider, job))
+                return
+            if args.wait:
+                wait_for_job(db, provider, job, interval=args.interval)
+            else:
+                refresh_job(db, provider, job)
+
+        if job.job_status == JOB_INGESTED:
+            print_job(job)
+            print("任务结果已导入")
+            return
+        if job.job_status != JOB_COMPLETED:
+            print_job(job)
+            print("任务未完成,稍后再导入")
+            sys.exit(1)
+        stats = ingest_job(db, provider, job)
+        print(f"导入完成: 成功 {stats['succeeded']}, 失败 {stats['failed']}")
+        print_job(job)
+
+
+if __name__ == "__main__":
+    main()
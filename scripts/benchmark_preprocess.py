@@ -0,0 +1,204 @@
+"""
+图片预处理基准测试
+对比不同预处理参数下发送给视觉模型的请求体大小,
+可选调用视觉模型评估作文内容和报告分数的提取准确度
+
+用法:
+    python benchmark_preprocess.py --limit 10
+    python benchmark_preprocess.py --limit 10 --with-model
+"""
+import argparse
+import base64
+import difflib
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+from extract_essays import EssayExtractor, MAX_SCORES
+from image_preprocess import ImagePreprocessor, PreprocessOptions
+
+project_root = Path(__file__).parent.parent
+
+# 待对比的预处理参数(None表示原图)
+SETTINGS: Dict[str, Optional[PreprocessOptions]] = {
+    "original": None,
+    "edge2048_q85": PreprocessOptions(long_edge=2048, quality=85),
+    "edge1600_q80_gray": PreprocessOptions(long_edge=1600, grayscale=True, quality=80),
+    "edge1280_q75_gray": PreprocessOptions(long_edge=1280, grayscale=True, quality=75),
+    "edge1024_q70_gray": PreprocessOptions(long_edge=1024, grayscale=True, quality=70),
+    "edge1600_q80_gray_deskew_crop": PreprocessOptions(
+        long_edge=1600, grayscale=True, quality=80, deskew=True, crop=True
+    ),
+}
+
+
+def fetch_local_copy(path: str, download_dir: Path) -> Optional[str]:
+    """返回图片的本地路径,远程地址先下载到本地"""
+    if not path:
+        return None
+    if not path.startswith("http"):
+        return path if os.path.exists(path) else None
+
+    download_dir.mkdir(parents=True, exist_ok=True)
+    suffix = Path(path).suffix or ".jpg"
+    local_path = download_dir / (hashlib.sha256(path.encode("utf-8")).hexdigest()[:16] + suffix)
+    if not local_path.exists():
+        response = requests.get(path, timeout=60)
+        response.raise_for_status()
+        local_path.write_bytes(response.content)
+    return str(local_path)
+
+
+def load_samples(data_file: Path, limit: int, download_dir: Path) -> List[Dict]:
+    """从essays_data.json取样本"""
+    with open(data_file, "r", encoding="utf-8") as f:
+        essays = json.load(f)
+
+    samples = []
+    for item in essays:
+        if len(samples) >= limit:
+            break
+        try:
+            image_path = fetch_local_copy(item.get("essay_image_path"), download_dir)
+        except Exception as e:
+            print(f"  ⚠️ 下载图片失败: {e}")
+            continue
+        if not image_path:
+            continue
+        report_path = item.get("analysis_report_path")
+        samples.append({
+            "image_path": image_path,
+            "essay_content": item.get("essay_content", ""),
+            "score_data": item.get("score_data"),
+            "report_path": report_path if report_path and os.path.exists(report_path) else None
+        })
+    return samples
+
+
+def score_error(extracted: Optional[Dict], expected: Optional[Dict]) -> Optional[Dict]:
+    """计算提取分数与已有分数的差异"""
+    if not extracted or not expected:
+        return None
+    dim_diffs = []
+    for dim_name in MAX_SCORES:
+        expected_dim = expected.get("dimensions", {}).get(dim_name, {})
+        extracted_dim = extracted["dimensions"][dim_name]
+        dim_diffs.append(abs(float(extracted_dim["score"]) - float(expected_dim.get("score", 0))))
+    return {
+        "total_match": extracted["total_score"] == expected.get("total_score"),
+        "dimension_mae": sum(dim_diffs) / len(dim_diffs)
+    }
+
+
+def run_setting(name: str, options: Optional[PreprocessOptions], samples: List[Dict], with_model: bool) -> Dict:
+    """运行单个预处理参数的基准测试"""
+    preprocessor = ImagePreprocessor(options, cache_dir=None) if options else None
+
+    raw_bytes = 0
+    payload_bytes = 0
+    elapsed = 0.0
+    similarities = []
+    score_results = []
+
+    extractor = None
+    if with_model:
+        extractor = EssayExtractor(
+            # 不加载/写入提取进度
+            output_json=os.path.join(tempfile.gettempdir(), "benchmark_preprocess_unused.json"),
+            essay_image_options=options,
+            report_image_options=options,
+            image_cache_dir=None
+        )
+
+    for sample in samples:
+        raw_bytes += os.path.getsize(sample["image_path"])
+
+        start = time.perf_counter()
+        if preprocessor:
+            payload = preprocessor.to_base64(sample["image_path"])
+        else:
+            with open(sample["image_path"], "rb") as f:
+                payload = base64.b64encode(f.read()).decode("utf-8")
+        elapsed += time.perf_counter() - start
+        payload_bytes += len(payload)
+
+        if extractor:
+            content = extractor.extract_essay_content(sample["image_path"])
+            similarities.append(
+                difflib.SequenceMatcher(None, content, sample["essay_content"]).ratio()
+            )
+            if sample["report_path"]:
+                extracted = extractor.extract_score_from_report(sample["report_path"])
+                error = score_error(extracted, sample["score_data"])
+                score_results.append(error)
+
+    count = len(samples)
+    result = {
+        "name": name,
+        "avg_raw_kb": raw_bytes / count / 1024,
+        "avg_payload_kb": payload_bytes / count / 1024,
+        "avg_preprocess_ms": elapsed / count * 1000,
+        "text_similarity": sum(similarities) / len(similarities) if similarities else None,
+        "total_accuracy": None,
+        "dimension_mae": None
+    }
+
+    valid_scores = [r for r in score_results if r]
+    if score_results:
+        result["total_accuracy"] = sum(1 for r in valid_scores if r["total_match"]) / len(score_results)
+    if valid_scores:
+        result["dimension_mae"] = sum(r["dimension_mae"] for r in valid_scores) / len(valid_scores)
+    return result
+
+
+def format_optional(value: Optional[float], fmt: str) -> str:
+    return format(value, fmt) if value is not None else "-"
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="图片预处理基准测试")
+    parser.add_argument("--data", default=str(project_root / "data" / "essays_data.json"), help="作文数据JSON")
+    parser.add_argument("--limit", type=int, default=10, help="样本数量")
+    parser.add_argument("--download-dir", default=".bench_images", help="远程图片下载目录")
+    parser.add_argument("--with-model", action="store_true", help="调用视觉模型评估提取准确度")
+    parser.add_argument("--settings", nargs="*", choices=list(SETTINGS), help="只运行指定参数")
+    args = parser.parse_args()
+
+    samples = load_samples(Path(args.data), args.limit, Path(args.download_dir))
+    if not samples:
+        print("❌ 没有可用的样本图片")
+        sys.exit(1)
+
+    print(f"📊 样本数量: {len(samples)}")
+    names = args.settings or list(SETTINGS)
+
+    results = [run_setting(name, SETTINGS[name], samples, args.with_model) for name in names]
+
+    print()
+    header = f"{'参数':<32}{'原图KB':>10}{'请求体KB':>10}{'压缩比':>8}{'预处理ms':>10}{'文本相似度':>10}{'总分准确率':>10}{'维度MAE':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        ratio = r["avg_payload_kb"] / (r["avg_raw_kb"] * 4 / 3)
+        print(
+            f"{r['name']:<32}"
+            f"{r['avg_raw_kb']:>10.1f}"
+            f"{r['avg_payload_kb']:>10.1f}"
+            f"{ratio:>8.1%}"
+            f"{r['avg_preprocess_ms']:>10.1f}"
+            f"{format_optional(r['text_similarity'], '.3f'):>10}"
+            f"{format_optional(r['total_accuracy'], '.1%'):>10}"
+            f"{format_optional(r['dimension_mae'], '.2f'):>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ from urllib.parse import urlparse
 from botocore.config import Config
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 
 
 def generate_random_string(length):
@@ -19,14 +20,26 @@ def generate_random_string(length):
 
 
 class CustomOSSClient:
-    def __init__(self, bucket_name: Optional[str] = None):
-        aws_access_key_id, aws_secret_access_key, endpoint_url, _bucket_name = self.__iniconfig()
-        if bucket_name:
-            _bucket_name = bucket_name
-        self.access_key_id = aws_access_key_id
-        self.access_key_secret = aws_secret_access_key
-        self.endpoint = endpoint_url
-        self.bucket_name = _bucket_name
+    def __init__(
+        self,
+        bucket_name: Optional[str] = None,
+        endpoint_url: Optional[str] = None,
+        aws_access_key_id: Optional[str] = None,
+        aws_secret_access_key: Optional[str] = None
+    ):
+        """
+        Args:
+            bucket_name: 桶名称(默认使用配置中的桶)
+            endpoint_url: 服务地址(默认使用配置中的地址,测试时可指向本地S3替身)
+            aws_access_key_id: 访问密钥ID
+            aws_secret_access_key: 访问密钥
+        """
+        _access_key_id, _access_key_secret, _endpoint_url, _bucket_name = self.__iniconfig()
+        self.access_key_id = aws_access_key_id or _access_key_id
+        self.access_key_secret = aws_secret_access_key or _access_key_secret
+        self.endpoint = endpoint_url or _endpoint_url
+        self.bucket_name = bucket_name or _bucket_name
+        self._shared_client = None
 
     def get_client(self):
         config = Config(
@@ -40,6 +53,19 @@ class CustomOSSClient:
             config=config,
         )
 
+    def get_shared_client(self):
+        """
+        获取复用的客户端
+        boto3客户端本身线程安全,但创建过程不是,需在主线程中先调用一次
+        """
+        if self._shared_client is None:
+            self._shared_client = self.get_client()
+        return self._shared_client
+
+    def object_url(self, file_path: str) -> str:
+        """对象的访问地址"""
+        return f'{self.endpoint}/{self.bucket_name}/{file_path}'
+
     def upload_file_random_path(self, bytes_content, file_suffix_no_dot="mp3") -> str:
         """上传文件到随机路径"""
         file_name = str(int(round(time.time() * 1000))) + "-" + generate_random_string(6)
@@ -76,12 +102,50 @@ class CustomOSSClient:
             )
             logging.info(f"文件已成功上传到 S3 桶 {self.bucket_name},路径为 {file_path}")
             logging.info(f"Content-Type: {content_type}, Content-Disposition: {content_disposition}")
-            address = f'{self.endpoint}/{self.bucket_name}/{file_path}'
+            address = self.object_url(file_path)
             return address
         except Exception as e:
             logging.error(f"上传时发生错误: {e}")
             raise
 
+    def upload_local_file(
+        self,
+        local_path: str,
+        file_path: str,
+        content_type=None,
+        content_disposition='inline',
+        transfer_config: Optional[TransferConfig] = None
+    ) -> str:
+        """流式上传本地文件到指定路径(超过阈值自动分片上传)
+
+        Args:
+            local_path: 本地文件路径
+            file_path: S3中的文件路径
+            content_type: MIME类型,如果不指定则根据文件后缀自动判断
+            content_disposition: inline(在线预览) 或 attachment(下载)
+            transfer_config: 分片上传配置
+        """
+        if content_type is None:
+            content_type = self._get_content_type(file_path)
+
+        s3_client = self.get_shared_client()
+        try:
+            s3_client.upload_file(
+                Filename=local_path,
+                Bucket=self.bucket_name,
+                Key=file_path,
+                ExtraArgs={
+                    'ContentType': content_type,
+                    'ContentDisposition': content_disposition
+                },
+                Config=transfer_config
+            )
+            logging.info(f"文件已成功上传到 S3 桶 {self.bucket_name},路径为 {file_path}")
+            return self.object_url(file_path)
+        except Exception as e:
+            logging.error(f"上传时发生错误: {e}")
+            raise
+
     @staticmethod
     def _get_content_type(file_path: str) -> str:
         """根据文件后缀返回Content-Type"""
@@ -1,73 +1,249 @@
 import requests
 import os
 import re
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Optional
 from urllib.parse import urlparse, parse_qs
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-def download_papers(api_url):
+# 答卷图片下载地址
+DOWNLOAD_URL_TEMPLATE = "https://xy-api.mifengjiaoyu.com/teach/download_file?token={token}&file_name={image_url}&link={image_url}&angle=0"
+
+# 下载记录文件(保存每个文件的ETag和大小)
+MANIFEST_NAME = ".download_manifest.json"
+
+STATUS_DOWNLOADED = "downloaded"
+STATUS_SKIPPED = "skipped"
+STATUS_FAILED = "failed"
+
+
+class PaperDownloader:
+    """
+    答卷并发下载器
+    - 复用连接池的Session,并发数可配置
+    - 分块流式写入临时文件,完成后原子重命名
+    - 根据ETag/文件大小跳过已下载的文件
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 8,
+        timeout: int = 60,
+        chunk_size: int = 64 * 1024,
+        download_url_template: str = DOWNLOAD_URL_TEMPLATE
+    ):
+        """
+        参数:
+            max_workers: 并发下载数
+            timeout: 单个请求超时时间(秒)
+            chunk_size: 流式写入的块大小
+            download_url_template: 下载地址模板(测试时可指向本地服务)
+        """
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.download_url_template = download_url_template
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=max_workers,
+            pool_maxsize=max_workers,
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504])
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self.manifest: Dict[str, Dict] = {}
+
+    def _load_manifest(self, output_dir: str) -> None:
+        manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+        self.manifest = {}
+        if os.path.exists(manifest_path):
+            try:
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    self.manifest = json.load(f)
+            except Exception as e:
+                print(f"读取下载记录失败,将重新校验: {str(e)}")
+
+    def _save_manifest(self, output_dir: str) -> None:
+        manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+        tmp_path = manifest_path + ".tmp"
+        with self._lock:
+            data = dict(self.manifest)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, manifest_path)
+
+    def download_file(self, url: str, filepath: str) -> Dict:
+        """
+        下载单个文件
+
+        返回:
+            {"status": downloaded/skipped/failed, "bytes": 写入字节数, "error": 错误信息}
+        """
+        filename = os.path.basename(filepath)
+        with self._lock:
+            record = self.manifest.get(filename)
+
+        local_size = os.path.getsize(filepath) if os.path.exists(filepath) else None
+
+        # 已有文件且记录了ETag时发条件请求,未变化返回304
+        headers = {}
+        if local_size is not None and record and record.get("etag") and record.get("size") == local_size:
+            headers["If-None-Match"] = record["etag"]
+
+        try:
+            with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+                if response.status_code == 304:
+                    return {"status": STATUS_SKIPPED, "bytes": 0}
+
+                if response.status_code != 200:
+                    return {"status": STATUS_FAILED, "bytes": 0, "error": f"状态码: {response.status_code}"}
+
+                etag = response.headers.get("ETag")
+                content_length = response.headers.get("Content-Length")
+
+                # 服务端不支持ETag时,按文件大小判断是否已下载
+                # (返回了ETag说明条件请求未命中,文件已变化,即使大小相同也要重新下载)
+                if etag is None and local_size is not None and content_length and int(content_length) == local_size:
+                    with self._lock:
+                        self.manifest[filename] = {"etag": etag, "size": local_size}
+                    return {"status": STATUS_SKIPPED, "bytes": 0}
+
+                part_path = filepath + ".part"
+                written = 0
+                with open(part_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        if chunk:
+                            f.write(chunk)
+                            written += len(chunk)
+
+                if content_length and int(content_length) != written:
+                    os.remove(part_path)
+                    return {"status": STATUS_FAILED, "bytes": 0, "error": "下载不完整"}
+
+                os.replace(part_path, filepath)
+                with self._lock:
+                    self.manifest[filename] = {"etag": etag, "size": written}
+                return {"status": STATUS_DOWNLOADED, "bytes": written}
+
+        except Exception as e:
+            return {"status": STATUS_FAILED, "bytes": 0, "error": str(e)}
+
+    def download_papers(self, api_url: str, output_dir: Optional[str] = None) -> Dict:
+        """
+        根据API URL并发下载所有学生的作文答卷
+
+        参数:
+            api_url: 完整的paper_list API请求地址
+            output_dir: 保存目录(默认使用homework_id)
+
+        返回:
+            下载统计
+        """
+        # 1. 从URL中提取homework_id和token
+        parsed_url = urlparse(api_url)
+        params = parse_qs(parsed_url.query)
+
+        homework_id = params.get('homework_id', ['unknown'])[0]
+        token = params.get('token', [''])[0]
+
+        # 2. 创建目录
+        output_dir = output_dir or homework_id
+        os.makedirs(output_dir, exist_ok=True)
+        self._load_manifest(output_dir)
+
+        summary = {
+            "total": 0,
+            STATUS_DOWNLOADED: 0,
+            STATUS_SKIPPED: 0,
+            STATUS_FAILED: 0,
+            "no_image": 0,
+            "bytes": 0,
+            "elapsed": 0.0
+        }
+
+        # 3. 获取试卷列表
+        response = self.session.get(api_url, timeout=self.timeout)
+        data = response.json()
+
+        if data['ret'] != 0:
+            print(f"获取试卷列表失败: {data.get('err', '未知错误')}")
+            return summary
+
+        detail_list = data['data']['detail_list']
+        total = len(detail_list)
+        summary["total"] = total
+
+        print(f"共找到 {total} 份答卷，开始下载(并发数: {self.max_workers})...")
+
+        # 4. 并发下载每个学生的图片
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {}
+            for student in detail_list:
+                child_name = student['child_name']
+
+                if not student.get('media') or len(student['media']) == 0:
+                    print(f"{child_name} - 没有图片")
+                    summary["no_image"] += 1
+                    continue
+
+                # 获取图片URL
+                image_url = student['media'][0]['url']
+
+                # 构建下载链接
+                download_url = self.download_url_template.format(token=token, image_url=image_url)
+
+                # 文件名
+                filename = f"{child_name}作文答卷.jpg"
+                filepath = os.path.join(output_dir, filename)
+
+                futures[executor.submit(self.download_file, download_url, filepath)] = child_name
+
+            for done, future in enumerate(as_completed(futures), 1):
+                child_name = futures[future]
+                result = future.result()
+                summary[result["status"]] += 1
+                summary["bytes"] += result["bytes"]
+                if result["status"] == STATUS_DOWNLOADED:
+                    print(f"[{done}/{len(futures)}] {child_name} - 下载成功")
+                elif result["status"] == STATUS_SKIPPED:
+                    print(f"[{done}/{len(futures)}] {child_name} - 已存在,跳过")
+                else:
+                    print(f"[{done}/{len(futures)}] {child_name} - 下载失败 ({result.get('error')})")
+
+        summary["elapsed"] = time.perf_counter() - start
+        self._save_manifest(output_dir)
+
+        speed = summary["bytes"] / 1024 / 1024 / summary["elapsed"] if summary["elapsed"] else 0
+        print(f"\n下载完成！文件保存在目录: {output_dir}")
+        print(
+            f"成功 {summary[STATUS_DOWNLOADED]} / 跳过 {summary[STATUS_SKIPPED]} / "
+            f"失败 {summary[STATUS_FAILED]} / 无图片 {summary['no_image']}, "
+            f"共 {summary['bytes'] / 1024 / 1024:.1f} MB, 用时 {summary['elapsed']:.1f} 秒, "
+            f"平均 {speed:.1f} MB/s"
+        )
+        return summary
+
+
+def download_papers(api_url, max_workers=8):
     """
     根据API URL下载所有学生的作文答卷
-    
+
     参数:
         api_url: 完整的paper_list API请求地址
+        max_workers: 并发下载数
     """
-    # 1. 从URL中提取homework_id和token
-    parsed_url = urlparse(api_url)
-    params = parse_qs(parsed_url.query)
-    
-    homework_id = params.get('homework_id', ['unknown'])[0]
-    token = params.get('token', [''])[0]
-    
-    # 2. 创建目录
-    output_dir = homework_id
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-    
-    # 3. 获取试卷列表
-    response = requests.get(api_url)
-    data = response.json()
-    
-    if data['ret'] != 0:
-        print(f"获取试卷列表失败: {data.get('err', '未知错误')}")
-        return
-    
-    detail_list = data['data']['detail_list']
-    total = len(detail_list)
-    
-    print(f"共找到 {total} 份答卷，开始下载...")
-    
-    # 4. 下载每个学生的图片
-    for idx, student in enumerate(detail_list, 1):
-        child_name = student['child_name']
-        
-        if not student.get('media') or len(student['media']) == 0:
-            print(f"[{idx}/{total}] {child_name} - 没有图片")
-            continue
-        
-        # 获取图片URL
-        image_url = student['media'][0]['url']
-        
-        # 构建下载链接
-        download_url = f"https://xy-api.mifengjiaoyu.com/teach/download_file?token={token}&file_name={image_url}&link={image_url}&angle=0"
-        
-        # 文件名
-        filename = f"{child_name}作文答卷.jpg"
-        filepath = os.path.join(output_dir, filename)
-        
-        try:
-            # 下载图片
-            img_response = requests.get(download_url)
-            if img_response.status_code == 200:
-                with open(filepath, 'wb') as f:
-                    f.write(img_response.content)
-                print(f"[{idx}/{total}] {child_name} - 下载成功")
-            else:
-                print(f"[{idx}/{total}] {child_name} - 下载失败 (状态码: {img_response.status_code})")
-        except Exception as e:
-            print(f"[{idx}/{total}] {child_name} - 下载出错: {str(e)}")
-    
-    print(f"\n下载完成！文件保存在目录: {output_dir}")
+    return PaperDownloader(max_workers=max_workers).download_papers(api_url)
+
 
 if __name__ == "__main__":
     # 使用示例
     api_url = input("请输入完整的API请求地址: ").strip()
-    download_papers(api_url)
\ No newline at end of file
+    download_papers(api_url)
@@ -1,4 +1,5 @@
 import os
+import sys
 import json
 import base64
 from pathlib import Path
@@ -7,6 +8,27 @@ from pdf2image import convert_from_path
 import requests
 from PIL import Image
 import io
+from image_preprocess import ImagePreprocessor, PreprocessOptions
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.utils.json_extract import extract_json
+
+
+# 固定的各维度最高分
+MAX_SCORES = {
+    "中心立意": 20,
+    "语言表达": 25,
+    "篇章结构": 15,
+    "文章选材": 15,
+    "内容情感": 25
+}
+
+# 分数提取模式
+SCORE_MODE_COMBINED = "combined"  # 单次调用同时提取总分和维度分
+SCORE_MODE_SEPARATE = "separate"  # 两次调用分别提取总分和维度分
 
 
 class EssayExtractor:
@@ -16,7 +38,12 @@ class EssayExtractor:
         self,
         base_dir: str = "蜜蜂家校答卷&分析报告",
         output_json: str = "essays_data.json",
-        poppler_path: Optional[str] = None
+        poppler_path: Optional[str] = None,
+        score_mode: str = SCORE_MODE_COMBINED,
+        compare_score_modes: bool = False,
+        essay_image_options: Optional[PreprocessOptions] = PreprocessOptions(grayscale=True),
+        report_image_options: Optional[PreprocessOptions] = PreprocessOptions(),
+        image_cache_dir: Optional[str] = ".image_cache"
     ):
         """
         初始化提取器
@@ -25,10 +52,40 @@ class EssayExtractor:
             base_dir: 数据根目录
             output_json: 输出JSON文件路径
             poppler_path: Poppler bin目录路径(Windows需要)
+            score_mode: 分数提取模式(combined: 单次调用, separate: 两次调用)
+            compare_score_modes: 是否同时运行两种模式并对比提取结果
+            essay_image_options: 作文答卷图片预处理参数(None表示发送原图)
+            report_image_options: 报告分数页预处理参数(None表示发送原图)
+            image_cache_dir: 预处理结果缓存目录(None表示不缓存)
         """
+        if score_mode not in (SCORE_MODE_COMBINED, SCORE_MODE_SEPARATE):
+            raise ValueError(f"不支持的分数提取模式: {score_mode}")
+
         self.base_dir = Path(base_dir)
         self.output_json = output_json
         self.poppler_path = poppler_path
+        self.score_mode = score_mode
+        self.compare_score_modes = compare_score_modes
+
+        # 图片预处理(缩小发送给视觉模型的请求体)
+        self.essay_preprocessor = (
+            ImagePreprocessor(essay_image_options, image_cache_dir) if essay_image_options else None
+        )
+        self.report_preprocessor = (
+            ImagePreprocessor(report_image_options, image_cache_dir) if report_image_options else None
+        )
+
+        # 提取模式对比统计
+        self.score_compare_stats = {
+            "compared": 0,
+            "both_valid": 0,
+            "combined_failed": 0,
+            "separate_failed": 0,
+            "total_match": 0,
+            "total_abs_diff": 0.0,
+            "dimension_match": 0,
+            "dimension_abs_diff": 0.0
+        }
 
         # 视觉模型配置
         self.api_config = {
@@ -74,24 +131,32 @@ class EssayExtractor:
         except Exception as e:
             print(f"    ⚠️ 保存失败: {e}")
 
-    def image_to_base64(self, image_path: str) -> str:
-        """将图片转换为base64编码"""
+    def image_to_base64(self, image_path: str, preprocessor: Optional[ImagePreprocessor] = None) -> str:
+        """将图片转换为base64编码(指定预处理器时先压缩图片)"""
+        if preprocessor:
+            return preprocessor.to_base64(image_path)
         with open(image_path, "rb") as img_file:
             return base64.b64encode(img_file.read()).decode('utf-8')
 
-    def call_vision_model(self, image_path: str, prompt: str) -> str:
+    def call_vision_model(
+        self,
+        image_path: str,
+        prompt: str,
+        preprocessor: Optional[ImagePreprocessor] = None
+    ) -> str:
         """
         调用视觉模型
 
         Args:
             image_path: 图片路径
             prompt: 提示词
+            preprocessor: 图片预处理器(None表示发送原图)
 
         Returns:
             模型返回的文本
         """
         # 将图片转为base64
-        image_base64 = self.image_to_base64(image_path)
+        image_base64 = self.image_to_base64(image_path, preprocessor)
 
         # 构建请求
         url = f"{self.api_config['base_url']}/chat/completions"
@@ -152,57 +217,156 @@ class EssayExtractor:
 4. 如果有标题，请包含标题
 5. 只输出作文正文内容，不要添加任何说明或注释"""
 
-        return self.call_vision_model(essay_image_path, prompt)
+        return self.call_vision_model(essay_image_path, prompt, self.essay_preprocessor)
 
-    def extract_score_from_report(self, report_pdf_path: str) -> Optional[Dict]:
+    def _render_report_page(self, report_pdf_path: str, temp_img_path: str) -> bool:
         """
-        从分析报告PDF提取分数(包括总分和5个维度分数)
+        将分析报告第2页(分数页)渲染为临时图片
 
         Args:
             report_pdf_path: 分析报告PDF路径
+            temp_img_path: 临时图片保存路径
 
         Returns:
-            提取的分数字典,提取失败返回None
-            格式: {
-                "total_score": 总分,
-                "dimensions": {
-                    "中心立意": {"score": 得分, "max_score": 20},
-                    "语言表达": {"score": 得分, "max_score": 25},
-                    "篇章结构": {"score": 得分, "max_score": 15},
-                    "文章选材": {"score": 得分, "max_score": 15},
-                    "内容情感": {"score": 得分, "max_score": 25}
+            是否渲染成功
+        """
+        # 只渲染第2页,避免把整份报告都转成图片
+        images = convert_from_path(
+            pdf_path=str(report_pdf_path),
+            dpi=300,
+            poppler_path=self.poppler_path,
+            first_page=2,
+            last_page=2
+        )
+
+        if not images:
+            print(f"  ⚠️ PDF转图片失败或页数不足")
+            return False
+
+        page = images[0]
+        if page.mode == "RGBA":
+            page = page.convert("RGB")
+        page.save(temp_img_path, quality=95)
+        return True
+
+    @staticmethod
+    def _parse_json_text(text: str) -> Dict:
+        """解析模型返回的JSON文本(容忍代码块标记和前后说明文字)"""
+        return extract_json(text)
+
+    @staticmethod
+    def _build_score_data(total_score, dim_scores: Dict, strict: bool = True) -> Optional[Dict]:
+        """
+        按MAX_SCORES校验并构建分数数据
+
+        Args:
+            total_score: 总分
+            dim_scores: 各维度得分 {维度名: 得分}
+            strict: 是否校验分数范围(False时只检查维度是否齐全)
+
+        Returns:
+            分数字典,校验失败返回None
+        """
+        try:
+            total_score = float(total_score)
+        except (TypeError, ValueError):
+            print(f"  ⚠️ 无法解析总分: {total_score}")
+            return None
+
+        if strict and (total_score < 0 or total_score > sum(MAX_SCORES.values())):
+            print(f"  ⚠️ 总分超出范围: {total_score}")
+            return None
+
+        dimensions = {}
+        for dim_name, max_score in MAX_SCORES.items():
+            score = dim_scores.get(dim_name)
+            if score is None:
+                print(f"  ⚠️ 缺少维度分数: {dim_name}")
+                return None
+            if not strict:
+                dimensions[dim_name] = {
+                    "score": score,
+                    "max_score": max_score
                 }
+                continue
+            try:
+                score_value = float(score)
+            except (TypeError, ValueError):
+                print(f"  ⚠️ 维度分数无法解析: {dim_name}={score}")
+                return None
+            if score_value < 0 or score_value > max_score:
+                print(f"  ⚠️ 维度 {dim_name} 分数超出范围: {score}(有效值0-{max_score})")
+                return None
+            dimensions[dim_name] = {
+                "score": score,
+                "max_score": max_score
             }
-        """
-        # 固定的各维度最高分
-        MAX_SCORES = {
-            "中心立意": 20,
-            "语言表达": 25,
-            "篇章结构": 15,
-            "文章选材": 15,
-            "内容情感": 25
+
+        return {
+            "total_score": total_score,
+            "dimensions": dimensions
         }
 
+    def _extract_score_combined(self, temp_img_path: str) -> Optional[Dict]:
+        """单次调用同时提取总分和5个维度分数"""
+        prompt_combined = """请从这张作文分析报告图片中同时提取总分和5个维度的得分。
+
+要求:
+1. 总分是图片中最显眼的红色大字数字
+2. 从雷达图或评分表中提取以下5个维度的得分:
+   - 中心立意
+   - 语言表达
+   - 篇章结构
+   - 文章选材
+   - 内容情感
+
+3. 输出格式为JSON字符串(严格按照此格式,不要添加任何其他文字):
+{
+  "total_score": 总分数字,
+  "dimensions": {
+    "中心立意": 得分数字,
+    "语言表达": 得分数字,
+    "篇章结构": 得分数字,
+    "文章选材": 得分数字,
+    "内容情感": 得分数字
+  }
+}
+
+禁止：
+1. 禁止使用雷达图中的各维度分数相加来计算总分,总分必须取红色大字。
+
+示例输出:
+{
+  "total_score": 36,
+  "dimensions": {
+    "中心立意": 16,
+    "语言表达": 13,
+    "篇章结构": 12,
+    "文章选材": 14,
+    "内容情感": 19
+  }
+}
+
+注意: 只输出JSON字符串,不要包含任何解释说明"""
+
+        combined_text = self.call_vision_model(temp_img_path, prompt_combined, self.report_preprocessor)
+
         try:
-            # 将PDF转换为图片(转换所有页)
-            images = convert_from_path(
-                pdf_path=str(report_pdf_path),
-                dpi=300,
-                poppler_path=self.poppler_path
-            )
+            data = self._parse_json_text(combined_text)
+        except (json.JSONDecodeError, ValueError, IndexError) as e:
+            print(f"  ⚠️ 无法解析合并提取结果: {combined_text[:100]}... 错误: {e}")
+            return None
 
-            if not images or len(images) < 2:
-                print(f"  ⚠️ PDF转图片失败或页数不足")
-                return None
+        if not isinstance(data, dict) or not isinstance(data.get("dimensions"), dict):
+            print(f"  ⚠️ 合并提取结果格式错误: {combined_text[:100]}...")
+            return None
 
-            # 取第2张图片(索引为1)
-            temp_img_path = "temp_report_page2.jpg"
-            if images[1].mode == "RGBA":
-                images[1] = images[1].convert("RGB")
-            images[1].save(temp_img_path, quality=95)
+        return self._build_score_data(data.get("total_score"), data["dimensions"])
 
-            # 第一次提取: 只提取总分(红色大字)
-            prompt_total = """请从这张作文分析报告图片中提取总分。
+    def _extract_score_separate(self, temp_img_path: str) -> Optional[Dict]:
+        """两次调用分别提取总分和5个维度分数"""
+        # 第一次提取: 只提取总分(红色大字)
+        prompt_total = """请从这张作文分析报告图片中提取总分。
 
 要求:
 1. 找到图片中最显眼的红色大字数字,这是总分
@@ -214,19 +378,17 @@ class EssayExtractor:
 示例输出:
 36"""
 
-            total_score_text = self.call_vision_model(temp_img_path, prompt_total)
+        total_score_text = self.call_vision_model(temp_img_path, prompt_total, self.report_preprocessor)
 
-            # 解析总分
-            try:
-                total_score = float(total_score_text.strip())
-            except ValueError:
-                print(f"  ⚠️ 无法解析总分: {total_score_text}")
-                if os.path.exists(temp_img_path):
-                    os.remove(temp_img_path)
-                return None
+        # 解析总分
+        try:
+            total_score = float(total_score_text.strip())
+        except ValueError:
+            print(f"  ⚠️ 无法解析总分: {total_score_text}")
+            return None
 
-            # 第二次提取: 只提取各维度分数
-            prompt_dimensions = """请从这张作文分析报告图片中提取5个维度的得分。
+        # 第二次提取: 只提取各维度分数
+        prompt_dimensions = """请从这张作文分析报告图片中提取5个维度的得分。
 
 要求:
 1. 从雷达图或评分表中提取以下5个维度的得分:
@@ -256,48 +418,127 @@ class EssayExtractor:
 
 注意: 只输出JSON字符串,不要包含任何解释说明"""
 
-            dimensions_text = self.call_vision_model(temp_img_path, prompt_dimensions)
+        dimensions_text = self.call_vision_model(temp_img_path, prompt_dimensions, self.report_preprocessor)
 
-            # 清理临时文件
-            if os.path.exists(temp_img_path):
-                os.remove(temp_img_path)
+        # 解析维度分数
+        try:
+            dim_scores = self._parse_json_text(dimensions_text)
+        except (json.JSONDecodeError, ValueError, IndexError) as e:
+            print(f"  ⚠️ 无法解析维度分数: {dimensions_text[:100]}... 错误: {e}")
+            return None
 
-            # 解析维度分数
-            try:
-                # 提取JSON部分(去除可能的markdown代码块标记)
-                dimensions_text = dimensions_text.strip()
-                if dimensions_text.startswith("```"):
-                    dimensions_text = dimensions_text.split("```")[1]
-                    if dimensions_text.startswith("json"):
-                        dimensions_text = dimensions_text[4:]
-                dimensions_text = dimensions_text.strip()
-
-                dim_scores = json.loads(dimensions_text)
-
-                # 使用固定的最高分构建维度数据
-                dimensions = {}
-                for dim_name, max_score in MAX_SCORES.items():
-                    score = dim_scores.get(dim_name)
-                    if score is None:
-                        print(f"  ⚠️ 缺少维度分数: {dim_name}")
-                        return None
-                    dimensions[dim_name] = {
-                        "score": score,
-                        "max_score": max_score
-                    }
-
-                return {
-                    "total_score": total_score,
-                    "dimensions": dimensions
+        if not isinstance(dim_scores, dict):
+            print(f"  ⚠️ 维度分数格式错误: {dimensions_text[:100]}...")
+            return None
+
+        # 保持两次调用方式原有的宽松校验,作为合并模式的兜底
+        return self._build_score_data(total_score, dim_scores, strict=False)
+
+    def _record_score_comparison(self, combined: Optional[Dict], separate: Optional[Dict]) -> None:
+        """记录两种提取模式的结果差异(以两次调用结果为基准)"""
+        stats = self.score_compare_stats
+        stats["compared"] += 1
+
+        if combined is None:
+            stats["combined_failed"] += 1
+            return
+        if separate is None:
+            stats["separate_failed"] += 1
+            return
+
+        stats["both_valid"] += 1
+        total_diff = abs(combined["total_score"] - separate["total_score"])
+        stats["total_abs_diff"] += total_diff
+        if total_diff == 0:
+            stats["total_match"] += 1
+
+        dim_mismatch = []
+        for dim_name in MAX_SCORES:
+            diff = abs(
+                float(combined["dimensions"][dim_name]["score"]) -
+                float(separate["dimensions"][dim_name]["score"])
+            )
+            stats["dimension_abs_diff"] += diff
+            if diff == 0:
+                stats["dimension_match"] += 1
+            else:
+                dim_mismatch.append(dim_name)
+
+        if total_diff or dim_mismatch:
+            print(f"    🔬 模式对比不一致 - 总分差: {total_diff}, 维度不一致: {dim_mismatch or '无'}")
+        else:
+            print(f"    🔬 模式对比一致")
+
+    def print_score_compare_summary(self) -> None:
+        """打印提取模式对比统计"""
+        stats = self.score_compare_stats
+        if not stats["compared"]:
+            return
+
+        both_valid = stats["both_valid"]
+        dim_count = both_valid * len(MAX_SCORES)
+        print(f"\n🔬 分数提取模式对比 (基准: 两次调用)")
+        print(f"  对比份数: {stats['compared']}, 均有效: {both_valid}")
+        print(f"  合并模式失败: {stats['combined_failed']}, 两次调用失败: {stats['separate_failed']}")
+        if both_valid:
+            print(f"  总分一致率: {stats['total_match'] / both_valid:.1%}, "
+                  f"平均绝对差: {stats['total_abs_diff'] / both_valid:.2f}")
+            print(f"  维度一致率: {stats['dimension_match'] / dim_count:.1%}, "
+                  f"平均绝对差: {stats['dimension_abs_diff'] / dim_count:.2f}")
+
+    def extract_score_from_report(self, report_pdf_path: str) -> Optional[Dict]:
+        """
+        从分析报告PDF提取分数(包括总分和5个维度分数)
+
+        合并模式下单次调用视觉模型同时提取总分和维度分,
+        校验失败时才回退到两次调用的提取方式
+
+        Args:
+            report_pdf_path: 分析报告PDF路径
+
+        Returns:
+            提取的分数字典,提取失败返回None
+            格式: {
+                "total_score": 总分,
+                "dimensions": {
+                    "中心立意": {"score": 得分, "max_score": 20},
+                    "语言表达": {"score": 得分, "max_score": 25},
+                    "篇章结构": {"score": 得分, "max_score": 15},
+                    "文章选材": {"score": 得分, "max_score": 15},
+                    "内容情感": {"score": 得分, "max_score": 25}
                 }
+            }
+        """
+        temp_img_path = "temp_report_page2.jpg"
 
-            except (json.JSONDecodeError, ValueError) as e:
-                print(f"  ⚠️ 无法解析维度分数: {dimensions_text[:100]}... 错误: {e}")
+        try:
+            if not self._render_report_page(report_pdf_path, temp_img_path):
                 return None
 
+            if self.compare_score_modes:
+                combined = self._extract_score_combined(temp_img_path)
+                separate = self._extract_score_separate(temp_img_path)
+                self._record_score_comparison(combined, separate)
+                if self.score_mode == SCORE_MODE_COMBINED:
+                    return combined or separate
+                return separate
+
+            if self.score_mode == SCORE_MODE_SEPARATE:
+                return self._extract_score_separate(temp_img_path)
+
+            score_data = self._extract_score_combined(temp_img_path)
+            if score_data is None:
+                print(f"  ↩️ 合并提取校验失败,回退到两次调用提取")
+                score_data = self._extract_score_separate(temp_img_path)
+            return score_data
+
         except Exception as e:
             print(f"  ⚠️ 处理分析报告失败: {e}")
             return None
+        finally:
+            # 清理临时文件
+            if os.path.exists(temp_img_path):
+                os.remove(temp_img_path)
 
     def process_student(self, student_dir: Path) -> None:
         """
@@ -412,6 +653,8 @@ class EssayExtractor:
                 print("⏭️ 继续处理下一个目录...")
                 continue
 
+        self.print_score_compare_summary()
+
         print(f"\n✅ 完成! 共处理 {len(self.results)} 份作文")
         print(f"📄 结果已保存到: {self.output_json}")
 
@@ -423,7 +666,9 @@ if __name__ == "__main__":
     extractor = EssayExtractor(
         base_dir="蜜蜂家校答卷&分析报告",
         output_json="essays_data.json",
-        poppler_path=POPPLER_PATH
+        poppler_path=POPPLER_PATH,
+        score_mode=SCORE_MODE_COMBINED,
+        compare_score_modes=False  # 设为True可对比两种提取模式的一致性
     )
 
     extractor.run()
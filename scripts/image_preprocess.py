@@ -0,0 +1,165 @@
+"""
+图片预处理
+在发送给视觉模型前压缩答卷/报告图片:
+缩放长边、灰度或对比度归一化、JPEG重编码、可选纠偏和裁边
+处理结果按(图片内容哈希, 处理参数)缓存到磁盘
+"""
+import base64
+import hashlib
+import io
+import os
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Optional
+
+from PIL import Image, ImageOps
+
+
+@dataclass(frozen=True)
+class PreprocessOptions:
+    """图片预处理参数"""
+    long_edge: Optional[int] = 2048   # 长边像素上限(None表示不缩放)
+    grayscale: bool = False           # 转为灰度(报告页的红色总分需保留颜色)
+    autocontrast: bool = True         # 对比度归一化
+    quality: int = 85                 # JPEG重编码质量(1-95)
+    deskew: bool = False              # 纠正扫描倾斜
+    crop: bool = False                # 裁掉四周空白
+    max_skew_angle: float = 5.0       # 纠偏搜索的最大角度
+
+    def cache_key(self) -> str:
+        """参数指纹,参与缓存键计算"""
+        return "-".join(f"{k}={v}" for k, v in sorted(asdict(self).items()))
+
+
+def _estimate_skew_angle(image: Image.Image, max_angle: float, step: float = 0.5) -> float:
+    """
+    用投影法估计倾斜角度
+    在缩小的二值图上尝试各个角度,取行投影方差最大的角度
+    """
+    probe = ImageOps.grayscale(image)
+    probe.thumbnail((800, 800))
+    # 文字为白、背景为黑,旋转填充的黑边不影响投影
+    probe = ImageOps.invert(probe).point(lambda p: 255 if p > 128 else 0)
+
+    best_angle = 0.0
+    best_score = -1.0
+    steps = int(max_angle / step)
+    for i in range(-steps, steps + 1):
+        angle = i * step
+        rotated = probe.rotate(angle, resample=Image.NEAREST, expand=False)
+        width, height = rotated.size
+        pixels = rotated.tobytes()
+        rows = [sum(pixels[y * width:(y + 1) * width]) for y in range(height)]
+        mean = sum(rows) / height
+        score = sum((r - mean) ** 2 for r in rows)
+        if score > best_score:
+            best_score = score
+            best_angle = angle
+    return best_angle
+
+
+def _crop_margins(image: Image.Image, threshold: int = 240, padding: int = 16) -> Image.Image:
+    """裁掉接近白色的四周空白"""
+    gray = ImageOps.grayscale(image)
+    mask = gray.point(lambda p: 255 if p < threshold else 0)
+    bbox = mask.getbbox()
+    if not bbox:
+        return image
+    left, top, right, bottom = bbox
+    return image.crop((
+        max(left - padding, 0),
+        max(top - padding, 0),
+        min(right + padding, image.width),
+        min(bottom + padding, image.height)
+    ))
+
+
+def preprocess_image_bytes(raw: bytes, options: PreprocessOptions) -> bytes:
+    """
+    按参数处理图片
+
+    Args:
+        raw: 原始图片字节
+        options: 预处理参数
+
+    Returns:
+        处理后的JPEG字节
+    """
+    image = Image.open(io.BytesIO(raw))
+    image = ImageOps.exif_transpose(image)
+    image = image.convert("L" if options.grayscale else "RGB")
+
+    if options.deskew:
+        angle = _estimate_skew_angle(image, options.max_skew_angle)
+        if angle:
+            fill = 255 if image.mode == "L" else (255, 255, 255)
+            image = image.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=fill)
+
+    if options.crop:
+        image = _crop_margins(image)
+
+    if options.long_edge and max(image.size) > options.long_edge:
+        image.thumbnail((options.long_edge, options.long_edge), Image.LANCZOS)
+
+    if options.autocontrast:
+        image = ImageOps.autocontrast(image, cutoff=1)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=options.quality, optimize=True)
+    return buffer.getvalue()
+
+
+class ImagePreprocessor:
+    """带磁盘缓存的图片预处理器"""
+
+    def __init__(self, options: Optional[PreprocessOptions] = None, cache_dir: Optional[str] = ".image_cache"):
+        """
+        Args:
+            options: 预处理参数(默认使用PreprocessOptions())
+            cache_dir: 缓存目录(None表示不缓存)
+        """
+        self.options = options or PreprocessOptions()
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _cache_path(self, raw: bytes) -> Optional[Path]:
+        if not self.cache_dir:
+            return None
+        digest = hashlib.sha256(raw)
+        digest.update(self.options.cache_key().encode("utf-8"))
+        key = digest.hexdigest()
+        return self.cache_dir / key[:2] / f"{key}.jpg"
+
+    def process(self, image_path: str) -> bytes:
+        """
+        处理图片文件,命中缓存时直接返回缓存结果
+
+        Args:
+            image_path: 图片路径
+
+        Returns:
+            处理后的JPEG字节
+        """
+        with open(image_path, "rb") as f:
+            raw = f.read()
+
+        cache_path = self._cache_path(raw)
+        if cache_path and cache_path.exists():
+            self.cache_hits += 1
+            return cache_path.read_bytes()
+
+        self.cache_misses += 1
+        processed = preprocess_image_bytes(raw, self.options)
+
+        if cache_path:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(".tmp")
+            tmp_path.write_bytes(processed)
+            os.replace(tmp_path, cache_path)
+
+        return processed
+
+    def to_base64(self, image_path: str) -> str:
+        """处理图片并转为base64编码"""
+        return base64.b64encode(self.process(image_path)).decode("utf-8")
@@ -1,6 +1,6 @@
 """
 数据库初始化脚本
-创建所有表并插入初始数据
+执行Alembic迁移创建所有表(alembic upgrade head),并插入初始数据
 """
 import sys
 from pathlib import Path
@@ -9,16 +9,20 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+from alembic import command
+from alembic.config import Config
 from sqlalchemy import text
-from app.database import engine, Base, SessionLocal
+from app.database import SessionLocal
 from app.models import Grade, Genre
 from datetime import datetime
 
 
 def create_tables():
-    """创建所有数据库表"""
+    """执行迁移创建所有数据库表"""
     print("开始创建数据库表...")
-    Base.metadata.create_all(bind=engine)
+    config = Config(str(project_root / "alembic.ini"))
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, "head")
     print("数据库表创建完成!")
 
 
@@ -5,13 +5,19 @@
 import sys
 import json
 import re
+import argparse
+import time
 from pathlib import Path
 from datetime import datetime
+from typing import Dict, Iterator, Any, Optional
+
+import ijson
 
 # 添加项目根目录到Python路径
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+from sqlalchemy import insert, update, select, func
 from app.database import SessionLocal
 from app.models import Batch, Essay, Prompt, Grade, Genre
 
@@ -154,6 +160,111 @@ def migrate_essays(db):
     return migrated_count
 
 
+def iter_essays_data(essays_file: Path) -> Iterator[Dict[str, Any]]:
+    """
+    逐条读取作文数据
+    用ijson增量解析,内存占用与文件大小无关
+    """
+    with open(essays_file, 'rb') as f:
+        yield from ijson.items(f, 'item', use_float=True)
+
+
+def build_essay_row(essay_data: Dict[str, Any], batch_id: int) -> Dict[str, Any]:
+    """构建作文插入行(与migrate_essays的字段规则一致)"""
+    # 判断分制
+    original_score_data = essay_data.get('score_data', {})
+    total_score = original_score_data.get('total_score', 0) if original_score_data else 0
+    score_system = 10 if total_score and total_score <= 10 else 40
+
+    essay_content = essay_data.get('essay_content', '')
+
+    return {
+        "batch_id": batch_id,
+        "student_name": essay_data.get('student_name'),
+        "essay_content": essay_content,
+        "essay_image_path": essay_data.get('essay_image_path'),
+        "analysis_report_path": essay_data.get('analysis_report_path'),
+        "word_count": len(essay_content),
+        "score_system": score_system,
+        "original_score": total_score,
+        "original_score_data": json.dumps(original_score_data, ensure_ascii=False) if original_score_data else None,
+        "status": 1
+    }
+
+
+def migrate_essays_bulk(db, chunk_size: int = 1000, essays_file: Optional[Path] = None):
+    """
+    批量迁移作文数据
+    - 预加载 directory_name → batch_id 映射,不再逐篇查询批次
+    - 增量解析JSON,按块批量插入,内存占用只与chunk_size相关
+    """
+    print("\n开始批量迁移作文数据...")
+
+    essays_file = essays_file or project_root / "data" / "essays_data.json"
+    if not essays_file.exists():
+        print(f"警告: 文件不存在 {essays_file}")
+        return 0
+
+    # 一次查询加载全部批次映射
+    batch_ids = dict(db.execute(select(Batch.directory_name, Batch.id)).all())
+
+    migrated_count = 0
+    skipped_count = 0
+    missing_batches = set()
+    rows = []
+
+    def flush_rows():
+        nonlocal rows, migrated_count
+        if rows:
+            db.execute(insert(Essay), rows)
+            migrated_count += len(rows)
+            rows = []
+
+    for essay_data in iter_essays_data(essays_file):
+        directory_name = essay_data.get('directory_name')
+        batch_id = batch_ids.get(directory_name) if directory_name else None
+        if batch_id is None:
+            if directory_name and directory_name not in missing_batches:
+                missing_batches.add(directory_name)
+                print(f"  警告: 批次不存在 {directory_name}")
+            skipped_count += 1
+            continue
+
+        rows.append(build_essay_row(essay_data, batch_id))
+        if len(rows) >= chunk_size:
+            flush_rows()
+
+    flush_rows()
+    db.commit()
+
+    print(f"成功迁移 {migrated_count} 篇作文")
+    if skipped_count > 0:
+        print(f"跳过 {skipped_count} 篇作文(批次不存在)")
+
+    return migrated_count
+
+
+def update_batch_essay_count_bulk(db):
+    """用一条GROUP BY更新语句计算所有批次的作文数量"""
+    print("\n批量更新批次作文数量...")
+
+    counts = (
+        select(Essay.batch_id, func.count(Essay.id).label('essay_count'))
+        .group_by(Essay.batch_id)
+        .subquery()
+    )
+
+    # 没有作文的批次不会出现在分组结果中,先归零
+    db.execute(update(Batch).values(essay_count=0))
+    result = db.execute(
+        update(Batch)
+        .where(Batch.id == counts.c.batch_id)
+        .values(essay_count=counts.c.essay_count)
+    )
+    db.commit()
+    print(f"成功更新 {result.rowcount} 个批次的作文数量")
+
+
 def update_batch_essay_count(db):
     """更新每个批次的作文数量"""
     print("\n更新批次作文数量...")
@@ -262,6 +373,16 @@ def verify_migration(db):
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="从JSON文件迁移数据到MySQL数据库")
+    parser.add_argument(
+        "--mode",
+        choices=["bulk", "orm"],
+        default="bulk",
+        help="作文迁移方式(bulk: 批量插入, orm: 逐条ORM插入)"
+    )
+    parser.add_argument("--chunk-size", type=int, default=1000, help="批量插入每块的行数")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("作文评分系统 - 数据迁移")
     print("=" * 60)
@@ -271,11 +392,20 @@ def main():
         # 1. 迁移批次
         migrate_batches(db)
 
-        # 2. 迁移作文
-        migrate_essays(db)
+        start = time.perf_counter()
+        if args.mode == "bulk":
+            # 2. 迁移作文
+            migrate_essays_bulk(db, chunk_size=args.chunk_size)
+
+            # 3. 更新批次作文数量
+            update_batch_essay_count_bulk(db)
+        else:
+            # 2. 迁移作文
+            migrate_essays(db)
 
-        # 3. 更新批次作文数量
-        update_batch_essay_count(db)
+            # 3. 更新批次作文数量
+            update_batch_essay_count(db)
+        print(f"作文迁移耗时: {time.perf_counter() - start:.2f}秒")
 
         # 4. 迁移提示词
         migrate_prompts(db)
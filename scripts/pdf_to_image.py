@@ -1,7 +1,15 @@
 import os
-from pdf2image import convert_from_path
+import re
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pdf2image import convert_from_path, pdfinfo_from_path
 from PIL import Image
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
+
+VALID_FORMATS = ["png", "jpg", "jpeg", "bmp", "tiff"]
+
+# pdftoppm输出文件名末尾的页码,如 xxx-07.jpg
+_PAGE_SUFFIX_PATTERN = re.compile(r"-(\d+)\.[^.]+$")
 
 
 def pdf_to_images(
@@ -27,14 +35,8 @@ def pdf_to_images(
     返回:
         生成的图片文件路径列表
     """
-    # 校验PDF文件是否存在
-    if not os.path.exists(pdf_path):
-        raise FileNotFoundError(f"PDF文件不存在：{pdf_path}")
-    
-    # 校验输出格式
-    valid_formats = ["png", "jpg", "jpeg", "bmp", "tiff"]
-    if img_format.lower() not in valid_formats:
-        raise ValueError(f"不支持的图片格式！支持格式：{valid_formats}")
+    # 校验PDF文件是否存在和输出格式
+    _check_args(pdf_path, img_format)
     
     # 创建输出目录
     os.makedirs(output_dir, exist_ok=True)
@@ -71,6 +73,176 @@ def pdf_to_images(
         raise RuntimeError(f"PDF转换失败：{str(e)}")
 
 
+def _check_args(pdf_path: str, img_format: str) -> str:
+    """校验PDF路径和输出格式,返回小写格式名"""
+    if not os.path.exists(pdf_path):
+        raise FileNotFoundError(f"PDF文件不存在：{pdf_path}")
+    if img_format.lower() not in VALID_FORMATS:
+        raise ValueError(f"不支持的图片格式！支持格式：{VALID_FORMATS}")
+    return img_format.lower()
+
+
+def _render_page_range(
+    pdf_path: str,
+    output_dir: str,
+    img_format: str,
+    dpi: int,
+    poppler_path: Optional[str],
+    first_page: int,
+    last_page: Optional[int],
+    thread_count: int
+) -> List[str]:
+    """
+    由poppler直接把指定页码范围渲染到磁盘(子进程中执行)
+    不在内存中保留PIL图片,返回按页码命名的图片路径
+    """
+    pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
+    prefix = f".{pdf_name}_{uuid.uuid4().hex[:8]}_"
+
+    raw_paths = convert_from_path(
+        pdf_path=pdf_path,
+        dpi=dpi,
+        poppler_path=poppler_path,
+        first_page=first_page,
+        last_page=last_page,
+        fmt=img_format,
+        jpegopt={"quality": 95, "optimize": "y"} if img_format in ["jpg", "jpeg"] else None,
+        output_folder=output_dir,
+        output_file=prefix,
+        paths_only=True,
+        thread_count=thread_count
+    )
+
+    # 重命名为与pdf_to_images一致的文件名（例如：test_pdf_1.png）
+    img_paths = []
+    for raw_path in sorted(raw_paths):
+        match = _PAGE_SUFFIX_PATTERN.search(raw_path)
+        if not match:
+            img_paths.append(raw_path)
+            continue
+        page = int(match.group(1))
+        img_path = os.path.join(output_dir, f"{pdf_name}_{page}.{img_format}")
+        os.replace(raw_path, img_path)
+        img_paths.append(img_path)
+    return img_paths
+
+
+def pdf_to_images_streaming(
+    pdf_path: str,
+    output_dir: str = "pdf_images",
+    img_format: str = "png",
+    dpi: int = 300,
+    poppler_path: Optional[str] = None,
+    start_page: int = 1,
+    end_page: Optional[int] = None,
+    pages_per_task: int = 4,
+    max_workers: Optional[int] = None,
+    thread_count: int = 1
+) -> Iterator[str]:
+    """
+    流式将PDF文件转换为图片
+    页码范围拆分到进程池中渲染,poppler直接写盘,每完成一段就产出对应图片路径,
+    内存占用与页数和DPI无关
+
+    参数:
+        pdf_path: 本地PDF文件路径
+        output_dir: 图片输出目录
+        img_format: 输出图片格式
+        dpi: 图片分辨率
+        poppler_path: Poppler的bin目录路径
+        start_page: 起始转换页码
+        end_page: 结束转换页码（None表示到最后一页）
+        pages_per_task: 每个子任务渲染的页数
+        max_workers: 进程池大小（默认CPU核数）
+        thread_count: 每个子任务内poppler并行线程数
+    返回:
+        图片路径迭代器（按完成顺序,不保证页码顺序）
+    """
+    img_format = _check_args(pdf_path, img_format)
+    os.makedirs(output_dir, exist_ok=True)
+
+    page_count = pdfinfo_from_path(pdf_path, poppler_path=poppler_path)["Pages"]
+    last_page = min(end_page or page_count, page_count)
+    ranges = [
+        (first, min(first + pages_per_task - 1, last_page))
+        for first in range(max(start_page, 1), last_page + 1, pages_per_task)
+    ]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(
+                _render_page_range, pdf_path, output_dir, img_format,
+                dpi, poppler_path, first, last, thread_count
+            )
+            for first, last in ranges
+        ]
+        for future in as_completed(futures):
+            try:
+                yield from future.result()
+            except Exception as e:
+                raise RuntimeError(f"PDF转换失败：{str(e)}")
+
+
+def _convert_whole_pdf(
+    pdf_path: str,
+    output_dir: str,
+    img_format: str,
+    dpi: int,
+    poppler_path: Optional[str]
+) -> Tuple[str, List[str]]:
+    """整份PDF渲染到磁盘(子进程中执行)"""
+    img_format = _check_args(pdf_path, img_format)
+    return pdf_path, _render_page_range(
+        pdf_path, output_dir, img_format, dpi, poppler_path,
+        first_page=1, last_page=None, thread_count=1
+    )
+
+
+def convert_directory(
+    input_dir: str,
+    output_dir: str = "pdf_images",
+    img_format: str = "png",
+    dpi: int = 300,
+    poppler_path: Optional[str] = None,
+    max_workers: int = 4
+) -> Iterator[Tuple[str, List[str]]]:
+    """
+    批量转换目录下的所有PDF
+    同时最多max_workers个PDF在转换,每完成一个就产出结果
+
+    参数:
+        input_dir: PDF所在目录
+        output_dir: 图片输出目录
+        img_format: 输出图片格式
+        dpi: 图片分辨率
+        poppler_path: Poppler的bin目录路径
+        max_workers: 并发转换的PDF数量上限
+    返回:
+        (PDF路径, 图片路径列表) 迭代器
+    """
+    pdf_paths = sorted(
+        os.path.join(input_dir, name)
+        for name in os.listdir(input_dir)
+        if name.lower().endswith(".pdf")
+    )
+    os.makedirs(output_dir, exist_ok=True)
+
+    failed: Dict[str, str] = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_convert_whole_pdf, pdf_path, output_dir, img_format, dpi, poppler_path): pdf_path
+            for pdf_path in pdf_paths
+        }
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                failed[futures[future]] = str(e)
+                print(f"转换失败：{futures[future]}，{e}")
+
+    print(f"批量转换完成！共 {len(pdf_paths)} 个PDF，失败 {len(failed)} 个")
+
+
 # 示例调用
 if __name__ == "__main__":
     # Windows用户需指定poppler_path（示例路径，需替换为自己的解压路径）
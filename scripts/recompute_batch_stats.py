@@ -0,0 +1,37 @@
+"""
+重算批次评分统计
+按评分表全量计算每个批次的评分数、总分累加值、分数段分布和各维度分数累加值,覆盖批次评分统计表;
+统计平时随评分写入增量更新,此脚本用于上线后初始化,以及直接修改数据库后修正偏差
+
+需要先执行 alembic upgrade head 创建批次评分统计表
+
+用法:
+    python scripts/recompute_batch_stats.py                 # 重算全部批次
+    python scripts/recompute_batch_stats.py --batch-ids 3,5  # 只重算指定批次
+"""
+import sys
+import argparse
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.database import SessionLocal
+from app.services.batch_stats import recompute_batch_stats
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="重算批次评分统计")
+    parser.add_argument("--batch-ids", type=lambda v: [int(x) for x in v.split(",") if x], help="批次ID,逗号分隔(默认全部)")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        count = recompute_batch_stats(db, args.batch_ids)
+        db.commit()
+        print(f"已重算评分统计: {count} 个批次")
+
+
+if __name__ == "__main__":
+    main()
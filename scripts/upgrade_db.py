@@ -0,0 +1,34 @@
+"""
+数据库结构升级脚本
+执行Alembic迁移到最新版本(等同于 alembic upgrade head),MySQL上在线建索引、加字段
+
+引入Alembic之前建的数据库先标记为基线版本(只需一次):
+    alembic stamp 0001
+
+用法:
+    python scripts/upgrade_db.py            # 执行升级
+    python scripts/upgrade_db.py --dry-run  # 只打印将要执行的SQL
+"""
+import sys
+import argparse
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from alembic import command
+from alembic.config import Config
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="数据库结构升级")
+    parser.add_argument("--dry-run", action="store_true", help="只打印将要执行的SQL")
+    args = parser.parse_args()
+
+    command.upgrade(Config(str(project_root / "alembic.ini")), "head", sql=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
+import datetime
+import hashlib
 import json
 import logging
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+from boto3.s3.transfer import TransferConfig
 from custom_oss_client import CustomOSSClient
 
 # 配置日志
@@ -11,13 +16,119 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+MB = 1024 * 1024
+
+# 需要上传的字段
+PATH_FIELDS = ('essay_image_path', 'analysis_report_path')
+
+
+def file_sha256(file_path: str, chunk_size: int = MB) -> str:
+    """分块计算文件SHA-256,避免整个文件读入内存"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class UploadManifest:
+    """
+    本地上传清单
+    - objects: 内容哈希 → OSS地址,用于去重和断点续传
+    - files: 本地文件 → (大小, 修改时间, 内容哈希),文件未变化时跳过重新计算哈希
+    """
+
+    def __init__(self, manifest_path: str):
+        self.manifest_path = Path(manifest_path)
+        self._lock = threading.Lock()
+        self.objects: Dict[str, str] = {}
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not self.manifest_path.exists():
+            return
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.objects = data.get('objects', {})
+            self.files = data.get('files', {})
+            logging.info(f"加载上传清单: {len(self.objects)} 个已上传对象")
+        except Exception as e:
+            logging.warning(f"读取上传清单失败,将重新建立: {e}")
+
+    def cached_hash(self, local_path: str) -> Optional[str]:
+        """文件大小和修改时间未变化时返回记录的哈希"""
+        stat = os.stat(local_path)
+        with self._lock:
+            entry = self.files.get(os.path.abspath(local_path))
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+            return entry['sha256']
+        return None
+
+    def remember_hash(self, local_path: str, sha256: str) -> None:
+        stat = os.stat(local_path)
+        with self._lock:
+            self.files[os.path.abspath(local_path)] = {
+                'size': stat.st_size,
+                'mtime': stat.st_mtime,
+                'sha256': sha256
+            }
+
+    def get_url(self, sha256: str) -> Optional[str]:
+        with self._lock:
+            return self.objects.get(sha256)
+
+    def add(self, sha256: str, url: str) -> None:
+        with self._lock:
+            self.objects[sha256] = url
+
+    def save(self) -> None:
+        """原子写入清单文件"""
+        with self._lock:
+            data = {'objects': dict(self.objects), 'files': dict(self.files)}
+        tmp_path = self.manifest_path.with_name(self.manifest_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+
 class FileUploader:
-    def __init__(self, json_path: str):
+    def __init__(
+        self,
+        json_path: str,
+        parallel: bool = True,
+        max_workers: int = 8,
+        manifest_path: Optional[str] = None,
+        multipart_threshold: int = 8 * MB,
+        multipart_chunksize: int = 8 * MB,
+        oss_client: Optional[CustomOSSClient] = None
+    ):
+        """
+        Args:
+            json_path: 作文数据JSON文件路径
+            parallel: 是否使用线程池并行上传(False为逐个串行上传)
+            max_workers: 并行上传的线程数
+            manifest_path: 上传清单路径(默认与JSON文件同目录)
+            multipart_threshold: 超过该大小的文件使用分片上传
+            multipart_chunksize: 分片大小
+            oss_client: OSS客户端(测试时可传入指向本地S3替身的客户端)
+        """
         self.json_path = json_path
-        self.oss_client = CustomOSSClient()
+        self.oss_client = oss_client or CustomOSSClient()
+        self.parallel = parallel
+        self.max_workers = max_workers
+        self.manifest = UploadManifest(manifest_path or self.json_path + '.upload_manifest.json')
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunksize,
+            max_concurrency=4,
+            use_threads=True
+        )
         self.uploaded_count = 0
         self.failed_count = 0
         self.skipped_count = 0
+        self.deduped_count = 0
 
     def get_file_suffix(self, file_path: str) -> str:
         """获取文件后缀名(不含点)"""
@@ -91,6 +202,101 @@ class FileUploader:
 
         return item
 
+    def _hash_local_file(self, local_path: str) -> Optional[str]:
+        """计算本地文件内容哈希(优先使用清单中的记录)"""
+        if not os.path.exists(local_path):
+            logging.warning(f"文件不存在: {local_path}")
+            return None
+        sha256 = self.manifest.cached_hash(local_path)
+        if sha256 is None:
+            sha256 = file_sha256(local_path)
+            self.manifest.remember_hash(local_path, sha256)
+        return sha256
+
+    def _upload_by_hash(self, sha256: str, local_path: str) -> str:
+        """按内容哈希作为对象路径上传,重复上传同一内容是幂等的"""
+        today = datetime.datetime.today()
+        object_name = f"essays/{today.year}{today.month}/{sha256}.{self.get_file_suffix(local_path)}"
+        return self.oss_client.upload_local_file(
+            local_path,
+            object_name,
+            transfer_config=self.transfer_config
+        )
+
+    def upload_all_parallel(self, data: List[Dict[str, Any]]) -> None:
+        """
+        并行上传所有数据项中的本地文件
+        - 按内容哈希去重,同一文件只上传一次
+        - 清单中已有的内容直接复用OSS地址(断点续传)
+        - 大文件流式分片上传
+        """
+        # 1. 收集所有本地路径
+        local_paths = []
+        seen = set()
+        for item in data:
+            for field in PATH_FIELDS:
+                if field not in item:
+                    continue
+                path = item[field]
+                if self.is_local_path(path):
+                    if path not in seen:
+                        seen.add(path)
+                        local_paths.append(path)
+                else:
+                    logging.info(f"跳过远程路径: {path}")
+                    self.skipped_count += 1
+
+        logging.info(f"共有 {len(local_paths)} 个本地文件需要处理")
+
+        # 创建复用的客户端(客户端创建过程非线程安全)
+        self.oss_client.get_shared_client()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # 2. 并行计算内容哈希
+            path_hashes = dict(zip(local_paths, executor.map(self._hash_local_file, local_paths)))
+
+            # 3. 按内容分组,清单中已有的直接复用
+            pending: Dict[str, str] = {}
+            for path, sha256 in path_hashes.items():
+                if sha256 is None:
+                    self.failed_count += 1
+                elif self.manifest.get_url(sha256) or sha256 in pending:
+                    self.deduped_count += 1
+                else:
+                    pending[sha256] = path
+
+            logging.info(f"需要上传 {len(pending)} 个文件, 去重/已上传 {self.deduped_count} 个")
+
+            # 4. 并行上传
+            futures = {
+                executor.submit(self._upload_by_hash, sha256, path): (sha256, path)
+                for sha256, path in pending.items()
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                sha256, path = futures[future]
+                try:
+                    url = future.result()
+                    self.manifest.add(sha256, url)
+                    self.uploaded_count += 1
+                    logging.info(f"[{done}/{len(futures)}] 成功上传: {path} -> {url}")
+                except Exception as e:
+                    self.failed_count += 1
+                    logging.error(f"[{done}/{len(futures)}] 上传失败 {path}: {e}")
+                # 定期保存清单,中断后可从清单继续
+                if done % 20 == 0:
+                    self.manifest.save()
+
+        self.manifest.save()
+
+        # 5. 替换数据项中的路径
+        for item in data:
+            for field in PATH_FIELDS:
+                path = item.get(field)
+                sha256 = path_hashes.get(path) if path else None
+                url = self.manifest.get_url(sha256) if sha256 else None
+                if url:
+                    item[field] = url
+
     def process_json(self):
         """处理JSON文件"""
         logging.info(f"开始处理文件: {self.json_path}")
@@ -112,9 +318,12 @@ class FileUploader:
         total_items = len(data)
         logging.info(f"共有 {total_items} 条数据需要处理")
 
-        for index, item in enumerate(data, 1):
-            logging.info(f"\n处理进度: {index}/{total_items}")
-            data[index - 1] = self.process_item(item)
+        if self.parallel:
+            self.upload_all_parallel(data)
+        else:
+            for index, item in enumerate(data, 1):
+                logging.info(f"\n处理进度: {index}/{total_items}")
+                data[index - 1] = self.process_item(item)
 
         # 备份原文件
         backup_path = self.json_path + '.backup'
@@ -140,6 +349,7 @@ class FileUploader:
         logging.info(f"成功上传: {self.uploaded_count} 个文件")
         logging.info(f"上传失败: {self.failed_count} 个文件")
         logging.info(f"跳过处理: {self.skipped_count} 个文件")
+        logging.info(f"去重复用: {self.deduped_count} 个文件")
 
 
 def main():
@@ -147,7 +357,7 @@ def main():
     json_file_path = r"d:\VSCodeProjects\learn\mifeng\essays_data.json"
 
     # 创建上传器并执行
-    uploader = FileUploader(json_file_path)
+    uploader = FileUploader(json_file_path, parallel=True, max_workers=8)
     uploader.process_json()
 
 
@@ -9,6 +9,9 @@ import os
 from pathlib import Path
 from openai import OpenAI
 from datetime import datetime
+from app.utils.converters import get_score_system_from_original
+from app.utils.json_extract import JSONExtractError, extract_json
+from app.utils.score_converter import DEFAULT_RUBRIC, ROUND_FLOOR
 
 app = FastAPI(title="作文评分系统")
 
@@ -462,18 +465,9 @@ async def ai_analyze_essay(request: AIScoreRequest):
         # 提取回复内容
         ai_response = response.choices[0].message.content.strip()
 
-        # 尝试解析JSON
-        # 移除可能的markdown代码块标记
-        if ai_response.startswith("```json"):
-            ai_response = ai_response[7:]
-        if ai_response.startswith("```"):
-            ai_response = ai_response[3:]
-        if ai_response.endswith("```"):
-            ai_response = ai_response[:-3]
-        ai_response = ai_response.strip()
 
-        # 解析分析结果
-        analysis = json.loads(ai_response)
+        # 解析分析结果(容忍代码块标记和前后说明文字)
+        analysis = extract_json(ai_response)
 
         # 验证必需字段
         required_fields = ["综合评价", "错别字", "错别字总数", "语病", "语病总数", "优点亮点", "改进建议"]
@@ -487,7 +481,7 @@ async def ai_analyze_essay(request: AIScoreRequest):
             "raw_response": ai_response
         }
 
-    except json.JSONDecodeError as e:
+    except JSONExtractError as e:
         return {
             "success": False,
             "error": f"AI返回格式错误: {str(e)}",
@@ -584,48 +578,17 @@ async def ai_score_essay(request: AIScoreWithAnalysisRequest):
         # 提取回复内容
         ai_response = response.choices[0].message.content.strip()
 
-        # 尝试解析JSON
-        # 移除可能的markdown代码块标记
-        if ai_response.startswith("```json"):
-            ai_response = ai_response[7:]
-        if ai_response.startswith("```"):
-            ai_response = ai_response[3:]
-        if ai_response.endswith("```"):
-            ai_response = ai_response[:-3]
-        ai_response = ai_response.strip()
-
-        # 解析分数
-        scores = json.loads(ai_response)
-
-        # 验证分数格式
-        required_dimensions = ["中心立意", "语言表达", "篇章结构", "文章选材", "内容情感"]
-        max_scores = {"中心立意": 20, "语言表达": 25, "篇章结构": 15, "文章选材": 15, "内容情感": 25}
-
-        dimensions = {}
-        dimensions_sum = 0
-
-        for dim in required_dimensions:
-            if dim not in scores:
-                raise ValueError(f"缺少维度: {dim}")
-            score = float(scores[dim])
-            if score < 0 or score > max_scores[dim]:
-                raise ValueError(f"维度 {dim} 分数超出范围: {score}")
-            dimensions[dim] = {
-                "score": score,
-                "max_score": max_scores[dim]
-            }
-            dimensions_sum += score
 
-        # 根据原始评分数据判断分制,计算总分
-        use_10_point_scale = False
-        if request.original_score_data and "total_score" in request.original_score_data:
-            if request.original_score_data["total_score"] <= 10:
-                use_10_point_scale = True
+        # 解析分数(容忍代码块标记和前后说明文字)
+        scores = extract_json(ai_response)
 
-        if use_10_point_scale:
-            total_score = int((dimensions_sum / 100) * 10)
-        else:
-            total_score = int((dimensions_sum / 100) * 40)
+        # 验证分数格式(维度按中文名输出)
+        values = DEFAULT_RUBRIC.validate(scores)
+        dimensions = DEFAULT_RUBRIC.dimensions_json(values, by_name=True)
+
+        # 根据原始评分数据判断分制,计算总分(取整数部分)
+        score_system = get_score_system_from_original(request.original_score_data)
+        total_score = int(DEFAULT_RUBRIC.total(values, score_system, rounding=ROUND_FLOOR))
 
         return {
             "success": True,
@@ -636,7 +599,7 @@ async def ai_score_essay(request: AIScoreWithAnalysisRequest):
             "raw_response": ai_response
         }
 
-    except json.JSONDecodeError as e:
+    except JSONExtractError as e:
         return {
             "success": False,
             "error": f"AI返回格式错误: {str(e)}",
@@ -0,0 +1,4 @@
+"""
+离线压测套件
+本地模拟OpenAI接口 + SQLite/本地MySQL数据库,测量接口吞吐和延迟
+"""
@@ -0,0 +1,320 @@
+"""
+压测环境
+- 启动模拟OpenAI服务
+- 创建SQLite(或BENCH_DATABASE_URL指定的本地MySQL)数据库,用data/下的数据初始化
+- 在后台线程中运行uvicorn,返回可访问的base_url
+"""
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import uvicorn
+from openai import OpenAI
+from sqlalchemy import MetaData, create_engine, event, insert, select
+from sqlalchemy.dialects.mysql import TINYINT
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "scripts"))
+
+# 未配置密钥时,导入AIService创建客户端会失败
+os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+
+import migrate_data  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.database import Base, InstrumentedQueuePool, get_db, instrument_engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Essay, Evaluation, Genre, Grade, Prompt, Score, User  # noqa: E402
+from app.services.ai_service import ai_service  # noqa: E402
+from app.services.batch_stats import recompute_batch_stats  # noqa: E402
+from app.services.idempotency import idempotency_store  # noqa: E402
+
+from .loadgen import BENCH_USER_PHONE  # noqa: E402
+from .mock_openai import MockOpenAIConfig, MockOpenAIServer, build_analysis, build_scores, SCORE_DIMENSIONS  # noqa: E402
+
+
+@compiles(TINYINT, "sqlite")
+def _compile_tinyint_sqlite(type_, compiler, **kw):
+    """SQLite没有TINYINT,按INTEGER建表"""
+    return "INTEGER"
+
+
+def _sqlite_metadata() -> MetaData:
+    """
+    复制表结构用于SQLite建表
+    SQLite的索引名全库唯一,重复的索引名(如idx_user)加上表名前缀
+    """
+    metadata = MetaData()
+    seen = set()
+    for table in Base.metadata.sorted_tables:
+        copied = table.to_metadata(metadata)
+        for index in copied.indexes:
+            if index.name in seen:
+                index.name = f"{copied.name}_{index.name}"
+            seen.add(index.name)
+    return metadata
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def seed_database(
+    session,
+    essay_copies: int = 1,
+    evaluations_per_essay: int = 2,
+    scores_per_evaluation: int = 2
+) -> dict:
+    """
+    初始化压测数据
+    批次/作文/提示词复用migrate_data的迁移函数,评价和评分按固定结构批量生成
+
+    Args:
+        essay_copies: essays_data.json复制的份数(放大数据量)
+        evaluations_per_essay: 每篇作文的历史评价数
+        scores_per_evaluation: 每次评价的评分数
+    """
+    now = datetime.now()
+    session.execute(insert(Grade), [
+        {"id": i, "grade_name": f"{7 + i - 1}年级", "grade_code": f"grade_{7 + i - 1}", "grade_level": "初中", "sort_order": i}
+        for i in (1, 2, 3)
+    ])
+    session.execute(insert(Genre), [
+        {"id": 1, "genre_name": "记叙文", "genre_code": "narrative", "sort_order": 1},
+        {"id": 2, "genre_name": "议论文", "genre_code": "argumentative", "sort_order": 2},
+    ])
+    session.execute(insert(User), [
+        {"phone": BENCH_USER_PHONE, "first_login_at": now, "last_login_at": now, "login_count": 1},
+        {"phone": "system", "first_login_at": now, "last_login_at": now, "login_count": 1},
+    ])
+    session.commit()
+
+    migrate_data.migrate_batches(session)
+
+    essays_file = project_root / "data" / "essays_data.json"
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if essay_copies > 1:
+            with open(essays_file, "r", encoding="utf-8") as f:
+                essays = json.load(f)
+            essays_file = Path(tmp_dir) / "essays_data.json"
+            with open(essays_file, "w", encoding="utf-8") as f:
+                json.dump(
+                    [{**essay, "student_name": f"{essay.get('student_name')}_{copy}"}
+                     for copy in range(essay_copies) for essay in essays],
+                    f, ensure_ascii=False
+                )
+        migrate_data.migrate_essays_bulk(session, essays_file=essays_file)
+
+    migrate_data.update_batch_essay_count_bulk(session)
+    migrate_data.migrate_prompts(session)
+
+    essay_ids = session.execute(select(Essay.id)).scalars().all()
+    analyze_prompt_id = session.execute(
+        select(Prompt.id).where(Prompt.prompt_type == "analyze", Prompt.is_default == 1)
+    ).scalars().first()
+    score_prompt_id = session.execute(
+        select(Prompt.id).where(Prompt.prompt_type == "score", Prompt.is_default == 1)
+    ).scalars().first()
+    analysis_json = json.dumps(build_analysis(200), ensure_ascii=False)
+    if evaluations_per_essay:
+        session.execute(insert(Evaluation), [
+            {
+                "essay_id": essay_id,
+                "user_phone": BENCH_USER_PHONE,
+                "analyze_prompt_id": analyze_prompt_id,
+                "confirmed_genre_id": 1,
+                "confirmed_grade_id": 1,
+                "evaluation_result": analysis_json,
+                "is_latest": 1 if n == evaluations_per_essay - 1 else 0,
+                "status": 1
+            }
+            for essay_id in essay_ids for n in range(evaluations_per_essay)
+        ])
+        session.commit()
+
+    evaluation_ids = session.execute(select(Evaluation.id)).scalars().all()
+    if scores_per_evaluation:
+        rows = []
+        for evaluation_id in evaluation_ids:
+            scores = build_scores(str(evaluation_id))
+            dimensions = {dim: {"score": scores[dim], "max_score": max_score} for dim, max_score in SCORE_DIMENSIONS.items()}
+            for n in range(scores_per_evaluation):
+                rows.append({
+                    "evaluation_id": evaluation_id,
+                    "user_phone": "system",
+                    "score_prompt_id": score_prompt_id,
+                    "score_type": "ai",
+                    "total_score": scores["total_score"],
+                    "dimension_scores": json.dumps(dimensions, ensure_ascii=False),
+                    "is_default": 1 if n == 0 else 0,
+                    "status": 1
+                })
+        session.execute(insert(Score), rows)
+        session.commit()
+        recompute_batch_stats(session)
+        session.commit()
+
+    return {"essays": len(essay_ids), "evaluations": len(evaluation_ids)}
+
+
+class BenchmarkEnvironment:
+    """
+    压测环境(上下文管理器)
+
+    用法:
+        with BenchmarkEnvironment(mock_config=MockOpenAIConfig(latency=1.0)) as env:
+            run_load(env.base_url, ...)
+    """
+
+    def __init__(
+        self,
+        mock_config: Optional[MockOpenAIConfig] = None,
+        database_url: Optional[str] = None,
+        essay_copies: int = 1,
+        evaluations_per_essay: int = 2,
+        scores_per_evaluation: int = 2,
+        echo_sql: bool = False
+    ):
+        """
+        Args:
+            mock_config: 模拟OpenAI接口配置
+            database_url: 数据库地址(默认读BENCH_DATABASE_URL,未设置时使用临时SQLite文件)
+                本地MySQL需要是空库,例如 mysql+pymysql://root:@localhost:3306/essay_bench
+            essay_copies: essays_data.json复制的份数
+            evaluations_per_essay: 每篇作文的历史评价数
+            scores_per_evaluation: 每次评价的评分数
+            echo_sql: 是否打印SQL
+        """
+        self.mock = MockOpenAIServer(mock_config)
+        self.database_url = database_url or os.getenv("BENCH_DATABASE_URL")
+        self.essay_copies = essay_copies
+        self.evaluations_per_essay = evaluations_per_essay
+        self.scores_per_evaluation = scores_per_evaluation
+        self.echo_sql = echo_sql
+
+        self.base_url = ""
+        self.seed_stats = {}
+        self._tmp_dir = None
+        self._server = None
+        self._server_thread = None
+        self._saved = {}
+
+    def _create_engine(self):
+        if self.database_url:
+            engine = create_engine(
+                self.database_url,
+                poolclass=InstrumentedQueuePool,
+                pool_pre_ping=True,
+                echo=self.echo_sql
+            )
+            instrument_engine(engine)
+            Base.metadata.create_all(bind=engine)
+            return engine
+
+        self._tmp_dir = tempfile.TemporaryDirectory(prefix="essay_bench_")
+        db_path = Path(self._tmp_dir.name) / "bench.db"
+        engine = create_engine(
+            f"sqlite:///{db_path}",
+            poolclass=InstrumentedQueuePool,
+            connect_args={"check_same_thread": False},
+            echo=self.echo_sql
+        )
+        instrument_engine(engine)
+
+        @event.listens_for(engine, "connect")
+        def _set_sqlite_pragma(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.close()
+
+        _sqlite_metadata().create_all(bind=engine)
+        return engine
+
+    def start(self) -> "BenchmarkEnvironment":
+        self.mock.start()
+
+        self.engine = self._create_engine()
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        with self.SessionLocal() as session:
+            self.seed_stats = seed_database(
+                session,
+                essay_copies=self.essay_copies,
+                evaluations_per_essay=self.evaluations_per_essay,
+                scores_per_evaluation=self.scores_per_evaluation
+            )
+
+        # 接口中按settings创建OpenAI客户端,AIService在导入时已创建客户端,两处都指向模拟服务
+        self._saved = {
+            "OPENAI_BASE_URL": settings.OPENAI_BASE_URL,
+            "OPENAI_API_KEY": settings.OPENAI_API_KEY,
+            "client": ai_service.client,
+            "idempotency_session_factory": idempotency_store.session_factory
+        }
+        settings.OPENAI_BASE_URL = self.mock.base_url
+        settings.OPENAI_API_KEY = "bench-key"
+        ai_service.client = OpenAI(base_url=self.mock.base_url, api_key="bench-key")
+
+        def override_get_db():
+            db = self.SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        idempotency_store.session_factory = self.SessionLocal
+
+        port = _free_port()
+        config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+        self._server = uvicorn.Server(config)
+        self._server_thread = threading.Thread(target=self._server.run, daemon=True)
+        self._server_thread.start()
+
+        deadline = time.time() + 10
+        while not self._server.started:
+            if time.time() > deadline or not self._server_thread.is_alive():
+                self.stop()
+                raise RuntimeError("压测服务启动失败")
+            time.sleep(0.05)
+
+        self.base_url = f"http://127.0.0.1:{port}"
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.should_exit = True
+            self._server_thread.join(timeout=10)
+            self._server = None
+
+        app.dependency_overrides.pop(get_db, None)
+        if self._saved:
+            settings.OPENAI_BASE_URL = self._saved["OPENAI_BASE_URL"]
+            settings.OPENAI_API_KEY = self._saved["OPENAI_API_KEY"]
+            ai_service.client = self._saved["client"]
+            idempotency_store.session_factory = self._saved["idempotency_session_factory"]
+            self._saved = {}
+
+        self.mock.stop()
+        if getattr(self, "engine", None) is not None:
+            self.engine.dispose()
+        if self._tmp_dir:
+            self._tmp_dir.cleanup()
+            self._tmp_dir = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
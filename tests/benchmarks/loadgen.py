@@ -0,0 +1,208 @@
+"""
+并发压测
+每个虚拟用户一个线程,循环执行场景,记录每个接口的耗时并统计p50/p95/p99和RPS
+"""
+import math
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+# 压测使用的用户(与harness初始化的用户一致)
+BENCH_USER_PHONE = "18348056312"
+
+# 长文作文(约800字),用于一站式批改场景
+SAMPLE_ESSAY = (
+    "秋天的田野是一幅美丽的画卷。金黄的稻谷随风起伏,像一片金色的海洋。"
+    "沉甸甸的谷子把稻穗也压弯了腰,农民伯伯脸上露出了丰收的笑容。"
+) * 12
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """最近秩法计算百分位数(输入需已排序)"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class ScenarioClient:
+    """记录每次请求耗时的HTTP客户端"""
+
+    def __init__(self, base_url: str, recorder: "LoadRecorder", timeout: float = 120):
+        self.base_url = base_url
+        self.recorder = recorder
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["X-User-Phone"] = BENCH_USER_PHONE
+
+    def request(self, label: str, method: str, path: str, **kwargs) -> Optional[dict]:
+        start = time.perf_counter()
+        ok = False
+        data = None
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+            ok = response.status_code < 400
+            if ok:
+                data = response.json()
+        except requests.RequestException:
+            ok = False
+        self.recorder.record(label, time.perf_counter() - start, ok)
+        return data
+
+    def get(self, label: str, path: str, **kwargs) -> Optional[dict]:
+        return self.request(label, "GET", path, **kwargs)
+
+    def post(self, label: str, path: str, **kwargs) -> Optional[dict]:
+        return self.request(label, "POST", path, **kwargs)
+
+
+class LoadRecorder:
+    """线程安全的耗时记录"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, label: str, elapsed: float, ok: bool) -> None:
+        with self._lock:
+            self.latencies.setdefault(label, []).append(elapsed)
+            self.errors.setdefault(label, 0)
+            if not ok:
+                self.errors[label] += 1
+
+    def report(self, wall_time: float) -> Dict:
+        """生成统计报告(耗时单位毫秒)"""
+        def summarize(values: List[float], errors: int) -> Dict:
+            values = sorted(values)
+            count = len(values)
+            return {
+                "count": count,
+                "errors": errors,
+                "rps": count / wall_time if wall_time else 0.0,
+                "mean_ms": sum(values) / count * 1000 if count else 0.0,
+                "p50_ms": percentile(values, 50) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+                "max_ms": values[-1] * 1000 if values else 0.0
+            }
+
+        with self._lock:
+            endpoints = {
+                label: summarize(values, self.errors[label])
+                for label, values in self.latencies.items()
+            }
+            all_values = [v for values in self.latencies.values() for v in values]
+            total = summarize(all_values, sum(self.errors.values()))
+
+        return {"wall_time_s": wall_time, "total": total, "endpoints": endpoints}
+
+
+# ========== 压测场景 ==========
+# 场景函数执行一轮用户操作: scenario(client, rng, context)
+
+def browse_lists(client: ScenarioClient, rng: random.Random, context: Dict) -> None:
+    """列表浏览: 批次列表 → 作文分页 → 作文详情"""
+    client.get("GET /api/batches", "/api/batches")
+    batch_id = rng.choice(context["batch_ids"])
+    page = client.get("GET /api/essays", "/api/essays", params={"batch_id": batch_id, "page": 1, "page_size": 20})
+    client.get("GET /api/essays?page=N", "/api/essays", params={"page": rng.randint(1, context["essay_pages"]), "page_size": 20})
+    items = (page or {}).get("essays") or []
+    if items:
+        client.get("GET /api/essays/{id}", f"/api/essays/{rng.choice(items)['id']}")
+
+
+def evaluation_history(client: ScenarioClient, rng: random.Random, context: Dict) -> None:
+    """评价历史: 作文详情 → 该作文的全部评价和评分"""
+    essay_id = rng.choice(context["essay_ids"])
+    client.get("GET /api/essays/{id}", f"/api/essays/{essay_id}")
+    client.get("GET /api/essays/{id}/evaluations", f"/api/essays/{essay_id}/evaluations")
+
+
+def complete_analysis(client: ScenarioClient, rng: random.Random, context: Dict) -> None:
+    """一站式批改(两次模型调用 + 写库)"""
+    client.post("POST /api/evaluations/complete-analysis", "/api/evaluations/complete-analysis", json={
+        "essay_content": SAMPLE_ESSAY,
+        "essay_title": "秋天的田野",
+        "essay_requirement": "以秋天为主题,写一篇不少于600字的记叙文",
+        "student_name": f"压测学生{rng.randint(1, 10000)}",
+        "score_system": 40
+    })
+
+
+SCENARIOS: Dict[str, Callable] = {
+    "browse": browse_lists,
+    "history": evaluation_history,
+    "complete_analysis": complete_analysis,
+}
+
+
+def build_context(base_url: str) -> Dict:
+    """预先读取场景需要的批次和作文ID"""
+    with requests.Session() as session:
+        batches = session.get(f"{base_url}/api/batches", timeout=60).json()
+        essays = session.get(f"{base_url}/api/essays", params={"page": 1, "page_size": 100}, timeout=60).json()
+    return {
+        "batch_ids": [b["id"] for b in batches["batches"]],
+        "essay_ids": [e["id"] for e in essays["essays"]],
+        "essay_pages": max(1, (essays["total"] + 19) // 20)
+    }
+
+
+def run_load(
+    base_url: str,
+    scenario: Callable,
+    users: int = 10,
+    duration: Optional[float] = None,
+    iterations: Optional[int] = None,
+    context: Optional[Dict] = None,
+    seed: int = 0
+) -> Dict:
+    """
+    以N个并发用户运行场景
+
+    Args:
+        base_url: 被测服务地址
+        scenario: 场景函数
+        users: 并发用户数
+        duration: 持续时间(秒),与iterations二选一
+        iterations: 每个用户执行的轮数
+        context: 场景上下文(默认通过build_context获取)
+        seed: 随机种子
+
+    Returns:
+        统计报告
+    """
+    if duration is None and iterations is None:
+        raise ValueError("duration和iterations至少指定一个")
+
+    context = context or build_context(base_url)
+    recorder = LoadRecorder()
+    deadline = time.perf_counter() + duration if duration else None
+
+    def user_loop(user_index: int):
+        rng = random.Random(seed * 1000 + user_index)
+        client = ScenarioClient(base_url, recorder)
+        done = 0
+        while True:
+            if iterations is not None and done >= iterations:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            scenario(client, rng, context)
+            done += 1
+        client.session.close()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=user_loop, args=(i,), daemon=True) for i in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    report = recorder.report(time.perf_counter() - start)
+    report["users"] = users
+    return report
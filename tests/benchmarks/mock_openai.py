@@ -0,0 +1,372 @@
+"""
+本地模拟的OpenAI兼容接口
+- POST /v1/chat/completions
+- Batch接口: POST /v1/files, POST /v1/batches, GET /v1/batches/{id}, POST /v1/batches/{id}/cancel,
+  GET /v1/files/{id}/content; 任务在batch_latency秒后于后台完成
+- 可配置响应延迟和输出token数,按提示词内容返回评价/文体/评分三种JSON
+- 模拟服务商的提示词前缀缓存: 与之前请求相同的前缀(不少于1024 token,按128对齐)计为cached_tokens
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+# 评分维度及满分(与evaluations.py一致)
+SCORE_DIMENSIONS = {
+    "theme_and_intent": 20,
+    "language_expression": 25,
+    "structure": 15,
+    "content_selection": 15,
+    "emotion_and_content": 25
+}
+
+
+def _stable_fraction(text: str) -> float:
+    """根据文本内容得到稳定的0-1之间的数,使同一篇作文得分一致"""
+    return int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16) / 0xFFFFFFFF
+
+
+def _estimate_tokens(text: str) -> int:
+    """粗略估算token数(中文约1字1token)"""
+    return max(1, len(text) // 2 + sum(1 for ch in text if ord(ch) > 0x2E80) // 2)
+
+
+def build_analysis(filler_tokens: int) -> Dict[str, Any]:
+    """作文评价结果"""
+    return {
+        "overall_evaluation": {
+            "summary": "文章结构完整,语言较为流畅。" + "文" * max(filler_tokens, 0),
+            "quality_level": "良好",
+            "main_strengths": ["立意明确", "语言流畅"],
+            "main_issues": ["细节描写不足"]
+        },
+        "requirement_evaluation": [{"requirement": "切合题意", "met": True, "comment": "符合要求"}],
+        "typos": [{"position": "第1段", "wrong": "在", "correct": "再"}],
+        "punctuation_errors": [],
+        "grammar_errors": [{"position": "第2段", "sentence": "通过这件事,使我明白了", "suggestion": "去掉“使”"}],
+        "highlights": [{"position": "第3段", "content": "沉甸甸的谷子把稻穗也压弯了腰", "reason": "拟人生动"}]
+    }
+
+
+def build_scores(essay_text: str) -> Dict[str, Any]:
+    """作文评分结果(同时包含顶层维度分和total_score/dimensions结构)"""
+    fraction = _stable_fraction(essay_text)
+    scores = {
+        dim: round(max_score * (0.55 + 0.4 * fraction))
+        for dim, max_score in SCORE_DIMENSIONS.items()
+    }
+    total = sum(scores.values())
+    return {
+        **scores,
+        "total_score": round(total / 100 * 40, 1),
+        "dimensions": {dim: {"score": s, "max_score": SCORE_DIMENSIONS[dim]} for dim, s in scores.items()}
+    }
+
+
+def build_genre() -> Dict[str, Any]:
+    """文体判断结果"""
+    return {
+        "genre_code": "narrative",
+        "genre_name": "记叙文",
+        "confidence": 0.9,
+        "grade_level": 7,
+        "reasoning": "以记事为主"
+    }
+
+
+class MockOpenAIConfig:
+    """模拟接口的行为配置(运行中可修改)"""
+
+    def __init__(
+        self,
+        latency: float = 0.5,
+        jitter: float = 0.1,
+        completion_tokens: int = 800,
+        error_rate: float = 0.0,
+        prompt_cache: bool = True,
+        batch_latency: float = 0.2
+    ):
+        """
+        Args:
+            latency: 平均响应延迟(秒)
+            jitter: 延迟随机抖动范围(秒)
+            completion_tokens: 评价结果的大致输出token数
+            error_rate: 返回500错误的比例
+            prompt_cache: 是否模拟提示词前缀缓存
+            batch_latency: Batch任务从创建到完成的时间(秒)
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.prompt_cache = prompt_cache
+        self.batch_latency = batch_latency
+
+
+class MockOpenAIServer:
+    """在后台线程运行的模拟OpenAI服务"""
+
+    def __init__(self, config: Optional[MockOpenAIConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or MockOpenAIConfig()
+        self.request_count = 0
+        self.requests: List[Dict[str, Any]] = []
+        self._recent_prompts: List[str] = []
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockOpenAIServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def record(self, path: str, body: Dict[str, Any]) -> None:
+        with self._lock:
+            self.request_count += 1
+            self.requests.append({"path": path, "body": body})
+
+    def cached_tokens(self, prompt_text: str) -> int:
+        """与最近请求的最长公共前缀对应的缓存token数"""
+        if not self.config.prompt_cache:
+            return 0
+        with self._lock:
+            longest = max((len(os.path.commonprefix([prompt_text, p])) for p in self._recent_prompts), default=0)
+            self._recent_prompts = (self._recent_prompts + [prompt_text])[-64:]
+        tokens = _estimate_tokens(prompt_text[:longest]) if longest else 0
+        return tokens // 128 * 128 if tokens >= 1024 else 0
+
+    def chat_completion(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """根据提示词内容构造chat completion响应"""
+        messages = body.get("messages", [])
+        prompt_text = "\n".join(
+            m["content"] if isinstance(m.get("content"), str) else json.dumps(m.get("content"), ensure_ascii=False)
+            for m in messages
+        )
+
+        if "genre_code" in prompt_text:
+            result = build_genre()
+        elif "请按照要求进行评分" in prompt_text or "分制计算总分" in prompt_text:
+            result = build_scores(prompt_text)
+        else:
+            result = build_analysis(self.config.completion_tokens - 150)
+
+        content = json.dumps(result, ensure_ascii=False)
+        prompt_tokens = _estimate_tokens(prompt_text)
+        completion_tokens = _estimate_tokens(content)
+        cached_tokens = min(self.cached_tokens(prompt_text), prompt_tokens)
+        return {
+            "id": f"chatcmpl-mock-{self.request_count}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock-model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens}
+            }
+        }
+
+    def create_file(self, content: bytes, filename: str, purpose: str) -> Dict[str, Any]:
+        file_id = f"file-mock-{uuid.uuid4().hex[:12]}"
+        file_object = {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed"
+        }
+        with self._lock:
+            self.files[file_id] = {**file_object, "content": content}
+        return file_object
+
+    def create_batch(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """创建Batch任务,batch_latency秒后在后台逐行执行并生成结果文件"""
+        input_file = self.files.get(body.get("input_file_id"))
+        if input_file is None:
+            return None
+        lines = [json.loads(line) for line in input_file["content"].decode("utf-8").splitlines() if line.strip()]
+        batch_id = f"batch_mock_{uuid.uuid4().hex[:12]}"
+        now = int(time.time())
+        batch = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": body.get("endpoint"),
+            "input_file_id": input_file["id"],
+            "completion_window": body.get("completion_window", "24h"),
+            "status": "in_progress",
+            "created_at": now,
+            "in_progress_at": now,
+            "expires_at": now + 86400,
+            "output_file_id": None,
+            "error_file_id": None,
+            "request_counts": {"total": len(lines), "completed": 0, "failed": 0},
+            "metadata": body.get("metadata")
+        }
+        with self._lock:
+            self.batches[batch_id] = batch
+        threading.Timer(self.config.batch_latency, self._run_batch, args=(batch_id, lines)).start()
+        return batch
+
+    def _run_batch(self, batch_id: str, lines: List[Dict[str, Any]]) -> None:
+        outputs, errors = [], []
+        for line in lines:
+            item = {"id": f"batch_req_{uuid.uuid4().hex[:12]}", "custom_id": line.get("custom_id")}
+            if self.config.error_rate and random.random() < self.config.error_rate:
+                errors.append({**item, "response": {
+                    "status_code": 500,
+                    "request_id": item["id"],
+                    "body": {"error": {"message": "mock upstream error", "type": "server_error"}}
+                }, "error": None})
+            else:
+                outputs.append({**item, "response": {
+                    "status_code": 200,
+                    "request_id": item["id"],
+                    "body": self.chat_completion(line.get("body", {}))
+                }, "error": None})
+
+        def to_jsonl(rows):
+            return "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows).encode("utf-8")
+
+        with self._lock:
+            batch = self.batches[batch_id]
+            if batch["status"] != "in_progress":
+                return
+        output_file = self.create_file(to_jsonl(outputs), "output.jsonl", "batch_output") if outputs else None
+        error_file = self.create_file(to_jsonl(errors), "errors.jsonl", "batch_output") if errors else None
+        with self._lock:
+            batch.update({
+                "status": "completed",
+                "completed_at": int(time.time()),
+                "output_file_id": output_file["id"] if output_file else None,
+                "error_file_id": error_file["id"] if error_file else None,
+                "request_counts": {"total": len(lines), "completed": len(outputs), "failed": len(errors)}
+            })
+
+    def cancel_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            batch = self.batches.get(batch_id)
+            if batch is not None and batch["status"] == "in_progress":
+                batch.update({"status": "cancelled", "cancelled_at": int(time.time())})
+        return batch
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status_code: int, payload: Dict[str, Any]) -> None:
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status_code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_bytes(self, status_code: int, content: bytes, content_type: str) -> None:
+                self.send_response(status_code)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def _not_found(self) -> None:
+                self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+            def do_GET(self):
+                path = self.path.split("?", 1)[0].rstrip("/")
+                parts = path.split("/")
+                if "/batches/" in path:
+                    batch = server.batches.get(parts[-1])
+                    return self._send_json(200, batch) if batch else self._not_found()
+                if path.endswith("/content") and "/files/" in path:
+                    file_object = server.files.get(parts[-2])
+                    if file_object is None:
+                        return self._not_found()
+                    return self._send_bytes(200, file_object["content"], "application/octet-stream")
+                self._not_found()
+
+            def _upload_file(self, raw: bytes) -> None:
+                """解析multipart/form-data上传"""
+                message = BytesParser(policy=HTTP).parsebytes(
+                    f"Content-Type: {self.headers.get('Content-Type')}\r\n\r\n".encode() + raw
+                )
+                fields, content, filename = {}, b"", "upload.jsonl"
+                for part in message.iter_parts():
+                    name = part.get_param("name", header="content-disposition")
+                    if name == "file":
+                        content = part.get_payload(decode=True) or b""
+                        filename = part.get_filename() or filename
+                    else:
+                        fields[name] = part.get_content().strip()
+                self._send_json(200, server.create_file(content, filename, fields.get("purpose", "batch")))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                raw = self.rfile.read(length)
+                path = self.path.split("?", 1)[0].rstrip("/")
+
+                if path.endswith("/files"):
+                    server.record(path, {})
+                    return self._upload_file(raw)
+
+                body = json.loads(raw or b"{}")
+                server.record(path, body)
+
+                if path.endswith("/batches"):
+                    batch = server.create_batch(body)
+                    return self._send_json(200, batch) if batch else self._not_found()
+                if path.endswith("/cancel") and "/batches/" in path:
+                    batch = server.cancel_batch(path.split("/")[-2])
+                    return self._send_json(200, batch) if batch else self._not_found()
+
+                config = server.config
+                delay = max(0.0, config.latency + random.uniform(-config.jitter, config.jitter))
+                time.sleep(delay)
+
+                if config.error_rate and random.random() < config.error_rate:
+                    self._send_json(500, {"error": {"message": "mock upstream error", "type": "server_error"}})
+                    return
+
+                if path.endswith("/chat/completions"):
+                    self._send_json(200, server.chat_completion(body))
+                else:
+                    self._not_found()
+
+        return Handler
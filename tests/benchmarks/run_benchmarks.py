@@ -0,0 +1,94 @@
+"""
+压测入口
+
+用法(在项目根目录执行):
+    python -m tests.benchmarks.run_benchmarks
+    python -m tests.benchmarks.run_benchmarks --scenario complete_analysis --users 20 --duration 30 --mock-latency 2
+    python -m tests.benchmarks.run_benchmarks --essay-copies 10 --output bench_report.json
+
+设置BENCH_DATABASE_URL可改用本地MySQL空库
+"""
+import argparse
+import json
+
+from .harness import BenchmarkEnvironment
+from .loadgen import SCENARIOS, build_context, run_load
+from .mock_openai import MockOpenAIConfig
+
+
+def print_report(name: str, report: dict) -> None:
+    """打印单个场景的统计表"""
+    print(f"\n📊 场景: {name}  并发用户: {report['users']}  用时: {report['wall_time_s']:.1f}s")
+    header = f"{'接口':<44}{'请求数':>8}{'错误':>6}{'RPS':>9}{'p50ms':>10}{'p95ms':>10}{'p99ms':>10}{'maxms':>10}"
+    print(header)
+    print("-" * len(header))
+    rows = list(report["endpoints"].items()) + [("合计", report["total"])]
+    for label, stats in rows:
+        print(
+            f"{label:<44}"
+            f"{stats['count']:>8}"
+            f"{stats['errors']:>6}"
+            f"{stats['rps']:>9.1f}"
+            f"{stats['p50_ms']:>10.1f}"
+            f"{stats['p95_ms']:>10.1f}"
+            f"{stats['p99_ms']:>10.1f}"
+            f"{stats['max_ms']:>10.1f}"
+        )
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="作文评分系统离线压测")
+    parser.add_argument("--scenario", choices=list(SCENARIOS) + ["all"], default="all", help="压测场景")
+    parser.add_argument("--users", type=int, default=10, help="并发用户数")
+    parser.add_argument("--duration", type=float, default=10, help="每个场景持续时间(秒)")
+    parser.add_argument("--iterations", type=int, help="每个用户执行的轮数(指定后忽略--duration)")
+    parser.add_argument("--mock-latency", type=float, default=0.5, help="模拟模型响应延迟(秒)")
+    parser.add_argument("--mock-jitter", type=float, default=0.1, help="模拟延迟抖动(秒)")
+    parser.add_argument("--completion-tokens", type=int, default=800, help="模拟评价输出token数")
+    parser.add_argument("--essay-copies", type=int, default=1, help="essays_data.json复制份数")
+    parser.add_argument("--evaluations-per-essay", type=int, default=2, help="每篇作文的历史评价数")
+    parser.add_argument("--echo-sql", action="store_true", help="打印SQL")
+    parser.add_argument("--output", help="JSON报告输出路径")
+    args = parser.parse_args()
+
+    names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    mock_config = MockOpenAIConfig(
+        latency=args.mock_latency,
+        jitter=args.mock_jitter,
+        completion_tokens=args.completion_tokens
+    )
+
+    reports = {}
+    with BenchmarkEnvironment(
+        mock_config=mock_config,
+        essay_copies=args.essay_copies,
+        evaluations_per_essay=args.evaluations_per_essay,
+        echo_sql=args.echo_sql
+    ) as env:
+        print(f"\n✅ 压测环境就绪: {env.base_url}  数据: {env.seed_stats}")
+        context = build_context(env.base_url)
+        for name in names:
+            report = run_load(
+                env.base_url,
+                SCENARIOS[name],
+                users=args.users,
+                duration=None if args.iterations else args.duration,
+                iterations=args.iterations,
+                context=context
+            )
+            report["mock_requests"] = env.mock.request_count
+            reports[name] = report
+            print_report(name, report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "config": vars(args),
+                "scenarios": reports
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\n报告已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
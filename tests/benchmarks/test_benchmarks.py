@@ -0,0 +1,94 @@
+"""
+压测套件冒烟测试
+小数据量、低延迟地跑一遍所有场景,确认环境和统计可用
+"""
+import pytest
+
+pytest.importorskip("uvicorn")
+requests = pytest.importorskip("requests")
+
+from .harness import BenchmarkEnvironment  # noqa: E402
+from .loadgen import SCENARIOS, build_context, percentile, run_load  # noqa: E402
+from .mock_openai import MockOpenAIConfig  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def bench_env():
+    with BenchmarkEnvironment(
+        mock_config=MockOpenAIConfig(latency=0.01, jitter=0.0, completion_tokens=200),
+        evaluations_per_essay=1,
+        scores_per_evaluation=1
+    ) as env:
+        yield env
+
+
+def test_percentile():
+    values = sorted(float(i) for i in range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([], 50) == 0.0
+
+
+@pytest.mark.parametrize("name", list(SCENARIOS))
+def test_scenario_runs_without_errors(bench_env, name):
+    context = build_context(bench_env.base_url)
+    report = run_load(bench_env.base_url, SCENARIOS[name], users=2, iterations=2, context=context)
+
+    assert report["total"]["count"] > 0
+    assert report["total"]["errors"] == 0
+    assert report["total"]["p50_ms"] <= report["total"]["p99_ms"]
+    assert report["total"]["rps"] > 0
+
+
+def test_complete_analysis_calls_mock_model(bench_env):
+    before = bench_env.mock.request_count
+    run_load(bench_env.base_url, SCENARIOS["complete_analysis"], users=1, iterations=1, context=build_context(bench_env.base_url))
+    # 评价 + 评分各一次
+    assert bench_env.mock.request_count - before == 2
+
+
+def test_metrics_endpoint_reports_pipeline_stages(bench_env):
+    run_load(bench_env.base_url, SCENARIOS["complete_analysis"], users=1, iterations=1, context=build_context(bench_env.base_url))
+    text = requests.get(f"{bench_env.base_url}/metrics", timeout=10).text
+
+    assert 'essay_http_request_duration_seconds_count{method="POST",route="/api/evaluations/complete-analysis",status="200"}' in text
+    assert 'essay_model_call_duration_seconds_count{model=' in text
+    assert 'stage="analyze"' in text and 'stage="score"' in text
+    assert 'essay_model_tokens_total{direction="in"' in text
+    assert 'essay_db_queries_per_request_count{route="/api/essays"}' in text
+    assert "essay_db_pool_checkout_wait_seconds_count" in text
+
+
+def test_server_timing_reports_query_count(bench_env):
+    response = requests.get(f"{bench_env.base_url}/api/essays", params={"page_size": 5}, timeout=10)
+
+    assert int(response.headers["X-DB-Query-Count"]) > 1
+    assert 'queries"' in response.headers["Server-Timing"]
+
+
+def test_slow_request_log_lists_repeated_statements(bench_env, caplog, monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "SLOW_REQUEST_QUERIES", 2)
+    with caplog.at_level("WARNING", logger="app"):
+        requests.get(f"{bench_env.base_url}/api/essays", params={"page_size": 5}, timeout=10)
+
+    slow_logs = [r.getMessage() for r in caplog.records if r.getMessage().startswith("慢请求")]
+    assert slow_logs
+    assert "\n  x" in slow_logs[0]
+
+
+def test_profiler_on_debug_header(bench_env, monkeypatch):
+    pytest.importorskip("pyinstrument")
+    from app.config import settings
+
+    headers = {settings.PROFILING_HEADER: "text"}
+    # 未开启时忽略请求头
+    response = requests.get(f"{bench_env.base_url}/api/batches", headers=headers, timeout=10)
+    assert "batches" in response.json()
+
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    response = requests.get(f"{bench_env.base_url}/api/batches", headers=headers, timeout=10)
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "get_batches" in response.text
@@ -0,0 +1,57 @@
+"""
+热点查询的执行计划检查
+按接口中的查询形状构造SQL,EXPLAIN QUERY PLAN确认都走索引且不需要额外排序(SQLite的TEMP B-TREE相当于MySQL的filesort)
+"""
+import pytest
+
+pytest.importorskip("uvicorn")
+
+from sqlalchemy import func, select  # noqa: E402
+
+from .harness import BenchmarkEnvironment  # noqa: E402
+
+from app.models import Essay, Evaluation, Prompt, Score  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def bench_env():
+    with BenchmarkEnvironment(evaluations_per_essay=2, scores_per_evaluation=2) as env:
+        yield env
+
+
+HOT_QUERIES = {
+    "essays_by_batch": select(Essay).where(Essay.status == 1, Essay.batch_id == 1).order_by(Essay.create_date.desc()).limit(20),
+    "essays_page": select(Essay).where(Essay.status == 1).order_by(Essay.create_date.desc()).limit(20),
+    "evaluation_summary": select(func.count(Evaluation.id), func.max(Evaluation.create_date)).where(
+        Evaluation.essay_id == 1, Evaluation.status == 1
+    ),
+    "evaluations_by_essay": select(Evaluation).where(
+        Evaluation.essay_id == 1, Evaluation.status == 1
+    ).order_by(Evaluation.create_date.desc()),
+    "scores_by_evaluation": select(Score).where(
+        Score.evaluation_id == 1, Score.status == 1
+    ).order_by(Score.create_date.desc()),
+    "prompts_by_scope": select(Prompt).where(
+        Prompt.status == 1, Prompt.grade_id == 1, Prompt.genre_id == 1, Prompt.prompt_type == "score"
+    ).order_by(Prompt.create_date.desc()),
+    "prompts_page": select(Prompt).where(Prompt.status == 1).order_by(Prompt.create_date.desc()),
+    "default_prompt": select(Prompt).where(
+        Prompt.prompt_type == "score", Prompt.is_default == 1, Prompt.status == 1
+    ).limit(1),
+}
+
+
+def _query_plan(env, statement):
+    sql = str(statement.compile(dialect=env.engine.dialect, compile_kwargs={"literal_binds": True}))
+    with env.engine.connect() as conn:
+        return [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+@pytest.mark.parametrize("name", list(HOT_QUERIES))
+def test_hot_query_uses_index_without_sort(bench_env, name):
+    plan = _query_plan(bench_env, HOT_QUERIES[name])
+
+    table_steps = [step for step in plan if step.startswith(("SEARCH", "SCAN"))]
+    assert table_steps
+    assert all("INDEX" in step for step in table_steps), f"{name}没有走索引: {plan}"
+    assert not any("TEMP B-TREE" in step for step in plan), f"{name}需要额外排序: {plan}"
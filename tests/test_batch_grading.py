@@ -0,0 +1,143 @@
+"""
+离线批量评分测试
+使用压测环境,模拟服务实现了Batch接口
+"""
+import json
+
+import pytest
+
+pytest.importorskip("uvicorn")
+
+from tests.benchmarks.harness import BenchmarkEnvironment  # noqa: E402
+from tests.benchmarks.mock_openai import MockOpenAIConfig  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def env():
+    with BenchmarkEnvironment(
+        mock_config=MockOpenAIConfig(latency=0.01, jitter=0.0, completion_tokens=200, batch_latency=0.2),
+        evaluations_per_essay=1,
+        scores_per_evaluation=1
+    ) as bench_env:
+        yield bench_env
+
+
+def _default_prompt_id(db, prompt_type):
+    from app.models import Prompt
+
+    return db.query(Prompt.id).filter_by(prompt_type=prompt_type, is_default=1).scalar()
+
+
+def _run_job(env, stage, essay_ids):
+    from app.services.batch_grading import JOB_COMPLETED, OpenAIBatchProvider, ingest_job, submit_job, wait_for_job
+
+    provider = OpenAIBatchProvider()
+    with env.SessionLocal() as db:
+        job = submit_job(db, provider, stage, _default_prompt_id(db, stage), essay_ids)
+        wait_for_job(db, provider, job, interval=0.05, timeout=10)
+        assert job.job_status == JOB_COMPLETED
+        stats = ingest_job(db, provider, job)
+        return job.id, stats
+
+
+def test_build_requests_jsonl_shape(env):
+    from app.models import Essay, Prompt
+    from app.services.batch_grading import build_batch_requests
+
+    with env.SessionLocal() as db:
+        essay_ids = [row.id for row in db.query(Essay.id).limit(2)]
+        prompt = db.query(Prompt).filter_by(id=_default_prompt_id(db, "analyze")).one()
+        requests = build_batch_requests(db, "analyze", prompt, essay_ids, "mock-model")
+
+    assert [r["custom_id"] for r in requests] == [f"analyze-{essay_id}" for essay_id in essay_ids]
+    assert all(r["url"] == "/v1/chat/completions" and r["body"]["model"] == "mock-model" for r in requests)
+    # 每行都能序列化为JSONL
+    assert all("\n" not in json.dumps(r, ensure_ascii=False) for r in requests)
+
+
+def test_analyze_then_score_batch(env):
+    from app.models import Essay, Evaluation, GradingJob, Score
+
+    with env.SessionLocal() as db:
+        essay_ids = [row.id for row in db.query(Essay.id).order_by(Essay.id).limit(3)]
+        chat_calls = sum(1 for r in env.mock.requests if r["path"].endswith("/chat/completions"))
+
+    _, stats = _run_job(env, "analyze", essay_ids)
+    assert stats == {"succeeded": 3, "failed": 0}
+
+    _, stats = _run_job(env, "score", essay_ids)
+    assert stats == {"succeeded": 3, "failed": 0}
+
+    with env.SessionLocal() as db:
+        latest = db.query(Evaluation).filter(Evaluation.essay_id.in_(essay_ids), Evaluation.is_latest == 1).all()
+        assert len(latest) == 3
+        assert all(e.model_name and e.prompt_tokens > 0 for e in latest)
+
+        default_scores = db.query(Score).filter(
+            Score.evaluation_id.in_([e.id for e in latest]), Score.is_default == 1
+        ).all()
+        assert len(default_scores) == 3
+        assert all(s.score_type == "ai" and 0 < s.total_score <= 40 for s in default_scores)
+
+        assert {job.job_status for job in db.query(GradingJob)} == {"ingested"}
+
+    # 没有经过实时接口
+    assert sum(1 for r in env.mock.requests if r["path"].endswith("/chat/completions")) == chat_calls
+
+
+def test_reanalyze_keeps_confirmed_genre_and_grade(env):
+    from app.models import Essay, Evaluation
+
+    with env.SessionLocal() as db:
+        essay = db.query(Essay).order_by(Essay.id).offset(5).first()
+        db.query(Evaluation).filter_by(essay_id=essay.id, is_latest=1).update(
+            {"confirmed_genre_id": 2, "confirmed_grade_id": 3}
+        )
+        # 没有评价的作文使用默认值
+        new_essay = Essay(batch_id=essay.batch_id, essay_content=essay.essay_content, word_count=essay.word_count,
+                          score_system=40, status=1)
+        db.add(new_essay)
+        db.commit()
+        essay_ids = [essay.id, new_essay.id]
+
+    _, stats = _run_job(env, "analyze", essay_ids)
+    assert stats == {"succeeded": 2, "failed": 0}
+
+    with env.SessionLocal() as db:
+        confirmed = {
+            e.essay_id: (e.confirmed_genre_id, e.confirmed_grade_id)
+            for e in db.query(Evaluation).filter(Evaluation.essay_id.in_(essay_ids), Evaluation.is_latest == 1)
+        }
+    assert confirmed == {essay_ids[0]: (2, 3), essay_ids[1]: (1, 1)}
+
+
+def test_failed_requests_counted_and_ingest_once(env):
+    from app.models import Essay, GradingJob
+    from app.services.batch_grading import OpenAIBatchProvider, ingest_job
+
+    with env.SessionLocal() as db:
+        essay_ids = [row.id for row in db.query(Essay.id).order_by(Essay.id.desc()).limit(4)]
+
+    env.mock.config.error_rate = 1.0
+    try:
+        job_id, stats = _run_job(env, "analyze", essay_ids)
+    finally:
+        env.mock.config.error_rate = 0.0
+    assert stats == {"succeeded": 0, "failed": 4}
+
+    with env.SessionLocal() as db:
+        job = db.query(GradingJob).filter_by(id=job_id).one()
+        assert "mock upstream error" in job.error_message
+        with pytest.raises(ValueError):
+            ingest_job(db, OpenAIBatchProvider(), job)
+
+
+def test_incomplete_provider_rejected_on_instantiation():
+    from app.services.batch_grading import BatchProvider
+
+    class SubmitOnlyProvider(BatchProvider):
+        def submit(self, requests, metadata=None):
+            return "job"
+
+    with pytest.raises(TypeError):
+        SubmitOnlyProvider()
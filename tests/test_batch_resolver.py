@@ -0,0 +1,130 @@
+"""
+批次复用测试(指纹唯一索引、并发创建、作文数量原子累加)
+使用压测环境(SQLite + 模拟OpenAI服务)
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("uvicorn")
+requests = pytest.importorskip("requests")
+
+from tests.benchmarks.harness import BenchmarkEnvironment  # noqa: E402
+from tests.benchmarks.loadgen import SAMPLE_ESSAY  # noqa: E402
+from tests.benchmarks.mock_openai import MockOpenAIConfig  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def env():
+    with BenchmarkEnvironment(
+        mock_config=MockOpenAIConfig(latency=0.05, jitter=0.0, completion_tokens=200),
+        evaluations_per_essay=1,
+        scores_per_evaluation=1
+    ) as bench_env:
+        yield bench_env
+
+
+def test_concurrent_submissions_share_one_batch(env):
+    from app.models import Batch, Essay
+    from app.services.batch_resolver import batch_fingerprint
+
+    title, requirement = "并发批次测试", "以秋天为主题,写一篇记叙文"
+    url = f"{env.base_url}/api/evaluations/complete-analysis"
+
+    def submit(i):
+        return requests.post(url, json={
+            "essay_content": SAMPLE_ESSAY,
+            "essay_title": title,
+            "essay_requirement": requirement,
+            "student_name": f"学生{i}",
+            "score_system": 40
+        }, timeout=60)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(submit, range(8)))
+
+    assert all(r.status_code == 200 for r in responses), [r.text for r in responses if r.status_code != 200]
+    assert len({r.json()["batch_id"] for r in responses}) == 1
+
+    with env.SessionLocal() as db:
+        batches = db.query(Batch).filter(Batch.fingerprint == batch_fingerprint(title, requirement)).all()
+        assert len(batches) == 1
+        assert batches[0].essay_count == 8
+        assert db.query(Essay).filter_by(batch_id=batches[0].id).count() == 8
+
+
+def test_empty_title_reuses_default_batch(env):
+    from app.models import Batch
+    from app.services.batch_resolver import DEFAULT_TITLE, resolve_batch
+
+    with env.SessionLocal() as db:
+        first = resolve_batch(db, "", "无要求")
+        second = resolve_batch(db, None, None)
+        db.commit()
+
+        batch = db.query(Batch).filter_by(id=first).one()
+    assert first == second
+    assert batch.essay_title == DEFAULT_TITLE and batch.essay_count == 2
+
+
+def test_backfill_skips_duplicate_batches(env):
+    from app.models import Batch
+    from app.services.batch_resolver import resolve_batch
+    from scripts.backfill_batch_fingerprints import backfill_fingerprints, recount_essays
+
+    with env.SessionLocal() as db:
+        db.add_all([
+            Batch(directory_name=f"legacy_dup_{i}", essay_title="旧批次", essay_requirement="旧要求", essay_count=5, status=1)
+            for i in range(2)
+        ])
+        db.commit()
+        legacy_ids = [b.id for b in db.query(Batch).filter_by(essay_title="旧批次").order_by(Batch.id)]
+
+        stats = backfill_fingerprints(db)
+        assert stats["updated"] >= 1
+        assert legacy_ids[1] in stats["duplicates"] and legacy_ids[0] not in stats["duplicates"]
+        # 再次执行没有需要回填的批次
+        assert backfill_fingerprints(db)["updated"] == 0
+
+        # 最早的批次被复用,作文数量按作文表修正
+        assert resolve_batch(db, "旧批次", "旧要求") == legacy_ids[0]
+        db.commit()
+        assert recount_essays(db) >= 2
+        assert db.query(Batch.essay_count).filter_by(id=legacy_ids[0]).scalar() == 0
+
+
+def test_insert_conflict_reads_committed_batch(env):
+    """查找时批次还不存在,插入前另一个请求已提交相同指纹的批次"""
+    from app.models import Batch
+    from app.services.batch_resolver import _create_batch, batch_fingerprint
+
+    fingerprint = batch_fingerprint("冲突批次", "冲突要求")
+    with env.SessionLocal() as other:
+        other.add(Batch(directory_name="conflict_other", essay_title="冲突批次", essay_requirement="冲突要求",
+                        essay_count=0, fingerprint=fingerprint, status=1))
+        other.commit()
+        other_id = other.query(Batch.id).filter_by(directory_name="conflict_other").scalar()
+
+    with env.SessionLocal() as db:
+        assert _create_batch(db, "冲突批次", "冲突要求", fingerprint) == other_id
+        db.rollback()
+
+
+def test_deleted_batch_not_reused(env):
+    from app.models import Batch
+    from app.services.batch_resolver import batch_fingerprint, resolve_batch
+
+    fingerprint = batch_fingerprint("已删除批次", "已删除要求")
+    with env.SessionLocal() as db:
+        deleted = Batch(directory_name="deleted_batch", essay_title="已删除批次", essay_requirement="已删除要求",
+                        essay_count=3, fingerprint=fingerprint, status=0)
+        db.add(deleted)
+        db.commit()
+
+        batch_id = resolve_batch(db, "已删除批次", "已删除要求")
+        db.commit()
+
+        assert batch_id != deleted.id
+        db.refresh(deleted)
+        assert deleted.fingerprint is None
+        assert db.query(Batch.fingerprint).filter_by(id=batch_id).scalar() == fingerprint
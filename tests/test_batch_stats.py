@@ -0,0 +1,159 @@
+"""
+批次评分统计测试
+使用压测环境(SQLite + 模拟OpenAI服务),评价/评分后检查增量维护的统计与全量重算结果一致
+"""
+import pytest
+
+pytest.importorskip("uvicorn")
+requests = pytest.importorskip("requests")
+
+from tests.benchmarks.harness import BenchmarkEnvironment  # noqa: E402
+from tests.benchmarks.loadgen import BENCH_USER_PHONE, SAMPLE_ESSAY  # noqa: E402
+from tests.benchmarks.mock_openai import MockOpenAIConfig  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def env():
+    with BenchmarkEnvironment(
+        mock_config=MockOpenAIConfig(latency=0.01, jitter=0.0, completion_tokens=200),
+        evaluations_per_essay=1,
+        scores_per_evaluation=1
+    ) as bench_env:
+        yield bench_env
+
+
+def _batch_stats(env):
+    response = requests.get(f"{env.base_url}/api/batches", timeout=30)
+    assert response.status_code == 200, response.text
+    return {batch["id"]: batch["score_stats"] for batch in response.json()["batches"]}
+
+
+def _recomputed_stats(env):
+    """全量重算后的统计(在回滚的事务中计算,不影响增量维护的数据)"""
+    from app.models import BatchScoreStats
+    from app.services.batch_stats import recompute_batch_stats, stats_summary
+
+    with env.SessionLocal() as db:
+        recompute_batch_stats(db)
+        stats = {row.batch_id: stats_summary(row) for row in db.query(BatchScoreStats)}
+        db.rollback()
+    return stats
+
+
+def _assert_matches_recompute(env):
+    incremental = {batch_id: stats for batch_id, stats in _batch_stats(env).items() if stats}
+    recomputed = _recomputed_stats(env)
+    assert incremental.keys() == {batch_id for batch_id, stats in recomputed.items() if stats}
+    for batch_id, stats in incremental.items():
+        expected = recomputed[batch_id]
+        assert stats["score_count"] == expected["score_count"]
+        assert stats["histogram"] == expected["histogram"]
+        assert stats["mean"] == pytest.approx(expected["mean"], abs=0.01)
+        assert stats["stddev"] == pytest.approx(expected["stddev"], abs=0.01)
+        assert stats["dimension_means"] == pytest.approx(expected["dimension_means"], abs=0.01)
+
+
+def _prompt_id(env, prompt_type):
+    from app.models import Prompt
+
+    with env.SessionLocal() as db:
+        return db.query(Prompt.id).filter_by(prompt_type=prompt_type, is_default=1).scalar()
+
+
+def _latest_evaluation(env, batch_id):
+    from app.models import Essay, Evaluation
+
+    with env.SessionLocal() as db:
+        return db.query(Evaluation.id, Evaluation.essay_id).join(Essay).filter(
+            Essay.batch_id == batch_id, Evaluation.is_latest == 1
+        ).order_by(Evaluation.id).first()
+
+
+def test_seeded_stats(env):
+    stats = _batch_stats(env)
+    assert any(stats.values())
+    for batch_stats in filter(None, stats.values()):
+        assert sum(batch_stats["histogram"]) == batch_stats["score_count"]
+        assert 0 <= batch_stats["mean"] <= 100
+        assert set(batch_stats["dimension_means"]) == {
+            "theme_and_intent", "language_expression", "structure", "content_selection", "emotion_and_content"
+        }
+    _assert_matches_recompute(env)
+
+
+def test_complete_analysis_creates_stats_for_new_batch(env):
+    response = requests.post(f"{env.base_url}/api/evaluations/complete-analysis", json={
+        "essay_content": SAMPLE_ESSAY,
+        "essay_title": "评分统计测试题目",
+        "essay_requirement": "不少于600字",
+        "student_name": "统计测试学生",
+        "score_system": 40
+    }, timeout=60)
+    assert response.status_code == 200, response.text
+    result = response.json()
+
+    stats = _batch_stats(env)[result["batch_id"]]
+    assert stats["score_count"] == 1
+    assert stats["mean"] == pytest.approx(result["total_score"] / 40 * 100, abs=0.01)
+    assert stats["stddev"] == 0
+    _assert_matches_recompute(env)
+
+
+def test_rescore_and_reanalyze_update_stats(env):
+    batch_id = next(batch_id for batch_id, stats in _batch_stats(env).items() if stats)
+    count = _batch_stats(env)[batch_id]["score_count"]
+    evaluation_id, essay_id = _latest_evaluation(env, batch_id)
+
+    # 重新评分: 默认评分替换,评分数不变
+    response = requests.post(f"{env.base_url}/api/evaluations/score", json={
+        "evaluation_id": evaluation_id,
+        "score_prompt_id": _prompt_id(env, "score"),
+        "confirmed_genre_id": 1,
+        "confirmed_grade_id": 1,
+        "user_phone": BENCH_USER_PHONE
+    }, timeout=60)
+    assert response.status_code == 200, response.text
+    assert _batch_stats(env)[batch_id]["score_count"] == count
+    _assert_matches_recompute(env)
+
+    # 重新评价: 之前评价的评分不再计入
+    response = requests.post(f"{env.base_url}/api/evaluations/analyze", json={
+        "essay_id": essay_id,
+        "analyze_prompt_id": _prompt_id(env, "analyze"),
+        "user_phone": BENCH_USER_PHONE
+    }, timeout=60)
+    assert response.status_code == 200, response.text
+    stats = _batch_stats(env)[batch_id]
+    assert (stats["score_count"] if stats else 0) == count - 1
+    _assert_matches_recompute(env)
+
+
+def test_score_route_stores_rubric_total(env):
+    import json
+
+    from app.models import Essay, Evaluation, Score
+    from app.utils.score_converter import DEFAULT_RUBRIC, ROUND_FLOOR
+
+    batch_id = next(batch_id for batch_id, stats in _batch_stats(env).items() if stats)
+    evaluation_id, _ = _latest_evaluation(env, batch_id)
+    response = requests.post(f"{env.base_url}/api/evaluations/score", json={
+        "evaluation_id": evaluation_id,
+        "score_prompt_id": _prompt_id(env, "score"),
+        "confirmed_genre_id": 1,
+        "confirmed_grade_id": 1,
+        "user_phone": BENCH_USER_PHONE
+    }, timeout=60)
+    assert response.status_code == 200, response.text
+    result = response.json()
+
+    with env.SessionLocal() as db:
+        score = db.query(Score).filter_by(id=result["score_id"]).one()
+        score_system = db.query(Essay.score_system).join(Evaluation).filter(Evaluation.id == evaluation_id).scalar()
+        dimensions = json.loads(score.dimension_scores)
+
+    # 维度分数按评分量表保存,总分按作文分制换算后取整数部分(不使用模型给出的总分)
+    assert set(dimensions) == set(DEFAULT_RUBRIC.dimensions)
+    assert all(set(value) == {"score", "max_score"} for value in dimensions.values())
+    values = DEFAULT_RUBRIC.validate(dimensions)
+    assert score.total_score == int(DEFAULT_RUBRIC.total(values, score_system, rounding=ROUND_FLOOR))
+    assert result["score_data"] == {"total_score": score.total_score, "dimensions": dimensions}
@@ -0,0 +1,129 @@
+"""
+模型服务熔断测试
+"""
+import os
+import time
+
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+
+from app.services.circuit_breaker import (  # noqa: E402
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _fail(breaker, error=RuntimeError("upstream down")):
+    with pytest.raises(type(error)):
+        with breaker.guard():
+            raise error
+
+
+def _succeed(breaker):
+    with breaker.guard():
+        pass
+
+
+def test_opens_after_failure_rate_and_fails_fast():
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_rate=0.5, min_calls=4, open_seconds=30, clock=clock)
+
+    _succeed(breaker)
+    _fail(breaker)
+    _succeed(breaker)
+    assert breaker.state == STATE_CLOSED
+    _fail(breaker)
+    assert breaker.state == STATE_OPEN
+
+    clock.now += 10
+    with pytest.raises(CircuitOpenError) as exc_info:
+        _succeed(breaker)
+    assert exc_info.value.retry_after == 20
+    assert breaker.status()["retry_after"] == 20
+
+
+def test_half_open_probe_closes_or_reopens():
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", min_calls=2, open_seconds=30, clock=clock)
+    _fail(breaker)
+    _fail(breaker)
+    assert breaker.state == STATE_OPEN
+
+    # 探测失败继续熔断
+    clock.now += 30
+    _fail(breaker)
+    assert breaker.state == STATE_OPEN and breaker.opened_until == clock.now + 30
+
+    # 探测期间只放行一个请求
+    clock.now += 30
+    with breaker.guard():
+        assert breaker.state == STATE_HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            _succeed(breaker)
+    assert breaker.state == STATE_CLOSED
+    assert breaker.status()["recent_calls"] == 0
+
+
+def test_window_and_ignored_errors():
+    clock = FakeClock()
+    breaker = CircuitBreaker(
+        "test", min_calls=2, window_seconds=60, clock=clock,
+        is_failure=lambda e: not isinstance(e, ValueError)
+    )
+    # 请求本身的错误不计为失败
+    _fail(breaker, ValueError("bad request"))
+    _fail(breaker, ValueError("bad request"))
+    assert breaker.state == STATE_CLOSED
+
+    _fail(breaker)
+    clock.now += 61
+    # 超出窗口的失败不再计入
+    _fail(breaker)
+    assert breaker.state == STATE_CLOSED
+    _fail(breaker)
+    assert breaker.state == STATE_OPEN
+
+
+def test_open_circuit_returns_503_and_shows_in_health(monkeypatch):
+    requests = pytest.importorskip("requests")
+    pytest.importorskip("uvicorn")
+    from app.services.ai_service import ai_service
+    from app.services.model_router import is_failover_error
+    from tests.benchmarks.harness import BenchmarkEnvironment
+    from tests.benchmarks.mock_openai import MockOpenAIConfig
+
+    monkeypatch.setattr(ai_service, "breaker", CircuitBreaker(
+        "model_provider", min_calls=2, open_seconds=30, is_failure=is_failover_error
+    ))
+    payload = {"essay_id": 1, "essay_content": "今天我和妈妈去公园。", "essay_requirement": "写一篇记叙文"}
+
+    with BenchmarkEnvironment(mock_config=MockOpenAIConfig(latency=0.01, jitter=0.0, error_rate=1.0)) as env:
+        ai_service.client = ai_service.client.with_options(max_retries=0)
+        url = f"{env.base_url}/api/evaluations/detect-genre"
+        for _ in range(2):
+            assert requests.post(url, json=payload, timeout=30).status_code == 500
+        upstream_calls = env.mock.request_count
+
+        start = time.perf_counter()
+        response = requests.post(url, json=payload, timeout=30)
+        assert response.status_code == 503
+        assert 0 < int(response.headers["Retry-After"]) <= 30
+        assert time.perf_counter() - start < 1
+        assert env.mock.request_count == upstream_calls
+
+        health = requests.get(f"{env.base_url}/health", timeout=5).json()
+        assert health["status"] == "degraded"
+        assert health["model_provider"]["circuit"]["state"] == STATE_OPEN
+        assert health["model_provider"]["targets"][0]["consecutive_failures"] == 2
@@ -0,0 +1,114 @@
+"""
+答卷并发下载测试
+使用本地HTTP服务作为接口替身
+"""
+import hashlib
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+pytest.importorskip("requests")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from dajuan import PaperDownloader  # noqa: E402
+
+FILES = {f"img{i}.jpg": bytes([i]) * (200 * 1024 + i) for i in range(6)}
+STUDENTS = [
+    {"child_name": f"学生{i}", "media": [{"url": f"img{i}.jpg"}]} for i in range(6)
+] + [{"child_name": "缺图学生", "media": []}]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = parse_qs(parsed.query)
+        if parsed.path == "/paper_list":
+            body = json.dumps({"ret": 0, "data": {"detail_list": STUDENTS}}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        name = params["file_name"][0]
+        StubHandler.requests_seen.append(name)
+        content = FILES[name]
+        etag = '"%s"' % hashlib.md5(content).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def make_downloader(base_url):
+    return PaperDownloader(
+        max_workers=4,
+        download_url_template=base_url + "/download_file?token={token}&file_name={image_url}"
+    )
+
+
+def test_downloads_all_papers_then_skips_on_rerun(stub_server, tmp_path):
+    api_url = f"{stub_server}/paper_list?homework_id=hw1&token=t"
+
+    summary = make_downloader(stub_server).download_papers(api_url, output_dir=str(tmp_path))
+    assert summary["downloaded"] == 6
+    assert summary["no_image"] == 1
+    for i in range(6):
+        assert (tmp_path / f"学生{i}作文答卷.jpg").read_bytes() == FILES[f"img{i}.jpg"]
+    assert not list(tmp_path.glob("*.part"))
+
+    summary = make_downloader(stub_server).download_papers(api_url, output_dir=str(tmp_path))
+    assert summary["downloaded"] == 0
+    assert summary["skipped"] == 6
+    assert summary["bytes"] == 0
+
+
+def test_redownloads_changed_file(stub_server, tmp_path):
+    api_url = f"{stub_server}/paper_list?homework_id=hw1&token=t"
+    make_downloader(stub_server).download_papers(api_url, output_dir=str(tmp_path))
+
+    (tmp_path / "学生0作文答卷.jpg").write_bytes(b"truncated")
+
+    summary = make_downloader(stub_server).download_papers(api_url, output_dir=str(tmp_path))
+    assert summary["downloaded"] == 1
+    assert summary["skipped"] == 5
+    assert (tmp_path / "学生0作文答卷.jpg").read_bytes() == FILES["img0.jpg"]
+
+
+def test_redownloads_same_size_file_with_new_etag(stub_server, tmp_path, monkeypatch):
+    api_url = f"{stub_server}/paper_list?homework_id=hw1&token=t"
+    make_downloader(stub_server).download_papers(api_url, output_dir=str(tmp_path))
+
+    # 服务端文件内容变化但大小相同(ETag不同)
+    changed = bytes([255]) * len(FILES["img0.jpg"])
+    monkeypatch.setitem(FILES, "img0.jpg", changed)
+
+    summary = make_downloader(stub_server).download_papers(api_url, output_dir=str(tmp_path))
+    assert summary["downloaded"] == 1
+    assert summary["skipped"] == 5
+    assert (tmp_path / "学生0作文答卷.jpg").read_bytes() == changed
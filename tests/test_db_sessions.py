@@ -0,0 +1,101 @@
+"""
+模型调用期间不占用数据库连接的测试
+使用压测环境,模拟服务固定延迟,调用期间采样连接池占用
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("uvicorn")
+requests = pytest.importorskip("requests")
+
+from tests.benchmarks.harness import BenchmarkEnvironment  # noqa: E402
+from tests.benchmarks.loadgen import BENCH_USER_PHONE, SAMPLE_ESSAY  # noqa: E402
+from tests.benchmarks.mock_openai import MockOpenAIConfig  # noqa: E402
+
+CONCURRENCY = 8
+
+
+@pytest.fixture(scope="module")
+def env():
+    with BenchmarkEnvironment(
+        mock_config=MockOpenAIConfig(latency=0.5, jitter=0.0, completion_tokens=200),
+        evaluations_per_essay=1,
+        scores_per_evaluation=1
+    ) as bench_env:
+        yield bench_env
+
+
+def _mean_checked_out(env, send):
+    """并发发送请求,返回期间连接池的平均占用数(写入阶段会短暂占满,只看平均值)"""
+    done = threading.Event()
+    samples = []
+
+    def sample():
+        while not done.is_set():
+            samples.append(env.engine.pool.checkedout())
+            done.wait(0.01)
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    try:
+        with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+            responses = list(pool.map(send, range(CONCURRENCY)))
+    finally:
+        done.set()
+        sampler.join()
+
+    assert all(r.status_code == 200 for r in responses), [r.text for r in responses if r.status_code != 200]
+    return sum(samples) / len(samples)
+
+
+def _default_prompt_id(env, prompt_type):
+    from app.models import Prompt
+
+    with env.SessionLocal() as db:
+        return db.query(Prompt.id).filter_by(prompt_type=prompt_type, is_default=1).scalar()
+
+
+def test_complete_analysis_releases_connection_during_model_calls(env):
+    url = f"{env.base_url}/api/evaluations/complete-analysis"
+
+    def send(i):
+        return requests.post(url, json={
+            "essay_content": SAMPLE_ESSAY,
+            "essay_title": "连接占用测试",
+            "essay_requirement": "以秋天为主题,写一篇记叙文",
+            "student_name": f"学生{i}",
+            "score_system": 40
+        }, timeout=60)
+
+    assert _mean_checked_out(env, send) < 1.5
+
+
+def test_analyze_and_score_release_connection_during_model_call(env):
+    from app.models import Essay
+
+    with env.SessionLocal() as db:
+        essay_ids = [row.id for row in db.query(Essay.id).order_by(Essay.id).limit(CONCURRENCY)]
+    analyze_prompt_id = _default_prompt_id(env, "analyze")
+    score_prompt_id = _default_prompt_id(env, "score")
+    evaluation_ids = {}
+
+    def analyze(i):
+        response = requests.post(f"{env.base_url}/api/evaluations/analyze", json={
+            "essay_id": essay_ids[i], "analyze_prompt_id": analyze_prompt_id, "user_phone": BENCH_USER_PHONE
+        }, timeout=60)
+        evaluation_ids[i] = response.json().get("evaluation_id")
+        return response
+
+    def score(i):
+        return requests.post(f"{env.base_url}/api/evaluations/score", json={
+            "evaluation_id": evaluation_ids[i],
+            "score_prompt_id": score_prompt_id,
+            "confirmed_genre_id": 1,
+            "confirmed_grade_id": 1,
+            "user_phone": BENCH_USER_PHONE
+        }, timeout=60)
+
+    assert _mean_checked_out(env, analyze) < 1.5
+    assert _mean_checked_out(env, score) < 1.5
@@ -0,0 +1,148 @@
+"""
+反馈分析测试
+- 统计函数: 二次加权Kappa、分组误差
+- 接口: 使用压测环境(SQLite),写入已知差值的教师评分反馈后检查统计结果
+"""
+import json
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("uvicorn")
+requests = pytest.importorskip("requests")
+
+from tests.benchmarks.harness import BenchmarkEnvironment  # noqa: E402
+from tests.benchmarks.loadgen import BENCH_USER_PHONE  # noqa: E402
+
+from app.services.score_analytics import (  # noqa: E402
+    DIMENSIONS,
+    analyze_divergence,
+    grouped_errors,
+    quadratic_weighted_kappa,
+)
+
+
+def test_quadratic_weighted_kappa():
+    scores = np.array([3.0, 5.0, 8.0, 10.0, 12.0, 15.0])
+    assert quadratic_weighted_kappa(scores, scores, 15) == pytest.approx(1.0)
+    # 完全相反的评分为负一致性
+    assert quadratic_weighted_kappa(scores, scores[::-1], 15) < 0
+    assert quadratic_weighted_kappa(scores[:1], scores[:1], 15) is None
+
+
+def test_grouped_errors_skips_missing_scores():
+    group_index = np.array([0, 0, 1, 1, 1])
+    ai = np.array([10.0, 12.0, 5.0, np.nan, 7.0])
+    teacher = np.array([8.0, 13.0, 5.0, 6.0, np.nan])
+    errors = grouped_errors(group_index, 2, ai, teacher)
+    assert errors["n"].tolist() == [2, 1]
+    assert errors["mae"].tolist() == pytest.approx([1.5, 0.0])
+    assert errors["bias"].tolist() == pytest.approx([0.5, 0.0])
+
+
+def _synthetic_columns(rows, groups=20, seed=0):
+    rng = np.random.default_rng(seed)
+    arrays = {
+        "batch_id": rng.integers(1, groups + 1, rows).astype(float),
+        "prompt_id": rng.integers(1, groups + 1, rows).astype(float),
+        "prompt_version": np.array(["v1"] * rows, dtype=object),
+        "score_system": np.full(rows, 40.0),
+        "ai_total": rng.integers(0, 41, rows).astype(float),
+        "teacher_total": rng.integers(0, 41, rows).astype(float),
+    }
+    for dim, (_, max_score) in DIMENSIONS.items():
+        arrays[f"ai_{dim}"] = rng.integers(0, max_score + 1, rows).astype(float)
+        teacher = rng.integers(0, max_score + 1, rows).astype(float)
+        teacher[rng.random(rows) < 0.3] = np.nan
+        arrays[f"teacher_{dim}"] = teacher
+    return arrays
+
+
+def test_analyze_divergence_large_input():
+    arrays = _synthetic_columns(200_000)
+    start = time.perf_counter()
+    result = analyze_divergence(arrays, "batch")
+    elapsed = time.perf_counter() - start
+
+    assert result["feedbacks"] == 200_000
+    assert len(result["groups"]) == 20
+    assert sum(group["feedbacks"] for group in result["groups"]) == 200_000
+    assert elapsed < 5, f"20万条反馈统计耗时{elapsed:.2f}s"
+
+
+@pytest.fixture(scope="module")
+def env():
+    with BenchmarkEnvironment(evaluations_per_essay=1, scores_per_evaluation=1) as bench_env:
+        yield bench_env
+
+
+@pytest.fixture(scope="module")
+def seeded(env):
+    """前6个评分: 教师各维度比AI低2分(中文键名),总分相同;另加1条评分对比反馈"""
+    from sqlalchemy import insert
+
+    from app.models import Feedback, Score
+
+    with env.SessionLocal() as db:
+        scores = db.query(Score).order_by(Score.id).limit(7).all()
+        rows = []
+        for score in scores[:6]:
+            dimensions = json.loads(score.dimension_scores)
+            custom_scores = {cn_name: dimensions[dim]["score"] - 2 for dim, (cn_name, _) in DIMENSIONS.items()}
+            rows.append({
+                "evaluation_id": score.evaluation_id,
+                "score_id": score.id,
+                "user_phone": BENCH_USER_PHONE,
+                "feedback_type": "custom_score",
+                "feedback_data": json.dumps({"custom_scores": custom_scores, "total_score": score.total_score}, ensure_ascii=False),
+                "status": 1
+            })
+        comparison = scores[6]
+        rows.append({
+            "evaluation_id": comparison.evaluation_id,
+            "score_id": comparison.id,
+            "user_phone": BENCH_USER_PHONE,
+            "feedback_type": "comparison",
+            "feedback_data": json.dumps({"user_score": comparison.total_score - 4, "is_better": False}),
+            "status": 1
+        })
+        db.execute(insert(Feedback), rows)
+        db.commit()
+        return {"comparison_total": comparison.total_score}
+
+
+def test_analytics_endpoint(env, seeded):
+    response = requests.get(f"{env.base_url}/api/feedbacks/analytics", timeout=30)
+    assert response.status_code == 200, response.text
+    result = response.json()
+
+    assert result["feedbacks"] == 7
+    for dim in DIMENSIONS:
+        stats = result["overall"][dim]
+        assert stats["n"] == 6
+        assert stats["mae"] == pytest.approx(2.0)
+        assert stats["bias"] == pytest.approx(2.0)
+        assert stats["exact_agreement"] == 0
+
+    # 总分换算为百分制: 6条相同,1条AI高4分(40分制) → 偏差 10/7
+    total = result["overall"]["total"]
+    assert total["n"] == 7
+    assert total["bias"] == pytest.approx(10 / 7, abs=1e-3)
+
+    assert len(result["groups"]) == 1
+    assert result["groups"][0]["feedbacks"] == 7
+    assert result["groups"][0]["label"]
+
+
+def test_analytics_group_by_batch(env, seeded):
+    response = requests.get(f"{env.base_url}/api/feedbacks/analytics", params={"group_by": "batch"}, timeout=30)
+    assert response.status_code == 200, response.text
+    groups = response.json()["groups"]
+    assert sum(group["feedbacks"] for group in groups) == 7
+    assert all(group["key"] is not None for group in groups)
+
+
+def test_analytics_invalid_group_by(env):
+    response = requests.get(f"{env.base_url}/api/feedbacks/analytics", params={"group_by": "user"}, timeout=30)
+    assert response.status_code == 400
@@ -0,0 +1,89 @@
+"""
+批量提交反馈测试
+使用压测环境(SQLite),通过X-DB-Query-Count响应头检查SQL数量
+"""
+import pytest
+
+pytest.importorskip("uvicorn")
+requests = pytest.importorskip("requests")
+
+from tests.benchmarks.harness import BenchmarkEnvironment  # noqa: E402
+from tests.benchmarks.loadgen import BENCH_USER_PHONE  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def env():
+    with BenchmarkEnvironment(evaluations_per_essay=1, scores_per_evaluation=1) as bench_env:
+        yield bench_env
+
+
+@pytest.fixture(scope="module")
+def score_refs(env):
+    from app.models import Score
+
+    with env.SessionLocal() as db:
+        return [(row.evaluation_id, row.id) for row in db.query(Score.evaluation_id, Score.id).order_by(Score.id).limit(5)]
+
+
+def _issue_mark(evaluation_id, score_id, start):
+    return {
+        "feedback_type": "issue_mark",
+        "evaluation_id": evaluation_id,
+        "score_id": score_id,
+        "user_phone": BENCH_USER_PHONE,
+        "issue_type": "grammar",
+        "issue_position": {"start": start, "end": start + 5},
+        "issue_description": "语病"
+    }
+
+
+def _count_feedbacks(env):
+    from app.models import Feedback
+
+    with env.SessionLocal() as db:
+        return db.query(Feedback).count()
+
+
+def test_bulk_insert_mixed_types(env, score_refs):
+    before = _count_feedbacks(env)
+    evaluation_id, score_id = score_refs[0]
+    feedbacks = [_issue_mark(e, s, i * 10) for i, (e, s) in enumerate(score_refs * 4)]
+    feedbacks.append({
+        "feedback_type": "comment",
+        "evaluation_id": evaluation_id,
+        "score_id": score_id,
+        "user_phone": BENCH_USER_PHONE,
+        "comment": "整体不错"
+    })
+
+    response = requests.post(f"{env.base_url}/api/feedbacks/bulk", json={"feedbacks": feedbacks}, timeout=30)
+
+    assert response.status_code == 200, response.text
+    assert response.json()["created"] == 21
+    # 一条校验查询 + 一条INSERT
+    assert int(response.headers["X-DB-Query-Count"]) <= 2
+    assert _count_feedbacks(env) - before == 21
+
+    listed = requests.get(f"{env.base_url}/api/feedbacks/score/{score_id}", timeout=30).json()["feedbacks"]
+    comment = next(item for item in listed if item["feedback_type"] == "comment")
+    assert comment["feedback_data"] == {"comment": "整体不错", "comment_type": "general"}
+
+
+def test_bulk_rejects_whole_batch_on_missing_reference(env, score_refs):
+    before = _count_feedbacks(env)
+    evaluation_id, score_id = score_refs[0]
+    feedbacks = [_issue_mark(evaluation_id, score_id, 0), _issue_mark(evaluation_id, 999999, 0)]
+
+    response = requests.post(f"{env.base_url}/api/feedbacks/bulk", json={"feedbacks": feedbacks}, timeout=30)
+
+    assert response.status_code == 404
+    assert "999999" in response.json()["detail"]
+    assert _count_feedbacks(env) == before
+
+
+def test_bulk_validates_feedback_type(env, score_refs):
+    evaluation_id, score_id = score_refs[0]
+    item = {**_issue_mark(evaluation_id, score_id, 0), "feedback_type": "unknown"}
+
+    assert requests.post(f"{env.base_url}/api/feedbacks/bulk", json={"feedbacks": [item]}, timeout=30).status_code == 422
+    assert requests.post(f"{env.base_url}/api/feedbacks/bulk", json={"feedbacks": []}, timeout=30).status_code == 422
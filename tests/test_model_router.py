@@ -0,0 +1,177 @@
+"""
+模型路由测试(切换目标、下线、对冲请求)
+"""
+import os
+import threading
+import time
+
+import httpx
+import openai
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+
+from app.services.model_router import ModelRouter, ModelTarget  # noqa: E402
+
+
+def _connection_error():
+    return openai.APIConnectionError(request=httpx.Request("POST", "http://upstream/v1/chat/completions"))
+
+
+def _target(name):
+    return ModelTarget(name, f"{name}-model", client=None)
+
+
+def _warm_up(target, stage, latency, samples=20):
+    for _ in range(samples):
+        target.record_success(stage, latency)
+
+
+def test_failover_to_next_target():
+    primary, backup = _target("primary"), _target("backup")
+    router = ModelRouter([primary, backup])
+    calls = []
+
+    def attempt(target):
+        calls.append(target.name)
+        if target is primary:
+            raise _connection_error()
+        return "ok"
+
+    result, route = router.call("analyze", attempt)
+
+    assert result == "ok"
+    assert calls == ["primary", "backup"]
+    assert route.attempts == 2 and route.target is backup
+    assert primary.consecutive_failures == 1 and backup.consecutive_failures == 0
+
+
+def test_request_errors_are_not_retried_elsewhere():
+    primary, backup = _target("primary"), _target("backup")
+    router = ModelRouter([primary, backup])
+    calls = []
+
+    def attempt(target):
+        calls.append(target.name)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        router.call("analyze", attempt)
+    assert calls == ["primary"]
+
+
+def test_unhealthy_target_moved_to_back():
+    primary, backup = _target("primary"), _target("backup")
+    router = ModelRouter([primary, backup], failure_threshold=2, cooldown=60)
+
+    def attempt(target):
+        if target is primary:
+            raise _connection_error()
+        return target.name
+
+    for _ in range(2):
+        router.call("score", attempt)
+
+    assert not primary.healthy
+    assert router.candidates() == [backup, primary]
+    _, route = router.call("score", attempt)
+    assert route.attempts == 1
+
+    # 冷却结束后重新参与路由
+    primary.unhealthy_until = 0
+    assert router.candidates() == [primary, backup]
+
+
+def test_all_targets_failing_raises_last_error():
+    router = ModelRouter([_target("a"), _target("b")])
+
+    def attempt(target):
+        raise _connection_error()
+
+    with pytest.raises(openai.APIConnectionError):
+        router.call("genre", attempt)
+
+
+def test_hedge_fires_after_p95_and_takes_first_response():
+    primary, backup = _target("primary"), _target("backup")
+    _warm_up(primary, "analyze", 0.05)
+    router = ModelRouter([primary, backup], hedge_enabled=True, hedge_min_delay=0.05)
+    release = threading.Event()
+
+    def attempt(target):
+        if target is primary:
+            release.wait(5)
+            return "slow"
+        return "fast"
+
+    start = time.perf_counter()
+    try:
+        result, route = router.call("analyze", attempt)
+    finally:
+        release.set()
+
+    assert result == "fast"
+    assert route.hedged and route.attempts == 2 and route.target is backup
+    assert time.perf_counter() - start < 1
+
+
+def test_hedge_timer_excludes_pool_queue_time():
+    primary, backup = _target("primary"), _target("backup")
+    _warm_up(primary, "analyze", 0.05)
+    router = ModelRouter([primary, backup], hedge_enabled=True, hedge_min_delay=0.05, max_hedge_workers=1)
+    # 线程池被占满,首个请求排队0.3秒后才开始执行
+    router._get_executor().submit(time.sleep, 0.3)
+
+    def attempt(target):
+        time.sleep(0.01)
+        return target.name
+
+    result, route = router.call("analyze", attempt)
+    assert result == "primary" and not route.hedged and route.attempts == 1
+
+
+def test_no_hedge_without_latency_samples():
+    primary, backup = _target("primary"), _target("backup")
+    router = ModelRouter([primary, backup], hedge_enabled=True, hedge_min_delay=0.01)
+
+    def attempt(target):
+        time.sleep(0.1)
+        return target.name
+
+    result, route = router.call("analyze", attempt)
+    assert result == "primary" and not route.hedged and route.attempts == 1
+
+
+def test_hedged_failover_when_primary_fails():
+    primary, backup = _target("primary"), _target("backup")
+    _warm_up(primary, "score", 1.0)
+    router = ModelRouter([primary, backup], hedge_enabled=True)
+
+    def attempt(target):
+        if target is primary:
+            raise _connection_error()
+        return "backup"
+
+    result, route = router.call("score", attempt)
+    assert result == "backup" and not route.hedged and route.attempts == 2
+
+
+def test_ai_service_fails_over_to_mock_upstream():
+    from openai import OpenAI
+
+    from app.services.ai_service import AIService
+    from tests.benchmarks.mock_openai import MockOpenAIConfig, MockOpenAIServer
+
+    with MockOpenAIServer(MockOpenAIConfig(latency=0.01, jitter=0.0)) as mock:
+        service = AIService()
+        # 主目标指向没有服务的端口,备用目标为模拟服务
+        service.client = OpenAI(base_url="http://127.0.0.1:9/v1", api_key="bench-key", max_retries=0)
+        service.router.targets.append(
+            ModelTarget("backup", "mock-backup", OpenAI(base_url=mock.base_url, api_key="bench-key"))
+        )
+
+        result = service.detect_genre("今天我和妈妈去公园。", "写一篇记叙文")
+
+    assert result["genre_code"]
+    assert service.router.primary.consecutive_failures == 1
+    assert mock.request_count == 1
@@ -0,0 +1,75 @@
+"""
+提示词模板编译和校验测试
+"""
+import os
+
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+
+from app.services.prompt_builder import build_analyze_messages  # noqa: E402
+from app.services.prompt_templates import PromptTemplateError, compile_prompt  # noqa: E402
+
+
+def test_compile_replaces_placeholders_with_markers():
+    compiled = compile_prompt('题目: {essay_title}\n正文: {essay_content}\n输出: {{"score": 1}}')
+
+    assert compiled.static_text == '题目: 【作文题目】\n正文: 【作文正文】\n输出: {"score": 1}'
+    assert compiled.fields == {"essay_title", "essay_content"}
+
+
+@pytest.mark.parametrize("content", [
+    '输出: {"score": 1}',
+    "多余的右括号 }",
+    "未闭合 {essay_title",
+    "位置占位符 {}",
+    "{essay_title!r}",
+    "   ",
+])
+def test_invalid_templates_rejected(content):
+    with pytest.raises(PromptTemplateError):
+        compile_prompt(content)
+
+
+def test_compile_cached_by_prompt_content():
+    first = compile_prompt("版本一 {essay_content}")
+    assert compile_prompt("版本一 {essay_content}") is first
+
+    # 内容修改后重新编译
+    assert compile_prompt("版本二 {essay_content}").static_text == "版本二 【作文正文】"
+
+
+def test_builder_accepts_compiled_prompt():
+    compiled = compile_prompt("请评价{essay_title}")
+    from_compiled = build_analyze_messages(compiled, "正文", essay_title="题目")
+    from_text = build_analyze_messages("请评价{essay_title}", "正文", essay_title="题目")
+
+    assert from_compiled == from_text
+
+
+def test_prompt_api_rejects_bad_template():
+    pytest.importorskip("uvicorn")
+    requests = pytest.importorskip("requests")
+    from tests.benchmarks.harness import BenchmarkEnvironment
+    from tests.benchmarks.mock_openai import MockOpenAIConfig
+
+    with BenchmarkEnvironment(mock_config=MockOpenAIConfig(latency=0.01, jitter=0.0), essay_copies=1) as env:
+        payload = {
+            "grade_id": 1,
+            "genre_id": 1,
+            "prompt_type": "analyze",
+            "version_name": "坏模板",
+            "prompt_content": '请输出JSON: {"score": 0} 作文: {essay_content}'
+        }
+        response = requests.post(f"{env.base_url}/api/prompts", json=payload, timeout=10)
+        assert response.status_code == 400
+        assert "模板格式错误" in response.json()["detail"]
+
+        payload["prompt_content"] = '请输出JSON: {{"score": 0}} 作文: {essay_content}'
+        response = requests.post(f"{env.base_url}/api/prompts", json=payload, timeout=10)
+        assert response.status_code == 200
+
+        response = requests.put(
+            f"{env.base_url}/api/prompts/{response.json()['id']}", json={"prompt_content": "{"}, timeout=10
+        )
+        assert response.status_code == 400
@@ -0,0 +1,144 @@
+"""
+相同请求合并和幂等键测试
+使用压测环境(SQLite + 模拟OpenAI服务)
+"""
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("uvicorn")
+requests = pytest.importorskip("requests")
+
+from tests.benchmarks.harness import BenchmarkEnvironment  # noqa: E402
+from tests.benchmarks.loadgen import BENCH_USER_PHONE, build_context  # noqa: E402
+from tests.benchmarks.mock_openai import MockOpenAIConfig  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def env():
+    with BenchmarkEnvironment(
+        mock_config=MockOpenAIConfig(latency=0.5, jitter=0.0, completion_tokens=200),
+        evaluations_per_essay=1,
+        scores_per_evaluation=1
+    ) as bench_env:
+        yield bench_env
+
+
+@pytest.fixture(scope="module")
+def analyze_payload(env):
+    from app.models import Prompt
+
+    context = build_context(env.base_url)
+    with env.SessionLocal() as db:
+        prompt_id = db.query(Prompt.id).filter_by(prompt_type="analyze", is_default=1).scalar()
+    return {"essay_id": context["essay_ids"][0], "analyze_prompt_id": prompt_id, "user_phone": BENCH_USER_PHONE}
+
+
+def _count_evaluations(env, essay_id):
+    from app.models import Evaluation
+
+    with env.SessionLocal() as db:
+        return db.query(Evaluation).filter_by(essay_id=essay_id).count()
+
+
+def test_concurrent_identical_analyze_coalesced(env, analyze_payload):
+    before_calls = env.mock.request_count
+    before_rows = _count_evaluations(env, analyze_payload["essay_id"])
+
+    url = f"{env.base_url}/api/evaluations/analyze"
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        responses = list(pool.map(lambda _: requests.post(url, json=analyze_payload, timeout=30), range(3)))
+
+    assert all(r.status_code == 200 for r in responses)
+    assert len({r.json()["evaluation_id"] for r in responses}) == 1
+    assert env.mock.request_count - before_calls == 1
+    assert _count_evaluations(env, analyze_payload["essay_id"]) - before_rows == 1
+
+
+def test_idempotency_key_replays_stored_response(env, analyze_payload):
+    url = f"{env.base_url}/api/evaluations/analyze"
+    headers = {"Idempotency-Key": "test-replay-1"}
+    before_calls = env.mock.request_count
+
+    first = requests.post(url, json=analyze_payload, headers=headers, timeout=30)
+    retry = requests.post(url, json=analyze_payload, headers=headers, timeout=30)
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers.get("Idempotent-Replayed") == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert env.mock.request_count - before_calls == 1
+
+
+def test_idempotency_key_reused_with_different_body(env, analyze_payload):
+    url = f"{env.base_url}/api/evaluations/analyze"
+    headers = {"Idempotency-Key": "test-mismatch-1"}
+
+    assert requests.post(url, json=analyze_payload, headers=headers, timeout=30).status_code == 200
+    other = {**analyze_payload, "user_phone": "system"}
+    response = requests.post(url, json=other, headers=headers, timeout=30)
+    assert response.status_code == 422
+
+
+def test_idempotency_key_in_progress_conflict(env, analyze_payload):
+    url = f"{env.base_url}/api/evaluations/analyze"
+    headers = {"Idempotency-Key": "test-conflict-1"}
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        first = pool.submit(requests.post, url, json=analyze_payload, headers=headers, timeout=30)
+        # 等第一个请求完成登记
+        time.sleep(0.2)
+        second = requests.post(url, json=analyze_payload, headers=headers, timeout=30)
+        assert first.result().status_code == 200
+
+    assert second.status_code == 409
+    assert second.headers["Retry-After"] == "1"
+
+
+def test_failed_request_releases_key(env, analyze_payload):
+    url = f"{env.base_url}/api/evaluations/analyze"
+    headers = {"Idempotency-Key": "test-release-1"}
+
+    missing = {**analyze_payload, "analyze_prompt_id": 999999}
+    assert requests.post(url, json=missing, headers=headers, timeout=30).status_code == 404
+    # 4xx响应同样保存,重试得到相同结果
+    replay = requests.post(url, json=missing, headers=headers, timeout=30)
+    assert replay.status_code == 404
+    assert replay.headers.get("Idempotent-Replayed") == "true"
+
+    env.mock.config.error_rate = 1.0
+    try:
+        headers = {"Idempotency-Key": "test-release-2"}
+        assert requests.post(url, json=analyze_payload, headers=headers, timeout=60).status_code == 500
+    finally:
+        env.mock.config.error_rate = 0.0
+    # 5xx不保存,同一个键可以重试
+    assert requests.post(url, json=analyze_payload, headers=headers, timeout=30).status_code == 200
+
+
+def test_stale_in_progress_key_taken_over(env, analyze_payload):
+    from datetime import datetime, timedelta
+
+    from app.config import settings
+    from app.models import IdempotencyRecord
+    from app.services.idempotency import request_fingerprint
+
+    url = f"{env.base_url}/api/evaluations/analyze"
+    body = json.dumps(analyze_payload).encode()
+    # 模拟处理中进程退出留下的登记
+    with env.SessionLocal() as db:
+        db.add(IdempotencyRecord(
+            idempotency_key="test-stale-1",
+            method="POST",
+            path="/api/evaluations/analyze",
+            request_hash=request_fingerprint("POST", "/api/evaluations/analyze", b"", body),
+            create_date=datetime.now() - timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS + 1),
+            status=1
+        ))
+        db.commit()
+
+    response = requests.post(url, data=body, headers={"Idempotency-Key": "test-stale-1", "Content-Type": "application/json"}, timeout=30)
+    assert response.status_code == 200
+    assert "Idempotent-Replayed" not in response.headers
@@ -0,0 +1,127 @@
+"""
+模型输出JSON提取和校验测试
+"""
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+
+from app.services.ai_service import AIService  # noqa: E402
+from app.services.response_parser import ResponseParseError, parse_model_output  # noqa: E402
+from app.utils.json_extract import IncrementalJSONExtractor, JSONExtractError, extract_json  # noqa: E402
+from app.utils.metrics import ModelCallRecord  # noqa: E402
+
+SCORES = {"中心立意": 16, "语言表达": 20, "篇章结构": 12, "文章选材": 11, "内容情感": 19}
+
+
+@pytest.mark.parametrize("text", [
+    '{"a": 1}',
+    '```json\n{"a": 1}\n```',
+    '好的,以下是结果:\n```\n{"a": 1}\n```\n如有疑问请告诉我。',
+    '说明{不是JSON}之后才是 {"a": 1} 结尾还有 {"b": 2}',
+])
+def test_extract_first_object(text):
+    assert extract_json(text) == {"a": 1}
+
+
+def test_braces_and_quotes_inside_strings():
+    text = '前言 {"comment": "用了\\"}\\"和{括号", "items": [{"x": "]"}]} 尾巴'
+    assert extract_json(text) == {"comment": '用了"}"和{括号', "items": [{"x": "]"}]}
+
+
+def test_incremental_feed_stops_at_complete_object():
+    payload = json.dumps({"summary": "一段\"带引号\"的评价", "typos": [1, 2]}, ensure_ascii=False)
+    text = "```json\n" + payload + "\n```\n以上就是全部内容。"
+    extractor = IncrementalJSONExtractor()
+
+    done_at = None
+    for i in range(0, len(text), 3):
+        if extractor.feed(text[i:i + 3]):
+            done_at = i
+            break
+
+    assert done_at is not None and done_at < len(text) - 10
+    assert extractor.result_or_raise()["typos"] == [1, 2]
+
+
+@pytest.mark.parametrize("text", ["", "没有JSON", '{"a": [1, 2'])
+def test_extract_failures(text):
+    with pytest.raises(JSONExtractError):
+        extract_json(text)
+
+
+def test_score_output_accepts_chinese_keys():
+    result = parse_model_output("score", "评分如下: " + json.dumps({**SCORES, "评分理由": "略"}, ensure_ascii=False))
+
+    assert result["theme_and_intent"] == 16
+    assert result["emotion_and_content"] == 19
+    assert result["评分理由"] == "略"
+    assert "中心立意" not in result
+
+
+def test_score_output_accepts_nested_dimensions():
+    data = {
+        "total_score": 31.2,
+        "dimensions": {dim: {"score": score, "max_score": 20} for dim, score in SCORES.items()}
+    }
+    result = parse_model_output("score", json.dumps(data, ensure_ascii=False))
+
+    assert result["structure"] == 12
+    assert result["content_selection"] == 11
+
+
+def test_score_output_out_of_range_rejected():
+    with pytest.raises(ResponseParseError) as exc_info:
+        parse_model_output("score", json.dumps({**SCORES, "中心立意": 30}, ensure_ascii=False))
+    assert "中心立意" in str(exc_info.value)
+
+
+def test_analysis_output_keeps_prompt_specific_fields():
+    data = {"综合评价": {"总评": "好"}, "typos": []}
+    assert parse_model_output("analyze", json.dumps(data, ensure_ascii=False)) == data
+
+
+def _fake_response(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def test_repair_only_on_failure(monkeypatch):
+    service = AIService()
+    calls = []
+
+    def fake_chat_completion(stage, messages, prompt_version=None, **kwargs):
+        calls.append((stage, messages))
+        repair = ModelCallRecord(stage, prompt_version, "mock")
+        repair.prompt_tokens, repair.completion_tokens, repair.latency_ms = 50, 30, 100
+        return _fake_response(json.dumps(SCORES, ensure_ascii=False)), repair
+
+    monkeypatch.setattr(service, "chat_completion", fake_chat_completion)
+
+    # 正常输出不发起修复
+    assert service.parse_response("score", json.dumps(SCORES, ensure_ascii=False))["structure"] == 12
+    assert calls == []
+
+    call = ModelCallRecord("score", "v1", "mock")
+    call.prompt_tokens, call.completion_tokens, call.latency_ms = 1000, 200, 2000
+    result = service.parse_response("score", '{"中心立意": 16, "语言表达": 20', call)
+
+    assert result["language_expression"] == 20
+    assert len(calls) == 1 and calls[0][0] == "score_repair"
+    # 修复请求只包含原始输出,不重发作文
+    assert '{"中心立意": 16, "语言表达": 20' in calls[0][1][-1]["content"]
+    assert (call.prompt_tokens, call.completion_tokens, call.latency_ms, call.retry_count) == (1050, 230, 2100, 1)
+
+
+def test_repair_failure_raises(monkeypatch):
+    service = AIService()
+    monkeypatch.setattr(
+        service, "chat_completion",
+        lambda stage, messages, prompt_version=None, **kwargs: (_fake_response("仍然不是JSON"), ModelCallRecord(stage, "v1", "mock"))
+    )
+
+    with pytest.raises(ResponseParseError) as exc_info:
+        service.parse_response("genre", "无法判断")
+    assert exc_info.value.raw_text == "无法判断"
@@ -0,0 +1,136 @@
+"""
+分制转换测试
+- 评分量表: 校验、取整方式、矩阵批量换算、分制间换算
+- 批次分制切换接口: 使用压测环境(SQLite + 模拟OpenAI服务)
+"""
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("uvicorn")
+requests = pytest.importorskip("requests")
+
+from tests.benchmarks.harness import BenchmarkEnvironment  # noqa: E402
+
+from app.utils.converters import convert_score_to_system  # noqa: E402
+from app.utils.score_converter import (  # noqa: E402
+    DEFAULT_RUBRIC,
+    ROUND_FLOOR,
+    ROUND_INTEGER,
+    ROUND_TENTH,
+    Rubric,
+    round_scores,
+)
+
+SCORES = {
+    "theme_and_intent": 17,
+    "language_expression": 21,
+    "structure": 12,
+    "content_selection": 11,
+    "emotion_and_content": 20,
+}
+
+
+def test_round_scores_modes():
+    values = [7.35, 27.95, 27.999999999]
+    assert round_scores(values, ROUND_TENTH).tolist() == [7.4, 28.0, 28.0]
+    assert round_scores(values, ROUND_INTEGER).tolist() == [7.0, 28.0, 28.0]
+    assert round_scores(values, ROUND_FLOOR).tolist() == [7.0, 27.0, 28.0]
+    with pytest.raises(ValueError):
+        round_scores(values, "ceil")
+
+
+def test_validate_accepts_english_and_chinese_keys():
+    values = DEFAULT_RUBRIC.validate(SCORES)
+    assert values.sum() == 81
+    chinese = {DEFAULT_RUBRIC.names[dim]: value for dim, value in SCORES.items()}
+    assert DEFAULT_RUBRIC.validate(chinese).tolist() == values.tolist()
+
+    with pytest.raises(ValueError, match="缺少维度"):
+        DEFAULT_RUBRIC.validate({**SCORES, "structure": None})
+    with pytest.raises(ValueError, match="超出范围"):
+        DEFAULT_RUBRIC.validate({**SCORES, "structure": 16})
+
+
+def test_total_for_single_essay_and_matrix():
+    values = DEFAULT_RUBRIC.validate(SCORES)
+    assert float(DEFAULT_RUBRIC.total(values, 40)) == 32.4
+    assert float(DEFAULT_RUBRIC.total(values, 10, rounding=ROUND_FLOOR)) == 8
+    assert convert_score_to_system(81, 40) == 32.4
+    assert convert_score_to_system(81, 10) == 8.1
+
+    rows = [SCORES, {dim: {"score": value, "max_score": 0} for dim, value in SCORES.items()}, {"structure": 10}]
+    matrix = DEFAULT_RUBRIC.matrix(rows)
+    totals = DEFAULT_RUBRIC.total(matrix, np.array([40, 10, 40]))
+    assert totals[:2].tolist() == [32.4, 8.1]
+    assert np.isnan(totals[2])
+
+
+def test_rescale_and_custom_rubric():
+    assert DEFAULT_RUBRIC.rescale([32.4, 8.1], [40, 10], 10).tolist() == [8.1, 8.1]
+    assert DEFAULT_RUBRIC.rescale([32.4, 8.1], [40, 10], [10, 40]).tolist() == [8.1, 32.4]
+
+    rubric = Rubric({"content": 30, "language": 20}, rounding=ROUND_INTEGER)
+    assert float(rubric.total(rubric.validate({"content": 25, "language": 12}), 40)) == 30
+    with pytest.raises(ValueError):
+        Rubric({"content": 30}, rounding="ceil")
+
+
+def test_large_matrix_conversion():
+    rng = np.random.default_rng(0)
+    matrix = rng.integers(0, 16, size=(200_000, len(DEFAULT_RUBRIC.dimensions))).astype(float)
+    systems = rng.choice([10, 40], size=200_000)
+    totals = DEFAULT_RUBRIC.total(matrix, systems)
+    assert totals.shape == (200_000,)
+    assert np.all(totals <= systems)
+
+
+@pytest.fixture(scope="module")
+def env():
+    with BenchmarkEnvironment(evaluations_per_essay=1, scores_per_evaluation=2) as bench_env:
+        yield bench_env
+
+
+def test_rescale_batch_endpoint(env):
+    from app.models import Essay, Evaluation, Score
+
+    with env.SessionLocal() as db:
+        batch_id = db.query(Essay.batch_id).filter(Essay.score_system == 40).first().batch_id
+        before = {
+            score.id: (score.total_score, json.loads(score.dimension_scores))
+            for score in db.query(Score).join(Evaluation).join(Essay).filter(Essay.batch_id == batch_id)
+        }
+    stats_before = next(
+        batch for batch in requests.get(f"{env.base_url}/api/batches", timeout=30).json()["batches"]
+        if batch["id"] == batch_id
+    )["score_stats"]
+
+    response = requests.post(f"{env.base_url}/api/batches/{batch_id}/rescale", json={"score_system": 10}, timeout=30)
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result["scores_updated"] == len(before)
+
+    with env.SessionLocal() as db:
+        assert {row.score_system for row in db.query(Essay.score_system).filter(Essay.batch_id == batch_id)} == {10}
+        for score_id, total in db.query(Score.id, Score.total_score).filter(Score.id.in_(list(before))):
+            dimensions = before[score_id][1]
+            # 默认舍去小数,与新评分的总分一致
+            assert total == int(sum(d["score"] for d in dimensions.values()) / 10)
+
+    # 百分制统计只有取整差异(10分制舍去小数,每篇最多相差百分制10分)
+    stats_after = next(
+        batch for batch in requests.get(f"{env.base_url}/api/batches", timeout=30).json()["batches"]
+        if batch["id"] == batch_id
+    )["score_stats"]
+    assert stats_after["score_count"] == stats_before["score_count"]
+    assert stats_after["mean"] == pytest.approx(stats_before["mean"], abs=10)
+
+    # 再次切换到相同分制不修改任何数据
+    response = requests.post(f"{env.base_url}/api/batches/{batch_id}/rescale", json={"score_system": 10}, timeout=30)
+    assert response.json()["scores_updated"] == 0
+
+    response = requests.post(f"{env.base_url}/api/batches/{batch_id}/rescale", json={"score_system": 20}, timeout=30)
+    assert response.status_code == 422
+    response = requests.post(f"{env.base_url}/api/batches/999999/rescale", json={"score_system": 10}, timeout=30)
+    assert response.status_code == 404
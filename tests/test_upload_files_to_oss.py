@@ -0,0 +1,99 @@
+"""
+并行去重上传测试
+使用moto作为本地S3替身
+"""
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from custom_oss_client import CustomOSSClient  # noqa: E402
+from upload_files_to_oss import FileUploader  # noqa: E402
+
+BUCKET = "test-bucket"
+ENDPOINT = "https://s3.amazonaws.com"
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def s3_client():
+    with moto.mock_aws():
+        client = CustomOSSClient(
+            bucket_name=BUCKET,
+            endpoint_url=ENDPOINT,
+            aws_access_key_id="testing",
+            aws_secret_access_key="testing"
+        )
+        client.get_client().create_bucket(Bucket=BUCKET)
+        yield client
+
+
+@pytest.fixture
+def essays_json(tmp_path):
+    image = tmp_path / "a作文答卷.jpg"
+    image.write_bytes(b"\xff\xd8\xff" + b"image" * 100)
+    duplicate = tmp_path / "b作文答卷.jpg"
+    duplicate.write_bytes(image.read_bytes())
+    report = tmp_path / "a作文分析报告.pdf"
+    report.write_bytes(b"%PDF" + b"0" * (6 * MB))
+
+    data = [
+        {"essay_image_path": str(image), "analysis_report_path": str(report)},
+        {"essay_image_path": str(duplicate), "analysis_report_path": "https://example.com/remote.pdf"},
+    ]
+    json_path = tmp_path / "essays_data.json"
+    json_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    return json_path, data
+
+
+def make_uploader(json_path, client):
+    return FileUploader(
+        str(json_path),
+        max_workers=4,
+        multipart_threshold=5 * MB,
+        multipart_chunksize=5 * MB,
+        oss_client=client
+    )
+
+
+def test_parallel_upload_dedups_by_content(s3_client, essays_json):
+    json_path, _ = essays_json
+    uploader = make_uploader(json_path, s3_client)
+    uploader.process_json()
+
+    assert uploader.uploaded_count == 2
+    assert uploader.deduped_count == 1
+    assert uploader.skipped_count == 1
+    assert uploader.failed_count == 0
+
+    result = json.loads(json_path.read_text(encoding="utf-8"))
+    assert result[0]["essay_image_path"] == result[1]["essay_image_path"]
+    assert result[0]["analysis_report_path"].endswith(".pdf")
+    assert result[1]["analysis_report_path"] == "https://example.com/remote.pdf"
+
+    objects = s3_client.get_client().list_objects_v2(Bucket=BUCKET)["Contents"]
+    assert len(objects) == 2
+    assert max(obj["Size"] for obj in objects) > 6 * MB
+
+
+def test_rerun_uploads_only_new_files(s3_client, essays_json, tmp_path):
+    json_path, data = essays_json
+    make_uploader(json_path, s3_client).process_json()
+
+    # 还原为本地路径并新增一个文件,模拟中断后重跑
+    extra = tmp_path / "c作文答卷.jpg"
+    extra.write_bytes(b"\xff\xd8\xff" + b"other" * 100)
+    data.append({"essay_image_path": str(extra)})
+    json_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+    uploader = make_uploader(json_path, s3_client)
+    uploader.process_json()
+
+    assert uploader.uploaded_count == 1
+    assert uploader.deduped_count == 3
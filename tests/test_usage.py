@@ -0,0 +1,68 @@
+"""
+模型调用统计测试
+使用压测环境(SQLite + 模拟OpenAI服务)
+"""
+import pytest
+
+pytest.importorskip("uvicorn")
+requests = pytest.importorskip("requests")
+
+from tests.benchmarks.harness import BenchmarkEnvironment  # noqa: E402
+from tests.benchmarks.loadgen import complete_analysis, run_load  # noqa: E402
+from tests.benchmarks.mock_openai import MockOpenAIConfig  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def env():
+    with BenchmarkEnvironment(
+        mock_config=MockOpenAIConfig(latency=0.01, jitter=0.0, completion_tokens=200),
+        evaluations_per_essay=1,
+        scores_per_evaluation=1
+    ) as bench_env:
+        run_load(bench_env.base_url, complete_analysis, users=2, iterations=2, context={})
+        yield bench_env
+
+
+def test_usage_persisted_with_evaluation_and_score(env):
+    from app.models import Evaluation, Score
+
+    with env.SessionLocal() as db:
+        evaluations = db.query(Evaluation).filter(Evaluation.model_name.isnot(None)).all()
+        scores = db.query(Score).filter(Score.model_name.isnot(None)).all()
+
+    assert len(evaluations) == 4
+    assert len(scores) == 4
+    for row in evaluations + scores:
+        assert row.prompt_tokens > 0
+        assert row.completion_tokens > 0
+        assert row.latency_ms >= 0
+        assert row.retry_count == 0
+
+
+@pytest.mark.parametrize("group_by", ["prompt_version", "batch", "day"])
+def test_usage_stats_grouping(env, group_by):
+    response = requests.get(f"{env.base_url}/api/usage/stats", params={"group_by": group_by}, timeout=10)
+    assert response.status_code == 200
+    items = response.json()["items"]
+
+    assert {item["stage"] for item in items} == {"analyze", "score"}
+    for stage in ("analyze", "score"):
+        stage_items = [item for item in items if item["stage"] == stage]
+        assert sum(item["calls"] for item in stage_items) == 4
+        assert all(item["prompt_tokens"] > 0 and item["avg_word_count"] > 0 for item in stage_items)
+
+
+def test_usage_stats_rejects_unknown_group(env):
+    response = requests.get(f"{env.base_url}/api/usage/stats", params={"group_by": "user"}, timeout=10)
+    assert response.status_code == 400
+
+
+def test_repeated_grading_hits_prompt_prefix_cache(env):
+    response = requests.get(
+        f"{env.base_url}/api/usage/stats", params={"group_by": "prompt_version", "stage": "analyze"}, timeout=10
+    )
+    item = response.json()["items"][0]
+
+    # 同一提示词版本的后续请求复用系统提示词+模板前缀
+    assert item["cached_tokens"] > 0
+    assert 0 < item["cache_hit_ratio"] < 1